@@ -0,0 +1,174 @@
+import itertools
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
+
+from eth_utils import (
+    ValidationError,
+)
+
+
+VType = TypeVar('VType')
+
+CHUNK_BITS = 10
+CHUNK_SIZE = 2 ** CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+
+
+class PersistentVector(Sequence[VType]):
+    """
+    An immutable sequence which, unlike a tuple, can be updated without copying all of it.
+
+    The items are kept in chunks of ``CHUNK_SIZE``, and an updated vector shares all the chunks
+    but the updated ones with the original, so updating an item only copies one chunk plus the
+    tuple of chunks, instead of the whole sequence. Batches of updates should go through
+    ``update`` to copy each chunk at most once.
+
+    It compares equal to any other sequence with the same items, tuples included.
+    """
+    __slots__ = ('_chunks', '_length')
+
+    _chunks: Tuple[Tuple[VType, ...], ...]
+    _length: int
+
+    def __init__(self, items: Iterable[VType] = ()) -> None:
+        if isinstance(items, PersistentVector):
+            self._chunks = items._chunks
+            self._length = items._length
+        else:
+            all_items = tuple(items)
+            self._chunks = _split_into_chunks(all_items)
+            self._length = len(all_items)
+
+    @classmethod
+    def _from_chunks(cls,
+                     chunks: Tuple[Tuple[VType, ...], ...],
+                     length: int) -> 'PersistentVector[VType]':
+        vector: PersistentVector[VType] = cls.__new__(cls)
+        vector._chunks = chunks
+        vector._length = length
+        return vector
+
+    def set(self, index: int, value: VType) -> 'PersistentVector[VType]':
+        """
+        Return a copy of the vector with the ``index``th item replaced by ``value``.
+        """
+        return self.update({index: value})
+
+    def update(self, values: Mapping[int, VType]) -> 'PersistentVector[VType]':
+        """
+        Return a copy of the vector with the items at the keys of ``values`` replaced by their
+        values.
+        """
+        chunks = list(self._chunks)
+        updated_chunks: Dict[int, List[VType]] = {}
+        for index, value in values.items():
+            if not 0 <= index < self._length:
+                raise ValidationError(
+                    "the length of the vector is {}, the given index {} is out of index".format(
+                        self._length,
+                        index,
+                    )
+                )
+            chunk_index = index >> CHUNK_BITS
+            if chunk_index not in updated_chunks:
+                updated_chunks[chunk_index] = list(chunks[chunk_index])
+            updated_chunks[chunk_index][index & CHUNK_MASK] = value
+
+        for chunk_index, chunk in updated_chunks.items():
+            chunks[chunk_index] = tuple(chunk)
+        return self._from_chunks(tuple(chunks), self._length)
+
+    def extend(self, values: Iterable[VType]) -> 'PersistentVector[VType]':
+        """
+        Return a copy of the vector with ``values`` appended.
+        """
+        new_items = tuple(values)
+        if not new_items:
+            return self
+
+        chunks = self._chunks
+        if self._length % CHUNK_SIZE:
+            # Fill up the last chunk before starting new ones
+            return self._from_chunks(
+                chunks[:-1] + _split_into_chunks(chunks[-1] + new_items),
+                self._length + len(new_items),
+            )
+        else:
+            return self._from_chunks(
+                chunks + _split_into_chunks(new_items),
+                self._length + len(new_items),
+            )
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> VType:
+        pass
+
+    @overload  # noqa: F811
+    def __getitem__(self, index: slice) -> Tuple[VType, ...]:
+        pass
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[VType, Tuple[VType, ...]]:  # noqa: F811,E501
+        if isinstance(index, slice):
+            return tuple(self)[index]
+
+        position = index + self._length if index < 0 else index
+        if position < 0:
+            raise IndexError("PersistentVector index out of range")
+        try:
+            return self._chunks[position >> CHUNK_BITS][position & CHUNK_MASK]
+        except IndexError:
+            raise IndexError("PersistentVector index out of range")
+
+    def __iter__(self) -> Iterator[VType]:
+        return itertools.chain.from_iterable(self._chunks)
+
+    def __add__(self, other: Any) -> 'PersistentVector[VType]':
+        if not isinstance(other, (tuple, PersistentVector)):
+            return NotImplemented
+        return self.extend(other)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, PersistentVector):
+            # Chunks shared by both compare by identity, without going over their items
+            return self._length == other._length and self._chunks == other._chunks
+        elif isinstance(other, Sequence) and not isinstance(other, (str, bytes, bytearray)):
+            return self._length == len(other) and tuple(self) == tuple(other)
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        # Same as the tuple with the same items, as they compare equal
+        return hash(tuple(self))
+
+    def __copy__(self) -> 'PersistentVector[VType]':
+        return self
+
+    def __deepcopy__(self, memo: Any) -> 'PersistentVector[VType]':
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (tuple(self),)
+
+    def __repr__(self) -> str:
+        return '{0}({1!r})'.format(type(self).__name__, tuple(self))
+
+
+def _split_into_chunks(items: Tuple[VType, ...]) -> Tuple[Tuple[VType, ...], ...]:
+    return tuple(
+        items[start:start + CHUNK_SIZE]
+        for start in range(0, len(items), CHUNK_SIZE)
+    )
@@ -0,0 +1,201 @@
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from eth_typing import (
+    Hash32,
+)
+
+import ssz
+from ssz.constants import (
+    SSZ_CHUNK_SIZE,
+)
+from ssz.sedes.base import (
+    BaseSedes,
+)
+
+from eth2._utils.persistent_vector import (
+    CHUNK_SIZE,
+    PersistentVector,
+)
+from eth2.beacon._utils.hash import (
+    hash_eth2,
+)
+
+
+ZERO_CHUNK = b'\x00' * SSZ_CHUNK_SIZE
+
+
+def _changed_indices(old_items: Sequence[Any], new_items: Sequence[Any]) -> Iterable[int]:
+    """
+    Return the indices of the items in ``new_items`` that are not the very same objects as in
+    ``old_items``, which ``new_items`` must be at least as long as.
+    """
+    if isinstance(old_items, PersistentVector) and isinstance(new_items, PersistentVector):
+        # Chunks shared with the old items hold the same objects, no need to go over them
+        chunk_pairs = zip(old_items._chunks, new_items._chunks)
+        for chunk_index, (old_chunk, new_chunk) in enumerate(chunk_pairs):
+            if old_chunk is not new_chunk:
+                offset = chunk_index * CHUNK_SIZE
+                for index, (old_item, new_item) in enumerate(zip(old_chunk, new_chunk)):
+                    if old_item is not new_item:
+                        yield offset + index
+    else:
+        for index, (old_item, new_item) in enumerate(zip(old_items, new_items)):
+            if old_item is not new_item:
+                yield index
+
+    yield from range(len(old_items), len(new_items))
+
+
+class MerkleTree:
+    """
+    The Merkle tree that ``ssz.sedes.List`` hashes its items into, which can be updated for a
+    new version of the list by rehashing only the items that changed since the last one, and
+    the paths from their leaves up to the root.
+
+    Items are told apart by identity, so it pays off for lists that are updated by copying the
+    old one except for a few items, like the lists in a ``BeaconState``.
+    """
+
+    def __init__(self, element_sedes: BaseSedes) -> None:
+        self.element_sedes = element_sedes
+        self._items: Sequence[Any] = ()
+        self._item_hashes: List[bytes] = []
+        self._items_per_chunk = 1
+        # The leaves first, up to the root
+        self._levels: List[List[bytes]] = [[ZERO_CHUNK]]
+
+    def intermediate_tree_hash(self, items: Sequence[Any]) -> Hash32:
+        """
+        Return the same as ``List(element_sedes).intermediate_tree_hash(items)``, updating the
+        tree to ``items`` on the way.
+        """
+        if not self._item_hashes or len(items) < len(self._items):
+            self._rebuild(items)
+        else:
+            self._update(items)
+        self._items = items
+
+        return hash_eth2(self._levels[-1][0] + len(items).to_bytes(32, 'little'))
+
+    def _rebuild(self, items: Sequence[Any]) -> None:
+        self._item_hashes = [self.element_sedes.intermediate_tree_hash(item) for item in items]
+        if not self._item_hashes:
+            self._levels = [[ZERO_CHUNK]]
+            return
+
+        item_hash_length = len(self._item_hashes[0])
+        if item_hash_length < SSZ_CHUNK_SIZE:
+            self._items_per_chunk = SSZ_CHUNK_SIZE // item_hash_length
+        else:
+            self._items_per_chunk = 1
+
+        num_chunks = (len(self._item_hashes) + self._items_per_chunk - 1) // self._items_per_chunk
+        self._levels = [[self._get_chunk(chunk_index) for chunk_index in range(num_chunks)]]
+        self._update_parents(range(num_chunks))
+
+    def _update(self, items: Sequence[Any]) -> None:
+        dirty_chunk_indices: Set[int] = set()
+        num_old_items = len(self._item_hashes)
+        for index in _changed_indices(self._items, items):
+            item_hash = self.element_sedes.intermediate_tree_hash(items[index])
+            if index >= num_old_items:
+                self._item_hashes.append(item_hash)
+            elif item_hash != self._item_hashes[index]:
+                self._item_hashes[index] = item_hash
+            else:
+                continue
+            dirty_chunk_indices.add(index // self._items_per_chunk)
+
+        if not dirty_chunk_indices:
+            return
+
+        leaves = self._levels[0]
+        for chunk_index in sorted(dirty_chunk_indices):
+            if chunk_index < len(leaves):
+                leaves[chunk_index] = self._get_chunk(chunk_index)
+            else:
+                leaves.append(self._get_chunk(chunk_index))
+        self._update_parents(dirty_chunk_indices)
+
+    def _get_chunk(self, chunk_index: int) -> bytes:
+        start = chunk_index * self._items_per_chunk
+        chunk = b''.join(self._item_hashes[start:start + self._items_per_chunk])
+        if self._items_per_chunk == 1:
+            return chunk
+        else:
+            return chunk.ljust(SSZ_CHUNK_SIZE, b'\x00')
+
+    def _update_parents(self, dirty_indices: Iterable[int]) -> None:
+        """
+        Rehash the nodes above the given leaves, padding levels of an odd length with a zero
+        chunk the way ``ssz.hash.merkle_hash`` does.
+        """
+        depth = 0
+        while len(self._levels[depth]) > 1:
+            level = self._levels[depth]
+            if depth + 1 == len(self._levels):
+                self._levels.append([])
+            parents = self._levels[depth + 1]
+            del parents[(len(level) + 1) // 2:]
+
+            dirty_parent_indices = sorted({index // 2 for index in dirty_indices})
+            for parent_index in dirty_parent_indices:
+                left_index = parent_index * 2
+                right = level[left_index + 1] if left_index + 1 < len(level) else ZERO_CHUNK
+                parent = hash_eth2(level[left_index] + right)
+                if parent_index < len(parents):
+                    parents[parent_index] = parent
+                else:
+                    parents.append(parent)
+
+            dirty_indices = dirty_parent_indices
+            depth += 1
+
+        del self._levels[depth + 1:]
+
+
+class TreeHashCache:
+    """
+    Computes the tree hash root of ``ssz.Serializable``s of one class, keeping the hashes of the
+    fields of the last one and the Merkle trees of its list fields, so that the root of an
+    updated copy only costs rehashing what changed.
+
+    It can be handed from an object to its copies, whatever order they are hashed in: the root
+    is always that of the given object.
+    """
+
+    def __init__(self) -> None:
+        self._field_hashes: Dict[str, Tuple[Any, bytes]] = {}
+        self._merkle_trees: Dict[str, MerkleTree] = {}
+
+    def hash_tree_root(self, value: ssz.Serializable) -> Hash32:
+        field_hashes = []
+        for field_name, field_sedes in value._meta.fields:
+            field_value = getattr(value, field_name)
+            try:
+                last_value, field_hash = self._field_hashes[field_name]
+            except KeyError:
+                last_value = None
+
+            if field_value is not last_value:
+                if isinstance(field_sedes, ssz.sedes.List) and not field_sedes.empty:
+                    if field_name not in self._merkle_trees:
+                        self._merkle_trees[field_name] = MerkleTree(field_sedes.element_sedes)
+                    field_hash = self._merkle_trees[field_name].intermediate_tree_hash(
+                        field_value,
+                    )
+                else:
+                    field_hash = field_sedes.intermediate_tree_hash(field_value)
+                self._field_hashes[field_name] = (field_value, field_hash)
+
+            field_hashes.append(field_hash)
+
+        return hash_eth2(b''.join(field_hashes))
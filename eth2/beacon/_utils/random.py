@@ -1,6 +1,7 @@
 
 from typing import (
     Iterable,
+    List,
     Sequence,
     Tuple,
     TypeVar,
@@ -22,6 +23,12 @@ from eth2.beacon.constants import (
     MAX_LIST_SIZE,
 )
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, see the numpy extra in setup.py. Without it we shuffle in pure Python.
+    np = None
+
 
 TItem = TypeVar('TItem')
 
@@ -77,6 +84,8 @@ def shuffle(values: Sequence[TItem],
     Utilizes 'swap or not' shuffling found in
     https://link.springer.com/content/pdf/10.1007%2F978-3-642-32009-5_1.pdf
     See the 'generalized domain' algorithm on page 3.
+
+    The whole list goes through each round at once, with NumPy if it is installed.
     """
     list_size = len(values)
 
@@ -86,19 +95,42 @@ def shuffle(values: Sequence[TItem],
             f"`MAX_LIST_SIZE` ({MAX_LIST_SIZE}"
         )
 
+    if np is None:
+        indices = _shuffled_indices_python(list_size, seed, shuffle_round_count)
+    else:
+        indices = _shuffled_indices_numpy(list_size, seed, shuffle_round_count)
+
+    for i in indices:
+        yield values[i]
+
+
+def _get_round_hash_bytes(list_size: int, seed: Hash32, round: int) -> bytes:
+    """
+    Return the concatenated hashes whose bits decide, for each position, whether to swap in the
+    given round.
+    """
+    return b''.join(
+        [
+            hash_eth2(seed + round.to_bytes(1, 'little') + i.to_bytes(4, 'little'))
+            for i in range((list_size + 255) // 256)
+        ]
+    )
+
+
+def _get_round_pivot(list_size: int, seed: Hash32, round: int) -> int:
+    return int.from_bytes(
+        hash_eth2(seed + round.to_bytes(1, 'little'))[:8],
+        'little',
+    ) % list_size
+
+
+def _shuffled_indices_python(list_size: int,
+                             seed: Hash32,
+                             shuffle_round_count: int) -> List[int]:
     indices = list(range(list_size))
     for round in range(shuffle_round_count):
-        hash_bytes = b''.join(
-            [
-                hash_eth2(seed + round.to_bytes(1, 'little') + i.to_bytes(4, 'little'))
-                for i in range((list_size + 255) // 256)
-            ]
-        )
-
-        pivot = int.from_bytes(
-            hash_eth2(seed + round.to_bytes(1, 'little'))[:8],
-            'little',
-        ) % list_size
+        hash_bytes = _get_round_hash_bytes(list_size, seed, round)
+        pivot = _get_round_pivot(list_size, seed, round)
         for i in range(list_size):
             flip = (pivot - indices[i]) % list_size
             hash_position = indices[i] if indices[i] > flip else flip
@@ -109,9 +141,23 @@ def shuffle(values: Sequence[TItem],
             else:
                 # not swap
                 pass
+    return indices
 
-    for i in indices:
-        yield values[i]
+
+def _shuffled_indices_numpy(list_size: int,
+                            seed: Hash32,
+                            shuffle_round_count: int) -> List[int]:
+    indices = np.arange(list_size, dtype=np.int64)
+    for round in range(shuffle_round_count):
+        hash_bytes = _get_round_hash_bytes(list_size, seed, round)
+        # The bit for ``hash_position`` is bit ``hash_position % 8`` of byte
+        # ``hash_position // 8``, least significant first
+        hash_bits = np.unpackbits(np.frombuffer(hash_bytes, dtype=np.uint8), bitorder='little')
+        pivot = _get_round_pivot(list_size, seed, round)
+        flip = (pivot - indices) % list_size
+        hash_positions = np.maximum(indices, flip)
+        indices = np.where(hash_bits[hash_positions], flip, indices)
+    return indices.tolist()
 
 
 def split(values: Sequence[TItem], split_count: int) -> Tuple[Iterable[TItem], ...]:
@@ -1,6 +1,6 @@
-import functools
 from typing import (
     Iterable,
+    Optional,
     Sequence,
     Tuple,
     TYPE_CHECKING,
@@ -33,6 +33,10 @@ from eth2.beacon.helpers import (
     get_active_validator_indices,
     slot_to_epoch,
 )
+from eth2.beacon.datastructures.committee_cache import (
+    RecentEpochsCache,
+    ShufflingKey,
+)
 from eth2.beacon.datastructures.shuffling_context import (
     ShufflingContext,
 )
@@ -55,6 +59,24 @@ if TYPE_CHECKING:
     from eth2.beacon.types.validator_records import ValidatorRecord  # noqa: F401
 
 
+Shuffling = Tuple[Iterable[ValidatorIndex], ...]
+
+
+# The active validator indices are keyed by their epoch and the active index root for it, and the
+# shufflings by everything they are computed from, so that we don't have to hash the validator
+# registry, let alone the whole state, to find them.
+_active_validator_indices_cache: RecentEpochsCache[
+    Tuple[Epoch, Hash32],
+    Tuple[ValidatorIndex, ...],
+] = RecentEpochsCache()
+_shuffling_cache: RecentEpochsCache[ShufflingKey, Shuffling] = RecentEpochsCache()
+
+
+def clear_committee_caches() -> None:
+    _active_validator_indices_cache.clear()
+    _shuffling_cache.clear()
+
+
 def get_epoch_committee_count(
         active_validator_count: int,
         shard_count: int,
@@ -69,7 +91,6 @@ def get_epoch_committee_count(
     ) * slots_per_epoch
 
 
-@functools.lru_cache(maxsize=128)
 def get_shuffling(*,
                   seed: Hash32,
                   validators: Sequence['ValidatorRecord'],
@@ -100,6 +121,18 @@ def get_shuffling(*,
         target_committee_size,
     )
 
+    return _shuffle_into_committees(
+        active_validator_indices,
+        seed,
+        committees_per_epoch,
+        shuffle_round_count,
+    )
+
+
+def _shuffle_into_committees(active_validator_indices: Sequence[ValidatorIndex],
+                             seed: Hash32,
+                             committees_per_epoch: int,
+                             shuffle_round_count: int) -> Shuffling:
     # Shuffle
     shuffled_active_validator_indices = shuffle(
         active_validator_indices,
@@ -171,15 +204,104 @@ def get_next_epoch_committee_count(
 # Helpers for get_crosslink_committees_at_slot
 #
 
+def _get_active_index_root(state: 'BeaconState',
+                           epoch: Epoch,
+                           committee_config: CommitteeConfig) -> Optional[Hash32]:
+    """
+    Return the active index root to key the committee caches on, if the state has one.
+    """
+    latest_active_index_roots_length = committee_config.LATEST_ACTIVE_INDEX_ROOTS_LENGTH
+    if len(state.latest_active_index_roots) != latest_active_index_roots_length:
+        return None
+    return state.latest_active_index_roots[epoch % latest_active_index_roots_length]
+
+
+def _get_cached_active_validator_indices(
+        state: 'BeaconState',
+        epoch: Epoch,
+        committee_config: CommitteeConfig) -> Tuple[ValidatorIndex, ...]:
+    """
+    Return the active validator indices at ``epoch``, which only go over the validator registry
+    the first time they are needed for the active index root of that epoch.
+    """
+    active_index_root = _get_active_index_root(state, epoch, committee_config)
+    if active_index_root is None:
+        return get_active_validator_indices(state.validator_registry, epoch)
+
+    return _active_validator_indices_cache.get(
+        (epoch, active_index_root),
+        state.current_epoch(committee_config.SLOTS_PER_EPOCH),
+        lambda: get_active_validator_indices(state.validator_registry, epoch),
+    )
+
+
+def _get_cached_epoch_committee_count(state: 'BeaconState',
+                                      epoch: Epoch,
+                                      committee_config: CommitteeConfig) -> int:
+    return get_epoch_committee_count(
+        active_validator_count=len(
+            _get_cached_active_validator_indices(state, epoch, committee_config)
+        ),
+        shard_count=committee_config.SHARD_COUNT,
+        slots_per_epoch=committee_config.SLOTS_PER_EPOCH,
+        target_committee_size=committee_config.TARGET_COMMITTEE_SIZE,
+    )
+
+
+def _get_cached_shuffling(state: 'BeaconState',
+                          seed: Hash32,
+                          shuffling_epoch: Epoch,
+                          committee_config: CommitteeConfig) -> Shuffling:
+    """
+    Return the same committees as ``get_shuffling``, but only shuffle them once for all the states
+    that share the seed and active validator indices at ``shuffling_epoch``.
+    """
+    active_validator_indices = _get_cached_active_validator_indices(
+        state,
+        shuffling_epoch,
+        committee_config,
+    )
+    committees_per_epoch = get_epoch_committee_count(
+        len(active_validator_indices),
+        committee_config.SHARD_COUNT,
+        committee_config.SLOTS_PER_EPOCH,
+        committee_config.TARGET_COMMITTEE_SIZE,
+    )
+
+    def shuffle_into_committees() -> Shuffling:
+        return _shuffle_into_committees(
+            active_validator_indices,
+            seed,
+            committees_per_epoch,
+            committee_config.SHUFFLE_ROUND_COUNT,
+        )
+
+    active_index_root = _get_active_index_root(state, shuffling_epoch, committee_config)
+    if active_index_root is None:
+        return shuffle_into_committees()
+
+    key = ShufflingKey(
+        seed=seed,
+        shuffling_epoch=shuffling_epoch,
+        active_index_root=active_index_root,
+        committees_per_epoch=committees_per_epoch,
+        shuffle_round_count=committee_config.SHUFFLE_ROUND_COUNT,
+    )
+    return _shuffling_cache.get(
+        key,
+        state.current_epoch(committee_config.SLOTS_PER_EPOCH),
+        shuffle_into_committees,
+    )
+
+
 def _get_shuffling_context_is_current_epoch(
         state: 'BeaconState',
         committee_config: CommitteeConfig) -> ShufflingContext:
     return ShufflingContext(
-        committees_per_epoch=get_current_epoch_committee_count(
-            state=state,
-            shard_count=committee_config.SHARD_COUNT,
-            slots_per_epoch=committee_config.SLOTS_PER_EPOCH,
-            target_committee_size=committee_config.TARGET_COMMITTEE_SIZE,
+        committees_per_epoch=_get_cached_epoch_committee_count(
+            state,
+            state.current_shuffling_epoch,
+            committee_config,
         ),
         seed=state.current_shuffling_seed,
         shuffling_epoch=state.current_shuffling_epoch,
@@ -191,11 +313,10 @@ def _get_shuffling_context_is_previous_epoch(
         state: 'BeaconState',
         committee_config: CommitteeConfig) -> ShufflingContext:
     return ShufflingContext(
-        committees_per_epoch=get_previous_epoch_committee_count(
-            state=state,
-            shard_count=committee_config.SHARD_COUNT,
-            slots_per_epoch=committee_config.SLOTS_PER_EPOCH,
-            target_committee_size=committee_config.TARGET_COMMITTEE_SIZE,
+        committees_per_epoch=_get_cached_epoch_committee_count(
+            state,
+            state.previous_shuffling_epoch,
+            committee_config,
         ),
         seed=state.previous_shuffling_seed,
         shuffling_epoch=state.previous_shuffling_epoch,
@@ -207,18 +328,16 @@ def _get_shuffling_contextis_next_epoch_registry_change(
         state: 'BeaconState',
         next_epoch: Epoch,
         committee_config: CommitteeConfig) -> ShufflingContext:
-    current_committees_per_epoch = get_current_epoch_committee_count(
-        state=state,
-        shard_count=committee_config.SHARD_COUNT,
-        slots_per_epoch=committee_config.SLOTS_PER_EPOCH,
-        target_committee_size=committee_config.TARGET_COMMITTEE_SIZE,
+    current_committees_per_epoch = _get_cached_epoch_committee_count(
+        state,
+        state.current_shuffling_epoch,
+        committee_config,
     )
     return ShufflingContext(
-        committees_per_epoch=get_next_epoch_committee_count(
-            state=state,
-            shard_count=committee_config.SHARD_COUNT,
-            slots_per_epoch=committee_config.SLOTS_PER_EPOCH,
-            target_committee_size=committee_config.TARGET_COMMITTEE_SIZE,
+        committees_per_epoch=_get_cached_epoch_committee_count(
+            state,
+            Epoch(state.current_shuffling_epoch + 1),
+            committee_config,
         ),
         seed=helpers.generate_seed(
             state=state,
@@ -242,11 +361,10 @@ def _get_shuffling_contextis_next_epoch_should_reseed(
         next_epoch: Epoch,
         committee_config: CommitteeConfig) -> ShufflingContext:
     return ShufflingContext(
-        committees_per_epoch=get_next_epoch_committee_count(
-            state=state,
-            shard_count=committee_config.SHARD_COUNT,
-            slots_per_epoch=committee_config.SLOTS_PER_EPOCH,
-            target_committee_size=committee_config.TARGET_COMMITTEE_SIZE,
+        committees_per_epoch=_get_cached_epoch_committee_count(
+            state,
+            Epoch(state.current_shuffling_epoch + 1),
+            committee_config,
         ),
         # for mocking this out in tests.
         seed=helpers.generate_seed(
@@ -267,11 +385,10 @@ def _get_shuffling_contextis_next_epoch_no_registry_change_no_reseed(
         state: 'BeaconState',
         committee_config: CommitteeConfig) -> ShufflingContext:
     return ShufflingContext(
-        committees_per_epoch=get_current_epoch_committee_count(
-            state=state,
-            shard_count=committee_config.SHARD_COUNT,
-            slots_per_epoch=committee_config.SLOTS_PER_EPOCH,
-            target_committee_size=committee_config.TARGET_COMMITTEE_SIZE,
+        committees_per_epoch=_get_cached_epoch_committee_count(
+            state,
+            state.current_shuffling_epoch,
+            committee_config,
         ),
         seed=state.current_shuffling_seed,
         shuffling_epoch=state.current_shuffling_epoch,
@@ -279,7 +396,6 @@ def _get_shuffling_contextis_next_epoch_no_registry_change_no_reseed(
     )
 
 
-@functools.lru_cache(maxsize=128)
 @to_tuple
 def get_crosslink_committees_at_slot(
         state: 'BeaconState',
@@ -288,6 +404,9 @@ def get_crosslink_committees_at_slot(
         registry_change: bool=False) -> Iterable[Tuple[Iterable[ValidatorIndex], Shard]]:
     """
     Return the list of ``(committee, shard)`` tuples for the ``slot``.
+
+    The shufflings the committees come from are cached, keyed by their seed, epoch and the active
+    index root of that epoch, so they are only computed once for all the states that share them.
     """
     genesis_epoch = committee_config.GENESIS_EPOCH
     shard_count = committee_config.SHARD_COUNT
@@ -329,11 +448,11 @@ def get_crosslink_committees_at_slot(
                 committee_config,
             )
 
-    shuffling = get_shuffling(
-        seed=shuffling_context.seed,
-        validators=state.validator_registry,
-        epoch=shuffling_context.shuffling_epoch,
-        committee_config=committee_config,
+    shuffling = _get_cached_shuffling(
+        state,
+        shuffling_context.seed,
+        shuffling_context.shuffling_epoch,
+        committee_config,
     )
     offset = slot % slots_per_epoch
     committees_per_slot = shuffling_context.committees_per_epoch // slots_per_epoch
@@ -0,0 +1,87 @@
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    NamedTuple,
+    TypeVar,
+)
+
+from eth_typing import (
+    Hash32,
+)
+
+from eth2.beacon.typing import (
+    Epoch,
+)
+
+
+TKey = TypeVar('TKey', bound=Hashable)
+TValue = TypeVar('TValue')
+
+
+class ShufflingKey(NamedTuple):
+    seed: Hash32
+    shuffling_epoch: Epoch
+    active_index_root: Hash32
+    committees_per_epoch: int
+    shuffle_round_count: int
+
+
+class RecentEpochsCache(Generic[TKey, TValue]):
+    """
+    A cache for values that are only needed while states are within an epoch or so of the epoch
+    they were first needed in, like the shufflings committees are drawn from.
+
+    Every value remembers the latest epoch of the states it was looked up for. When a state from a
+    later epoch comes along, the values that weren't looked up for its previous epoch or later are
+    evicted.
+    """
+
+    def __init__(self) -> None:
+        self._values: Dict[TKey, TValue] = {}
+        self._last_used_epochs: Dict[TKey, Epoch] = {}
+        self._latest_epoch = Epoch(0)
+
+    def get(self, key: TKey, epoch: Epoch, compute: Callable[[], TValue]) -> TValue:
+        """
+        Return the value for ``key``, looked up for a state in ``epoch``, computing it with
+        ``compute`` if it is not cached.
+        """
+        if epoch > self._latest_epoch:
+            self._latest_epoch = epoch
+            self.evict_before(Epoch(epoch - 1))
+
+        try:
+            value = self._values[key]
+        except KeyError:
+            value = compute()
+            self._values[key] = value
+            self._last_used_epochs[key] = epoch
+        else:
+            self._last_used_epochs[key] = max(epoch, self._last_used_epochs[key])
+        return value
+
+    def evict_before(self, epoch: Epoch) -> None:
+        """
+        Evict the values that were last looked up for states before ``epoch``.
+        """
+        stale_keys = tuple(
+            key
+            for key, last_used_epoch in self._last_used_epochs.items()
+            if last_used_epoch < epoch
+        )
+        for key in stale_keys:
+            del self._values[key]
+            del self._last_used_epochs[key]
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._last_used_epochs.clear()
+        self._latest_epoch = Epoch(0)
+
+    def __contains__(self, key: TKey) -> bool:
+        return key in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
@@ -12,6 +12,8 @@ from cytoolz import (
     sliding_window,
 )
 
+from lru import LRU
+
 import ssz
 from eth_typing import (
     Hash32,
@@ -591,10 +593,14 @@ class BeaconChainDB(BaseBeaconChainDB):
     def _persist_state(cls,
                        db: BaseDB,
                        state: BeaconState) -> None:
+        state_ssz = ssz.encode(state)
         db.set(
             state.root,
-            ssz.encode(state),
+            state_ssz,
         )
+        # Keep reading back the very same state, so that the tree hash roots of the states
+        # transitioned from it only rehash what they changed
+        _decoded_states[state_ssz] = state
 
     #
     # Raw Database API
@@ -621,7 +627,14 @@ def _decode_block(block_ssz: bytes, sedes: Type[BaseBeaconBlock]) -> BaseBeaconB
     return ssz.decode(block_ssz, sedes=sedes)
 
 
-@functools.lru_cache(128)
+_decoded_states = LRU(128)
+
+
 def _decode_state(state_ssz: bytes) -> BeaconState:
-    # TODO: forkable BeaconState fields?
-    return ssz.decode(state_ssz, sedes=BeaconState)
+    try:
+        return _decoded_states[state_ssz]
+    except KeyError:
+        # TODO: forkable BeaconState fields?
+        state = ssz.decode(state_ssz, sedes=BeaconState)
+        _decoded_states[state_ssz] = state
+        return state
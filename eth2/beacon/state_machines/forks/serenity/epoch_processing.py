@@ -8,9 +8,6 @@ from typing import (
     Tuple,
 )
 
-from eth_utils import (
-    to_dict,
-)
 from eth_utils.toolz import (
     curry,
     first,
@@ -18,6 +15,7 @@ from eth_utils.toolz import (
 
 from eth2.beacon import helpers
 from eth2._utils.numeric import (
+    integer_squareroot,
     is_power_of_two,
 )
 from eth2._utils.tuple import (
@@ -74,6 +72,13 @@ from eth2.beacon.typing import (
     ValidatorIndex,
 )
 
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, see the numpy extra in setup.py. Without it the rewards and penalties
+    # are computed one validator at a time.
+    np = None
+
 
 #
 # Eth1 data votes
@@ -321,16 +326,11 @@ def process_crosslinks(state: BeaconState, config: BeaconConfig) -> BeaconState:
     return state
 
 
-@to_dict
 def _update_rewards_or_penalies(
         index: ValidatorIndex,
-        amount: Gwei,
-        rewards_or_penalties: Dict[ValidatorIndex, Gwei]) -> Iterable[Tuple[ValidatorIndex, Gwei]]:
-    for i in rewards_or_penalties:
-        if i == index:
-            yield i, Gwei(rewards_or_penalties[i] + amount)
-        else:
-            yield i, rewards_or_penalties[i]
+        amount: int,
+        rewards_or_penalties: Dict[ValidatorIndex, Gwei]) -> None:
+    rewards_or_penalties[index] = Gwei(rewards_or_penalties[index] + amount)
 
 
 def _compute_normal_justification_and_finalization_deltas(
@@ -364,13 +364,13 @@ def _compute_normal_justification_and_finalization_deltas(
     for index in previous_epoch_active_validator_indices:
         # Expected FFG source
         if index in previous_epoch_attester_indices:
-            rewards_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 base_rewards[index] * previous_epoch_attesting_balance // previous_total_balance,
                 rewards_received,
             )
             # Inclusion speed bonus
-            rewards_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 (
                     base_rewards[index] * config.MIN_ATTESTATION_INCLUSION_DELAY //
@@ -379,14 +379,14 @@ def _compute_normal_justification_and_finalization_deltas(
                 rewards_received,
             )
         else:
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 base_rewards[index],
                 penalties_received,
             )
         # Expected FFG target
         if index in previous_epoch_boundary_attester_indices:
-            rewards_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 (
                     base_rewards[index] * previous_epoch_boundary_attesting_balance //
@@ -395,14 +395,14 @@ def _compute_normal_justification_and_finalization_deltas(
                 rewards_received,
             )
         else:
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 base_rewards[index],
                 penalties_received,
             )
         # Expected head
         if index in previous_epoch_head_attester_indices:
-            rewards_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 (
                     base_rewards[index] * previous_epoch_head_attesting_balance //
@@ -411,7 +411,7 @@ def _compute_normal_justification_and_finalization_deltas(
                 rewards_received,
             )
         else:
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 base_rewards[index],
                 penalties_received,
@@ -423,7 +423,7 @@ def _compute_normal_justification_and_finalization_deltas(
                 inclusion_infos[index].inclusion_slot,
                 CommitteeConfig(config),
             )
-            rewards_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 proposer_index,
                 base_rewards[index] // config.ATTESTATION_INCLUSION_REWARD_QUOTIENT,
                 rewards_received,
@@ -458,7 +458,7 @@ def _compute_inactivity_leak_deltas(
     penalties_received = rewards_received.copy()
     for index in previous_epoch_active_validator_indices:
         if index not in previous_epoch_attester_indices:
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 inactivity_penalties[index],
                 penalties_received,
@@ -466,7 +466,7 @@ def _compute_inactivity_leak_deltas(
         else:
             # If a validator did attest, apply a small penalty
             # for getting attestations included late
-            rewards_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 (
                     base_rewards[index] // config.MIN_ATTESTATION_INCLUSION_DELAY //
@@ -474,19 +474,19 @@ def _compute_inactivity_leak_deltas(
                 ),
                 rewards_received,
             )
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 base_rewards[index],
                 penalties_received,
             )
         if index not in previous_epoch_boundary_attester_indices:
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 inactivity_penalties[index],
                 penalties_received,
             )
         if index not in previous_epoch_head_attester_indices:
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 index,
                 base_rewards[index],
                 penalties_received,
@@ -501,7 +501,7 @@ def _compute_inactivity_leak_deltas(
             current_epoch < state.validator_registry[i].withdrawable_epoch
         )
         if eligible:
-            penalties_received = _update_rewards_or_penalies(
+            _update_rewards_or_penalies(
                 ValidatorIndex(i),
                 2 * inactivity_penalties[ValidatorIndex(i)] + base_rewards[ValidatorIndex(i)],
                 penalties_received,
@@ -509,17 +509,9 @@ def _compute_inactivity_leak_deltas(
     return (rewards_received, penalties_received)
 
 
-@curry
-def _process_rewards_and_penalties_for_finality(
+def _get_previous_epoch_boundary_and_head_attester_indices(
         state: BeaconState,
-        config: BeaconConfig,
-        previous_epoch_active_validator_indices: Set[ValidatorIndex],
-        previous_total_balance: Gwei,
-        previous_epoch_attestations: Sequence[Attestation],
-        previous_epoch_attester_indices: Set[ValidatorIndex],
-        inclusion_infos: Dict[ValidatorIndex, InclusionInfo],
-        effective_balances: Dict[ValidatorIndex, Gwei],
-        base_rewards: Dict[ValidatorIndex, Gwei]) -> Tuple[Dict[ValidatorIndex, Gwei], Dict[ValidatorIndex, Gwei]]:  # noqa: E501
+        config: BeaconConfig) -> Tuple[Set[ValidatorIndex], Set[ValidatorIndex]]:
     previous_epoch_boundary_attestations = get_previous_epoch_boundary_attestations(
         state,
         config.SLOTS_PER_EPOCH,
@@ -543,6 +535,27 @@ def _process_rewards_and_penalties_for_finality(
         attestations=previous_epoch_head_attestations,
         committee_config=CommitteeConfig(config),
     )
+    return (
+        set(previous_epoch_boundary_attester_indices),
+        set(previous_epoch_head_attester_indices),
+    )
+
+
+@curry
+def _process_rewards_and_penalties_for_finality(
+        state: BeaconState,
+        config: BeaconConfig,
+        previous_epoch_active_validator_indices: Set[ValidatorIndex],
+        previous_total_balance: Gwei,
+        previous_epoch_attestations: Sequence[Attestation],
+        previous_epoch_attester_indices: Set[ValidatorIndex],
+        inclusion_infos: Dict[ValidatorIndex, InclusionInfo],
+        effective_balances: Dict[ValidatorIndex, Gwei],
+        base_rewards: Dict[ValidatorIndex, Gwei]) -> Tuple[Dict[ValidatorIndex, Gwei], Dict[ValidatorIndex, Gwei]]:  # noqa: E501
+    (
+        previous_epoch_boundary_attester_indices,
+        previous_epoch_head_attester_indices,
+    ) = _get_previous_epoch_boundary_and_head_attester_indices(state, config)
 
     epochs_since_finality = state.next_epoch(config.SLOTS_PER_EPOCH) - state.finalized_epoch
     if epochs_since_finality <= 4:
@@ -617,13 +630,13 @@ def _process_rewards_and_penalties_for_crosslinks(
                 crosslink_committee,
             )
             for index in attesting_validator_indices:
-                rewards_received = _update_rewards_or_penalies(
+                _update_rewards_or_penalies(
                     index,
                     base_rewards[index] * total_attesting_balance // total_balance,
                     rewards_received,
                 )
             for index in set(crosslink_committee).difference(attesting_validator_indices):
-                penalties_received = _update_rewards_or_penalies(
+                _update_rewards_or_penalies(
                     index,
                     base_rewards[index],
                     penalties_received,
@@ -649,10 +662,12 @@ def process_rewards_and_penalties(state: BeaconState, config: BeaconConfig) -> B
     # Compute previous epoch attester indices and the total balance they account for
     # for later use.
     previous_epoch_attestations = state.previous_epoch_attestations
-    previous_epoch_attester_indices = get_attester_indices_from_attestations(
-        state=state,
-        attestations=previous_epoch_attestations,
-        committee_config=CommitteeConfig(config),
+    previous_epoch_attester_indices = set(
+        get_attester_indices_from_attestations(
+            state=state,
+            attestations=previous_epoch_attestations,
+            committee_config=CommitteeConfig(config),
+        )
     )
 
     # Compute inclusion slot/distance of previous attestations for later use.
@@ -662,6 +677,22 @@ def process_rewards_and_penalties(state: BeaconState, config: BeaconConfig) -> B
         committee_config=CommitteeConfig(config),
     )
 
+    if np is not None:
+        # NumPy only warns about integer divisions by zero and gives 0, where the rest of this
+        # function raises ZeroDivisionError.
+        try:
+            with np.errstate(divide='raise'):
+                return _process_rewards_and_penalties_numpy(
+                    state,
+                    config,
+                    previous_epoch_active_validator_indices,
+                    previous_total_balance,
+                    previous_epoch_attester_indices,
+                    inclusion_infos,
+                )
+        except FloatingPointError as err:
+            raise ZeroDivisionError(str(err)) from err
+
     # Compute effective balance of each previous epoch active validator for later use
     effective_balances = {
         ValidatorIndex(index): get_effective_balance(
@@ -704,9 +735,8 @@ def process_rewards_and_penalties(state: BeaconState, config: BeaconConfig) -> B
     )
 
     # Apply the overall rewards/penalties
-    for index in range(len(state.validator_registry)):
-        state = state.update_validator_balance(
-            ValidatorIndex(index),
+    state = state.update_validator_balances({
+        ValidatorIndex(index): Gwei(
             # Prevent validator balance under flow
             max(
                 (
@@ -717,12 +747,206 @@ def process_rewards_and_penalties(state: BeaconState, config: BeaconConfig) -> B
                     crosslinks_penalties[index]
                 ),
                 0,
-            ),
+            )
         )
+        for index in range(len(state.validator_registry))
+    })
 
     return state
 
 
+def _get_mask(validator_indices: Iterable[ValidatorIndex], num_validators: int) -> 'np.ndarray':
+    mask = np.zeros(num_validators, dtype=bool)
+    mask[np.fromiter(validator_indices, dtype=np.int64)] = True
+    return mask
+
+
+def _scale(values: 'np.ndarray', numerator: int, denominator: int) -> 'np.ndarray':
+    """
+    Return ``values * numerator // denominator``, going through Python integers for each distinct
+    value, as the products of balances can overflow 64 bits.
+    """
+    distinct_values, inverse = np.unique(values, return_inverse=True)
+    scaled_values = np.array(
+        [value * numerator // denominator for value in distinct_values.tolist()],
+        dtype=np.int64,
+    )
+    return scaled_values[inverse]
+
+
+def _process_rewards_and_penalties_numpy(
+        state: BeaconState,
+        config: BeaconConfig,
+        previous_epoch_active_validator_indices: Set[ValidatorIndex],
+        previous_total_balance: Gwei,
+        previous_epoch_attester_indices: Set[ValidatorIndex],
+        inclusion_infos: Dict[ValidatorIndex, InclusionInfo]) -> BeaconState:
+    """
+    Compute the rewards and penalties for finality and crosslinks the same way
+    ``process_rewards_and_penalties`` does, as arrays over all the validators at once, and apply
+    them in a single update.
+    """
+    num_validators = len(state.validator_registry)
+    balances = np.fromiter(state.validator_balances, dtype=np.int64, count=num_validators)
+    effective_balances = np.minimum(balances, config.MAX_DEPOSIT_AMOUNT)
+    if previous_total_balance == 0:
+        base_rewards = np.zeros(num_validators, dtype=np.int64)
+    else:
+        adjusted_quotient = (
+            integer_squareroot(previous_total_balance) // config.BASE_REWARD_QUOTIENT
+        )
+        base_rewards = effective_balances // adjusted_quotient // 5
+
+    rewards = np.zeros(num_validators, dtype=np.int64)
+    penalties = np.zeros(num_validators, dtype=np.int64)
+
+    # 1. Rewards and penalties for justification and finalization
+    (
+        previous_epoch_boundary_attester_indices,
+        previous_epoch_head_attester_indices,
+    ) = _get_previous_epoch_boundary_and_head_attester_indices(state, config)
+    active = _get_mask(previous_epoch_active_validator_indices, num_validators)
+    attesters = _get_mask(previous_epoch_attester_indices, num_validators)
+    boundary_attesters = _get_mask(previous_epoch_boundary_attester_indices, num_validators)
+    head_attesters = _get_mask(previous_epoch_head_attester_indices, num_validators)
+
+    active_attesters = active & attesters
+    active_attester_indices = np.flatnonzero(active_attesters)
+    inclusion_distances = np.fromiter(
+        (
+            inclusion_infos[ValidatorIndex(index)].inclusion_distance
+            for index in active_attester_indices.tolist()
+        ),
+        dtype=np.int64,
+        count=len(active_attester_indices),
+    )
+
+    epochs_since_finality = state.next_epoch(config.SLOTS_PER_EPOCH) - state.finalized_epoch
+    if epochs_since_finality <= 4:
+        for attester_mask in (attesters, boundary_attesters, head_attesters):
+            attesting_balance = int(effective_balances[attester_mask].sum())
+            rewarded = active & attester_mask
+            rewards[rewarded] += _scale(
+                base_rewards[rewarded],
+                attesting_balance,
+                previous_total_balance,
+            )
+            penalized = active & ~attester_mask
+            penalties[penalized] += base_rewards[penalized]
+
+        # Inclusion speed bonus
+        rewards[active_attester_indices] += (
+            base_rewards[active_attester_indices] * config.MIN_ATTESTATION_INCLUSION_DELAY //
+            inclusion_distances
+        )
+        # Proposer bonus
+        proposer_indices_at_slots = {
+            inclusion_slot: get_beacon_proposer_index(
+                state,
+                inclusion_slot,
+                CommitteeConfig(config),
+            )
+            for inclusion_slot in set(
+                inclusion_infos[ValidatorIndex(index)].inclusion_slot
+                for index in active_attester_indices.tolist()
+            )
+        }
+        proposer_indices = np.fromiter(
+            (
+                proposer_indices_at_slots[inclusion_infos[ValidatorIndex(index)].inclusion_slot]
+                for index in active_attester_indices.tolist()
+            ),
+            dtype=np.int64,
+            count=len(active_attester_indices),
+        )
+        np.add.at(
+            rewards,
+            proposer_indices,
+            base_rewards[active_attester_indices] // config.ATTESTATION_INCLUSION_REWARD_QUOTIENT,
+        )
+    else:
+        inactivity_penalties = base_rewards + _scale(
+            effective_balances,
+            epochs_since_finality,
+            config.INACTIVITY_PENALTY_QUOTIENT,
+        ) // 2
+
+        penalized = active & ~attesters
+        penalties[penalized] += inactivity_penalties[penalized]
+        # If a validator did attest, apply a small penalty for getting attestations included
+        # late
+        rewards[active_attester_indices] += (
+            base_rewards[active_attester_indices] // config.MIN_ATTESTATION_INCLUSION_DELAY //
+            inclusion_distances
+        )
+        penalties[active_attesters] += base_rewards[active_attesters]
+        penalized = active & ~boundary_attesters
+        penalties[penalized] += inactivity_penalties[penalized]
+        penalized = active & ~head_attesters
+        penalties[penalized] += base_rewards[penalized]
+
+        # Penalize slashed-but-inactive validators as though they were active but offline
+        current_epoch = state.current_epoch(config.SLOTS_PER_EPOCH)
+        slashed_and_not_withdrawable = np.fromiter(
+            (
+                validator.slashed and current_epoch < validator.withdrawable_epoch
+                for validator in state.validator_registry
+            ),
+            dtype=bool,
+            count=num_validators,
+        )
+        penalized = ~active & slashed_and_not_withdrawable
+        penalties[penalized] += 2 * inactivity_penalties[penalized] + base_rewards[penalized]
+
+    # 2. Rewards and penalties for crosslinks
+    effective_balances_by_index = {
+        ValidatorIndex(index): Gwei(effective_balance)
+        for index, effective_balance in enumerate(effective_balances.tolist())
+    }
+    previous_epoch_start_slot = get_epoch_start_slot(
+        state.previous_epoch(config.SLOTS_PER_EPOCH, config.GENESIS_EPOCH),
+        config.SLOTS_PER_EPOCH,
+    )
+    current_epoch_start_slot = get_epoch_start_slot(
+        state.current_epoch(config.SLOTS_PER_EPOCH),
+        config.SLOTS_PER_EPOCH,
+    )
+    for slot in range(previous_epoch_start_slot, current_epoch_start_slot):
+        crosslink_committees_at_slot = get_crosslink_committees_at_slot(
+            state,
+            slot,
+            CommitteeConfig(config),
+        )
+        for crosslink_committee, shard in crosslink_committees_at_slot:
+            winning_root, attesting_validator_indices = get_winning_root_and_participants(
+                state=state,
+                shard=shard,
+                effective_balances=effective_balances_by_index,
+                committee_config=CommitteeConfig(config),
+            )
+            committee_indices = np.fromiter(crosslink_committee, dtype=np.int64)
+            attesting_indices = np.fromiter(attesting_validator_indices, dtype=np.int64)
+            total_attesting_balance = int(effective_balances[attesting_indices].sum())
+            total_balance = int(effective_balances[committee_indices].sum())
+
+            rewards[attesting_indices] += _scale(
+                base_rewards[attesting_indices],
+                total_attesting_balance,
+                total_balance,
+            )
+            non_attesting_indices = np.setdiff1d(committee_indices, attesting_indices)
+            penalties[non_attesting_indices] += base_rewards[non_attesting_indices]
+
+    # Apply the overall rewards/penalties, preventing validator balance under flow. Only the
+    # balances that changed are updated, so that the others are still shared with the old state.
+    new_balances = np.maximum(balances + rewards - penalties, 0)
+    changed_indices = np.flatnonzero(new_balances != balances)
+    return state.update_validator_balances({
+        ValidatorIndex(index): Gwei(balance)
+        for index, balance in zip(changed_indices.tolist(), new_balances[changed_indices].tolist())
+    })
+
+
 #
 # Ejections
 #
@@ -1110,6 +1334,7 @@ def process_slashings(state: BeaconState,
         current_epoch,
     )
 
+    penalized_balances = {}
     for validator_index, validator in enumerate(state.validator_registry):
         validator_index = ValidatorIndex(validator_index)
         is_halfway_to_withdrawable_epoch = (
@@ -1123,11 +1348,10 @@ def process_slashings(state: BeaconState,
                 total_penalties=total_penalties,
                 total_balance=total_balance,
             )
-            state = state.update_validator_balance(
-                validator_index=validator_index,
-                balance=state.validator_balances[validator_index] - penalty,
+            penalized_balances[validator_index] = Gwei(
+                state.validator_balances[validator_index] - penalty
             )
-    return state
+    return state.update_validator_balances(penalized_balances)
 
 
 def process_exit_queue(state: BeaconState,
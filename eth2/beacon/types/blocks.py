@@ -29,7 +29,6 @@ from eth._utils.datatypes import (
     Configurable,
 )
 
-from eth2.beacon._utils.hash import hash_eth2
 from eth2.beacon.constants import EMPTY_SIGNATURE
 from eth2.beacon.typing import (
     Slot,
@@ -158,13 +157,12 @@ class BaseBeaconBlock(ssz.Serializable, Configurable, ABC):
     @property
     def hash(self) -> Hash32:
         if self._hash is None:
-            self._hash = hash_eth2(ssz.encode(self))
+            self._hash = ssz.hash_tree_root(self)
         return self._hash
 
     @property
     def root(self) -> Hash32:
         # Alias of `hash`.
-        # Using flat hash, might change to SSZ tree hash.
         return self.hash
 
     @property
@@ -1,4 +1,6 @@
 from typing import (
+    Any,
+    Mapping,
     Sequence,
 )
 
@@ -20,8 +22,11 @@ from eth.constants import (
     ZERO_HASH32,
 )
 
-from eth2.beacon._utils.hash import (
-    hash_eth2,
+from eth2._utils.persistent_vector import (
+    PersistentVector,
+)
+from eth2._utils.tree_hash import (
+    TreeHashCache,
 )
 from eth2.beacon.helpers import slot_to_epoch
 from eth2.beacon.typing import (
@@ -133,8 +138,10 @@ class BeaconState(ssz.Serializable):
             genesis_time=genesis_time,
             fork=fork,
             # Validator registry
-            validator_registry=validator_registry,
-            validator_balances=validator_balances,
+            # These are updated a few validators at a time, which would mean copying them whole
+            # every time as tuples
+            validator_registry=PersistentVector(validator_registry),
+            validator_balances=PersistentVector(validator_balances),
             validator_registry_update_epoch=validator_registry_update_epoch,
             # Randomness and committees
             latest_randao_mixes=latest_randao_mixes,
@@ -163,23 +170,45 @@ class BeaconState(ssz.Serializable):
             deposit_index=deposit_index,
         )
 
+    def copy(self, **kwargs: Any) -> 'BeaconState':
+        """
+        Return a copy of the state with the given fields replaced.
+
+        The fields that aren't replaced are shared with this state instead of being deep copied,
+        since they are all immutable.
+        """
+        fields = {
+            field_name: getattr(self, field_name)
+            for field_name in self._meta.field_names
+        }
+        fields.update(kwargs)
+        state = type(self)(**fields)
+        # Let the copy rehash only what changed since this state or another copy was hashed
+        state._tree_hash_cache = self._get_tree_hash_cache()
+        return state
+
     def __repr__(self) -> str:
         return 'BeaconState #{0}>'.format(
             encode_hex(self.root)[2:10],
         )
 
     _hash = None
+    _tree_hash_cache = None
+
+    def _get_tree_hash_cache(self) -> TreeHashCache:
+        if self._tree_hash_cache is None:
+            self._tree_hash_cache = TreeHashCache()
+        return self._tree_hash_cache
 
     @property
     def hash(self) -> Hash32:
         if self._hash is None:
-            self._hash = hash_eth2(ssz.encode(self))
+            self._hash = self._get_tree_hash_cache().hash_tree_root(self)
         return self._hash
 
     @property
     def root(self) -> Hash32:
         # Alias of `hash`.
-        # Using flat hash, might change to SSZ tree hash.
         return self.hash
 
     @property
@@ -264,11 +293,8 @@ class BeaconState(ssz.Serializable):
         if validator_index >= self.num_validators or validator_index < 0:
             raise IndexError("Incorrect validator index")
 
-        validator_registry = list(self.validator_registry)
-        validator_registry[validator_index] = validator
-
         updated_state = self.copy(
-            validator_registry=tuple(validator_registry),
+            validator_registry=self.validator_registry.set(validator_index, validator),
         )
         return updated_state
 
@@ -278,14 +304,19 @@ class BeaconState(ssz.Serializable):
         """
         Update the balance of validator of the given ``validator_index``.
         """
-        if validator_index >= self.num_validators or validator_index < 0:
-            raise IndexError("Incorrect validator index")
+        return self.update_validator_balances({validator_index: balance})
 
-        validator_balances = list(self.validator_balances)
-        validator_balances[validator_index] = balance
+    def update_validator_balances(self,
+                                  balances: Mapping[ValidatorIndex, Gwei]) -> 'BeaconState':
+        """
+        Update the balances of the validators at the keys of ``balances`` at once.
+        """
+        for validator_index in balances:
+            if validator_index >= self.num_validators or validator_index < 0:
+                raise IndexError("Incorrect validator index")
 
         updated_state = self.copy(
-            validator_balances=tuple(validator_balances),
+            validator_balances=self.validator_balances.update(balances),
         )
         return updated_state
 
@@ -1,9 +1,25 @@
 import asyncio
+import collections
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+)
+import contextlib
 import logging
 import os
 import random
 import struct
-from typing import Tuple
+import time
+from typing import (
+    Any,
+    Callable,
+    DefaultDict,
+    Deque,
+    Iterator,
+    NamedTuple,
+    Tuple,
+    TypeVar,
+)
 
 import sha3
 
@@ -44,22 +60,88 @@ from .constants import (
 )
 
 
+TReturn = TypeVar('TReturn')
+
+
+class HandshakeStageLatency(NamedTuple):
+    stage: str
+    # The number of recent handshakes that went through this stage, and how long it took them
+    samples: int
+    mean: float
+    max: float
+
+
+class HandshakeExecutor:
+    """
+    Runs the elliptic curve work of RLPx auth handshakes in a bounded pool of threads, limits
+    how many outbound connections we are setting up at any time, and records how long
+    handshakes spend in each stage.
+
+    The stages of outbound handshakes are connect, encode_auth, wait_auth_ack and
+    decode_auth_ack, and those of inbound ones wait_auth, decode_auth and encode_auth_ack. Both
+    then go through p2p_handshake and sub_proto_handshake.
+
+    With max_workers=0 the elliptic curve work is done on the event loop instead.
+    """
+    # The number of recent durations we keep for each stage.
+    max_stage_samples = 256
+
+    def __init__(self, max_workers: int = 2, max_concurrent_dials: int = 32) -> None:
+        if max_workers:
+            self._executor: Executor = ThreadPoolExecutor(
+                max_workers, thread_name_prefix='p2p-handshake')
+        else:
+            self._executor = None
+        self.dial_slots = asyncio.Semaphore(max_concurrent_dials)
+        self._stage_durations: DefaultDict[str, Deque[float]] = collections.defaultdict(
+            lambda: collections.deque(maxlen=self.max_stage_samples))
+
+    async def run(self, func: Callable[..., TReturn], *args: Any) -> TReturn:
+        if self._executor is None:
+            return func(*args)
+        return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+
+    @contextlib.contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """
+        Record how long the wrapped block takes as a sample of the given stage, unless it raises.
+        """
+        started_at = time.perf_counter()
+        yield
+        self._stage_durations[stage].append(time.perf_counter() - started_at)
+
+    def get_stage_latencies(self) -> Tuple[HandshakeStageLatency, ...]:
+        return tuple(
+            HandshakeStageLatency(stage, len(durations), sum(durations) / len(durations),
+                                  max(durations))
+            for stage, durations in self._stage_durations.items()
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
 async def handshake(
         remote: kademlia.Node,
         privkey: datatypes.PrivateKey,
-        token: CancelToken) -> Tuple[bytes, bytes, sha3.keccak_256, sha3.keccak_256, asyncio.StreamReader, asyncio.StreamWriter]:  # noqa: E501
+        token: CancelToken,
+        executor: HandshakeExecutor = None) -> Tuple[bytes, bytes, sha3.keccak_256, sha3.keccak_256, asyncio.StreamReader, asyncio.StreamWriter]:  # noqa: E501
     """
     Perform the auth handshake with given remote.
 
     Returns the established secrets and the StreamReader/StreamWriter pair already connected to
     the remote.
     """
+    if executor is None:
+        executor = HandshakeExecutor(max_workers=0)
     use_eip8 = False
     initiator = HandshakeInitiator(remote, privkey, use_eip8, token)
-    reader, writer = await initiator.connect()
+    with executor.timed('connect'):
+        reader, writer = await initiator.connect()
     try:
         aes_secret, mac_secret, egress_mac, ingress_mac = await _handshake(
-            initiator, reader, writer, token)
+            initiator, reader, writer, token, executor)
     except Exception:
         # Note: This is one of two places where we manually handle closing the
         # reader/writer connection pair in the event of an error during the
@@ -76,28 +158,48 @@ async def handshake(
 
 async def _handshake(initiator: 'HandshakeInitiator', reader: asyncio.StreamReader,
                      writer: asyncio.StreamWriter, token: CancelToken,
+                     executor: HandshakeExecutor = None,
                      ) -> Tuple[bytes, bytes, sha3.keccak_256, sha3.keccak_256]:
     """See the handshake() function above.
 
     This code was factored out into this helper so that we can create Peers with directly
     connected readers/writers for our tests.
     """
+    if executor is None:
+        executor = HandshakeExecutor(max_workers=0)
     initiator_nonce = keccak(os.urandom(HASH_LEN))
-    auth_msg = initiator.create_auth_message(initiator_nonce)
-    auth_init = initiator.encrypt_auth_message(auth_msg)
+    with executor.timed('encode_auth'):
+        auth_init = await token.cancellable_wait(
+            executor.run(_create_auth_init, initiator, initiator_nonce))
     writer.write(auth_init)
 
-    auth_ack = await token.cancellable_wait(
-        reader.read(ENCRYPTED_AUTH_ACK_LEN),
-        timeout=REPLY_TIMEOUT)
+    with executor.timed('wait_auth_ack'):
+        auth_ack = await token.cancellable_wait(
+            reader.read(ENCRYPTED_AUTH_ACK_LEN),
+            timeout=REPLY_TIMEOUT)
 
     if reader.at_eof():
         # This is what happens when Parity nodes have blacklisted us
         # (https://github.com/ethereum/py-evm/issues/901).
         raise HandshakeFailure("%s disconnected before sending auth ack", repr(initiator.remote))
 
+    with executor.timed('decode_auth_ack'):
+        return await token.cancellable_wait(executor.run(
+            _decode_auth_ack, initiator, initiator_nonce, auth_init, auth_ack))
+
+
+def _create_auth_init(initiator: 'HandshakeInitiator', initiator_nonce: bytes) -> bytes:
+    auth_msg = initiator.create_auth_message(initiator_nonce)
+    return initiator.encrypt_auth_message(auth_msg)
+
+
+def _decode_auth_ack(initiator: 'HandshakeInitiator',
+                     initiator_nonce: bytes,
+                     auth_init: bytes,
+                     auth_ack: bytes,
+                     ) -> Tuple[bytes, bytes, sha3.keccak_256, sha3.keccak_256]:
     ephemeral_pubkey, responder_nonce = initiator.decode_auth_ack_message(auth_ack)
-    aes_secret, mac_secret, egress_mac, ingress_mac = initiator.derive_secrets(
+    return initiator.derive_secrets(
         initiator_nonce,
         responder_nonce,
         ephemeral_pubkey,
@@ -105,8 +207,6 @@ async def _handshake(initiator: 'HandshakeInitiator', reader: asyncio.StreamRead
         auth_ack
     )
 
-    return aes_secret, mac_secret, egress_mac, ingress_mac
-
 
 class HandshakeBase:
     logger = logging.getLogger("p2p.peer.Handshake")
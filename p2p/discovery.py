@@ -7,6 +7,7 @@ More information at https://github.com/ethereum/devp2p/blob/master/rlpx.md#node-
 """
 import asyncio
 import collections
+from concurrent.futures import Executor
 import contextlib
 import logging
 import random
@@ -16,11 +17,14 @@ from typing import (
     Any,
     Callable,
     cast,
+    Deque,
     Dict,
     Hashable,
     Iterable,
     Iterator,
     List,
+    NamedTuple,
+    Optional,
     Sequence,
     Set,
     Text,
@@ -54,6 +58,11 @@ from eth_utils import (
 
 from eth_keys import keys
 from eth_keys import datatypes
+from eth_keys.backends import get_backend
+from eth_keys.exceptions import (
+    BadSignature,
+    ValidationError as KeysValidationError,
+)
 
 from eth_hash.auto import keccak
 
@@ -70,6 +79,7 @@ from p2p.events import (
 from p2p.exceptions import AlreadyWaitingDiscoveryResponse, NoEligibleNodes, UnableToGetDiscV5Ticket
 from p2p.kademlia import to_uris, Node as KademliaNode
 from p2p import kademlia
+from p2p.persistence import BaseNodeStore, NoopNodeStore
 from p2p import protocol
 from p2p.service import BaseService
 
@@ -95,6 +105,9 @@ HEAD_SIZE_V5 = len(V5_ID_STRING) + SIG_SIZE  # 87
 EXPIRATION = 60  # let messages expire after N secondes
 PROTO_VERSION = 4
 PROTO_VERSION_V5 = 5
+# eth_keys looks up (and imports) its backend on every signing and recovery unless it's given one,
+# which costs about as much as the signing itself, so we look it up only once.
+ECC_BACKEND = get_backend()
 
 
 class DefectiveMessage(Exception):
@@ -142,6 +155,35 @@ CMD_ID_MAP_V5 = dict(
         CMD_TOPIC_NODES])
 
 
+class DecodedMessage(NamedTuple):
+    """A discovery message whose signer has not been recovered yet."""
+    signature: bytes
+    signed_data: bytes
+    cmd_id: int
+    payload: Tuple[Any, ...]
+    message_hash: Hash32
+
+
+class InboundMessage(NamedTuple):
+    address: kademlia.Address
+    message: bytes
+    is_v5: bool
+    cmd: DiscoveryCommand
+    decoded: DecodedMessage
+
+
+class LookupStats(NamedTuple):
+    target: int
+    # Seconds from the start of the lookup until we had the closest nodes
+    duration: float
+    # The number of find_node requests we sent, and how many of them got a reply
+    queries: int
+    replies: int
+    # How many hops away from our routing table we got in the longest chain of find_node
+    # requests, each one to a node we learned about from the previous one
+    hops: int
+
+
 class DiscoveryProtocol(asyncio.DatagramProtocol):
     """A Kademlia-like protocol to discover RLPx nodes."""
     logger: ExtendedDebugLogger = cast(ExtendedDebugLogger,
@@ -149,15 +191,61 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
     transport: asyncio.DatagramTransport = None
     use_v5 = False
     _max_neighbours_per_packet_cache = None
+    # The maximum number of nodes from our node store that we start with
+    max_seed_nodes = 64
+    # When we have an executor, datagrams are queued when received and the signers of the messages
+    # in them are recovered there in batches of up to this size.
+    inbound_batch_size = 64
+    # When we fall this far behind, the oldest datagrams we haven't handled are dropped.
+    max_pending_datagrams = 4096
+    # The number of recently received message hashes we remember in order to drop duplicates.
+    max_recent_messages = 8192
+    # The number of signed neighbours packets we keep around for reuse.
+    max_cached_neighbours_packets = 256
+    # The number of find_node requests a lookup keeps in flight at any time.
+    lookup_concurrency = kademlia.k_find_concurrency
+    # The number of nodes we bond with at any time, across all lookups.
+    max_concurrent_bonds = 32
+    # The number of bonds with nodes that may have to be evicted from our routing table which can
+    # be pending at any time. When there are more we don't check the new candidates.
+    max_pending_evictions = 64
+    # The number of recent lookups whose LookupStats we keep.
+    max_lookup_stats = 32
 
     def __init__(self,
                  privkey: datatypes.PrivateKey,
                  address: kademlia.Address,
                  bootstrap_nodes: Tuple[kademlia.Node, ...],
-                 cancel_token: CancelToken) -> None:
+                 cancel_token: CancelToken,
+                 node_store: BaseNodeStore = None,
+                 executor: Executor = None,
+                 executor_workers: int = 1) -> None:
+        """
+        :param node_store: Where the nodes we bond with are recorded, so that we can start with
+        them after a restart instead of only with the bootstrap nodes.
+        :param executor: If given, the signers of the messages we receive are recovered there,
+        in batches, instead of on the event loop.
+        :param executor_workers: The number of workers of the executor, which is how many batches
+        we keep in flight there.
+        """
         self.privkey = privkey
         self.address = address
         self.bootstrap_nodes = bootstrap_nodes
+        if node_store is None:
+            self.node_store: BaseNodeStore = NoopNodeStore()
+        else:
+            self.node_store = node_store
+        self.executor = executor
+        self.executor_workers = executor_workers
+        self._pending_datagrams: Deque[Tuple[kademlia.Address, bytes]] = collections.deque(
+            maxlen=self.max_pending_datagrams)
+        self._datagrams_received = asyncio.Event()
+        # Hashes of the messages we received recently, with the time we can forget them at.
+        self._recent_messages: 'collections.OrderedDict[Hash32, float]' = (
+            collections.OrderedDict())
+        # Signed neighbours packets by the nodes they carry, with the time we stop reusing them.
+        self._neighbours_packets: 'collections.OrderedDict[bytes, Tuple[bytes, float]]' = (
+            collections.OrderedDict())
         self.this_node = kademlia.Node(self.pubkey, address)
         self.routing = kademlia.RoutingTable(self.this_node)
         self.topic_table = TopicTable(self.logger)
@@ -167,16 +255,37 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
         self.topic_nodes_callbacks = CallbackManager()
         self.parity_pong_tokens: Dict[Hash32, Hash32] = {}
         self.cancel_token = CancelToken('DiscoveryProtocol').chain(cancel_token)
+        self._bond_slots = asyncio.Semaphore(self.max_concurrent_bonds)
+        self._pending_evictions: Set[kademlia.Node] = set()
+        self.lookup_stats: Deque[LookupStats] = collections.deque(maxlen=self.max_lookup_stats)
 
     def update_routing_table(self, node: kademlia.Node) -> None:
         """Update the routing table entry for the given node."""
         eviction_candidate = self.routing.add_node(node)
-        if eviction_candidate:
-            # This means we couldn't add the node because its bucket is full, so schedule a bond()
-            # with the least recently seen node on that bucket. If the bonding fails the node will
-            # be removed from the bucket and a new one will be picked from the bucket's
-            # replacement cache.
-            asyncio.ensure_future(self.bond(eviction_candidate))
+        if not eviction_candidate:
+            return
+        # This means we couldn't add the node because its bucket is full, so schedule a bond()
+        # with the least recently seen node on that bucket. If the bonding fails the node will
+        # be removed from the bucket and a new one will be picked from the bucket's
+        # replacement cache.
+        if eviction_candidate in self._pending_evictions:
+            return
+        elif len(self._pending_evictions) >= self.max_pending_evictions:
+            # There's no point in queueing up more of these than we can bond with, as buckets
+            # fill up again while we wait.
+            self.logger.debug2(
+                "Too many pending evictions, not checking %s", eviction_candidate)
+            return
+        self._pending_evictions.add(eviction_candidate)
+        asyncio.ensure_future(self._check_eviction_candidate(eviction_candidate))
+
+    async def _check_eviction_candidate(self, node: kademlia.Node) -> None:
+        try:
+            await self.bond(node)
+        except OperationCancelled:
+            pass
+        finally:
+            self._pending_evictions.discard(node)
 
     async def bond(self, node: kademlia.Node) -> bool:
         """Bond with the given node.
@@ -189,18 +298,16 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
         elif node == self.this_node:
             return False
 
-        if self.use_v5:
-            token = self.send_ping_v5(node, [])
-            log_version = "v5"
-        else:
-            token = self.send_ping_v4(node)
-            log_version = "v4"
+        # Lookups can come up with hundreds of new nodes at a time, so we limit the number of
+        # bonds in progress to keep them from flooding the network and our event loop.
+        async with self._bond_slots:
+            self.cancel_token.raise_if_triggered()
+            return await self._bond(node)
 
+    async def _bond(self, node: kademlia.Node) -> bool:
+        log_version = "v5" if self.use_v5 else "v4"
         try:
-            if self.use_v5:
-                got_pong, _, _ = await self.wait_pong_v5(node, token)
-            else:
-                got_pong = await self.wait_pong_v4(node, token)
+            got_pong = await self._ping(node)
         except AlreadyWaitingDiscoveryResponse:
             self.logger.debug("bonding failed, awaiting %s pong from %s", log_version, node)
             return False
@@ -208,8 +315,11 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
         if not got_pong:
             self.logger.debug("bonding failed, didn't receive %s pong from %s", log_version, node)
             self.routing.remove_node(node)
+            self.node_store.record_failure(node)
             return False
 
+        self.node_store.record_pong(node)
+
         try:
             # Give the remote node a chance to ping us before we move on and
             # start sending find_node requests. It is ok for wait_ping() to
@@ -224,6 +334,32 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
         self.update_routing_table(node)
         return True
 
+    async def revalidate(self, node: kademlia.Node) -> bool:
+        """Ping a node from our routing table, removing it from there if it doesn't reply."""
+        try:
+            got_pong = await self._ping(node)
+        except AlreadyWaitingDiscoveryResponse:
+            # Someone else is pinging it already, and will deal with the outcome
+            return False
+
+        if got_pong:
+            self.node_store.record_pong(node)
+        else:
+            self.logger.debug2("%s failed to revalidate, removing it", node)
+            self.routing.remove_node(node)
+            self.node_store.record_failure(node)
+        return got_pong
+
+    async def _ping(self, node: kademlia.Node) -> bool:
+        """Ping the given node and return whether or not it replied with a pong."""
+        if self.use_v5:
+            token = self.send_ping_v5(node, [])
+            got_pong, _, _ = await self.wait_pong_v5(node, token)
+            return got_pong
+        else:
+            token = self.send_ping_v4(node)
+            return await self.wait_pong_v4(node, token)
+
     async def wait_ping(self, remote: kademlia.Node) -> bool:
         """Wait for a ping from the given remote.
 
@@ -275,15 +411,18 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
 
         return got_pong
 
-    async def wait_neighbours(self, remote: kademlia.Node) -> Tuple[kademlia.Node, ...]:
+    async def wait_neighbours(self, remote: kademlia.Node) -> Optional[Tuple[kademlia.Node, ...]]:
         """Wait for a neihgbours packet from the given node.
 
-        Returns the list of neighbours received.
+        Returns the list of neighbours received, or None if the node didn't reply at all.
         """
         event = asyncio.Event()
         neighbours: List[kademlia.Node] = []
+        replied = False
 
         def process(response: List[kademlia.Node]) -> None:
+            nonlocal replied
+            replied = True
             neighbours.extend(response)
             # This callback is expected to be called multiple times because nodes usually
             # split the neighbours replies into multiple packets, so we only call event.set() once
@@ -300,6 +439,8 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
                 self.logger.debug2(
                     'timed out waiting for %d neighbours from %s', kademlia.k_bucket_size, remote)
 
+        if not replied:
+            return None
         return tuple(n for n in neighbours if n != self.this_node)
 
     def _mkpingid(self, token: Hash32, node: kademlia.Node) -> Hash32:
@@ -314,19 +455,35 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
     async def lookup(self, node_id: int) -> Tuple[kademlia.Node, ...]:
         """Lookup performs a network search for nodes close to the given target.
 
-        It approaches the target by querying nodes that are closer to it on each iteration.  The
-        given target does not need to be an actual node identifier.
+        It approaches the target by querying nodes that are closer to it, keeping up to
+        lookup_concurrency queries in flight and sending a new one to the closest node we haven't
+        asked yet as soon as one of them returns. It finishes once all of the k closest nodes we
+        know of have replied, without waiting for queries to nodes further away. The given target
+        does not need to be an actual node identifier.
         """
+        started_at = time.monotonic()
         nodes_asked: Set[kademlia.Node] = set()
+        nodes_replied: Set[kademlia.Node] = set()
         nodes_seen: Set[kademlia.Node] = set()
+        # The number of hops away from our routing table of every node we know of
+        hops: Dict[kademlia.Node, int] = {}
 
-        async def _find_node(node_id: int, remote: kademlia.Node) -> Tuple[kademlia.Node, ...]:
+        async def _find_node(
+                node_id: int, remote: kademlia.Node) -> Optional[Tuple[kademlia.Node, ...]]:
             # Short-circuit in case our token has been triggered to avoid trying to send requests
             # over a transport that is probably closed already.
             self.cancel_token.raise_if_triggered()
             self._send_find_node(remote, node_id)
-            candidates = await self.wait_neighbours(remote)
-            if not candidates:
+            try:
+                candidates = await self.wait_neighbours(remote)
+            except AlreadyWaitingDiscoveryResponse:
+                self.logger.debug("already waiting for neighbours from %s", remote)
+                return None
+            if candidates is None:
+                self.logger.debug("got no reply from %s, returning", remote)
+                return None
+            elif not candidates:
+                # The node is alive, it just doesn't know of anyone closer to the target
                 self.logger.debug("got no candidates from %s, returning", remote)
                 return tuple()
             all_candidates = tuple(c for c in candidates if c not in nodes_seen)
@@ -342,29 +499,62 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
             self.logger.debug2("bonded with %s candidates", bonded.count(True))
             return tuple(c for c in candidates if bonded[candidates.index(c)])
 
-        def _exclude_if_asked(nodes: Iterable[kademlia.Node]) -> List[kademlia.Node]:
-            nodes_to_ask = list(set(nodes).difference(nodes_asked))
-            return kademlia.sort_by_distance(nodes_to_ask, node_id)[:kademlia.k_find_concurrency]
+        queries: Dict['asyncio.Future[Optional[Tuple[kademlia.Node, ...]]]', kademlia.Node] = {}
+
+        def _send_queries() -> None:
+            for node in closest:
+                if len(queries) >= self.lookup_concurrency:
+                    break
+                elif node in nodes_asked or self.neighbours_callbacks.locked(node):
+                    continue
+                nodes_asked.add(node)
+                queries[asyncio.ensure_future(_find_node(node_id, node))] = node
 
         closest = self.routing.neighbours(node_id)
+        hops.update((node, 0) for node in closest)
         self.logger.debug("starting lookup; initial neighbours: %s", closest)
-        nodes_to_ask = _exclude_if_asked(closest)
-        while nodes_to_ask:
-            self.logger.debug2("node lookup; querying %s", nodes_to_ask)
-            nodes_asked.update(nodes_to_ask)
-            results = await asyncio.gather(*(
-                _find_node(node_id, n)
-                for n
-                in nodes_to_ask
-                if not self.neighbours_callbacks.locked(n)
-            ))
-            for candidates in results:
-                closest.extend(candidates)
-            closest = kademlia.sort_by_distance(closest, node_id)[:kademlia.k_bucket_size]
-            nodes_to_ask = _exclude_if_asked(closest)
-
+        try:
+            _send_queries()
+            while queries:
+                self.logger.debug2("node lookup; waiting for %s", tuple(queries.values()))
+                done, _ = await self.cancel_token.cancellable_wait(
+                    asyncio.wait(tuple(queries), return_when=asyncio.FIRST_COMPLETED))
+                for query in done:
+                    remote = queries.pop(query)
+                    candidates = query.result()
+                    if candidates is None:
+                        # Nodes that don't reply are no good to whoever's looking for peers.
+                        if remote in closest:
+                            closest.remove(remote)
+                        continue
+                    nodes_replied.add(remote)
+                    for candidate in candidates:
+                        if candidate not in hops:
+                            hops[candidate] = hops[remote] + 1
+                            closest.append(candidate)
+                closest = kademlia.sort_by_distance(closest, node_id)[:kademlia.k_bucket_size]
+                if nodes_replied.issuperset(closest):
+                    break
+                _send_queries()
+        finally:
+            for query in queries:
+                query.cancel()
+
+        stats = LookupStats(
+            target=node_id,
+            duration=time.monotonic() - started_at,
+            queries=len(nodes_asked),
+            replies=len(nodes_replied),
+            hops=1 + max(hops[node] for node in nodes_asked) if nodes_asked else 0,
+        )
+        self.lookup_stats.append(stats)
         self.logger.debug(
-            "lookup finished for target %s; closest neighbours: %s", to_hex(node_id), closest
+            "lookup finished for target %s in %.2fs, %d queries, %d hops; closest neighbours: %s",
+            to_hex(node_id),
+            stats.duration,
+            stats.queries,
+            stats.hops,
+            closest,
         )
         return tuple(closest)
 
@@ -416,13 +606,28 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
             self.logger.debug("full-bootnode: %s", uri)
             self.logger.info("bootnode: %s...%s@%s", pubkey_head, pubkey_tail, uri_tail)
 
+        # Nodes we bonded with before a restart most likely still remember us, so they go straight
+        # into our routing table, where they can be handed out as peer candidates while we
+        # check that they're still around.
+        seed_nodes = tuple(
+            node for node in self.node_store.get_seed_nodes(self.max_seed_nodes)
+            if node != self.this_node
+        )
+        for node in seed_nodes:
+            self.routing.add_node(node)
+        if seed_nodes:
+            self.logger.info("Starting with %d previously seen nodes", len(seed_nodes))
+
         try:
-            bonded = await asyncio.gather(*(
-                self.bond(n)
-                for n
-                in self.bootstrap_nodes
-                if (not self.ping_callbacks.locked(n) and not self.pong_callbacks.locked(n))
-            ))
+            bonded = await asyncio.gather(
+                *(
+                    self.bond(n)
+                    for n
+                    in self.bootstrap_nodes
+                    if (not self.ping_callbacks.locked(n) and not self.pong_callbacks.locked(n))
+                ),
+                *(self.revalidate(n) for n in seed_nodes),
+            )
             if not any(bonded):
                 self.logger.info("Failed to bond with bootstrap nodes %s", self.bootstrap_nodes)
                 return
@@ -433,12 +638,148 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
     def datagram_received(self, data: Union[bytes, Text], addr: Tuple[str, int]) -> None:
         ip_address, udp_port = addr
         address = kademlia.Address(ip_address, udp_port)
-        # The prefix below is what geth uses to identify discv5 msgs.
-        # https://github.com/ethereum/go-ethereum/blob/c4712bf96bc1bae4a5ad4600e9719e4a74bde7d5/p2p/discv5/udp.go#L149  # noqa: E501
-        if text_if_str(to_bytes, data).startswith(V5_ID_STRING):
-            self.receive_v5(address, cast(bytes, data))
+        datagram = (address, text_if_str(to_bytes, data))
+        if self.executor is None:
+            # Recovering signers on the event loop costs the same whether we do it in batches or
+            # not, and asyncio gives us a single datagram per iteration of the loop, so queueing
+            # them up would only delay reading the next ones.
+            messages = self._decode_datagrams((datagram,))
+            self._dispatch_messages(messages, recover_signers(tuple(
+                (msg.decoded.signature, msg.decoded.signed_data) for msg in messages)))
         else:
-            self.receive(address, cast(bytes, data))
+            self._pending_datagrams.append(datagram)
+            self._datagrams_received.set()
+
+    async def handle_datagrams(self) -> None:
+        """Handle the datagrams queued up by datagram_received(), until we are stopped.
+
+        The signers of the messages in a batch of datagrams are recovered in our executor, which
+        gets up to one batch per worker at a time, and we keep reading datagrams, which will go in
+        the next batches, in the meantime. Batches are dispatched in the order they were received.
+        """
+        loop = asyncio.get_event_loop()
+        # The batches whose signers are being recovered, oldest first
+        in_flight: Deque[Tuple[
+            Tuple[InboundMessage, ...],
+            'asyncio.Future[Tuple[Optional[bytes], ...]]',
+        ]] = collections.deque()
+        try:
+            while True:
+                while self._pending_datagrams and len(in_flight) < self.executor_workers:
+                    num_datagrams = min(self.inbound_batch_size, len(self._pending_datagrams))
+                    messages = self._decode_datagrams(
+                        self._pending_datagrams.popleft() for _ in range(num_datagrams))
+                    signatures = tuple(
+                        (msg.decoded.signature, msg.decoded.signed_data) for msg in messages)
+                    signers = asyncio.ensure_future(
+                        loop.run_in_executor(self.executor, recover_signers, signatures))
+                    in_flight.append((messages, signers))
+                if not self._pending_datagrams:
+                    self._datagrams_received.clear()
+
+                if not in_flight:
+                    await self.cancel_token.cancellable_wait(self._datagrams_received.wait())
+                elif in_flight[0][1].done():
+                    messages, signers = in_flight.popleft()
+                    self._dispatch_messages(messages, signers.result())
+                elif len(in_flight) < self.executor_workers:
+                    # Wake up for new datagrams as well, so that idle workers get them. The batch
+                    # is shielded because cancellable_wait() cancels what did not complete first.
+                    await self.cancel_token.cancellable_wait(
+                        asyncio.shield(in_flight[0][1]), self._datagrams_received.wait())
+                else:
+                    await self.cancel_token.cancellable_wait(asyncio.shield(in_flight[0][1]))
+        except OperationCancelled:
+            pass
+        finally:
+            for _, signers in in_flight:
+                signers.cancel()
+
+    def _decode_datagrams(
+            self,
+            datagrams: Iterable[Tuple[kademlia.Address, bytes]]) -> Tuple[InboundMessage, ...]:
+        """Decode the messages in the given datagrams.
+
+        Messages that are defective, duplicated, expired or have the wrong number of elements are
+        dropped here, before we spend any time recovering their signers.
+        """
+        messages: List[InboundMessage] = []
+        now = time.time()
+        while self._recent_messages:
+            message_hash, forget_at = next(iter(self._recent_messages.items()))
+            if forget_at > now:
+                break
+            del self._recent_messages[message_hash]
+
+        for address, message in datagrams:
+            # The prefix below is what geth uses to identify discv5 msgs.
+            # https://github.com/ethereum/go-ethereum/blob/c4712bf96bc1bae4a5ad4600e9719e4a74bde7d5/p2p/discv5/udp.go#L149  # noqa: E501
+            is_v5 = message.startswith(V5_ID_STRING)
+            try:
+                if is_v5:
+                    decoded = _decode_v5(message)
+                else:
+                    decoded = _decode_v4(message)
+            except DefectiveMessage as e:
+                self.logger.error('error unpacking message (%s) from %s: %s', message, address, e)
+                continue
+            except (IndexError, KeyError, rlp.DecodingError) as e:
+                self.logger.debug('malformed message (%s) from %s: %r', message, address, e)
+                continue
+
+            if decoded.message_hash in self._recent_messages:
+                self.logger.debug2('dropping duplicate message from %s', address)
+                continue
+            # Messages expire after EXPIRATION seconds, so we can't get a valid duplicate of a
+            # message after that.
+            self._recent_messages[decoded.message_hash] = now + EXPIRATION
+            if len(self._recent_messages) > self.max_recent_messages:
+                self._recent_messages.popitem(last=False)
+
+            if is_v5:
+                cmd = CMD_ID_MAP_V5[decoded.cmd_id]
+            else:
+                cmd = CMD_ID_MAP[decoded.cmd_id]
+            if len(decoded.payload) != cmd.elem_count:
+                self.logger.error('invalid %s payload: %s', cmd.name, decoded.payload)
+                continue
+
+            if not is_v5:
+                # As of discovery version 4, expiration is the last element for all packets, so
+                # we can validate that here, but if it changes we may have to do so on the
+                # handler methods.
+                try:
+                    expiration = rlp.sedes.big_endian_int.deserialize(decoded.payload[-1])
+                except rlp.DeserializationError as e:
+                    self.logger.debug('invalid expiration in message from %s: %r', address, e)
+                    continue
+                if now > expiration:
+                    self.logger.debug('received message already expired')
+                    continue
+
+            messages.append(InboundMessage(address, message, is_v5, cmd, decoded))
+        return tuple(messages)
+
+    def _dispatch_messages(self,
+                           messages: Sequence[InboundMessage],
+                           signers: Sequence[Optional[bytes]]) -> None:
+        for msg, signer in zip(messages, signers):
+            if signer is None:
+                self.logger.debug('invalid signature on message from %s', msg.address)
+                continue
+            node = kademlia.Node(keys.PublicKey(signer), msg.address)
+            try:
+                if msg.is_v5:
+                    self._get_handler_v5(msg.cmd)(
+                        node, msg.decoded.payload, msg.decoded.message_hash, msg.message)
+                else:
+                    self._get_handler(msg.cmd)(
+                        node, msg.decoded.payload, msg.decoded.message_hash)
+            except OperationCancelled:
+                raise
+            except Exception:
+                # One bad message must not stop us from handling the others in the batch.
+                self.logger.exception("Error handling %s message from %s", msg.cmd.name, node)
 
     def error_received(self, exc: Exception) -> None:
         self.logger.error('error received: %s', exc)
@@ -454,29 +795,6 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
         # and exit cleanly when they notice the cancel token has been triggered.
         await asyncio.sleep(0.1)
 
-    def receive(self, address: kademlia.Address, message: bytes) -> None:
-        try:
-            remote_pubkey, cmd_id, payload, message_hash = _unpack_v4(message)
-        except DefectiveMessage as e:
-            self.logger.error('error unpacking message (%s) from %s: %s', message, address, e)
-            return
-
-        # As of discovery version 4, expiration is the last element for all packets, so
-        # we can validate that here, but if it changes we may have to do so on the
-        # handler methods.
-        expiration = rlp.sedes.big_endian_int.deserialize(payload[-1])
-        if time.time() > expiration:
-            self.logger.debug('received message already expired')
-            return
-
-        cmd = CMD_ID_MAP[cmd_id]
-        if len(payload) != cmd.elem_count:
-            self.logger.error('invalid %s payload: %s', cmd.name, payload)
-            return
-        node = kademlia.Node(remote_pubkey, address)
-        handler = self._get_handler(cmd)
-        handler(node, payload, message_hash)
-
     def recv_pong_v4(self, node: kademlia.Node, payload: Tuple[Any, ...], _: Hash32) -> None:
         # The pong payload should have 3 elements: to, token, expiration
         _, token, _ = payload
@@ -545,12 +863,36 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
 
         max_neighbours = self._get_max_neighbours_per_packet()
         for i in range(0, len(nodes), max_neighbours):
-            message = _pack_v4(
-                CMD_NEIGHBOURS.id, tuple([nodes[i:i + max_neighbours]]), self.privkey)
+            message = self._pack_neighbours_v4(nodes[i:i + max_neighbours])
             self.logger.debug2('>>> neighbours to %s: %s',
                                node, neighbours[i:i + max_neighbours])
             self.send(node, message)
 
+    def _pack_neighbours_v4(self, nodes: List[List[bytes]]) -> bytes:
+        """Return a signed neighbours packet with the given nodes.
+
+        Unlike pongs, which carry the hash of the ping they reply to, neighbours packets depend
+        only on the nodes in them, and nodes close to each other get the same ones when they
+        look us up, so we reuse the packets we signed until they're halfway to expiring.
+        """
+        key = rlp.encode(nodes)
+        now = time.time()
+        try:
+            message, reuse_until = self._neighbours_packets[key]
+        except KeyError:
+            pass
+        else:
+            if reuse_until > now:
+                self._neighbours_packets.move_to_end(key)
+                return message
+
+        message = _pack_v4(CMD_NEIGHBOURS.id, tuple([nodes]), self.privkey)
+        self._neighbours_packets[key] = (message, now + EXPIRATION / 2)
+        self._neighbours_packets.move_to_end(key)
+        if len(self._neighbours_packets) > self.max_cached_neighbours_packets:
+            self._neighbours_packets.popitem(last=False)
+        return message
+
     def process_neighbours(self, remote: kademlia.Node, neighbours: List[kademlia.Node]) -> None:
         """Process a neighbours response.
 
@@ -646,21 +988,6 @@ class DiscoveryProtocol(asyncio.DatagramProtocol):
         else:
             raise ValueError(f"Unknown command: {cmd}")
 
-    def receive_v5(self, address: kademlia.Address, message: bytes) -> None:
-        try:
-            remote_pubkey, cmd_id, payload, message_hash = _unpack_v5(message)
-        except DefectiveMessage as e:
-            self.logger.error('error unpacking message (%s) from %s: %s', message, address, e)
-            return
-
-        cmd = CMD_ID_MAP_V5[cmd_id]
-        if len(payload) != cmd.elem_count:
-            self.logger.error('invalid %s payload: %s', cmd.name, payload)
-            return
-        node = kademlia.Node(remote_pubkey, address)
-        handler = self._get_handler_v5(cmd)
-        handler(node, payload, message_hash, message)
-
     def recv_ping_v5(self, node: kademlia.Node, payload: Tuple[Any, ...],
                      message_hash: Hash32, _: bytes) -> None:
         # version, from, to, expiration, topics
@@ -871,8 +1198,12 @@ class PreferredNodeDiscoveryProtocol(DiscoveryProtocol):
                  address: kademlia.Address,
                  bootstrap_nodes: Tuple[kademlia.Node, ...],
                  preferred_nodes: Sequence[kademlia.Node],
-                 cancel_token: CancelToken) -> None:
-        super().__init__(privkey, address, bootstrap_nodes, cancel_token)
+                 cancel_token: CancelToken,
+                 node_store: BaseNodeStore = None,
+                 executor: Executor = None,
+                 executor_workers: int = 1) -> None:
+        super().__init__(
+            privkey, address, bootstrap_nodes, cancel_token, node_store, executor, executor_workers)
 
         self.preferred_nodes = preferred_nodes
         self.logger.info('Preferred peers: %s', self.preferred_nodes)
@@ -933,8 +1264,12 @@ class DiscoveryByTopicProtocol(DiscoveryProtocol):
                  privkey: datatypes.PrivateKey,
                  address: kademlia.Address,
                  bootstrap_nodes: Tuple[kademlia.Node, ...],
-                 cancel_token: CancelToken) -> None:
-        super().__init__(privkey, address, bootstrap_nodes, cancel_token)
+                 cancel_token: CancelToken,
+                 node_store: BaseNodeStore = None,
+                 executor: Executor = None,
+                 executor_workers: int = 1) -> None:
+        super().__init__(
+            privkey, address, bootstrap_nodes, cancel_token, node_store, executor, executor_workers)
         self.topic = topic
 
     def get_nodes_to_connect(self, count: int) -> Iterator[kademlia.Node]:
@@ -1050,6 +1385,7 @@ class NoopDiscoveryService(BaseService):
 class DiscoveryService(BaseService):
     _last_lookup: float = 0
     _lookup_interval: int = 30
+    _node_store_flush_interval: int = 60
 
     def __init__(self,
                  proto: DiscoveryProtocol,
@@ -1091,9 +1427,17 @@ class DiscoveryService(BaseService):
         self.run_daemon_task(self.handle_get_random_bootnode_requests())
 
         await self._start_udp_listener()
+        if self.proto.executor is not None:
+            self.run_daemon_task(self.proto.handle_datagrams())
         self.run_task(self.proto.bootstrap())
+        self.run_daemon_task(self.periodically_flush_node_store())
         await self.cancel_token.wait()
 
+    async def periodically_flush_node_store(self) -> None:
+        while self.is_operational:
+            await self.sleep(self._node_store_flush_interval)
+            self.proto.node_store.flush()
+
     async def _start_udp_listener(self) -> None:
         loop = asyncio.get_event_loop()
         # TODO: Support IPv6 addresses as well.
@@ -1120,6 +1464,7 @@ class DiscoveryService(BaseService):
 
     async def _cleanup(self) -> None:
         await self.proto.stop()
+        self.proto.node_store.flush()
 
 
 class NodeTicketInfo:
@@ -1236,7 +1581,7 @@ def _pack_v4(cmd_id: int, payload: Tuple[Any, ...], privkey: datatypes.PrivateKe
     cmd_id = to_bytes(cmd_id)
     expiration = rlp.sedes.big_endian_int.serialize(_get_msg_expiration())
     encoded_data = cmd_id + rlp.encode(payload + tuple([expiration]))
-    signature = privkey.sign_msg(encoded_data)
+    signature = ECC_BACKEND.ecdsa_sign(keccak(encoded_data), privkey)
     message_hash = keccak(signature.to_bytes() + encoded_data)
     return message_hash + signature.to_bytes() + encoded_data
 
@@ -1246,18 +1591,25 @@ def _unpack_v4(message: bytes) -> Tuple[datatypes.PublicKey, int, Tuple[Any, ...
 
     Returns the public key used to sign the message, the cmd ID, payload and hash.
     """
+    decoded = _decode_v4(message)
+    signature = keys.Signature(decoded.signature)
+    remote_pubkey = signature.recover_public_key_from_msg(decoded.signed_data)
+    return remote_pubkey, decoded.cmd_id, decoded.payload, decoded.message_hash
+
+
+def _decode_v4(message: bytes) -> DecodedMessage:
+    """Check the MAC of a discovery v4 UDP message and decode it, without recovering its signer.
+    """
     message_hash = Hash32(message[:MAC_SIZE])
     if message_hash != keccak(message[MAC_SIZE:]):
         raise WrongMAC("Wrong msg mac")
-    signature = keys.Signature(message[MAC_SIZE:HEAD_SIZE])
-    signed_data = message[HEAD_SIZE:]
-    remote_pubkey = signature.recover_public_key_from_msg(signed_data)
     cmd_id = message[HEAD_SIZE]
     cmd = CMD_ID_MAP[cmd_id]
     payload = tuple(rlp.decode(message[HEAD_SIZE + 1:], strict=False))
     # Ignore excessive list elements as required by EIP-8.
     payload = payload[:cmd.elem_count]
-    return remote_pubkey, cmd_id, payload, message_hash
+    return DecodedMessage(
+        message[MAC_SIZE:HEAD_SIZE], message[HEAD_SIZE:], cmd_id, payload, message_hash)
 
 
 def _get_msg_expiration() -> int:
@@ -1268,7 +1620,7 @@ def _pack_v5(cmd_id: int, payload: Tuple[Any, ...], privkey: datatypes.PrivateKe
     """Create and sign a discovery v5 UDP message to be sent to a remote node."""
     cmd_id = to_bytes(cmd_id)
     encoded_data = cmd_id + rlp.encode(payload)
-    signature = privkey.sign_msg(encoded_data)
+    signature = ECC_BACKEND.ecdsa_sign(keccak(encoded_data), privkey)
     return signature.to_bytes() + encoded_data
 
 
@@ -1277,18 +1629,45 @@ def _unpack_v5(message: bytes) -> Tuple[datatypes.PublicKey, int, Tuple[Any, ...
 
     Returns the public key used to sign the message, the cmd ID, payload and msg hash.
     """
+    decoded = _decode_v5(message)
+    signature = keys.Signature(decoded.signature)
+    remote_pubkey = signature.recover_public_key_from_msg(decoded.signed_data)
+    return remote_pubkey, decoded.cmd_id, decoded.payload, decoded.message_hash
+
+
+def _decode_v5(message: bytes) -> DecodedMessage:
+    """Decode a discovery v5 UDP message, without recovering its signer."""
     if not message.startswith(V5_ID_STRING):
         raise DefectiveMessage("Missing v5 version prefix")
     message_hash = keccak(message[len(V5_ID_STRING):])
-    signature = keys.Signature(message[len(V5_ID_STRING):HEAD_SIZE_V5])
     body = message[HEAD_SIZE_V5:]
-    remote_pubkey = signature.recover_public_key_from_msg(body)
     cmd_id = body[0]
     cmd = CMD_ID_MAP_V5[cmd_id]
     payload = tuple(rlp.decode(body[1:], strict=False))
     # Ignore excessive list elements as required by EIP-8.
     payload = payload[:cmd.elem_count]
-    return remote_pubkey, cmd_id, payload, message_hash
+    return DecodedMessage(
+        message[len(V5_ID_STRING):HEAD_SIZE_V5], body, cmd_id, payload, Hash32(message_hash))
+
+
+def recover_signers(
+        signed_messages: Sequence[Tuple[bytes, bytes]]) -> Tuple[Optional[bytes], ...]:
+    """Recover the public keys that produced the given signatures over the given data.
+
+    Takes (signature, signed data) pairs and returns the public keys as bytes, or None for the
+    signatures that are invalid. Only bytes go in and out so that it's cheap to run in a worker
+    process.
+    """
+    signers: List[Optional[bytes]] = []
+    for signature, signed_data in signed_messages:
+        try:
+            pubkey = ECC_BACKEND.ecdsa_recover(
+                keccak(signed_data), keys.Signature(signature, backend=ECC_BACKEND))
+        except (BadSignature, KeysValidationError):
+            signers.append(None)
+        else:
+            signers.append(pubkey.to_bytes())
+    return tuple(signers)
 
 
 class CallbackLock:
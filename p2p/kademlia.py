@@ -1,5 +1,6 @@
 import bisect
 from functools import total_ordering
+import heapq
 import ipaddress
 import logging
 import operator
@@ -257,6 +258,9 @@ class RoutingTable:
         self._initialized_at = time.monotonic()
         self.this_node = node
         self.buckets = [KBucket(0, k_max_node_id)]
+        # The end of every bucket, in the same order as self.buckets, so that we can find the
+        # bucket for a given ID without going through all of them.
+        self._bucket_ends = [k_max_node_id]
 
     def get_random_nodes(self, count: int) -> Iterator[Node]:
         if count > len(self):
@@ -286,6 +290,7 @@ class RoutingTable:
         a, b = bucket.split()
         self.buckets[index] = a
         self.buckets.insert(index + 1, b)
+        self._bucket_ends[index:index + 1] = [a.end, b.end]
 
     @property
     def idle_buckets(self) -> List[KBucket]:
@@ -297,26 +302,27 @@ class RoutingTable:
         return [b for b in self.buckets if not b.is_full]
 
     def remove_node(self, node: Node) -> None:
-        binary_get_bucket_for_node(self.buckets, node).remove_node(node)
+        self.get_bucket_for_node(node).remove_node(node)
 
     def add_node(self, node: Node) -> Node:
         if node == self.this_node:
             raise ValueError("Cannot add this_node to routing table")
-        bucket = binary_get_bucket_for_node(self.buckets, node)
+        index = _bisect_buckets(self.buckets, self._bucket_ends, node.id)
+        bucket = self.buckets[index]
         eviction_candidate = bucket.add(node)
         if eviction_candidate is not None:  # bucket is full
             # Split if the bucket has the local node in its range or if the depth is not congruent
             # to 0 mod k_b
             depth = _compute_shared_prefix_bits(bucket.nodes)
             if bucket.in_range(self.this_node) or (depth % k_b != 0 and depth != k_id_size):
-                self.split_bucket(self.buckets.index(bucket))
+                self.split_bucket(index)
                 return self.add_node(node)  # retry
             # Nothing added, ping eviction_candidate
             return eviction_candidate
         return None  # successfully added to not full bucket
 
     def get_bucket_for_node(self, node: Node) -> KBucket:
-        return binary_get_bucket_for_node(self.buckets, node)
+        return self.buckets[_bisect_buckets(self.buckets, self._bucket_ends, node.id)]
 
     def buckets_by_distance_to(self, id: int) -> List[KBucket]:
         return sorted(self.buckets, key=operator.methodcaller('distance_to', id))
@@ -333,17 +339,31 @@ class RoutingTable:
                 yield n
 
     def neighbours(self, node_id: int, k: int = k_bucket_size) -> List[Node]:
-        """Return up to k neighbours of the given node."""
-        nodes = []
-        # Sorting by bucket.midpoint does not work in edge cases, so build a short list of k * 2
-        # nodes and sort it by distance_to.
-        for bucket in self.buckets_by_distance_to(node_id):
-            for n in bucket.nodes_by_distance_to(node_id):
-                if n is not node_id:
-                    nodes.append(n)
-                    if len(nodes) == k * 2:
-                        break
-        return sort_by_distance(nodes, node_id)[:k]
+        """Return up to k neighbours of the given node, closest first.
+
+        Buckets are only ever created by splitting the whole ID space in halves, so each of them
+        holds all IDs with a given prefix. Starting from the bucket where the given ID would be,
+        we widen the range of IDs we look at to the sibling of the prefix shared by that range,
+        one bit at a time. All IDs in the sibling are farther away than those in the range we
+        had already seen, so we can stop as soon as we've seen k nodes.
+        """
+        low = high = _bisect_buckets(self.buckets, self._bucket_ends, node_id)
+        range_start, range_end = self.buckets[low].start, self.buckets[low].end
+        candidates = list(self.buckets[low].nodes)
+        while len(candidates) < k and (range_start, range_end) != (0, k_max_node_id):
+            range_size = range_end - range_start + 1
+            if range_start & range_size:
+                # We're the upper half of the next range, so the sibling is on our left
+                range_start -= range_size
+                while low > 0 and self.buckets[low - 1].end >= range_start:
+                    low -= 1
+                    candidates.extend(self.buckets[low].nodes)
+            else:
+                range_end += range_size
+                while high < len(self.buckets) - 1 and self.buckets[high + 1].start <= range_end:
+                    high += 1
+                    candidates.extend(self.buckets[high].nodes)
+        return heapq.nsmallest(k, candidates, key=operator.methodcaller('distance_to', node_id))
 
 
 def check_relayed_addr(sender: Address, addr: Address) -> bool:
@@ -366,32 +386,34 @@ def check_relayed_addr(sender: Address, addr: Address) -> bool:
 def binary_get_bucket_for_node(buckets: List[KBucket], node: Node) -> KBucket:
     """Given a list of ordered buckets, returns the bucket for a given node."""
     bucket_ends = [bucket.end for bucket in buckets]
-    bucket_position = bisect.bisect_left(bucket_ends, node.id)
+    return buckets[_bisect_buckets(buckets, bucket_ends, node.id)]
+
+
+def _bisect_buckets(buckets: List[KBucket], bucket_ends: List[int], node_id: int) -> int:
+    """Return the position of the bucket for the given ID in a list of ordered buckets.
+
+    :param bucket_ends: The end of every bucket in the list.
+    """
+    bucket_position = bisect.bisect_left(bucket_ends, node_id)
     # Prevents edge cases where bisect_left returns an out of range index
-    try:
-        bucket = buckets[bucket_position]
-        assert bucket.start <= node.id <= bucket.end
-        return bucket
-    except (IndexError, AssertionError):
-        raise ValueError(f"No bucket found for node with id {node.id}")
+    if bucket_position < len(buckets) and buckets[bucket_position].start <= node_id:
+        return bucket_position
+    raise ValueError(f"No bucket found for node with id {node_id}")
 
 
 def _compute_shared_prefix_bits(nodes: List[Node]) -> int:
     """Count the number of prefix bits shared by all nodes."""
-    def to_binary(x: int) -> str:  # left padded bit representation
-        b = bin(x)[2:]
-        return '0' * (k_id_size - len(b)) + b
-
     if len(nodes) < 2:
         return k_id_size
 
-    bits = [to_binary(n.id) for n in nodes]
-    for i in range(1, k_id_size + 1):
-        if len(set(b[:i] for b in bits)) != 1:
-            return i - 1
-    # This means we have at least two nodes with the same ID, so raise an AssertionError
-    # because we don't want it to be caught accidentally.
-    raise AssertionError("Unable to calculate number of shared prefix bits")
+    # The bits shared by the lowest and highest IDs are shared by all of them
+    ids = [n.id for n in nodes]
+    lowest, highest = min(ids), max(ids)
+    if lowest == highest:
+        # This means we have at least two nodes with the same ID, so raise an AssertionError
+        # because we don't want it to be caught accidentally.
+        raise AssertionError("Unable to calculate number of shared prefix bits")
+    return k_id_size - (lowest ^ highest).bit_length()
 
 
 def sort_by_distance(nodes: List[Node], target_id: int) -> List[Node]:
@@ -2,18 +2,20 @@ import asyncio
 import collections
 import contextlib
 import datetime
+import enum
 import functools
 import logging
-import operator
-import struct
+import time
 from abc import (
     ABC,
     abstractmethod
 )
 
+from concurrent.futures import Executor
 from typing import (
     Any,
     cast,
+    Deque,
     Dict,
     Iterator,
     List,
@@ -28,10 +30,6 @@ import sha3
 
 import rlp
 
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives.constant_time import bytes_eq
-
 from eth_utils import (
     to_tuple,
 )
@@ -39,7 +37,7 @@ from eth_utils import (
 
 from eth_keys import datatypes
 
-from cancel_token import CancelToken
+from cancel_token import CancelToken, OperationCancelled
 
 from p2p import auth
 from p2p import protocol
@@ -58,11 +56,10 @@ from p2p.exceptions import (
     UnknownProtocolCommand,
     UnreachablePeer,
 )
+from p2p.rlpx import RLPxFrameCodec
 from p2p.service import BaseService
 from p2p._utils import (
     get_devp2p_cmd_id,
-    roundup_16,
-    sxor,
     time_since,
 )
 from p2p.p2p_proto import (
@@ -76,8 +73,6 @@ from p2p.p2p_proto import (
 
 from .constants import (
     CONN_IDLE_TIMEOUT,
-    HEADER_LEN,
-    MAC_LEN,
     SNAPPY_PROTOCOL_VERSION,
 )
 
@@ -85,7 +80,9 @@ if TYPE_CHECKING:
     from p2p.peer_pool import BasePeerPool  # noqa: F401
 
 
-async def handshake(remote: Node, factory: 'BasePeerFactory') -> 'BasePeer':
+async def handshake(remote: Node,
+                    factory: 'BasePeerFactory',
+                    executor: auth.HandshakeExecutor = None) -> 'BasePeer':
     """Perform the auth and P2P handshakes with the given remote.
 
     Return an instance of the given peer_class (must be a subclass of
@@ -97,7 +94,12 @@ async def handshake(remote: Node, factory: 'BasePeerFactory') -> 'BasePeer':
     HandshakeFailure if the remote disconnects before completing the
     handshake or if none of the sub-protocols supported by us is also
     supported by the remote.
+
+    The elliptic curve work of the auth handshake is done in the given executor, which also
+    records how long each stage of the handshake takes.
     """
+    if executor is None:
+        executor = auth.HandshakeExecutor(max_workers=0)
     try:
         (aes_secret,
          mac_secret,
@@ -105,7 +107,7 @@ async def handshake(remote: Node, factory: 'BasePeerFactory') -> 'BasePeer':
          ingress_mac,
          reader,
          writer
-         ) = await auth.handshake(remote, factory.privkey, factory.cancel_token)
+         ) = await auth.handshake(remote, factory.privkey, factory.cancel_token, executor)
     except (ConnectionRefusedError, OSError) as e:
         raise UnreachablePeer(f"Can't reach {remote!r}") from e
     connection = PeerConnection(
@@ -123,8 +125,10 @@ async def handshake(remote: Node, factory: 'BasePeerFactory') -> 'BasePeer':
     )
 
     try:
-        await peer.do_p2p_handshake()
-        await peer.do_sub_proto_handshake()
+        with executor.timed('p2p_handshake'):
+            await peer.do_p2p_handshake()
+        with executor.timed('sub_proto_handshake'):
+            await peer.do_sub_proto_handshake()
     except Exception:
         # Note: This is one of two places where we manually handle closing the
         # reader/writer connection pair in the event of an error during the
@@ -165,6 +169,17 @@ class BasePeerContext:
     pass
 
 
+class CongestionPolicy(enum.Enum):
+    """
+    What to do with a peer that has been congested, with more outbound data queued than its
+    outbound_high_water, for longer than its max_congestion_time.
+    """
+    # Drop the messages we send it until it catches up.
+    drop = 1
+    # Disconnect from it.
+    disconnect = 2
+
+
 class BasePeer(BaseService):
     conn_idle_timeout = CONN_IDLE_TIMEOUT
     # Must be defined in subclasses. All items here must be Protocol classes representing
@@ -174,6 +189,22 @@ class BasePeer(BaseService):
     listen_port = 30303
     # Will be set upon the successful completion of a P2P handshake.
     sub_proto: protocol.Protocol = None
+    # How much we try to read from the connection at once. We may get less, but we decrypt all
+    # the frames that we get in one go.
+    read_chunk_size = 64 * 1024
+    # Outbound messages are queued and written by a background task, which waits for the
+    # transport to drain before writing more, and then writes all the messages that queued up in
+    # the meantime at once. A peer is congested once more than outbound_high_water bytes are
+    # queued, until it gets below outbound_low_water again.
+    outbound_high_water = 4 * 1024 * 1024
+    outbound_low_water = 1024 * 1024
+    max_congestion_time = 30
+    congestion_policy = CongestionPolicy.disconnect
+    # How much we write to the transport at once, at most, unless a single message is larger.
+    max_coalesced_write_size = 256 * 1024
+    # Messages of commands that are slow to decode are decoded in the executor returned by
+    # get_msg_decoding_executor() when they are at least this large, before being decompressed.
+    min_offloaded_msg_size = 64 * 1024
 
     def __init__(self,
                  remote: Node,
@@ -182,7 +213,12 @@ class BasePeer(BaseService):
                  context: BasePeerContext,
                  inbound: bool = False,
                  token: CancelToken = None,
+                 frame_decryption_executor: Executor = None,
                  ) -> None:
+        """
+        :param frame_decryption_executor: A thread pool to decrypt large frames in, so that the
+        event loop is free to serve other peers in the meantime.
+        """
         super().__init__(token)
 
         # Any contextual information the peer may need.
@@ -221,23 +257,47 @@ class BasePeer(BaseService):
         self.received_msgs: Dict[protocol.Command, int] = collections.defaultdict(int)
 
         # Encryption and Cryptography *stuff*
-        self.egress_mac = connection.egress_mac
-        self.ingress_mac = connection.ingress_mac
-        # FIXME: Insecure Encryption: https://github.com/ethereum/devp2p/issues/32
-        iv = b"\x00" * 16
-        aes_secret = connection.aes_secret
-        mac_secret = connection.mac_secret
-        aes_cipher = Cipher(algorithms.AES(aes_secret), modes.CTR(iv), default_backend())
-        self.aes_enc = aes_cipher.encryptor()
-        self.aes_dec = aes_cipher.decryptor()
-        mac_cipher = Cipher(algorithms.AES(mac_secret), modes.ECB(), default_backend())
-        self.mac_enc = mac_cipher.encryptor().update
+        self.codec = RLPxFrameCodec(
+            connection.aes_secret,
+            connection.mac_secret,
+            connection.egress_mac,
+            connection.ingress_mac,
+            executor=frame_decryption_executor,
+        )
+        # Frames we've read and decrypted but whose messages haven't been decoded yet.
+        self._frames: Deque[bytes] = collections.deque()
+
+        # Headers and bodies of the messages waiting to be encrypted and written to the
+        # transport, and how we've been keeping up with writing them.
+        self._outbound: Deque[Tuple[bytes, bytes]] = collections.deque()
+        self._outbound_size = 0
+        self._outbound_writer: 'asyncio.Future[None]' = None
+        self._congested_since: float = None
+        self.sent_msgs_count = 0
+        self.sent_bytes_count = 0
+        self.writes_count = 0
+        self.dropped_msgs_count = 0
+        self.max_outbound_size = 0
 
         # Manages the boot process
         self.boot_manager = self.get_boot_manager()
 
     def get_extra_stats(self) -> List[str]:
-        return []
+        return [
+            f"outbound: {self.sent_msgs_count} msgs, {self.sent_bytes_count} bytes in "
+            f"{self.writes_count} writes, {self.dropped_msgs_count} msgs dropped, "
+            f"{self._outbound_size} bytes queued (max {self.max_outbound_size})"
+        ]
+
+    @property
+    def is_congested(self) -> bool:
+        return self._congested_since is not None
+
+    @property
+    def congested_for(self) -> float:
+        if self._congested_since is None:
+            return 0
+        return time.monotonic() - self._congested_since
 
     @property
     def boot_manager_class(self) -> Type[BasePeerBootManager]:
@@ -344,12 +404,30 @@ class BasePeer(BaseService):
         else:
             raise UnknownProtocolCommand(f"No protocol found for cmd_id {cmd_id}")
 
-    async def read(self, n: int) -> bytes:
-        self.logger.debug2("Waiting for %s bytes from %s", n, self.remote)
+    async def read_frames(self) -> None:
+        """
+        Read whatever the remote has sent us, but at least enough for the next frame (or the header
+        of it) to be complete, and decrypt all the frames that are.
+        """
+        n = max(self.codec.bytes_needed, self.read_chunk_size)
+        self.logger.debug2("Waiting for up to %s bytes from %s", n, self.remote)
         try:
-            return await self.wait(self.reader.readexactly(n), timeout=self.conn_idle_timeout)
-        except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError) as e:
+            data = await self.wait(self.reader.read(n), timeout=self.conn_idle_timeout)
+        except (ConnectionResetError, BrokenPipeError) as e:
             raise PeerConnectionLost(repr(e))
+        if not data:
+            raise PeerConnectionLost(f"{self.remote} closed the connection")
+
+        self.codec.feed(data)
+        try:
+            frames = await self.codec.decode_frames()
+        except DecryptionError as err:
+            self.logger.debug(
+                "Bad message from peer %s: Error: %r",
+                self, err,
+            )
+            raise MalformedMessage from err
+        self._frames.extend(frames)
 
     def close(self) -> None:
         """Close this peer's reader/writer streams.
@@ -360,6 +438,9 @@ class BasePeer(BaseService):
         """
         if not self.reader.at_eof():
             self.reader.feed_eof()
+        if self._outbound and not self.is_closing:
+            # Hand whatever is still queued to the transport, which flushes it before closing.
+            self._write_outbound(self._outbound_size)
         self.writer.close()
 
     @property
@@ -368,6 +449,8 @@ class BasePeer(BaseService):
 
     async def _cleanup(self) -> None:
         self.close()
+        if self._outbound_writer is not None:
+            self._outbound_writer.cancel()
 
     async def _run(self) -> None:
         # The `boot` process is run in the background to allow the `run` loop
@@ -399,35 +482,12 @@ class BasePeer(BaseService):
                 return
 
     async def read_msg(self) -> Tuple[protocol.Command, protocol.PayloadType]:
-        header_data = await self.read(HEADER_LEN + MAC_LEN)
-        try:
-            header = self.decrypt_header(header_data)
-        except DecryptionError as err:
-            self.logger.debug(
-                "Bad message header from peer %s: Error: %r",
-                self, err,
-            )
-            raise MalformedMessage from err
-        frame_size = self.get_frame_size(header)
-        # The frame_size specified in the header does not include the padding to 16-byte boundary,
-        # so need to do this here to ensure we read all the frame's data.
-        read_size = roundup_16(frame_size)
-        frame_data = await self.read(read_size + MAC_LEN)
-        try:
-            msg = self.decrypt_body(frame_data, frame_size)
-        except DecryptionError as err:
-            self.logger.debug(
-                "Bad message body from peer %s: Error: %r",
-                self, err,
-            )
-            raise MalformedMessage from err
+        while not self._frames:
+            await self.read_frames()
+        msg = self._frames.popleft()
         cmd = self.get_protocol_command_for(msg)
-        # NOTE: This used to be a bottleneck but it doesn't seem to be so anymore. If we notice
-        # too much time is being spent on this again, we need to consider running this in a
-        # ProcessPoolExecutor(). Need to make sure we don't use all CPUs in the machine for that,
-        # though, otherwise asyncio's event loop can't run and we can't keep up with other peers.
         try:
-            decoded_msg = cast(Dict[str, Any], cmd.decode(msg))
+            decoded_msg = cast(Dict[str, Any], await self.decode_msg(cmd, msg))
         except MalformedMessage as err:
             self.logger.debug(
                 "Malformed message from peer %s: CMD:%s Error: %r",
@@ -439,6 +499,33 @@ class BasePeer(BaseService):
             self.received_msgs[cmd] += 1
             return cmd, decoded_msg
 
+    async def decode_msg(self, cmd: protocol.Command, msg: bytes) -> protocol.PayloadType:
+        """
+        Decode the given message, in the executor returned by get_msg_decoding_executor() if it's
+        a large one of a command that is slow to decode.
+
+        We don't read any more messages from this peer until this returns, so they are still
+        processed in the order they were sent, but the event loop is free to serve other peers.
+        """
+        if not cmd.is_decoding_slow or len(msg) < self.min_offloaded_msg_size:
+            return cmd.decode(msg)
+        executor = self.get_msg_decoding_executor()
+        if executor is None:
+            return cmd.decode(msg)
+        self.logger.debug2("Decoding %s msg of %d bytes in %s", cmd, len(msg), executor)
+        loop = asyncio.get_event_loop()
+        return await self.wait(loop.run_in_executor(executor, cmd.decode, msg))
+
+    def get_msg_decoding_executor(self) -> Executor:
+        """
+        Return the executor to decode large messages in, or None to decode them all in the event
+        loop.
+
+        It must not use all the CPUs in the machine, otherwise asyncio's event loop can't run and
+        we can't keep up with other peers.
+        """
+        return None
+
     def handle_p2p_msg(self, cmd: protocol.Command, msg: protocol.PayloadType) -> None:
         """Handle the base protocol (P2P) messages."""
         if isinstance(cmd, Disconnect):
@@ -517,70 +604,6 @@ class BasePeer(BaseService):
             "Finished P2P handshake with %s, using sub-protocol %s",
             self.remote, self.sub_proto)
 
-    def encrypt(self, header: bytes, frame: bytes) -> bytes:
-        if len(header) != HEADER_LEN:
-            raise ValueError(f"Unexpected header length: {len(header)}")
-
-        header_ciphertext = self.aes_enc.update(header)
-        mac_secret = self.egress_mac.digest()[:HEADER_LEN]
-        self.egress_mac.update(sxor(self.mac_enc(mac_secret), header_ciphertext))
-        header_mac = self.egress_mac.digest()[:HEADER_LEN]
-
-        frame_ciphertext = self.aes_enc.update(frame)
-        self.egress_mac.update(frame_ciphertext)
-        fmac_seed = self.egress_mac.digest()[:HEADER_LEN]
-
-        mac_secret = self.egress_mac.digest()[:HEADER_LEN]
-        self.egress_mac.update(sxor(self.mac_enc(mac_secret), fmac_seed))
-        frame_mac = self.egress_mac.digest()[:HEADER_LEN]
-
-        return header_ciphertext + header_mac + frame_ciphertext + frame_mac
-
-    def decrypt_header(self, data: bytes) -> bytes:
-        if len(data) != HEADER_LEN + MAC_LEN:
-            raise ValueError(
-                f"Unexpected header length: {len(data)}, expected {HEADER_LEN} + {MAC_LEN}"
-            )
-
-        header_ciphertext = data[:HEADER_LEN]
-        header_mac = data[HEADER_LEN:]
-        mac_secret = self.ingress_mac.digest()[:HEADER_LEN]
-        aes = self.mac_enc(mac_secret)[:HEADER_LEN]
-        self.ingress_mac.update(sxor(aes, header_ciphertext))
-        expected_header_mac = self.ingress_mac.digest()[:HEADER_LEN]
-        if not bytes_eq(expected_header_mac, header_mac):
-            raise DecryptionError(
-                f'Invalid header mac: expected {expected_header_mac}, got {header_mac}'
-            )
-        return self.aes_dec.update(header_ciphertext)
-
-    def decrypt_body(self, data: bytes, body_size: int) -> bytes:
-        read_size = roundup_16(body_size)
-        if len(data) < read_size + MAC_LEN:
-            raise ValueError(
-                f'Insufficient body length; Got {len(data)}, wanted {read_size} + {MAC_LEN}'
-            )
-
-        frame_ciphertext = data[:read_size]
-        frame_mac = data[read_size:read_size + MAC_LEN]
-
-        self.ingress_mac.update(frame_ciphertext)
-        fmac_seed = self.ingress_mac.digest()[:MAC_LEN]
-        self.ingress_mac.update(sxor(self.mac_enc(fmac_seed), fmac_seed))
-        expected_frame_mac = self.ingress_mac.digest()[:MAC_LEN]
-        if not bytes_eq(expected_frame_mac, frame_mac):
-            raise DecryptionError(
-                f'Invalid frame mac: expected {expected_frame_mac}, got {frame_mac}'
-            )
-        return self.aes_dec.update(frame_ciphertext)[:body_size]
-
-    def get_frame_size(self, header: bytes) -> int:
-        # The frame size is encoded in the header as a 3-byte int, so before we unpack we need
-        # to prefix it with an extra byte.
-        encoded_size = b'\x00' + header[:3]
-        (size,) = struct.unpack(b'>I', encoded_size)
-        return size
-
     def send(self, header: bytes, body: bytes) -> None:
         cmd_id = rlp.decode(body[:1], sedes=rlp.sedes.big_endian_int)
         self.logger.debug2("Sending msg with cmd id %d to %s", cmd_id, self)
@@ -588,7 +611,68 @@ class BasePeer(BaseService):
             self.logger.error(
                 "Attempted to send msg with cmd id %d to disconnected peer %s", cmd_id, self)
             return
-        self.writer.write(self.encrypt(header, body))
+
+        if self.is_congested and self.congested_for > self.max_congestion_time:
+            if self.congestion_policy is CongestionPolicy.drop:
+                self.logger.debug2(
+                    "Dropping msg with cmd id %d to congested peer %s", cmd_id, self)
+                self.dropped_msgs_count += 1
+                return
+            self.logger.debug(
+                "%s has had more than %d bytes queued for %ds, disconnecting",
+                self, self.outbound_high_water, self.max_congestion_time,
+            )
+            # There's no point in writing out what's queued, but we still want to tell it why
+            # we're disconnecting.
+            self.dropped_msgs_count += len(self._outbound) + 1
+            self._outbound.clear()
+            self._outbound_size = 0
+            self._update_congestion()
+            self.disconnect_nowait(DisconnectReason.timeout)
+            return
+
+        self._outbound.append((header, body))
+        self._outbound_size += len(header) + len(body)
+        self.max_outbound_size = max(self.max_outbound_size, self._outbound_size)
+        self._update_congestion()
+        if self._outbound_writer is None or self._outbound_writer.done():
+            self._outbound_writer = asyncio.ensure_future(self._write_outbound_until_empty())
+
+    async def _write_outbound_until_empty(self) -> None:
+        while self._outbound and not self.is_closing:
+            self._write_outbound(self.max_coalesced_write_size)
+            try:
+                await self.wait(self.writer.drain())
+            except (OperationCancelled, ConnectionResetError, BrokenPipeError):
+                # The peer is going away, and close() writes out whatever is left.
+                return
+
+    def _write_outbound(self, max_size: int) -> None:
+        """
+        Encrypt queued messages, until their total size reaches max_size or there are no more, and
+        write them to the transport at once.
+        """
+        size = 0
+        frames: List[bytes] = []
+        while self._outbound and size < max_size:
+            header, body = self._outbound.popleft()
+            size += len(header) + len(body)
+            frames.append(self.codec.encrypt(header, body))
+        self.writer.write(b''.join(frames))
+        self._outbound_size -= size
+        self.sent_msgs_count += len(frames)
+        self.sent_bytes_count += size
+        self.writes_count += 1
+        self._update_congestion()
+
+    def _update_congestion(self) -> None:
+        if self._outbound_size > self.outbound_high_water:
+            if self._congested_since is None:
+                self.logger.debug(
+                    "%s is congested, with %d bytes queued", self, self._outbound_size)
+                self._congested_since = time.monotonic()
+        elif self._outbound_size < self.outbound_low_water:
+            self._congested_since = None
 
     def _disconnect(self, reason: DisconnectReason) -> None:
         if not isinstance(reason, DisconnectReason):
@@ -623,22 +707,24 @@ class BasePeer(BaseService):
                             snappy_support: bool) -> protocol.Protocol:
         """Select the sub-protocol to use when talking to the remote.
 
-        Find the highest version of our supported sub-protocols that is also supported by the
+        Find the most preferred of our supported sub-protocols that is also supported by the
         remote and stores an instance of it (with the appropriate cmd_id offset) in
-        self.sub_proto.
+        self.sub_proto. Sub-protocols are listed in ``_supported_sub_protocols`` in order of
+        preference, the most preferred (usually the highest version) last.
 
         Raises NoMatchingPeerCapabilities if none of our supported protocols match one of the
         remote's protocols.
         """
-        matching_capabilities = set(self.capabilities).intersection(remote_capabilities)
-        if not matching_capabilities:
+        remote_capabilities_set = set(remote_capabilities)
+        matching_protocols = [
+            proto_class
+            for proto_class in self._supported_sub_protocols
+            if (proto_class.name, proto_class.version) in remote_capabilities_set
+        ]
+        if not matching_protocols:
             raise NoMatchingPeerCapabilities()
-        _, highest_matching_version = max(matching_capabilities, key=operator.itemgetter(1))
         offset = self.base_protocol.cmd_length
-        for proto_class in self._supported_sub_protocols:
-            if proto_class.version == highest_matching_version:
-                return proto_class(self, offset, snappy_support)
-        raise NoMatchingPeerCapabilities()
+        return matching_protocols[-1](self, offset, snappy_support)
 
     def __str__(self) -> str:
         return f"{self.__class__.__name__} {self.remote}"
@@ -817,10 +903,12 @@ class BasePeerFactory(ABC):
     def __init__(self,
                  privkey: datatypes.PrivateKey,
                  context: BasePeerContext,
-                 token: CancelToken) -> None:
+                 token: CancelToken,
+                 frame_decryption_executor: Executor = None) -> None:
         self.privkey = privkey
         self.context = context
         self.cancel_token = token
+        self.frame_decryption_executor = frame_decryption_executor
 
     def create_peer(self,
                     remote: Node,
@@ -833,4 +921,5 @@ class BasePeerFactory(ABC):
             context=self.context,
             inbound=inbound,
             token=self.cancel_token,
+            frame_decryption_executor=self.frame_decryption_executor,
         )
@@ -2,6 +2,10 @@ from abc import (
     abstractmethod,
 )
 import asyncio
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+)
 import operator
 from typing import (
     AsyncIterator,
@@ -10,6 +14,7 @@ from typing import (
     Dict,
     Iterator,
     List,
+    Set,
     Tuple,
     Type,
 )
@@ -36,6 +41,9 @@ from p2p.constants import (
     DISOVERY_INTERVAL,
     REQUEST_PEER_CANDIDATE_TIMEOUT,
 )
+from p2p.auth import (
+    HandshakeExecutor,
+)
 from p2p.events import (
     ConnectToNodeCommand,
     PeerCandidatesRequest,
@@ -83,6 +91,14 @@ class BasePeerPool(BaseService, AsyncIterable[BasePeer]):
     """
     _report_interval = 60
     _peer_boot_timeout = DEFAULT_PEER_BOOT_TIMEOUT
+    # The number of threads doing the elliptic curve work of auth handshakes, for both the
+    # connections we make and, via our server, the ones we accept.
+    max_handshake_workers = 2
+    # The number of nodes we dial at any time, until they have booted or we give up on them.
+    max_concurrent_dials = 32
+    # The number of threads our peers decrypt large frames in, or 0 to decrypt them on the
+    # event loop.
+    max_frame_decryption_workers = 1
 
     def __init__(self,
                  privkey: datatypes.PrivateKey,
@@ -106,6 +122,13 @@ class BasePeerPool(BaseService, AsyncIterable[BasePeer]):
         self.connected_nodes: Dict[Node, BasePeer] = {}
         self._subscribers: List[PeerSubscriber] = []
         self.event_bus = event_bus
+        self.handshake_executor = HandshakeExecutor(
+            self.max_handshake_workers, self.max_concurrent_dials)
+        if self.max_frame_decryption_workers:
+            self.frame_decryption_executor: Executor = ThreadPoolExecutor(
+                self.max_frame_decryption_workers, thread_name_prefix='p2p-frame-decryption')
+        else:
+            self.frame_decryption_executor = None
 
     async def accept_connect_commands(self) -> None:
         async for command in self.wait_iter(self.event_bus.stream(ConnectToNodeCommand)):
@@ -172,6 +195,7 @@ class BasePeerPool(BaseService, AsyncIterable[BasePeer]):
             privkey=self.privkey,
             context=self.context,
             token=self.cancel_token,
+            frame_decryption_executor=self.frame_decryption_executor,
         )
 
     @property
@@ -254,6 +278,9 @@ class BasePeerPool(BaseService, AsyncIterable[BasePeer]):
 
     async def _cleanup(self) -> None:
         await self.stop_all_peers()
+        self.handshake_executor.shutdown()
+        if self.frame_decryption_executor is not None:
+            self.frame_decryption_executor.shutdown(wait=False)
 
     async def connect(self, remote: Node) -> BasePeer:
         """
@@ -274,7 +301,8 @@ class BasePeerPool(BaseService, AsyncIterable[BasePeer]):
             self.logger.debug2("Connecting to %s...", remote)
             # We use self.wait() as well as passing our CancelToken to handshake() as a workaround
             # for https://github.com/ethereum/py-evm/issues/670.
-            peer = await self.wait(handshake(remote, self.get_peer_factory()))
+            peer = await self.wait(
+                handshake(remote, self.get_peer_factory(), self.handshake_executor))
 
             return peer
         except OperationCancelled:
@@ -302,16 +330,37 @@ class BasePeerPool(BaseService, AsyncIterable[BasePeer]):
         return None
 
     async def connect_to_nodes(self, nodes: Iterator[Node]) -> None:
-        for node in nodes:
-            if self.is_full or not self.is_operational:
-                return
-
-            # TODO: Consider changing connect() to raise an exception instead of returning None,
-            # as discussed in
-            # https://github.com/ethereum/py-evm/pull/139#discussion_r152067425
-            peer = await self.connect(node)
-            if peer is not None:
-                await self.start_peer(peer)
+        """
+        Dial the given nodes, up to max_concurrent_dials at a time across all calls, and start
+        the peers we complete the handshake with. Returns once all of them are done.
+        """
+        dials: Set['asyncio.Future[None]'] = set()
+        try:
+            for node in nodes:
+                if self.is_full or not self.is_operational:
+                    break
+                await self.wait(self.handshake_executor.dial_slots.acquire())
+                dial = asyncio.ensure_future(self._dial(node))
+                dial.add_done_callback(lambda _: self.handshake_executor.dial_slots.release())
+                dials.add(dial)
+            if dials:
+                await self.wait(asyncio.gather(*dials))
+        finally:
+            for dial in dials:
+                dial.cancel()
+
+    async def _dial(self, node: Node) -> None:
+        # TODO: Consider changing connect() to raise an exception instead of returning None,
+        # as discussed in
+        # https://github.com/ethereum/py-evm/pull/139#discussion_r152067425
+        peer = await self.connect(node)
+        if peer is None:
+            return
+        elif self.is_full:
+            # Other dials may have filled the pool while we were doing the handshake.
+            await peer.disconnect(DisconnectReason.too_many_peers)
+        else:
+            await self.start_peer(peer)
 
     def _peer_finished(self, peer: BaseService) -> None:
         """Remove the given peer from our list of connected nodes.
@@ -336,6 +385,16 @@ class BasePeerPool(BaseService, AsyncIterable[BasePeer]):
                 [peer for peer in self.connected_nodes.values() if peer.inbound])
             self.logger.info("Connected peers: %d inbound, %d outbound",
                              inbound_peers, (len(self.connected_nodes) - inbound_peers))
+            handshake_latencies = self.handshake_executor.get_stage_latencies()
+            if handshake_latencies:
+                self.logger.debug(
+                    "Handshake stage latencies: %s",
+                    ", ".join(
+                        f"{latency.stage}={latency.mean * 1000:.0f}ms"
+                        f"(max {latency.max * 1000:.0f}ms, n={latency.samples})"
+                        for latency in handshake_latencies
+                    ),
+                )
             subscribers = len(self._subscribers)
             if subscribers:
                 longest_queue = max(
@@ -4,11 +4,16 @@ import datetime
 import functools
 from pathlib import Path
 import sqlite3
-from typing import Any, Callable, TypeVar, cast, Dict, Type, Optional
+import threading
+import time
+from typing import Any, Callable, TypeVar, cast, Dict, NamedTuple, Tuple, Type, Optional
+
+from eth_keys import keys
+from eth_utils import decode_hex
 
 from trinity._utils.logging import HasExtendedDebugLogger
 
-from p2p.kademlia import Node
+from p2p.kademlia import Address, Node
 from p2p.exceptions import (
     BadDatabaseError,
     BaseP2PError,
@@ -90,15 +95,40 @@ def must_be_open(func: T) -> T:
 
 
 class SQLitePeerInfo(BasePeerInfo):
+    """
+    Keeps every bad node in memory, so that we can check dial candidates without going to the
+    database, and writes the failures we record to it in batches, from a background thread,
+    every ``flush_interval`` seconds.
+    """
+    flush_interval = 30
+
     def __init__(self, path: Path) -> None:
         self.path = path
         self.closed = False
 
+        # Bad nodes that changed since we last flushed, by whether they are already in the db,
+        # guarded by _pending_lock as they are written from another thread.
+        self._pending_inserts: Dict[str, BadNode] = {}
+        self._pending_updates: Dict[str, BadNode] = {}
+        self._pending_lock = threading.Lock()
+        # The connection is used from the flusher thread as well, but only by one thread at a
+        # time, holding _db_lock.
+        self._db_lock = threading.Lock()
+        self._closing = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._periodically_flush, name=f'{self}-flusher', daemon=True)
+
         # python 3.6 does not support sqlite3.connect(Path)
-        self.db = sqlite3.connect(str(self.path))
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
         self.db.row_factory = sqlite3.Row
         self.setup_schema()
 
+        self._bad_nodes: Dict[str, BadNode] = {
+            row['enode']: BadNode(row['enode'], row['until'], row['reason'], row['error_count'])
+            for row in self.db.execute('SELECT * FROM bad_nodes')
+        }
+        self._flusher.start()
+
     def __str__(self) -> str:
         return f'<SQLitePeerInfo({self.path})>'
 
@@ -116,7 +146,7 @@ class SQLitePeerInfo(BasePeerInfo):
     @must_be_open
     def _record_bad_node(self, remote: Node, timeout: int, reason: str) -> None:
         enode = remote.uri()
-        bad_node = self._fetch_bad_node(remote)
+        bad_node = self._bad_nodes.get(enode)
         now = datetime.datetime.utcnow()
         if bad_node:
             new_error_count = bad_node.error_count + 1
@@ -154,47 +184,92 @@ class SQLitePeerInfo(BasePeerInfo):
         return True
 
     def _fetch_bad_node(self, remote: Node) -> Optional[BadNode]:
-        enode = remote.uri()
-        cursor = self.db.execute('SELECT * from bad_nodes WHERE enode = ?', (enode,))
-        row = cursor.fetchone()
-        if not row:
-            return None
-        result = BadNode(row['enode'], row['until'], row['reason'], row['error_count'])
-        return result
+        return self._bad_nodes.get(remote.uri())
 
     def _insert_bad_node(self,
                          enode: str,
                          until: datetime.datetime,
                          reason: str,
                          error_count: int) -> None:
-        with self.db:
-            self.db.execute(
-                '''
-                INSERT INTO bad_nodes (enode, until, reason, error_count)
-                VALUES (?, ?, ?, ?)
-                ''',
-                (enode, time_to_str(until), reason, error_count),
-            )
+        bad_node = BadNode(enode, time_to_str(until), reason, error_count)
+        self._bad_nodes[enode] = bad_node
+        with self._pending_lock:
+            self._pending_inserts[enode] = bad_node
 
     def _update_bad_node(self,
                          enode: str,
                          until: datetime.datetime,
                          reason: str,
                          error_count: int) -> None:
-        with self.db:
-            self.db.execute(
-                '''
-                UPDATE bad_nodes
-                SET until = ?, reason = ?, error_count = ?
-                WHERE enode = ?
-                ''',
-                (time_to_str(until), reason, error_count, enode),
-            )
+        bad_node = BadNode(enode, time_to_str(until), reason, error_count)
+        self._bad_nodes[enode] = bad_node
+        with self._pending_lock:
+            if enode in self._pending_inserts:
+                # We haven't written it yet
+                self._pending_inserts[enode] = bad_node
+            else:
+                self._pending_updates[enode] = bad_node
+
+    def _periodically_flush(self) -> None:
+        while not self._closing.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                self.logger.exception("Failed to write bad nodes to %s", self.path)
+
+    def flush(self) -> None:
+        """
+        Write the failures recorded since the last flush to the database, in one transaction.
+        """
+        with self._db_lock:
+            if self.closed:
+                return
+            # Take the pending changes, so that we don't hold up record_failure() while we write
+            with self._pending_lock:
+                inserts, self._pending_inserts = self._pending_inserts, {}
+                updates, self._pending_updates = self._pending_updates, {}
+            if not inserts and not updates:
+                return
+            try:
+                with self.db:
+                    self.db.executemany(
+                        '''
+                        INSERT INTO bad_nodes (enode, until, reason, error_count)
+                        VALUES (?, ?, ?, ?)
+                        ''',
+                        inserts.values(),
+                    )
+                    self.db.executemany(
+                        '''
+                        UPDATE bad_nodes
+                        SET until = ?, reason = ?, error_count = ?
+                        WHERE enode = ?
+                        ''',
+                        ((until, reason, error_count, enode)
+                         for enode, until, reason, error_count in updates.values()),
+                    )
+            except sqlite3.Error:
+                # Put them back to be retried, unless they changed again meanwhile
+                with self._pending_lock:
+                    for enode, bad_node in inserts.items():
+                        if enode in self._pending_updates:
+                            bad_node = self._pending_updates.pop(enode)
+                        self._pending_inserts.setdefault(enode, bad_node)
+                    for enode, bad_node in updates.items():
+                        self._pending_updates.setdefault(enode, bad_node)
+                raise
 
     def close(self) -> None:
-        self.db.close()
-        self.db = None
-        self.closed = True
+        if self.closed:
+            return
+        self._closing.set()
+        if self._flusher.is_alive():
+            self._flusher.join()
+        self.flush()
+        with self._db_lock:
+            self.db.close()
+            self.db = None
+            self.closed = True
 
     @must_be_open
     def setup_schema(self) -> None:
@@ -250,3 +325,151 @@ class MemoryPeerInfo(SQLitePeerInfo):
 
     def __str__(self) -> str:
         return '<MemoryPeerInfo()>'
+
+
+class NodeStats(NamedTuple):
+    # When we last got a pong from the node, as returned by time.time()
+    last_pong: float
+    # The number of pongs we got from it
+    pongs: int
+    # The number of pings it failed to reply to since its last pong
+    failures: int
+
+
+class BaseNodeStore(ABC, HasExtendedDebugLogger):
+    """
+    Nodes we have bonded with during discovery, kept across restarts so that we have someone to
+    connect to without waiting for a lookup.
+    """
+    # Nodes that fail to reply to this many consecutive pings are forgotten
+    max_failures = 5
+    # Nodes we haven't heard from in this many seconds are not worth retrying
+    max_age = 5 * ONE_DAY
+
+    @abstractmethod
+    def record_pong(self, node: Node) -> None:
+        pass
+
+    @abstractmethod
+    def record_failure(self, node: Node) -> None:
+        pass
+
+    @abstractmethod
+    def get_seed_nodes(self, count: int) -> Tuple[Node, ...]:
+        """
+        Return up to ``count`` nodes that replied to a ping within the last ``max_age`` seconds,
+        the most recently seen first.
+        """
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Persist everything that was recorded so far.
+        """
+        pass
+
+
+class NoopNodeStore(BaseNodeStore):
+    def record_pong(self, node: Node) -> None:
+        pass
+
+    def record_failure(self, node: Node) -> None:
+        pass
+
+    def get_seed_nodes(self, count: int) -> Tuple[Node, ...]:
+        return tuple()
+
+    def flush(self) -> None:
+        pass
+
+
+class SQLiteNodeStore(BaseNodeStore):
+    """
+    Keeps the stats of every node in memory and only writes those that changed when flushed, as
+    discovery pings nodes far too often to go to the database every time.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+        # python 3.6 does not support sqlite3.connect(Path)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS nodes (
+                    pubkey TEXT PRIMARY KEY, ip TEXT, udp_port INTEGER, tcp_port INTEGER,
+                    last_pong REAL, pongs INTEGER, failures INTEGER
+                )
+                """
+            )
+            self.db.execute('DELETE FROM nodes WHERE last_pong < ?', (time.time() - self.max_age,))
+        self._nodes: Dict[Node, NodeStats] = {}
+        for row in self.db.execute('SELECT * FROM nodes'):
+            pubkey = keys.PublicKey(decode_hex(row['pubkey']))
+            address = Address(row['ip'], row['udp_port'], row['tcp_port'])
+            stats = NodeStats(row['last_pong'], row['pongs'], row['failures'])
+            self._nodes[Node(pubkey, address)] = stats
+        # Nodes whose stats changed since we last flushed, with None for those we forgot
+        self._changed: Dict[Node, Optional[NodeStats]] = {}
+
+    def __str__(self) -> str:
+        return f'<SQLiteNodeStore({self.path})>'
+
+    def record_pong(self, node: Node) -> None:
+        if node in self._nodes:
+            pongs = self._nodes.pop(node).pongs + 1
+        else:
+            pongs = 1
+        # The node may have moved to a different address, so replace the key as well
+        self._nodes[node] = self._changed[node] = NodeStats(time.time(), pongs, failures=0)
+
+    def record_failure(self, node: Node) -> None:
+        if node not in self._nodes:
+            # We only keep track of nodes that replied to us at some point
+            return
+        last_pong, pongs, failures = self._nodes[node]
+        if failures + 1 >= self.max_failures:
+            self.logger.debug2("Forgetting %s, it failed to reply to %d pings", node, failures + 1)
+            del self._nodes[node]
+            self._changed[node] = None
+        else:
+            self._nodes[node] = self._changed[node] = NodeStats(last_pong, pongs, failures + 1)
+
+    def get_seed_nodes(self, count: int) -> Tuple[Node, ...]:
+        cutoff = time.time() - self.max_age
+        recent = [node for node, stats in self._nodes.items() if stats.last_pong >= cutoff]
+        recent.sort(key=lambda node: self._nodes[node].last_pong, reverse=True)
+        return tuple(recent[:count])
+
+    def flush(self) -> None:
+        if not self._changed:
+            return
+        updated = []
+        deleted = []
+        for node, stats in self._changed.items():
+            pubkey = node.pubkey.to_hex()
+            if stats is None:
+                deleted.append((pubkey,))
+            else:
+                address = node.address
+                updated.append(
+                    (pubkey, address.ip, address.udp_port, address.tcp_port) + tuple(stats))
+        with self.db:
+            self.db.executemany('DELETE FROM nodes WHERE pubkey = ?', deleted)
+            self.db.executemany(
+                'INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)', updated)
+        self._changed.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
+
+
+class MemoryNodeStore(SQLiteNodeStore):
+    def __init__(self) -> None:
+        super().__init__(Path(":memory:"))
+
+    def __str__(self) -> str:
+        return '<MemoryNodeStore()>'
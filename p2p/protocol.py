@@ -56,6 +56,9 @@ _DecodedMsgType = PayloadType
 class Command:
     _cmd_id: int = None
     decode_strict = True
+    # Whether decoding large messages of this command takes long enough that it's worth doing it
+    # outside the event loop. See BasePeer.decode_msg().
+    is_decoding_slow = False
     structure: List[Tuple[str, Any]] = []
 
     _logger: logging.Logger = None
@@ -0,0 +1,212 @@
+import asyncio
+from concurrent.futures import Executor
+import struct
+from typing import (
+    List,
+    Tuple,
+    Union,
+)
+
+import sha3
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.constant_time import bytes_eq
+
+from p2p.exceptions import DecryptionError
+from p2p._utils import (
+    roundup_16,
+    sxor,
+)
+
+from .constants import (
+    HEADER_LEN,
+    MAC_LEN,
+)
+
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def get_frame_size(header: bytes) -> int:
+    # The frame size is encoded in the header as a 3-byte int, so before we unpack we need
+    # to prefix it with an extra byte.
+    encoded_size = b'\x00' + header[:3]
+    (size,) = struct.unpack(b'>I', encoded_size)
+    return size
+
+
+class RLPxFrameCodec:
+    """
+    Encrypt the frames we send over an RLPx connection and decrypt the ones we receive on it.
+
+    Data read from the connection is fed into a buffer that is reused for as long as the
+    connection lasts, and every call to :meth:`decode_frames` decrypts all the frames that are
+    complete in it, working on memoryviews of the buffer rather than on copies of its slices.
+
+    If given an executor, the bodies of frames of at least ``min_threaded_frame_size`` bytes are
+    decrypted in it so that the event loop can do other things in the meantime. It must be a
+    thread pool, as the state of the cipher and the MAC can't be shared with other processes.
+    """
+    min_threaded_frame_size = 64 * 1024
+
+    def __init__(self,
+                 aes_secret: bytes,
+                 mac_secret: bytes,
+                 egress_mac: sha3.keccak_256,
+                 ingress_mac: sha3.keccak_256,
+                 executor: Executor = None) -> None:
+        self.egress_mac = egress_mac
+        self.ingress_mac = ingress_mac
+        # FIXME: Insecure Encryption: https://github.com/ethereum/devp2p/issues/32
+        iv = b"\x00" * 16
+        aes_cipher = Cipher(algorithms.AES(aes_secret), modes.CTR(iv), default_backend())
+        self._aes_enc = aes_cipher.encryptor()
+        self._aes_dec = aes_cipher.decryptor()
+        mac_cipher = Cipher(algorithms.AES(mac_secret), modes.ECB(), default_backend())
+        # Frame bodies may be decrypted in another thread while we encrypt frames on the event
+        # loop, so each direction gets its own cipher context.
+        self._egress_mac_enc = mac_cipher.encryptor().update
+        self._ingress_mac_enc = mac_cipher.encryptor().update
+        self.executor = executor
+        self._buffer = bytearray()
+        # The size of the frame whose header we've decrypted but whose body is not in the
+        # buffer yet.
+        self._body_size: int = None
+        # When a call to decode_frames() is cancelled while a frame's body is being decrypted in
+        # the executor, the frames it decrypted before and the decryption of that body, which
+        # carries on, are kept here for the next call.
+        self._decoded_frames: List[bytes] = []
+        self._body_decryption: 'asyncio.Future[bytes]' = None
+
+    @property
+    def bytes_needed(self) -> int:
+        """
+        The number of bytes we still need to be fed before we can decrypt the next frame, or the
+        next frame's header if we don't know its size yet.
+        """
+        if self._body_size is None:
+            needed = HEADER_LEN + MAC_LEN
+        else:
+            needed = roundup_16(self._body_size) + MAC_LEN
+        return max(0, needed - len(self._buffer))
+
+    def encrypt(self, header: bytes, frame: bytes) -> bytes:
+        if len(header) != HEADER_LEN:
+            raise ValueError(f"Unexpected header length: {len(header)}")
+
+        header_ciphertext = self._aes_enc.update(header)
+        mac_secret = self.egress_mac.digest()[:HEADER_LEN]
+        self.egress_mac.update(sxor(self._egress_mac_enc(mac_secret), header_ciphertext))
+        header_mac = self.egress_mac.digest()[:HEADER_LEN]
+
+        frame_ciphertext = self._aes_enc.update(frame)
+        self.egress_mac.update(frame_ciphertext)
+        fmac_seed = self.egress_mac.digest()[:HEADER_LEN]
+        self.egress_mac.update(sxor(self._egress_mac_enc(fmac_seed), fmac_seed))
+        frame_mac = self.egress_mac.digest()[:HEADER_LEN]
+
+        return b''.join((header_ciphertext, header_mac, frame_ciphertext, frame_mac))
+
+    def feed(self, data: bytes) -> None:
+        self._buffer.extend(data)
+
+    async def decode_frames(self) -> Tuple[bytes, ...]:
+        """
+        Decrypt all the frames that are complete in what we've been fed so far, in the order they
+        were sent, and drop them from the buffer.
+
+        Raises DecryptionError if the MAC of a frame or of its header doesn't match, in which case
+        the connection can't be used anymore.
+        """
+        buffer = self._buffer
+        frames = self._decoded_frames
+        self._decoded_frames = []
+        offset = 0
+        try:
+            while True:
+                if self._body_size is None:
+                    end = offset + HEADER_LEN + MAC_LEN
+                    if end > len(buffer):
+                        break
+                    header = self._decrypt_header(bytes(buffer[offset:end]))
+                    self._body_size = get_frame_size(header)
+                    offset = end
+
+                body_size = self._body_size
+                mac_start = offset + roundup_16(body_size)
+                end = mac_start + MAC_LEN
+                if end > len(buffer):
+                    break
+                frame_mac = bytes(buffer[mac_start:end])
+                if self.executor is not None and body_size >= self.min_threaded_frame_size:
+                    if self._body_decryption is None:
+                        # The thread gets a copy of the frame, as the buffer must not change
+                        # under it if we're cancelled while waiting for it.
+                        loop = asyncio.get_event_loop()
+                        self._body_decryption = asyncio.ensure_future(loop.run_in_executor(
+                            self.executor,
+                            self._decrypt_body,
+                            bytes(buffer[offset:mac_start]),
+                            frame_mac,
+                            body_size,
+                        ))
+                    # Shielded, as the thread advances the state of the cipher and the MAC
+                    # whether we're cancelled or not, so the frame has to be picked up by the
+                    # next call, with the body still at the start of the buffer.
+                    frame = await asyncio.shield(self._body_decryption)
+                    self._body_decryption = None
+                else:
+                    with memoryview(buffer)[offset:mac_start] as frame_ciphertext:
+                        frame = self._decrypt_body(frame_ciphertext, frame_mac, body_size)
+                frames.append(frame)
+                self._body_size = None
+                offset = end
+        except asyncio.CancelledError:
+            self._decoded_frames = frames
+            raise
+        finally:
+            # Nothing may hold a view of the buffer by now, or it can't be resized.
+            del buffer[:offset]
+        return tuple(frames)
+
+    def _decrypt_header(self, data: bytes) -> bytes:
+        if len(data) != HEADER_LEN + MAC_LEN:
+            raise ValueError(
+                f"Unexpected header length: {len(data)}, expected {HEADER_LEN} + {MAC_LEN}"
+            )
+
+        header_ciphertext = data[:HEADER_LEN]
+        header_mac = data[HEADER_LEN:]
+        mac_secret = self.ingress_mac.digest()[:HEADER_LEN]
+        aes = self._ingress_mac_enc(mac_secret)[:HEADER_LEN]
+        self.ingress_mac.update(sxor(aes, header_ciphertext))
+        expected_header_mac = self.ingress_mac.digest()[:HEADER_LEN]
+        if not bytes_eq(expected_header_mac, header_mac):
+            raise DecryptionError(
+                f'Invalid header mac: expected {expected_header_mac}, got {header_mac}'
+            )
+        return self._aes_dec.update(header_ciphertext)
+
+    def _decrypt_body(self,
+                      frame_ciphertext: BytesLike,
+                      frame_mac: bytes,
+                      body_size: int) -> bytes:
+        read_size = roundup_16(body_size)
+        if len(frame_ciphertext) != read_size:
+            raise ValueError(
+                f'Unexpected body length: {len(frame_ciphertext)}, expected {read_size}'
+            )
+
+        self.ingress_mac.update(frame_ciphertext)
+        fmac_seed = self.ingress_mac.digest()[:MAC_LEN]
+        self.ingress_mac.update(sxor(self._ingress_mac_enc(fmac_seed), fmac_seed))
+        expected_frame_mac = self.ingress_mac.digest()[:MAC_LEN]
+        if not bytes_eq(expected_frame_mac, frame_mac):
+            raise DecryptionError(
+                f'Invalid frame mac: expected {expected_frame_mac}, got {frame_mac}'
+            )
+        frame = self._aes_dec.update(frame_ciphertext)
+        if len(frame) == body_size:
+            return frame
+        return frame[:body_size]
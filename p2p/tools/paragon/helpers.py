@@ -59,6 +59,9 @@ class MockStreamWriter:
     def write(self, *args: Any, **kwargs: Any) -> None:
         self._target(*args, **kwargs)
 
+    async def drain(self) -> None:
+        pass
+
     def close(self) -> None:
         self.transport.close()
 
@@ -164,8 +167,8 @@ async def get_directly_linked_peers_without_handshake(
     aes_secret, mac_secret, egress_mac, ingress_mac = responder.derive_secrets(
         initiator_nonce, responder_nonce, initiator_ephemeral_pubkey,
         auth_cipher, auth_ack_ciphertext)
-    assert egress_mac.digest() == alice.ingress_mac.digest()
-    assert ingress_mac.digest() == alice.egress_mac.digest()
+    assert egress_mac.digest() == alice.codec.ingress_mac.digest()
+    assert ingress_mac.digest() == alice.codec.egress_mac.digest()
     connection = PeerConnection(
         reader=bob_reader,
         writer=bob_writer,
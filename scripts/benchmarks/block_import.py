@@ -0,0 +1,164 @@
+"""Import a chain of blocks full of value transfers, the way ``RegularChainBodySyncer`` does,
+with the ``SimpleBlockImporter`` or with a ``PipelinedBlockImporter`` recovering transaction
+senders in a pool of processes.
+
+The chain is built once, in memory and without proof of work, and every run imports it into a
+fresh in-memory database.
+
+Run with `python -m scripts.benchmarks.block_import -num-blocks 50 -num-transactions 50`.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import time
+from typing import (
+    List,
+    Sequence,
+    Tuple,
+)
+
+from eth_keys import keys
+from eth_utils import to_wei
+
+from eth import constants
+from eth.chains.base import MiningChain
+from eth.db.atomic import AtomicDB
+from eth.rlp.blocks import BaseBlock
+from eth.tools.builder.chain import (
+    build,
+    byzantium_at,
+    disable_pow_check,
+    genesis,
+)
+
+from trinity.sync.common.chain import (
+    BaseBlockImporter,
+    PipelinedBlockImporter,
+    SimpleBlockImporter,
+)
+
+from tests.core.integration_test_helpers import FakeAsyncChain
+
+GENESIS_PARAMS = {
+    'coinbase': constants.ZERO_ADDRESS,
+    'difficulty': 1,
+    'gas_limit': 8000000,
+    'timestamp': 1514764800,
+}
+
+SENDERS = tuple(keys.PrivateKey(bytes([i]) * 32) for i in range(1, 17))
+
+GENESIS_STATE = {
+    sender.public_key.to_canonical_address(): {
+        'balance': to_wei(1000, 'ether'),
+        'nonce': 0,
+        'code': b'',
+        'storage': {},
+    }
+    for sender in SENDERS
+}
+
+
+def _make_chain(db: AtomicDB) -> MiningChain:
+    return build(
+        FakeAsyncChain,
+        byzantium_at(0),
+        disable_pow_check(),
+        genesis(db=db, params=GENESIS_PARAMS, state=GENESIS_STATE),
+    )
+
+
+def _make_blocks(num_blocks: int, num_transactions: int) -> List[BaseBlock]:
+    chain = _make_chain(AtomicDB())
+    blocks: List[BaseBlock] = []
+    nonces = [0] * len(SENDERS)
+    for block_number in range(num_blocks):
+        for i in range(num_transactions):
+            sender_index = (block_number * num_transactions + i) % len(SENDERS)
+            tx = chain.create_unsigned_transaction(
+                nonce=nonces[sender_index],
+                gas_price=1,
+                gas=21000,
+                to=bytes([i % 256]) * 20,
+                value=1,
+                data=b'',
+            )
+            chain.apply_transaction(tx.as_signed_transaction(SENDERS[sender_index]))
+            nonces[sender_index] += 1
+        blocks.append(chain.mine_block())
+    # Like the syncer, which gets them from BaseTransaction.from_base_transaction(), we use
+    # blocks with transactions decoded from their RLP.
+    return [
+        type(block)(
+            block.header,
+            [type(tx).from_base_transaction(tx) for tx in block.transactions],
+            block.uncles,
+        )
+        for block in blocks
+    ]
+
+
+async def _import(importer: BaseBlockImporter, blocks: Sequence[BaseBlock]) -> None:
+    importer.preview_blocks(blocks)
+    for block in blocks:
+        await importer.import_block(block)
+
+
+def _run(blocks: Sequence[BaseBlock], num_workers: int) -> Tuple[float, float]:
+    chain = _make_chain(AtomicDB())
+    loop = asyncio.get_event_loop()
+    if num_workers:
+        executor = ProcessPoolExecutor(num_workers)
+        # Get the worker processes up before we start measuring
+        loop.run_until_complete(asyncio.gather(*(
+            loop.run_in_executor(executor, time.sleep, 0.1) for _ in range(num_workers)
+        )))
+        importer: BaseBlockImporter = PipelinedBlockImporter(chain, executor)
+    else:
+        executor = None
+        importer = SimpleBlockImporter(chain)
+
+    try:
+        start_at = time.perf_counter()
+        loop.run_until_complete(_import(importer, blocks))
+        elapsed = time.perf_counter() - start_at
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    assert chain.get_canonical_head() == blocks[-1].header
+    return elapsed, elapsed / len(blocks)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-blocks', type=int, default=50)
+    parser.add_argument('-num-transactions', type=int, default=50)
+    parser.add_argument('-workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.block_import')
+
+    logger.info(
+        "Building %d blocks with %d transactions each", args.num_blocks, args.num_transactions)
+    blocks = _make_blocks(args.num_blocks, args.num_transactions)
+    num_transactions = sum(len(block.transactions) for block in blocks)
+    for num_workers in [0] + args.workers:
+        elapsed, per_block = _run(blocks, num_workers)
+        logger.info(
+            "%-9s %d blocks (%d txs) in %6.2fs: %6.1f blocks/sec, %7.0f txs/sec, %5.1fms/block",
+            "%d workers" % num_workers if num_workers else "simple",
+            len(blocks),
+            num_transactions,
+            elapsed,
+            len(blocks) / elapsed,
+            num_transactions / elapsed,
+            per_block * 1000,
+        )
+
+
+if __name__ == "__main__":
+    _test()
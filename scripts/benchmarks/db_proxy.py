@@ -0,0 +1,104 @@
+"""Compare ops/sec of the database proxy access patterns over the IPC manager.
+
+Measures one round trip per call (the classic ``coro_exists``/``coro_set`` path), concurrent
+single calls and the batched ``coro_*_many`` APIs.
+
+Run with `python -m scripts.benchmarks.db_proxy -num-keys 20000`.
+"""
+import asyncio
+import logging
+import multiprocessing
+import tempfile
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Sequence,
+)
+
+from eth.db.atomic import AtomicDB
+
+from trinity.config import TrinityConfig
+from trinity.constants import ROPSTEN_NETWORK_ID
+from trinity.db.base import AsyncDBPreProxy
+from trinity.db.eth1.manager import (
+    create_db_consumer_manager,
+    create_db_server_manager,
+)
+from trinity.initialization import initialize_data_dir
+from trinity._utils.ipc import (
+    kill_process_gracefully,
+    wait_for_ipc,
+)
+
+
+def _serve(manager) -> None:  # type: ignore
+    server = manager.get_server()
+    server.serve_forever()
+
+
+async def _sequential_single_calls(db: AsyncDBPreProxy, keys: Sequence[bytes]) -> None:
+    for key in keys:
+        await db.coro_set(key, key)
+    for key in keys:
+        await db.coro_exists(key)
+
+
+async def _concurrent_single_calls(db: AsyncDBPreProxy, keys: Sequence[bytes]) -> None:
+    await asyncio.gather(*(db.coro_set(key, key) for key in keys))
+    await asyncio.gather(*(db.coro_exists(key) for key in keys))
+
+
+def _batched_calls(batch_size: int) -> Callable[[AsyncDBPreProxy, Sequence[bytes]], Awaitable[None]]:  # noqa: E501
+    async def run(db: AsyncDBPreProxy, keys: Sequence[bytes]) -> None:
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            await db.coro_set_many({key: key for key in batch})
+        for i in range(0, len(keys), batch_size):
+            await db.coro_exists_many(keys[i:i + batch_size])
+    return run
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-keys', type=int, default=10000)
+    parser.add_argument('-batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.db_proxy')
+
+    scenarios = (
+        ('one round trip per call', _sequential_single_calls),
+        ('concurrent single calls', _concurrent_single_calls),
+        (f'batched ({args.batch_size} keys per call)', _batched_calls(args.batch_size)),
+    )
+
+    loop = asyncio.get_event_loop()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        trinity_config = TrinityConfig(network_id=ROPSTEN_NETWORK_ID, trinity_root_dir=temp_dir)
+        initialize_data_dir(trinity_config)
+
+        server_manager = create_db_server_manager(trinity_config, AtomicDB())
+        server_process = multiprocessing.Process(target=_serve, args=(server_manager,))
+        server_process.start()
+        try:
+            wait_for_ipc(trinity_config.database_ipc_path)
+            db = create_db_consumer_manager(trinity_config.database_ipc_path).get_db()  # type: ignore  # noqa: E501
+
+            for run_id, (name, scenario) in enumerate(scenarios):
+                keys = tuple(b'%d-%d' % (run_id, i) for i in range(args.num_keys))
+                start_at = time.perf_counter()
+                loop.run_until_complete(scenario(db, keys))
+                elapsed = time.perf_counter() - start_at
+                # every scenario performs one write and one existence check per key
+                logger.info(
+                    "%-32s %10.0f ops/sec (%.2fs)", name, 2 * len(keys) / elapsed, elapsed)
+        finally:
+            kill_process_gracefully(server_process, logger)
+
+
+if __name__ == "__main__":
+    _test()
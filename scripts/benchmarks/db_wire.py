@@ -0,0 +1,131 @@
+"""Compare latency and throughput of the BaseManager database proxies with the binary transport.
+
+Run with `python -m scripts.benchmarks.db_wire -num-requests 5000`.
+"""
+import asyncio
+import logging
+import multiprocessing
+import statistics
+import tempfile
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    List,
+)
+
+from eth.chains.ropsten import ROPSTEN_GENESIS_HEADER
+from eth.db.atomic import AtomicDB
+from eth.db.chain import ChainDB
+from eth.db.header import HeaderDB
+
+from trinity.config import TrinityConfig
+from trinity.constants import (
+    DB_TRANSPORT_BINARY,
+    ROPSTEN_NETWORK_ID,
+)
+from trinity.db.eth1.manager import (
+    create_db_consumer_manager,
+    create_db_server_manager,
+)
+from trinity.db.wire import DBWireServer
+from trinity.initialization import initialize_data_dir
+from trinity._utils.ipc import (
+    kill_process_gracefully,
+    wait_for_ipc,
+)
+
+VALUE_SIZE = 512
+
+
+def _serve(trinity_config: TrinityConfig, num_keys: int) -> None:
+    base_db = AtomicDB()
+    for i in range(num_keys):
+        base_db[b'key-%d' % i] = b'\x01' * VALUE_SIZE
+    ChainDB(base_db).persist_header(ROPSTEN_GENESIS_HEADER)
+
+    manager = create_db_server_manager(trinity_config, base_db)
+    DBWireServer(base_db, HeaderDB(base_db)).serve_in_thread(trinity_config.database_wire_ipc_path)
+    manager.get_server().serve_forever()
+
+
+async def _measure_latency(request: Callable[[int], Awaitable[Any]], num_requests: int) -> List[float]:  # noqa: E501
+    latencies = []
+    for i in range(num_requests):
+        start_at = time.perf_counter()
+        await request(i)
+        latencies.append(time.perf_counter() - start_at)
+    return latencies
+
+
+async def _measure_throughput(request: Callable[[int], Awaitable[Any]], num_requests: int) -> float:  # noqa: E501
+    start_at = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(num_requests)))
+    return num_requests / (time.perf_counter() - start_at)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.db_wire')
+
+    loop = asyncio.get_event_loop()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        trinity_config = TrinityConfig(
+            network_id=ROPSTEN_NETWORK_ID,
+            trinity_root_dir=temp_dir,
+            db_transport=DB_TRANSPORT_BINARY,
+        )
+        initialize_data_dir(trinity_config)
+
+        server_process = multiprocessing.Process(
+            target=_serve,
+            args=(trinity_config, args.num_requests),
+        )
+        server_process.start()
+        try:
+            wait_for_ipc(trinity_config.database_ipc_path)
+            proxy_manager = create_db_consumer_manager(trinity_config.database_ipc_path)
+            wire_manager = create_db_consumer_manager(
+                trinity_config.database_ipc_path,
+                wire_ipc_path=trinity_config.database_wire_ipc_path,
+            )
+
+            for transport, manager in (('manager', proxy_manager), ('binary', wire_manager)):
+                db = manager.get_db()  # type: ignore
+                headerdb = manager.get_headerdb()  # type: ignore
+                genesis_hash = ROPSTEN_GENESIS_HEADER.hash
+
+                async def get_value(i: int) -> bytes:
+                    return await db.coro_get(b'key-%d' % i)
+
+                async def get_header(i: int) -> Any:
+                    return await headerdb.coro_get_block_header_by_hash(genesis_hash)
+
+                for name, request in (('get', get_value), ('header', get_header)):
+                    latencies = loop.run_until_complete(
+                        _measure_latency(request, args.num_requests)
+                    )
+                    throughput = loop.run_until_complete(
+                        _measure_throughput(request, args.num_requests)
+                    )
+                    logger.info(
+                        "%-8s %-7s median latency %7.1fus  p99 %7.1fus  throughput %8.0f req/sec",
+                        transport,
+                        name,
+                        statistics.median(latencies) * 1e6,
+                        sorted(latencies)[int(len(latencies) * 0.99)] * 1e6,
+                        throughput,
+                    )
+        finally:
+            kill_process_gracefully(server_process, logger)
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,178 @@
+"""Drive discovery pings through a local UDP socket into a ``DiscoveryProtocol`` and measure how
+many it handles per second and how long the event loop is kept from running other tasks.
+
+Pings come from a separate process, from many different nodes and at a fixed rate, and some of
+them are sent twice, like retransmissions. The protocol replies to every ping with a pong, which
+is signed like it would be on a live node.
+
+Run with `python -m scripts.benchmarks.discovery_load -rate 2000 -duration 5 -workers 1 2`.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+import random
+import socket
+import time
+from typing import (
+    Any,
+    List,
+    Tuple,
+)
+
+from cancel_token import CancelToken
+from eth_keys import keys
+from eth_utils import keccak
+import rlp
+
+# p2p.discovery uses trinity's enode validation, and importing it before trinity ends up in a
+# circular import.
+import trinity  # noqa: F401
+
+from p2p import discovery
+from p2p.kademlia import (
+    Address,
+    Node,
+)
+
+
+class CountingDiscoveryProtocol(discovery.DiscoveryProtocol):
+    pings_handled = 0
+
+    def recv_ping_v4(self, node: Node, payload: Any, message_hash: Any) -> None:
+        self.pings_handled += 1
+        super().recv_ping_v4(node, payload, message_hash)
+
+
+def _make_pings(to: Address, num_senders: int, num_pings: int, duplicates: float) -> List[bytes]:
+    senders = [keys.PrivateKey(keccak(i.to_bytes(4, 'big'))) for i in range(num_senders)]
+    version = rlp.sedes.big_endian_int.serialize(discovery.PROTO_VERSION)
+    pings: List[bytes] = []
+    while len(pings) < num_pings:
+        sender = senders[len(pings) % num_senders]
+        # Pings from the same node in the same second are identical, so vary the endpoint we
+        # claim to be listening on.
+        sender_address = Address('127.0.0.1', random.randint(1024, 65535))
+        payload = (version, sender_address.to_endpoint(), to.to_endpoint())
+        ping = discovery._pack_v4(discovery.CMD_PING.id, payload, sender)
+        pings.append(ping)
+        if random.random() < duplicates:
+            pings.append(ping)
+    return pings[:num_pings]
+
+
+def _send(pings: List[bytes], to: Tuple[str, int], rate: int) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    start_at = time.perf_counter()
+    # Send in chunks every millisecond or so, sleeping in between to keep to the rate
+    chunk_size = max(1, rate // 1000)
+    for i in range(0, len(pings), chunk_size):
+        for ping in pings[i:i + chunk_size]:
+            sock.sendto(ping, to)
+        delay = start_at + (i + chunk_size) / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    sock.close()
+
+
+async def _measure_lag(interval: float, lags: List[float]) -> None:
+    while True:
+        scheduled_at = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - scheduled_at)
+
+
+async def _run(rate: int, duration: float, num_senders: int, duplicates: float,
+               num_workers: int) -> Tuple[int, int, int, float, float, float, float]:
+    loop = asyncio.get_event_loop()
+    address = Address('127.0.0.1', random.randint(20000, 60000))
+    privkey = keys.PrivateKey(keccak(b'benchmark'))
+    cancel_token = CancelToken('discovery-load')
+    if num_workers:
+        executor = ProcessPoolExecutor(num_workers)
+        # Get the worker processes up before we start measuring
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, time.sleep, 0.1) for _ in range(num_workers)
+        ))
+        proto = CountingDiscoveryProtocol(privkey, address, (), cancel_token, executor=executor)
+    else:
+        executor = None
+        proto = CountingDiscoveryProtocol(privkey, address, (), cancel_token)
+    await loop.create_datagram_endpoint(
+        lambda: proto, local_addr=(address.ip, address.udp_port), family=socket.AF_INET)
+
+    pings = _make_pings(address, num_senders, int(rate * duration), duplicates)
+    num_unique = len(set(pings))
+    lags: List[float] = []
+    lag_task = asyncio.ensure_future(_measure_lag(0.01, lags))
+    sender = multiprocessing.Process(
+        target=_send, args=(pings, (address.ip, address.udp_port), rate))
+    start_at = time.perf_counter()
+    cpu_start_at = time.process_time()
+    sender.start()
+    try:
+        # Wait for the sender to finish, and then for the protocol to catch up
+        while sender.is_alive():
+            await asyncio.sleep(0.05)
+        handled = -1
+        while handled != proto.pings_handled:
+            handled = proto.pings_handled
+            await asyncio.sleep(0.2)
+        elapsed = time.perf_counter() - start_at - 0.2
+        cpu_time = time.process_time() - cpu_start_at
+    finally:
+        lag_task.cancel()
+        proto.transport.close()
+        cancel_token.trigger()
+        if executor is not None:
+            executor.shutdown()
+        sender.join()
+
+    return (
+        len(pings),
+        num_unique,
+        proto.pings_handled,
+        elapsed,
+        cpu_time,
+        sum(lags) / len(lags),
+        max(lags),
+    )
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-rate', type=int, default=2000)
+    parser.add_argument('-duration', type=float, default=5)
+    parser.add_argument('-num-senders', type=int, default=500)
+    parser.add_argument('-duplicates', type=float, default=0.2)
+    parser.add_argument('-workers', type=int, nargs='*', default=[1])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.discovery_load')
+
+    loop = asyncio.get_event_loop()
+    for num_workers in [0] + args.workers:
+        sent, unique, handled, elapsed, cpu_time, mean_lag, max_lag = loop.run_until_complete(
+            _run(args.rate, args.duration, args.num_senders, args.duplicates, num_workers))
+        # The CPU time is that of the event loop's process only, not the workers'
+        logger.info(
+            "%-9s %d pings (%d unique) sent at %d/sec: %d handled in %5.2fs (%6.0f/sec), "
+            "%4.0fus of CPU per ping sent, event loop lag %5.1fms mean, %6.1fms max",
+            "%d workers" % num_workers if num_workers else "in-loop",
+            sent,
+            unique,
+            args.rate,
+            handled,
+            elapsed,
+            handled / elapsed,
+            cpu_time / sent * 1000000,
+            mean_lag * 1000,
+            max_lag * 1000,
+        )
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,171 @@
+"""Process the rewards and penalties of an epoch transition for a state with the given number of
+validators, with NumPy and in pure Python, and check that both give the same balances.
+
+Each committee of the previous epoch has an attestation from most of its members, with some of
+them voting for another epoch boundary or head than the canonical ones.
+
+Run with `python -m scripts.benchmarks.epoch_rewards -num-validators 16384 65536
+-epochs-since-finality 3 5`.
+"""
+import logging
+import random
+import time
+from typing import (
+    Tuple,
+)
+
+from eth2._utils.bitfield import (
+    get_empty_bitfield,
+    set_voted,
+)
+from eth2.beacon.committee_helpers import get_crosslink_committees_at_slot
+from eth2.beacon.configs import CommitteeConfig
+from eth2.beacon.constants import FAR_FUTURE_EPOCH
+from eth2.beacon.helpers import (
+    get_block_root,
+    get_epoch_start_slot,
+)
+from eth2.beacon.state_machines.forks.serenity import epoch_processing
+from eth2.beacon.state_machines.forks.serenity.configs import SERENITY_CONFIG
+from eth2.beacon.types.attestation_data import AttestationData
+from eth2.beacon.types.pending_attestation_records import PendingAttestationRecord
+from eth2.beacon.types.states import BeaconState
+from eth2.beacon.types.validator_records import ValidatorRecord
+from eth2.beacon.typing import (
+    Epoch,
+    Gwei,
+    Slot,
+)
+
+
+def _make_state(num_validators: int, epochs_since_finality: int, rng: random.Random) -> BeaconState:
+    config = SERENITY_CONFIG
+    validators = tuple(
+        ValidatorRecord(
+            pubkey=index.to_bytes(48, 'little'),
+            withdrawal_credentials=b'\x22' * 32,
+            activation_epoch=config.GENESIS_EPOCH,
+            exit_epoch=FAR_FUTURE_EPOCH,
+            withdrawable_epoch=FAR_FUTURE_EPOCH,
+            initiated_exit=False,
+            slashed=False,
+        )
+        for index in range(num_validators)
+    )
+    balances = tuple(
+        Gwei(config.MAX_DEPOSIT_AMOUNT - rng.randrange(config.MAX_DEPOSIT_AMOUNT // 10))
+        for _ in range(num_validators)
+    )
+    state = BeaconState.create_filled_state(
+        genesis_epoch=config.GENESIS_EPOCH,
+        genesis_start_shard=config.GENESIS_START_SHARD,
+        genesis_slot=config.GENESIS_SLOT,
+        shard_count=config.SHARD_COUNT,
+        latest_block_roots_length=config.LATEST_BLOCK_ROOTS_LENGTH,
+        latest_active_index_roots_length=config.LATEST_ACTIVE_INDEX_ROOTS_LENGTH,
+        latest_randao_mixes_length=config.LATEST_RANDAO_MIXES_LENGTH,
+        latest_slashed_exit_length=config.LATEST_SLASHED_EXIT_LENGTH,
+        activated_genesis_validators=validators,
+        genesis_balances=balances,
+    )
+    # The last slot of the epoch `epochs_since_finality - 1` epochs after the finalized one
+    current_epoch = config.GENESIS_EPOCH + max(epochs_since_finality - 1, 1)
+    state = state.copy(
+        slot=Slot(get_epoch_start_slot(current_epoch + 1, config.SLOTS_PER_EPOCH) - 1),
+        finalized_epoch=Epoch(current_epoch + 1 - epochs_since_finality),
+    )
+    return state.copy(previous_epoch_attestations=_make_attestations(state, rng))
+
+
+def _make_attestations(state: BeaconState,
+                       rng: random.Random) -> Tuple[PendingAttestationRecord, ...]:
+    config = SERENITY_CONFIG
+    previous_epoch_start_slot = get_epoch_start_slot(
+        state.previous_epoch(config.SLOTS_PER_EPOCH, config.GENESIS_EPOCH),
+        config.SLOTS_PER_EPOCH,
+    )
+    attestations = []
+    previous_epoch_end_slot = previous_epoch_start_slot + config.SLOTS_PER_EPOCH
+    for slot in range(previous_epoch_start_slot, previous_epoch_end_slot):
+        committees = get_crosslink_committees_at_slot(state, slot, CommitteeConfig(config))
+        for committee, shard in committees:
+            bitfield = get_empty_bitfield(len(committee))
+            for committee_index in range(len(committee)):
+                if rng.random() < 0.9:
+                    bitfield = set_voted(bitfield, committee_index)
+            canonical_head = rng.random() < 0.8
+            attestations.append(PendingAttestationRecord(
+                data=AttestationData(
+                    slot=slot,
+                    shard=shard,
+                    beacon_block_root=(
+                        get_block_root(state, slot, config.LATEST_BLOCK_ROOTS_LENGTH)
+                        if canonical_head else b'\x33' * 32
+                    ),
+                    epoch_boundary_root=get_block_root(
+                        state,
+                        previous_epoch_start_slot,
+                        config.LATEST_BLOCK_ROOTS_LENGTH,
+                    ),
+                    crosslink_data_root=b'\x11' * 32,
+                    latest_crosslink=state.latest_crosslinks[shard],
+                    justified_epoch=config.GENESIS_EPOCH,
+                    justified_block_root=b'\x00' * 32,
+                ),
+                aggregation_bitfield=bitfield,
+                custody_bitfield=get_empty_bitfield(len(committee)),
+                slot_included=Slot(
+                    slot + config.MIN_ATTESTATION_INCLUSION_DELAY + rng.randrange(4)
+                ),
+            ))
+    return tuple(attestations)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-validators', type=int, nargs='+', default=[16384, 65536])
+    parser.add_argument('-epochs-since-finality', type=int, nargs='+', default=[3, 5])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.epoch_rewards')
+
+    if epoch_processing.np is None:
+        raise SystemExit("NumPy is not installed, see the numpy extra in setup.py")
+    numpy_module = epoch_processing.np
+
+    rng = random.Random(0)
+    for num_validators in args.num_validators:
+        for epochs_since_finality in args.epochs_since_finality:
+            state = _make_state(num_validators, epochs_since_finality, rng)
+
+            start_at = time.perf_counter()
+            numpy_state = epoch_processing.process_rewards_and_penalties(state, SERENITY_CONFIG)
+            numpy_elapsed = time.perf_counter() - start_at
+
+            epoch_processing.np = None
+            try:
+                start_at = time.perf_counter()
+                python_state = epoch_processing.process_rewards_and_penalties(
+                    state,
+                    SERENITY_CONFIG,
+                )
+                python_elapsed = time.perf_counter() - start_at
+            finally:
+                epoch_processing.np = numpy_module
+            assert numpy_state.validator_balances == python_state.validator_balances
+
+            logger.info(
+                "%6d validators, %d epochs since finality: python %6.2fs, numpy %6.2fs (%.1fx)",
+                num_validators,
+                epochs_since_finality,
+                python_elapsed,
+                numpy_elapsed,
+                python_elapsed / numpy_elapsed,
+            )
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,180 @@
+"""Dial a number of local peers and measure how long it takes to complete the handshakes with all
+of them, how long the event loop is kept from running other tasks meanwhile and how long the
+handshakes spend in each stage.
+
+The peers are ``BaseServer``s listening on local ports, run in a separate process so that their
+side of the handshakes doesn't get in the way of what we measure. They share one
+``HandshakeExecutor``, and wait for the given latency before they start on each handshake, as
+remote peers would take at least a round trip to reply.
+
+Run with `python -m scripts.benchmarks.handshakes -num-peers 200 -latency 0.1 -workers 0 2
+-dials 1 32`.
+"""
+import asyncio
+from asyncio import (
+    StreamReader,
+    StreamWriter,
+)
+import itertools
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+import time
+from typing import (
+    List,
+    Tuple,
+)
+
+from eth_keys import keys
+
+# p2p.kademlia uses trinity's enode validation, and importing it before trinity ends up in a
+# circular import.
+import trinity  # noqa: F401
+
+from p2p import ecies
+from p2p.auth import (
+    HandshakeExecutor,
+    HandshakeStageLatency,
+)
+from p2p.kademlia import (
+    Address,
+    Node,
+)
+from p2p.tools.paragon import (
+    ParagonContext,
+    ParagonPeerPool,
+)
+
+from trinity.server import BaseServer
+
+
+class ParagonServer(BaseServer[ParagonPeerPool]):
+    latency = 0.0
+
+    def _make_peer_pool(self) -> ParagonPeerPool:
+        return ParagonPeerPool(
+            privkey=self.privkey,
+            context=ParagonContext(),
+            token=self.cancel_token,
+        )
+
+    def _make_request_server(self) -> None:
+        return None
+
+    async def receive_handshake(self, reader: StreamReader, writer: StreamWriter) -> None:
+        await asyncio.sleep(self.latency)
+        await super().receive_handshake(reader, writer)
+
+
+def _serve(num_peers: int, latency: float, conn: Connection) -> None:
+    # The remote peers' warnings, about running without bootstrap nodes and such, only get in the
+    # way here.
+    logging.disable(logging.WARNING)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    ParagonServer.latency = latency
+    executor = HandshakeExecutor()
+    servers = []
+    for _ in range(num_peers):
+        server = ParagonServer(
+            privkey=ecies.generate_privkey(),
+            port=0,
+            chain=None,
+            chaindb=None,
+            headerdb=None,
+            base_db=None,
+            network_id=99,
+        )
+        server.peer_pool.handshake_executor = executor
+        loop.run_until_complete(server._start_tcp_listener())
+        servers.append(server)
+    conn.send([
+        (server.privkey.public_key.to_bytes(), server._tcp_listener.sockets[0].getsockname()[1])
+        for server in servers
+    ])
+    loop.run_forever()
+
+
+async def _measure_lag(interval: float, lags: List[float]) -> None:
+    while True:
+        scheduled_at = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - scheduled_at)
+
+
+RunResult = Tuple[float, int, float, float, Tuple[HandshakeStageLatency, ...]]
+
+
+async def _run(nodes: List[Node], num_workers: int, max_dials: int) -> RunResult:
+    peer_pool = ParagonPeerPool(
+        privkey=ecies.generate_privkey(),
+        context=ParagonContext(),
+        max_peers=len(nodes),
+    )
+    peer_pool.handshake_executor = HandshakeExecutor(num_workers, max_dials)
+    asyncio.ensure_future(peer_pool.run())
+    await peer_pool.events.started.wait()
+
+    lags: List[float] = []
+    lag_task = asyncio.ensure_future(_measure_lag(0.01, lags))
+    start_at = time.perf_counter()
+    try:
+        await peer_pool.connect_to_nodes(iter(nodes))
+        elapsed = time.perf_counter() - start_at
+    finally:
+        lag_task.cancel()
+        stage_latencies = peer_pool.handshake_executor.get_stage_latencies()
+        num_connected = len(peer_pool)
+        await peer_pool.cancel()
+
+    return elapsed, num_connected, sum(lags) / max(1, len(lags)), max(lags, default=0), (
+        stage_latencies)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-peers', type=int, default=200)
+    parser.add_argument('-latency', type=float, default=0.1, help="In seconds")
+    parser.add_argument('-workers', type=int, nargs='+', default=[0, 2])
+    parser.add_argument('-dials', type=int, nargs='+', default=[1, 32])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.handshakes')
+    # Don't log every peer we connect to
+    logging.getLogger('p2p').setLevel(logging.WARNING)
+
+    parent_conn, child_conn = multiprocessing.Pipe()
+    server_process = multiprocessing.Process(
+        target=_serve, args=(args.num_peers, args.latency, child_conn), daemon=True)
+    server_process.start()
+    nodes = [
+        Node(keys.PublicKey(pubkey), Address('127.0.0.1', port, port))
+        for pubkey, port in parent_conn.recv()
+    ]
+
+    loop = asyncio.get_event_loop()
+    try:
+        for num_workers, max_dials in itertools.product(args.workers, args.dials):
+            elapsed, num_connected, mean_lag, max_lag, stage_latencies = loop.run_until_complete(
+                _run(nodes, num_workers, max_dials))
+            logger.info(
+                "%-9s %2d dials: %d/%d peers in %5.2fs, event loop lag %5.1fms mean, %6.1fms max",
+                "%d workers" % num_workers if num_workers else "in-loop",
+                max_dials,
+                num_connected,
+                len(nodes),
+                elapsed,
+                mean_lag * 1000,
+                max_lag * 1000,
+            )
+            logger.info("    %s", ", ".join(
+                f"{latency.stage}={latency.mean * 1000:.1f}ms" for latency in stage_latencies))
+    finally:
+        server_process.terminate()
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,110 @@
+"""Flood a peer with large ``BlockHeaders`` messages and measure how long the event loop is kept
+from running other tasks while it decodes them, in the event loop or in a pool of processes.
+
+The messages are all sent before we start measuring, to two ``ETHPeer``s linked directly, so
+that the receiving peer always has the next one ready to be read.
+
+Run with `python -m scripts.benchmarks.msg_decoding -num-messages 10 -msg-size 2 -workers 1 2`.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+import time
+from typing import (
+    List,
+    Tuple,
+)
+
+from eth.rlp.headers import BlockHeader
+
+from trinity.protocol.eth.commands import BlockHeaders
+
+from tests.core.peer_helpers import get_directly_linked_peers_without_handshake
+
+
+def _make_headers(msg_size: int) -> List[BlockHeader]:
+    # Each header takes about 540 bytes once encoded
+    return [
+        BlockHeader(difficulty=1, block_number=i, gas_limit=1, extra_data=os.urandom(32))
+        for i in range(msg_size // 540)
+    ]
+
+
+async def _measure_lag(interval: float, lags: List[float]) -> None:
+    while True:
+        scheduled_at = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - scheduled_at)
+
+
+async def _run(headers: List[BlockHeader],
+               num_messages: int,
+               num_workers: int) -> Tuple[float, float, float]:
+    alice, bob = await get_directly_linked_peers_without_handshake()
+    await asyncio.gather(alice.do_p2p_handshake(), bob.do_p2p_handshake())
+    await asyncio.gather(alice.do_sub_proto_handshake(), bob.do_sub_proto_handshake())
+    if num_workers:
+        executor = ProcessPoolExecutor(num_workers)
+        # Get the worker processes up before we start measuring
+        await asyncio.gather(*(
+            asyncio.get_event_loop().run_in_executor(executor, time.sleep, 0.1)
+            for _ in range(num_workers)
+        ))
+    else:
+        executor = None
+    bob.get_msg_decoding_executor = lambda: executor  # type: ignore
+
+    for _ in range(num_messages):
+        alice.sub_proto.send_block_headers(headers)
+
+    lags: List[float] = []
+    lag_task = asyncio.ensure_future(_measure_lag(0.01, lags))
+    start_at = time.perf_counter()
+    try:
+        for _ in range(num_messages):
+            cmd, msg = await bob.read_msg()
+            assert isinstance(cmd, BlockHeaders) and len(msg) == len(headers)
+        elapsed = time.perf_counter() - start_at
+    finally:
+        lag_task.cancel()
+        alice.close()
+        bob.close()
+        if executor is not None:
+            executor.shutdown()
+
+    return elapsed, sum(lags) / max(1, len(lags)), max(lags, default=0)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-messages', type=int, default=10)
+    parser.add_argument('-msg-size', type=float, default=2, help="In megabytes")
+    parser.add_argument('-workers', type=int, nargs='*', default=[1, 2])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.msg_decoding')
+
+    headers = _make_headers(int(args.msg_size * 1024 * 1024))
+    loop = asyncio.get_event_loop()
+    for num_workers in [0] + args.workers:
+        elapsed, mean_lag, max_lag = loop.run_until_complete(
+            _run(headers, args.num_messages, num_workers))
+        logger.info(
+            "%-9s %d BlockHeaders msgs (%d headers each) in %6.2fs: %5.2f msgs/sec, "
+            "event loop lag %6.1fms mean, %6.1fms max",
+            "%d workers" % num_workers if num_workers else "in-loop",
+            args.num_messages,
+            len(headers),
+            elapsed,
+            args.num_messages / elapsed,
+            mean_lag * 1000,
+            max_lag * 1000,
+        )
+
+
+if __name__ == "__main__":
+    _test()
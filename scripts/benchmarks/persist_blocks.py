@@ -0,0 +1,144 @@
+"""Persist blocks through the database process, one at a time or in batches, the way
+``FastChainBodySyncer`` does once their bodies and receipts have been downloaded.
+
+Each mode gets its own database process, backed by LevelDB, and the blocks per second are
+measured with the ``ChainSyncPerformanceTracker`` that the syncer reports progress with.
+
+Run with `python -m scripts.benchmarks.persist_blocks -num-blocks 5000 -batch-size 100`.
+"""
+import asyncio
+import logging
+import multiprocessing
+from pathlib import Path
+import tempfile
+from typing import (
+    List,
+)
+
+from eth.chains.ropsten import ROPSTEN_GENESIS_HEADER
+from eth.db.backends.level import LevelDB
+from eth.rlp.blocks import BaseBlock
+from eth.rlp.headers import BlockHeader
+from eth.vm.forks.frontier.blocks import FrontierBlock
+from eth.vm.forks.frontier.transactions import FrontierTransaction
+
+from trinity.config import TrinityConfig
+from trinity.constants import ROPSTEN_NETWORK_ID
+from trinity.db.eth1.chain import BaseAsyncChainDB
+from trinity.db.eth1.manager import (
+    create_db_consumer_manager,
+    create_db_server_manager,
+)
+from trinity.initialization import initialize_data_dir
+from trinity.sync.full.chain import (
+    ChainSyncPerformanceTracker,
+    ChainSyncStats,
+)
+from trinity._utils.ipc import (
+    kill_process_gracefully,
+    wait_for_ipc,
+)
+
+
+def _serve(trinity_config: TrinityConfig, db_path: Path) -> None:
+    base_db = LevelDB(db_path)
+    manager = create_db_server_manager(trinity_config, base_db)
+    manager.get_server().serve_forever()
+
+
+def _make_blocks(num_blocks: int, num_transactions: int) -> List[BaseBlock]:
+    blocks: List[BaseBlock] = []
+    parent = ROPSTEN_GENESIS_HEADER
+    for _ in range(num_blocks):
+        header = BlockHeader(
+            difficulty=parent.difficulty,
+            block_number=parent.block_number + 1,
+            gas_limit=parent.gas_limit,
+            timestamp=parent.timestamp + 1,
+            parent_hash=parent.hash,
+        )
+        # Like the syncer, which gets them from BaseTransaction.from_base_transaction(), we use
+        # transactions decoded from their RLP, which then don't need to be encoded again.
+        transactions = [
+            FrontierTransaction.from_base_transaction(FrontierTransaction(
+                nonce=header.block_number * num_transactions + i,
+                gas_price=1,
+                gas=21000,
+                to=b'\x01' * 20,
+                value=1,
+                data=b'',
+                v=27,
+                r=1,
+                s=1,
+            ))
+            for i in range(num_transactions)
+        ]
+        blocks.append(FrontierBlock(header, transactions=transactions, uncles=[]))
+        parent = header
+    return blocks
+
+
+async def _persist(chaindb: BaseAsyncChainDB,
+                   blocks: List[BaseBlock],
+                   batch_size: int) -> ChainSyncStats:
+    tracker = ChainSyncPerformanceTracker(ROPSTEN_GENESIS_HEADER)
+    for i in range(0, len(blocks), batch_size):
+        batch = blocks[i:i + batch_size]
+        if batch_size == 1:
+            await chaindb.coro_persist_block(batch[0])
+        else:
+            await chaindb.coro_persist_blocks(batch)
+        tracker.record_transactions(sum(len(block.transactions) for block in batch))
+        tracker.set_latest_head(batch[-1].header)
+    return tracker.report()
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-blocks', type=int, default=5000)
+    parser.add_argument('-num-transactions', type=int, default=20)
+    parser.add_argument('-batch-size', type=int, nargs='+', default=[100])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.persist_blocks')
+
+    blocks = _make_blocks(args.num_blocks, args.num_transactions)
+    loop = asyncio.get_event_loop()
+    # A batch size of 1 uses coro_persist_block(), as we did before coro_persist_blocks()
+    for batch_size in [1] + args.batch_size:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trinity_config = TrinityConfig(
+                network_id=ROPSTEN_NETWORK_ID,
+                trinity_root_dir=temp_dir,
+            )
+            initialize_data_dir(trinity_config)
+            server_process = multiprocessing.Process(
+                target=_serve,
+                args=(trinity_config, Path(temp_dir) / 'chain'),
+            )
+            server_process.start()
+            try:
+                wait_for_ipc(trinity_config.database_ipc_path)
+                manager = create_db_consumer_manager(trinity_config.database_ipc_path)
+                stats = loop.run_until_complete(
+                    _persist(manager.get_chaindb(), blocks, batch_size)  # type: ignore
+                )
+            finally:
+                kill_process_gracefully(server_process, logger)
+
+        logger.info(
+            "batch size %4d: %d blocks (%d txs) in %6.2fs: %7.0f blocks/sec, %8.0f txs/sec",
+            batch_size,
+            stats.num_blocks,
+            stats.num_transactions,
+            stats.elapsed,
+            stats.num_blocks / stats.elapsed,
+            stats.num_transactions / stats.elapsed,
+        )
+
+
+if __name__ == "__main__":
+    _test()
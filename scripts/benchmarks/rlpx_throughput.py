@@ -0,0 +1,129 @@
+"""Send messages of different sizes between two in-process peers and measure how many of them, and
+how many megabytes, get encrypted, framed, decrypted and decoded per second.
+
+The peers are linked directly, without sockets, so that what we measure is the work the peers
+do. Messages are sent in batches, and the receiving peer reads them all before the next batch
+goes out. A ticker measures how long the event loop is kept from running other tasks, which is
+what decrypting large frames in a thread helps with.
+
+Run with `python -m scripts.benchmarks.rlpx_throughput -sizes 100 10000 1000000 -threads 1`.
+"""
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+)
+import logging
+import os
+import time
+from typing import (
+    List,
+    Tuple,
+)
+
+# p2p.kademlia uses trinity's enode validation, and importing it before trinity ends up in a
+# circular import.
+import trinity  # noqa: F401
+
+from cancel_token import CancelToken
+
+from p2p import ecies
+from p2p.tools.paragon import (
+    BroadcastData,
+    ParagonContext,
+    ParagonPeer,
+    ParagonPeerFactory,
+)
+from p2p.tools.paragon.helpers import get_directly_linked_peers_without_handshake
+
+
+async def _measure_lag(interval: float, lags: List[float]) -> None:
+    while True:
+        scheduled_at = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - scheduled_at)
+
+
+async def _receive(bob: ParagonPeer, num_messages: int) -> None:
+    for _ in range(num_messages):
+        cmd, _ = await bob.read_msg()
+        assert isinstance(cmd, BroadcastData)
+
+
+async def _run(size: int,
+               num_messages: int,
+               batch_size: int,
+               executor: Executor) -> Tuple[float, float, float]:
+    alice_factory, bob_factory = (
+        ParagonPeerFactory(
+            privkey=ecies.generate_privkey(),
+            context=ParagonContext(),
+            token=CancelToken('rlpx_throughput'),
+            frame_decryption_executor=executor,
+        )
+        for _ in range(2)
+    )
+    alice, bob = await get_directly_linked_peers_without_handshake(alice_factory, bob_factory)
+    await asyncio.gather(alice.do_p2p_handshake(), bob.do_p2p_handshake())
+    data = os.urandom(size)
+
+    lags: List[float] = []
+    lag_task = asyncio.ensure_future(_measure_lag(0.001, lags))
+    start_at = time.perf_counter()
+    try:
+        for i in range(0, num_messages, batch_size):
+            batch = min(batch_size, num_messages - i)
+            for _ in range(batch):
+                alice.sub_proto.send_broadcast_data(data)
+            await _receive(bob, batch)
+        elapsed = time.perf_counter() - start_at
+    finally:
+        lag_task.cancel()
+        alice.close()
+        bob.close()
+
+    return elapsed, sum(lags) / max(1, len(lags)), max(lags, default=0)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-sizes', type=int, nargs='+', default=[100, 10000, 1000000])
+    parser.add_argument('-megabytes', type=float, default=50)
+    parser.add_argument('-max-messages', type=int, default=50000)
+    parser.add_argument('-batch-size', type=int, default=100)
+    parser.add_argument('-threads', type=int, nargs='*', default=[1])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.rlpx_throughput')
+
+    loop = asyncio.get_event_loop()
+    for num_threads in [0] + args.threads:
+        if num_threads:
+            executor: Executor = ThreadPoolExecutor(num_threads)
+        else:
+            executor = None
+        for size in args.sizes:
+            num_messages = min(args.max_messages, int(args.megabytes * 1024 * 1024 / size) or 1)
+            elapsed, mean_lag, max_lag = loop.run_until_complete(
+                _run(size, num_messages, args.batch_size, executor))
+            logger.info(
+                "%-9s %6d messages of %7d bytes in %5.2fs: %7.0f msgs/sec, %6.1f MB/sec, "
+                "event loop lag %5.1fms mean, %6.1fms max",
+                "%d threads" % num_threads if num_threads else "in-loop",
+                num_messages,
+                size,
+                elapsed,
+                num_messages / elapsed,
+                num_messages * size / elapsed / 1024 / 1024,
+                mean_lag * 1000,
+                max_lag * 1000,
+            )
+        if executor is not None:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    _test()
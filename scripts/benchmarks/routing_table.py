@@ -0,0 +1,76 @@
+"""Measure the discovery protocol's routing table: adding nodes to it, looking up the bucket for a
+node and finding the neighbours of an ID, which is what we do for every ``find_node`` we get.
+
+Run with `python -m scripts.benchmarks.routing_table -num-nodes 10000 100000`.
+"""
+import logging
+import random
+import time
+from typing import (
+    Callable,
+    List,
+    Sequence,
+)
+
+from eth_keys import keys
+
+# p2p.kademlia uses trinity's enode validation, and importing it before trinity ends up in a
+# circular import.
+import trinity  # noqa: F401
+
+from p2p.kademlia import (
+    Address,
+    Node,
+    RoutingTable,
+    k_pubkey_size,
+)
+
+
+def _random_node() -> Node:
+    pubkey = random.getrandbits(k_pubkey_size).to_bytes(k_pubkey_size // 8, 'big')
+    return Node(keys.PublicKey(pubkey), Address('10.0.0.1', 30303))
+
+
+def _rate(operation: Callable[[Node], object], nodes: Sequence[Node]) -> float:
+    start_at = time.perf_counter()
+    for node in nodes:
+        operation(node)
+    return len(nodes) / (time.perf_counter() - start_at)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-nodes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('-num-queries', type=int, default=10000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.routing_table')
+
+    for num_nodes in args.num_nodes:
+        nodes: List[Node] = [_random_node() for _ in range(num_nodes)]
+        queries: List[Node] = [_random_node() for _ in range(args.num_queries)]
+        table = RoutingTable(_random_node())
+
+        add_rate = _rate(table.add_node, nodes)
+        # Most of the nodes we've been offered don't make it into the table, as buckets far from
+        # us fill up, so look up some of the ones that did as well.
+        lookups = random.sample(list(table), min(len(table), args.num_queries)) + queries
+        lookup_rate = _rate(table.get_bucket_for_node, lookups)
+        neighbours_rate = _rate(lambda node: table.neighbours(node.id), queries)
+        logger.info(
+            "%7d nodes offered, %5d in %4d buckets: %8.0f adds/sec, %8.0f lookups/sec, "
+            "%8.0f neighbours/sec",
+            num_nodes,
+            len(table),
+            len(table.buckets),
+            add_rate,
+            lookup_rate,
+            neighbours_rate,
+        )
+
+
+if __name__ == "__main__":
+    _test()
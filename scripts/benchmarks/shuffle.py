@@ -0,0 +1,55 @@
+"""Shuffle lists of validator indices of different sizes, the way ``get_shuffling`` does for the
+active validators of every epoch, in pure Python and with NumPy, and check that both give the
+same result.
+
+Run with `python -m scripts.benchmarks.shuffle -sizes 16384 65536 300000 -rounds 90`.
+"""
+import logging
+import os
+import time
+
+from eth_typing import Hash32
+
+from eth2.beacon._utils.random import (
+    _shuffled_indices_numpy,
+    _shuffled_indices_python,
+)
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-sizes', type=int, nargs='+', default=[16384, 65536, 300000])
+    parser.add_argument('-rounds', type=int, default=90)
+    parser.add_argument('-skip-python', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.shuffle')
+
+    seed = Hash32(os.urandom(32))
+    for size in args.sizes:
+        start_at = time.perf_counter()
+        numpy_indices = _shuffled_indices_numpy(size, seed, args.rounds)
+        numpy_elapsed = time.perf_counter() - start_at
+        if args.skip_python:
+            logger.info("%7d validators: numpy %6.3fs", size, numpy_elapsed)
+            continue
+
+        start_at = time.perf_counter()
+        python_indices = _shuffled_indices_python(size, seed, args.rounds)
+        python_elapsed = time.perf_counter() - start_at
+        assert numpy_indices == python_indices
+
+        logger.info(
+            "%7d validators: python %7.3fs, numpy %6.3fs (%.0fx)",
+            size,
+            python_elapsed,
+            numpy_elapsed,
+            python_elapsed / numpy_elapsed,
+        )
+
+
+if __name__ == "__main__":
+    _test()
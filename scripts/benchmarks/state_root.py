@@ -0,0 +1,122 @@
+"""Compute the root of a ``BeaconState`` with the given number of validators after every slot,
+for a number of slots that each update what a slot transition usually does: the slot, the
+recent block roots and randao mixes and a few validator balances.
+
+The incremental tree hash, which only rehashes what changed since the previous slot's state, is
+compared with a full tree hash of every state and with the flat hash of the serialized state
+roots used to be.
+
+Run with `python -m scripts.benchmarks.state_root -num-validators 65536 -slots 16`.
+"""
+import logging
+import random
+import time
+
+import ssz
+
+from eth2.beacon._utils.hash import hash_eth2
+from eth2.beacon.state_machines.forks.serenity.configs import SERENITY_CONFIG
+from eth2.beacon.types.states import BeaconState
+from eth2.beacon.types.validator_records import ValidatorRecord
+from eth2.beacon.typing import (
+    Gwei,
+    Slot,
+    ValidatorIndex,
+)
+
+
+def _make_state(num_validators: int) -> BeaconState:
+    config = SERENITY_CONFIG
+    validators = tuple(
+        ValidatorRecord.create_pending_validator(
+            pubkey=index.to_bytes(48, 'little'),
+            withdrawal_credentials=b'\x22' * 32,
+        )
+        for index in range(num_validators)
+    )
+    return BeaconState.create_filled_state(
+        genesis_epoch=config.GENESIS_EPOCH,
+        genesis_start_shard=config.GENESIS_START_SHARD,
+        genesis_slot=config.GENESIS_SLOT,
+        shard_count=config.SHARD_COUNT,
+        latest_block_roots_length=config.LATEST_BLOCK_ROOTS_LENGTH,
+        latest_active_index_roots_length=config.LATEST_ACTIVE_INDEX_ROOTS_LENGTH,
+        latest_randao_mixes_length=config.LATEST_RANDAO_MIXES_LENGTH,
+        latest_slashed_exit_length=config.LATEST_SLASHED_EXIT_LENGTH,
+        activated_genesis_validators=validators,
+        genesis_balances=(config.MAX_DEPOSIT_AMOUNT,) * num_validators,
+    )
+
+
+def _next_slot_state(state: BeaconState, rng: random.Random) -> BeaconState:
+    config = SERENITY_CONFIG
+    slot = Slot(state.slot + 1)
+    block_root_index = slot % config.LATEST_BLOCK_ROOTS_LENGTH
+    mix_index = slot % config.LATEST_RANDAO_MIXES_LENGTH
+    state = state.copy(
+        slot=slot,
+        latest_block_roots=(
+            state.latest_block_roots[:block_root_index] +
+            (rng.getrandbits(256).to_bytes(32, 'little'),) +
+            state.latest_block_roots[block_root_index + 1:]
+        ),
+        latest_randao_mixes=(
+            state.latest_randao_mixes[:mix_index] +
+            (rng.getrandbits(256).to_bytes(32, 'little'),) +
+            state.latest_randao_mixes[mix_index + 1:]
+        ),
+    )
+    return state.update_validator_balances({
+        ValidatorIndex(rng.randrange(state.num_validators)): Gwei(rng.getrandbits(32))
+        for _ in range(16)
+    })
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-validators', type=int, default=65536)
+    parser.add_argument('-slots', type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.state_root')
+
+    rng = random.Random(0)
+    state = _make_state(args.num_validators)
+    start_at = time.perf_counter()
+    state.root
+    logger.info(
+        "%d validators: first root in %.3fs",
+        args.num_validators,
+        time.perf_counter() - start_at,
+    )
+
+    incremental_elapsed = full_elapsed = flat_elapsed = 0.0
+    for _ in range(args.slots):
+        state = _next_slot_state(state, rng)
+
+        start_at = time.perf_counter()
+        root = state.root
+        incremental_elapsed += time.perf_counter() - start_at
+
+        start_at = time.perf_counter()
+        full_root = ssz.hash_tree_root(state)
+        full_elapsed += time.perf_counter() - start_at
+        assert root == full_root
+
+        start_at = time.perf_counter()
+        hash_eth2(ssz.encode(state))
+        flat_elapsed += time.perf_counter() - start_at
+
+    logger.info(
+        "per slot: incremental tree hash %.4fs, full tree hash %.3fs, flat hash %.3fs",
+        incremental_elapsed / args.slots,
+        full_elapsed / args.slots,
+        flat_elapsed / args.slots,
+    )
+
+
+if __name__ == "__main__":
+    _test()
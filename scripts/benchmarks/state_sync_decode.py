@@ -0,0 +1,128 @@
+"""Sync a random state trie through ``StateSync``, decoding the replies on the event loop or in a
+pool of processes.
+
+Replies of ``-batch-size`` nodes are served straight from an in-memory copy of the state, so
+this measures how fast we can go through them once they've arrived from peers. Besides the
+overall rate we report how long the event loop was blocked processing replies, which is what
+limits how many peers we can keep busy during a real state sync.
+
+Run with `python -m scripts.benchmarks.state_sync_decode -num-accounts 20000 -workers 1 2 4`.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import logging
+import os
+import random
+import time
+from typing import (
+    Iterable,
+    Sequence,
+    Tuple,
+)
+
+from eth_typing import Hash32
+
+from eth.db.account import AccountDB
+from eth.db.backends.memory import MemoryDB
+from eth.tools.logging import ExtendedDebugLogger
+
+from trinity.sync.full.hexary_trie import (
+    DecodedNode,
+    decode_trie_nodes,
+)
+from trinity.sync.full.state import StateSync
+
+from tests.core.integration_test_helpers import FakeAsyncMemoryDB
+
+
+def _make_random_state(num_accounts: int) -> Tuple[MemoryDB, Hash32]:
+    raw_db = MemoryDB()
+    account_db = AccountDB(raw_db)
+    for _ in range(num_accounts):
+        addr = os.urandom(20)
+        account_db.set_balance(addr, random.randint(0, 10000))
+        account_db.set_nonce(addr, random.randint(0, 10000))
+        for slot in range(4):
+            account_db.set_storage(addr, slot, random.randint(1, 10000))
+        account_db.set_code(addr, os.urandom(32))
+    account_db.persist()
+    return raw_db, account_db.state_root
+
+
+async def _decode(executor: ProcessPoolExecutor,
+                  num_workers: int,
+                  nodes: Sequence[Tuple[Hash32, bytes, int]]) -> Iterable[DecodedNode]:
+    if not nodes:
+        return ()
+    loop = asyncio.get_event_loop()
+    chunk_size = -(-len(nodes) // num_workers)
+    results = await asyncio.gather(*(
+        loop.run_in_executor(executor, decode_trie_nodes, nodes[i:i + chunk_size])
+        for i in range(0, len(nodes), chunk_size)
+    ))
+    return tuple(itertools.chain.from_iterable(results))
+
+
+async def _sync(raw_db: MemoryDB,
+                state_root: Hash32,
+                batch_size: int,
+                num_workers: int) -> Tuple[int, float]:
+    sync_logger = ExtendedDebugLogger('trinity.benchmarks.state_sync_decode.sync')
+    sync_logger.setLevel(logging.INFO)
+    scheduler = StateSync(state_root, FakeAsyncMemoryDB(), MemoryDB(), sync_logger)
+    executor = ProcessPoolExecutor(num_workers) if num_workers else None
+    num_nodes = 0
+    blocked = 0.0
+    try:
+        requests = scheduler.next_batch(batch_size)
+        while requests:
+            results = [(request.node_key, raw_db[request.node_key]) for request in requests]
+            num_nodes += len(results)
+            if executor is None:
+                decoded: Iterable[DecodedNode] = None
+            else:
+                decoded = await _decode(
+                    executor, num_workers, scheduler.get_nodes_to_decode(results))
+            start_at = time.perf_counter()
+            await scheduler.process(results, decoded)
+            blocked += time.perf_counter() - start_at
+            requests = scheduler.next_batch(batch_size)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return num_nodes, blocked
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-accounts', type=int, default=20000)
+    parser.add_argument('-batch-size', type=int, default=384)
+    parser.add_argument('-workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.state_sync_decode')
+
+    raw_db, state_root = _make_random_state(args.num_accounts)
+    loop = asyncio.get_event_loop()
+    for num_workers in [0] + args.workers:
+        start_at = time.perf_counter()
+        num_nodes, blocked = loop.run_until_complete(
+            _sync(raw_db, state_root, args.batch_size, num_workers)
+        )
+        elapsed = time.perf_counter() - start_at
+        logger.info(
+            "%-9s %d nodes in %6.2fs: %8.0f nodes/sec, event loop blocked for %6.2fs",
+            "%d workers" % num_workers if num_workers else "inline",
+            num_nodes,
+            elapsed,
+            num_nodes / elapsed,
+            blocked,
+        )
+
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,154 @@
+"""Schedule and drain a large synthetic trie through the ``HexaryTrieSync`` scheduler.
+
+Every node has ``-fanout`` children until ``-num-nodes`` have been scheduled. Replies are
+processed ``-in-flight`` batches after they were requested, to mimic the requests that are
+outstanding with peers during a real state sync. The legacy sorted-list queue is measured on a
+smaller trie as it is quadratic in the size of the queue.
+
+Run with `python -m scripts.benchmarks.trie_sync_scheduler -num-nodes 5000000`.
+"""
+import asyncio
+import bisect
+import collections
+import itertools
+import logging
+import resource
+import tempfile
+import time
+from typing import (
+    Deque,
+    List,
+    Type,
+)
+
+from eth.db.backends.memory import MemoryDB
+from eth.tools.logging import ExtendedDebugLogger
+
+from trinity.sync.full.hexary_trie import (
+    HexaryTrieSync,
+    SyncRequest,
+)
+
+from tests.core.integration_test_helpers import FakeAsyncMemoryDB
+
+
+class SortedListTrieSync(HexaryTrieSync):
+    """
+    The scheduler as it was before it used a heap: a sorted list of SyncRequests, rebuilt on
+    every call to next_batch().
+    """
+
+    def next_batch(self, n: int = 1) -> List[SyncRequest]:
+        if len(self.queue) == 0:
+            return []
+        batch = list(reversed((self.queue[-n:])))
+        self.queue = self.queue[:-n]  # type: ignore
+        return batch
+
+    def _enqueue(self, request: SyncRequest) -> None:
+        bisect.insort(self.queue, request)  # type: ignore
+
+
+def _node_key(index: int) -> bytes:
+    return index.to_bytes(32, 'big')
+
+
+async def _drain(scheduler: HexaryTrieSync,
+                 num_nodes: int,
+                 fanout: int,
+                 batch_size: int,
+                 in_flight: int) -> int:
+    key_counter = itertools.count(1)
+    num_scheduled = 1
+    peak_queued = 0
+    outstanding: Deque[List[SyncRequest]] = collections.deque()
+    while scheduler.has_pending_requests:
+        batch = scheduler.next_batch(batch_size)
+        if batch:
+            outstanding.append(batch)
+        if len(outstanding) <= in_flight and batch:
+            continue
+        if not outstanding:
+            break
+
+        peak_queued = max(peak_queued, scheduler.num_queued)
+        for request in outstanding.popleft():
+            request.data = b''
+            num_children = min(fanout, num_nodes - num_scheduled)
+            for _ in range(num_children):
+                scheduler._schedule(
+                    _node_key(next(key_counter)), request, request.depth + 1, None)
+            num_scheduled += num_children
+            if request.dependencies == 0:
+                await scheduler.commit(request)
+    return peak_queued
+
+
+def _run(scheduler_class: Type[HexaryTrieSync],
+         num_nodes: int,
+         fanout: int,
+         batch_size: int,
+         in_flight: int,
+         max_queued: int,
+         logger: logging.Logger) -> None:
+    sync_logger = ExtendedDebugLogger('trinity.benchmarks.trie_sync_scheduler.sync')
+    sync_logger.setLevel(logging.INFO)
+    with tempfile.TemporaryDirectory() as spill_dir:
+        scheduler = scheduler_class(
+            _node_key(0),
+            FakeAsyncMemoryDB(),
+            MemoryDB(),
+            sync_logger,
+            max_queued_requests=max_queued,
+            spill_dir=spill_dir,
+        )
+        start_at = time.perf_counter()
+        peak_queued = asyncio.get_event_loop().run_until_complete(
+            _drain(scheduler, num_nodes, fanout, batch_size, in_flight)
+        )
+        elapsed = time.perf_counter() - start_at
+
+    assert scheduler.committed_nodes == num_nodes
+    logger.info(
+        "%-20s %9d nodes in %7.2fs: %9.0f nodes/sec, peak queue %d, max RSS %dMB",
+        scheduler_class.__name__,
+        num_nodes,
+        elapsed,
+        num_nodes / elapsed,
+        peak_queued,
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024,
+    )
+
+
+def _test() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-num-nodes', type=int, default=5000000)
+    parser.add_argument('-legacy-num-nodes', type=int, default=200000)
+    parser.add_argument('-fanout', type=int, default=16)
+    parser.add_argument('-batch-size', type=int, default=384)
+    parser.add_argument('-in-flight', type=int, default=64)
+    parser.add_argument('-max-queued', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('trinity.benchmarks.trie_sync_scheduler')
+
+    for scheduler_class, num_nodes in ((SortedListTrieSync, args.legacy_num_nodes),
+                                       (HexaryTrieSync, args.legacy_num_nodes),
+                                       (HexaryTrieSync, args.num_nodes)):
+        _run(
+            scheduler_class,
+            num_nodes,
+            args.fanout,
+            args.batch_size,
+            args.in_flight,
+            # the legacy queue can't spill to disk
+            None if scheduler_class is SortedListTrieSync else args.max_queued,
+            logger,
+        )
+
+
+if __name__ == "__main__":
+    _test()
@@ -80,6 +80,10 @@ deps = {
         "py-evm==0.2.0a42",
         "ssz==0.1.0a2",
     ],
+    # Optional, for the eth2 computations that go over every validator
+    'numpy': [
+        "numpy>=1.17.0,<2.0.0",
+    ],
     'libp2p': [
         "base58>=1.0.3",
         # use the forked multiaddr temporarily until the fixing changes are released
@@ -103,6 +107,7 @@ deps['dev'] = (
     deps['doc'] +
     deps['lint'] +
     deps['eth2'] +
+    deps['numpy'] +
     deps['libp2p']
 )
 
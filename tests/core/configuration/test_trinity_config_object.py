@@ -10,6 +10,7 @@ from eth_keys import keys
 
 from trinity._utils.chains import (
     DATABASE_SOCKET_FILENAME,
+    DATABASE_WIRE_SOCKET_FILENAME,
     get_data_dir_for_network_id,
     get_local_data_dir,
     get_nodekey_path,
@@ -20,6 +21,8 @@ from trinity.config import (
     BeaconAppConfig,
 )
 from trinity.constants import (
+    DB_TRANSPORT_BINARY,
+    DB_TRANSPORT_MANAGER,
     IPC_DIR,
     LOG_DIR,
     LOG_FILE,
@@ -83,6 +86,18 @@ def test_trinity_config_explicit_properties():
     assert trinity_config.nodekey_path == Path('./nodekey').resolve()
 
 
+def test_trinity_config_db_transport(xdg_trinity_root):
+    assert TrinityConfig(network_id=1).db_transport == DB_TRANSPORT_MANAGER
+
+    trinity_config = TrinityConfig(network_id=1, db_transport=DB_TRANSPORT_BINARY)
+    assert trinity_config.db_transport == DB_TRANSPORT_BINARY
+    assert trinity_config.database_wire_ipc_path.name == DATABASE_WIRE_SOCKET_FILENAME
+    assert trinity_config.database_wire_ipc_path != trinity_config.database_ipc_path
+
+    with pytest.raises(ValueError):
+        TrinityConfig(network_id=1, db_transport='carrier-pigeon')
+
+
 NODEKEY = '0xd18445cc77139cd8e09110e99c9384f0601bd2dfa5b230cda917df7e56b69949'
 
 
@@ -115,3 +115,13 @@ def test_atomic_batch_over_ipc_manager(manager):
     assert db[b'key-b'] == b'value-b'
     assert b'key-c' in db
     assert db[b'key-c'] == b'value-c'
+
+
+@pytest.mark.asyncio
+async def test_batched_methods_over_ipc_manager(manager):
+    db = manager.get_db()
+
+    await db.coro_set_many({b'key-d': b'value-d', b'key-e': b'value-e'})
+
+    assert await db.coro_exists_many((b'key-a', b'key-d', b'missing')) == (True, True, False)
+    assert await db.coro_get_many((b'key-e', b'missing')) == (b'value-e', None)
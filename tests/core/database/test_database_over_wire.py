@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import multiprocessing
+from pathlib import Path
+import tempfile
+
+import pytest
+
+from eth.chains.ropsten import ROPSTEN_GENESIS_HEADER
+from eth.db.atomic import (
+    AtomicDB,
+)
+from eth.db.header import (
+    HeaderDB,
+)
+from eth.exceptions import (
+    HeaderNotFound,
+)
+
+from trinity.db.wire import (
+    ERROR_STATUSES,
+    AsyncDBWireClient,
+    AsyncHeaderDBWireClient,
+    DBWireServer,
+)
+from trinity._utils.ipc import (
+    wait_for_ipc,
+    kill_process_gracefully,
+)
+
+
+def serve_db(ipc_path):
+    core_db = AtomicDB()
+    core_db[b'key-a'] = b'value-a'
+
+    headerdb = HeaderDB(core_db)
+    headerdb.persist_header(ROPSTEN_GENESIS_HEADER)
+
+    DBWireServer(core_db, headerdb).serve_forever(ipc_path)
+
+
+@pytest.fixture
+def wire_ipc_path():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ipc_path = Path(temp_dir) / 'db-wire.ipc'
+        server_process = multiprocessing.Process(target=serve_db, args=(ipc_path,))
+        server_process.start()
+
+        wait_for_ipc(ipc_path)
+
+        try:
+            yield ipc_path
+        finally:
+            kill_process_gracefully(server_process, logging.getLogger())
+
+
+def test_db_over_wire(wire_ipc_path):
+    db = AsyncDBWireClient(wire_ipc_path)
+
+    assert b'key-a' in db
+    assert db[b'key-a'] == b'value-a'
+
+    with pytest.raises(KeyError):
+        db[b'not-present']
+
+    db[b'key-b'] = b'value-b'
+    assert db[b'key-b'] == b'value-b'
+
+    del db[b'key-b']
+    assert b'key-b' not in db
+
+
+def test_atomic_batch_over_wire(wire_ipc_path):
+    db = AsyncDBWireClient(wire_ipc_path)
+
+    with db.atomic_batch() as batch:
+        batch.set(b'key-c', b'value-c')
+        batch.set(b'key-d', b'value-d')
+
+    assert db[b'key-c'] == b'value-c'
+    assert db[b'key-d'] == b'value-d'
+
+
+@pytest.mark.asyncio
+async def test_async_db_over_wire(wire_ipc_path):
+    db = AsyncDBWireClient(wire_ipc_path)
+
+    await db.coro_set(b'key-e', b'value-e')
+    assert await db.coro_exists(b'key-e') is True
+    assert await db.coro_get(b'key-e') == b'value-e'
+
+    with pytest.raises(KeyError):
+        await db.coro_get(b'not-present')
+
+    # many requests in flight on the same connection
+    values = await asyncio.gather(*(db.coro_exists(b'key-%d' % i) for i in range(100)))
+    assert values == [False] * 100
+
+
+@pytest.mark.asyncio
+async def test_batched_methods_over_wire(wire_ipc_path):
+    db = AsyncDBWireClient(wire_ipc_path)
+
+    await db.coro_set_many({b'key-f': b'value-f', b'empty': b''})
+
+    assert await db.coro_exists_many((b'key-a', b'key-f', b'missing')) == (True, True, False)
+    assert await db.coro_get_many((b'key-f', b'missing', b'empty')) == (b'value-f', None, b'')
+
+
+@pytest.mark.asyncio
+async def test_headerdb_over_wire(wire_ipc_path):
+    headerdb = AsyncHeaderDBWireClient(wire_ipc_path)
+
+    head = await headerdb.coro_get_canonical_head()
+    assert head == ROPSTEN_GENESIS_HEADER
+    assert headerdb.get_canonical_head() == ROPSTEN_GENESIS_HEADER
+
+    assert await headerdb.coro_get_block_header_by_hash(head.hash) == head
+    assert await headerdb.coro_get_canonical_block_hash(0) == head.hash
+    assert await headerdb.coro_get_canonical_block_header_by_number(0) == head
+    assert await headerdb.coro_get_score(head.hash) == head.difficulty
+    assert await headerdb.coro_header_exists(head.hash) is True
+
+    with pytest.raises(HeaderNotFound):
+        await headerdb.coro_get_block_header_by_hash(b'\x00' * 32)
+
+
+def test_serve_in_thread_raises_startup_error():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ipc_path = Path(temp_dir) / 'missing-dir' / 'db-wire.ipc'
+        with pytest.raises(OSError):
+            DBWireServer(AtomicDB()).serve_in_thread(ipc_path)
+
+
+def test_error_statuses_list_subclasses_first():
+    exc_classes = [exc_class for _, exc_class in ERROR_STATUSES]
+    for index, exc_class in enumerate(exc_classes):
+        for later_class in exc_classes[index + 1:]:
+            assert not issubclass(later_class, exc_class)
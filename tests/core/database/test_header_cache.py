@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from eth.chains.ropsten import ROPSTEN_GENESIS_HEADER
+from eth.db.atomic import AtomicDB
+from eth.db.header import HeaderDB
+from eth.exceptions import HeaderNotFound
+from eth.rlp.headers import BlockHeader
+from eth.vm.forks.frontier.blocks import FrontierBlock
+
+from trinity.db.eth1.cache import (
+    CachedAsyncChainDB,
+    CachedAsyncHeaderDB,
+    CanonicalHeadNotifyingDB,
+)
+from trinity.db.eth1.events import CanonicalHeadChanged
+
+from tests.core.integration_test_helpers import (
+    FakeAsyncChainDB,
+    FakeAsyncHeaderDB,
+)
+
+
+def make_child(parent, difficulty=None, extra_data=b''):
+    return BlockHeader(
+        difficulty=parent.difficulty if difficulty is None else difficulty,
+        block_number=parent.block_number + 1,
+        gas_limit=parent.gas_limit,
+        timestamp=parent.timestamp + 1,
+        parent_hash=parent.hash,
+        extra_data=extra_data,
+    )
+
+
+@pytest.fixture
+def base_db():
+    return AtomicDB()
+
+
+@pytest.fixture
+def headerdb(base_db):
+    headerdb = FakeAsyncHeaderDB(base_db)
+    headerdb.persist_header(ROPSTEN_GENESIS_HEADER)
+    return headerdb
+
+
+@pytest.mark.asyncio
+async def test_cached_headerdb_serves_lookups_by_hash_from_cache(headerdb):
+    cached = CachedAsyncHeaderDB(headerdb)
+    genesis_hash = ROPSTEN_GENESIS_HEADER.hash
+
+    for _ in range(3):
+        assert await cached.coro_get_block_header_by_hash(genesis_hash) == ROPSTEN_GENESIS_HEADER
+        assert await cached.coro_get_score(genesis_hash) == ROPSTEN_GENESIS_HEADER.difficulty
+
+    assert await cached.coro_header_exists(genesis_hash) is True
+    assert await cached.coro_header_exists(b'\x00' * 32) is False
+
+    info = cached.cache_info()
+    assert info.misses == 3
+    assert info.hits == 5
+    assert info.size == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_headerdb_counts_canonical_lookups_by_number(headerdb):
+    cached = CachedAsyncHeaderDB(headerdb)
+
+    for _ in range(3):
+        header = await cached.coro_get_canonical_block_header_by_number(0)
+        assert header == ROPSTEN_GENESIS_HEADER
+
+    info = cached.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_headerdb_is_bounded(headerdb):
+    cached = CachedAsyncHeaderDB(headerdb, max_size=1)
+    child = make_child(ROPSTEN_GENESIS_HEADER)
+    headerdb.persist_header(child)
+
+    await cached.coro_get_block_header_by_hash(ROPSTEN_GENESIS_HEADER.hash)
+    await cached.coro_get_block_header_by_hash(child.hash)
+    await cached.coro_get_block_header_by_hash(ROPSTEN_GENESIS_HEADER.hash)
+
+    assert cached.cache_info().misses == 3
+    assert cached.cache_info().size == 1
+
+
+@pytest.mark.asyncio
+async def test_canonical_lookups_are_invalidated_on_canonical_head_changed(headerdb, event_bus):
+    cached = CachedAsyncHeaderDB(headerdb, event_bus)
+
+    assert await cached.coro_get_canonical_head() == ROPSTEN_GENESIS_HEADER
+    with pytest.raises(HeaderNotFound):
+        await cached.coro_get_canonical_block_hash(1)
+
+    # Written by another process, so this instance doesn't know about it yet
+    child = make_child(ROPSTEN_GENESIS_HEADER)
+    headerdb.persist_header(child)
+    assert await cached.coro_get_canonical_head() == ROPSTEN_GENESIS_HEADER
+
+    event_bus.broadcast(CanonicalHeadChanged(child.hash))
+    for _ in range(100):
+        if await cached.coro_get_canonical_head() == child:
+            break
+        await asyncio.sleep(0.01)
+    else:
+        raise AssertionError("Cache was not invalidated")
+
+    assert await cached.coro_get_canonical_block_hash(1) == child.hash
+    assert await cached.coro_get_canonical_block_header_by_number(1) == child
+    # header by hash survives invalidation
+    hits = cached.cache_info().hits
+    assert await cached.coro_get_block_header_by_hash(ROPSTEN_GENESIS_HEADER.hash)
+    assert cached.cache_info().hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_persisting_through_the_cache_invalidates_canonical_lookups(base_db, headerdb):
+    cached = CachedAsyncChainDB(FakeAsyncChainDB(base_db))
+    assert await cached.coro_get_canonical_head() == ROPSTEN_GENESIS_HEADER
+
+    child = make_child(ROPSTEN_GENESIS_HEADER)
+    await cached.coro_persist_header(child)
+
+    assert await cached.coro_get_canonical_head() == child
+    assert await cached.coro_get_canonical_block_hash(1) == child.hash
+
+
+@pytest.mark.asyncio
+async def test_persisting_blocks_through_the_cache_invalidates_canonical_lookups(base_db, headerdb):
+    cached = CachedAsyncChainDB(FakeAsyncChainDB(base_db))
+    assert await cached.coro_get_canonical_head() == ROPSTEN_GENESIS_HEADER
+
+    child = make_child(ROPSTEN_GENESIS_HEADER)
+    grandchild = make_child(child)
+    await cached.coro_persist_blocks((
+        FrontierBlock(child, transactions=[], uncles=[]),
+        FrontierBlock(grandchild, transactions=[], uncles=[]),
+    ))
+
+    assert await cached.coro_get_canonical_head() == grandchild
+    assert await cached.coro_get_canonical_block_hash(1) == child.hash
+
+
+def test_notifying_db_reports_canonical_head_changes():
+    changes = []
+    notifying_db = CanonicalHeadNotifyingDB(AtomicDB(), changes.append)
+    headerdb = HeaderDB(notifying_db)
+
+    headerdb.persist_header(ROPSTEN_GENESIS_HEADER)
+    child = make_child(ROPSTEN_GENESIS_HEADER)
+    headerdb.persist_header_chain((child, make_child(child)))
+    assert changes == [ROPSTEN_GENESIS_HEADER.hash, make_child(child).hash]
+
+    # a side chain with less difficulty doesn't change the head
+    uncle = make_child(ROPSTEN_GENESIS_HEADER, difficulty=1, extra_data=b'uncle')
+    headerdb.persist_header(uncle)
+    notifying_db[b'unrelated'] = b'value'
+    assert len(changes) == 2
@@ -0,0 +1,90 @@
+import pytest
+
+from eth.chains.ropsten import ROPSTEN_GENESIS_HEADER
+from eth.db.atomic import AtomicDB
+from eth.exceptions import ParentNotFound
+from eth.rlp.headers import BlockHeader
+from eth.vm.forks.frontier.blocks import FrontierBlock
+from eth.vm.forks.frontier.transactions import FrontierTransaction
+
+from trinity.db.eth1.cache import CanonicalHeadNotifyingDB
+from trinity.db.eth1.chain import TrinityChainDB
+
+
+def make_block(parent, num_transactions):
+    header = BlockHeader(
+        difficulty=parent.difficulty,
+        block_number=parent.block_number + 1,
+        gas_limit=parent.gas_limit,
+        timestamp=parent.timestamp + 1,
+        parent_hash=parent.hash,
+    )
+    transactions = [
+        FrontierTransaction(
+            nonce=header.block_number * 100 + i,
+            gas_price=1,
+            gas=21000,
+            to=b'\x01' * 20,
+            value=1,
+            data=b'',
+            v=27,
+            r=1,
+            s=1,
+        )
+        for i in range(num_transactions)
+    ]
+    return FrontierBlock(header, transactions=transactions, uncles=[])
+
+
+def make_blocks(num_blocks):
+    blocks = []
+    parent = ROPSTEN_GENESIS_HEADER
+    for i in range(num_blocks):
+        block = make_block(parent, num_transactions=i % 3)
+        blocks.append(block)
+        parent = block.header
+    return blocks
+
+
+@pytest.fixture
+def head_changes():
+    return []
+
+
+@pytest.fixture
+def chaindb(head_changes):
+    chaindb = TrinityChainDB(CanonicalHeadNotifyingDB(AtomicDB(), head_changes.append))
+    chaindb.persist_header(ROPSTEN_GENESIS_HEADER)
+    head_changes.clear()
+    return chaindb
+
+
+def test_persist_blocks_matches_persist_block(chaindb, head_changes):
+    blocks = make_blocks(5)
+    expected_db = TrinityChainDB(AtomicDB())
+    expected_db.persist_header(ROPSTEN_GENESIS_HEADER)
+    expected = [expected_db.persist_block(block) for block in blocks]
+
+    new_canonical_hashes, old_canonical_hashes = chaindb.persist_blocks(blocks)
+
+    assert new_canonical_hashes == tuple(block.hash for block in blocks)
+    assert new_canonical_hashes == tuple(new for news, _ in expected for new in news)
+    assert old_canonical_hashes == ()
+    assert chaindb.get_canonical_head() == blocks[-1].header
+    for block in blocks:
+        for index, transaction in enumerate(block.transactions):
+            assert chaindb.get_transaction_index(transaction.hash) == (block.number, index)
+    # All blocks were written in one go
+    assert head_changes == [blocks[-1].hash]
+
+
+def test_persist_blocks_is_atomic(chaindb, head_changes):
+    blocks = make_blocks(3)
+    orphan = make_block(make_block(blocks[-1].header, 0).header, 1)
+
+    with pytest.raises(ParentNotFound):
+        chaindb.persist_blocks(blocks + [orphan])
+
+    assert chaindb.get_canonical_head() == ROPSTEN_GENESIS_HEADER
+    assert not chaindb.header_exists(blocks[0].hash)
+    assert head_changes == []
@@ -15,7 +15,6 @@ from eth.chains.base import (
 from eth.db.backends.level import LevelDB
 from eth.db.backends.memory import MemoryDB
 from eth.db.atomic import AtomicDB
-from eth.db.chain import ChainDB
 from eth.tools.builder.chain import (
     build,
     byzantium_at,
@@ -25,8 +24,14 @@ from eth.tools.builder.chain import (
 from eth.db.header import HeaderDB
 from eth.vm.forks.byzantium import ByzantiumVM
 
-from trinity.db.base import BaseAsyncDB
-from trinity.db.eth1.chain import BaseAsyncChainDB
+from trinity.db.base import (
+    BaseAsyncDB,
+    BatchedDB,
+)
+from trinity.db.eth1.chain import (
+    BaseAsyncChainDB,
+    TrinityChainDB,
+)
 from trinity.db.eth1.header import BaseAsyncHeaderDB
 
 ZIPPED_FIXTURES_PATH = Path(__file__).parent.parent / 'integration' / 'fixtures'
@@ -52,19 +57,37 @@ def async_passthrough(base_name):
     return passthrough_method
 
 
+def async_batch_passthrough(base_name):
+    coro_name = 'coro_{0}'.format(base_name)
+
+    async def passthrough_method(self, *args, **kwargs):
+        return getattr(BatchedDB(self), base_name)(*args, **kwargs)
+    passthrough_method.__name__ = coro_name
+    return passthrough_method
+
+
 class FakeAsyncAtomicDB(AtomicDB, BaseAsyncDB):
     coro_set = async_passthrough('set')
     coro_exists = async_passthrough('exists')
+    coro_get_many = async_batch_passthrough('get_many')
+    coro_exists_many = async_batch_passthrough('exists_many')
+    coro_set_many = async_batch_passthrough('set_many')
 
 
 class FakeAsyncMemoryDB(MemoryDB, BaseAsyncDB):
     coro_set = async_passthrough('set')
     coro_exists = async_passthrough('exists')
+    coro_get_many = async_batch_passthrough('get_many')
+    coro_exists_many = async_batch_passthrough('exists_many')
+    coro_set_many = async_batch_passthrough('set_many')
 
 
 class FakeAsyncLevelDB(LevelDB, BaseAsyncDB):
     coro_set = async_passthrough('set')
     coro_exists = async_passthrough('exists')
+    coro_get_many = async_batch_passthrough('get_many')
+    coro_exists_many = async_batch_passthrough('exists_many')
+    coro_set_many = async_batch_passthrough('set_many')
 
 
 class FakeAsyncHeaderDB(BaseAsyncHeaderDB, HeaderDB):
@@ -78,8 +101,9 @@ class FakeAsyncHeaderDB(BaseAsyncHeaderDB, HeaderDB):
     coro_persist_header_chain = async_passthrough('persist_header_chain')
 
 
-class FakeAsyncChainDB(BaseAsyncChainDB, FakeAsyncHeaderDB, ChainDB):
+class FakeAsyncChainDB(BaseAsyncChainDB, FakeAsyncHeaderDB, TrinityChainDB):
     coro_persist_block = async_passthrough('persist_block')
+    coro_persist_blocks = async_passthrough('persist_blocks')
     coro_persist_uncles = async_passthrough('persist_uncles')
     coro_persist_trie_data_dict = async_passthrough('persist_trie_data_dict')
     coro_get = async_passthrough('get')
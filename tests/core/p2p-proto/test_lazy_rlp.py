@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+import rlp
+from rlp import sedes
+
+from eth_hash.auto import keccak
+
+from eth.db.trie import make_trie_root_and_nodes
+from eth.rlp.headers import BlockHeader
+from eth.rlp.receipts import Receipt
+from eth.rlp.transactions import BaseTransactionFields
+from eth.vm.forks.frontier.transactions import FrontierTransaction
+
+from p2p.exceptions import MalformedMessage
+
+from trinity.protocol.eth.commands import (
+    BlockBodies,
+    Receipts,
+)
+from trinity.protocol.eth.normalizers import (
+    GetBlockBodiesNormalizer,
+    ReceiptsNormalizer,
+)
+from trinity.rlp.block_body import (
+    BlockBody,
+    LazyBlockBody,
+)
+from trinity.rlp.lazy import (
+    LazyRLPSequence,
+    split_rlp_list,
+)
+
+
+def mk_transaction(nonce):
+    return BaseTransactionFields(
+        nonce=nonce,
+        gas=21000,
+        gas_price=1,
+        to=os.urandom(20),
+        value=nonce,
+        data=os.urandom(nonce),
+        v=27,
+        r=int.from_bytes(os.urandom(32), 'big'),
+        s=int.from_bytes(os.urandom(32), 'big'),
+    )
+
+
+def mk_uncle(block_number):
+    return BlockHeader(
+        state_root=os.urandom(32),
+        difficulty=1000000,
+        block_number=block_number,
+        gas_limit=3141592,
+        timestamp=1000,
+    )
+
+
+def mk_receipt(gas_used):
+    return Receipt(state_root=os.urandom(32), gas_used=gas_used, bloom=0, logs=[])
+
+
+@pytest.mark.parametrize(
+    'items',
+    (
+        [],
+        [b''],
+        [b'\x01', b'\x80', b'a' * 100],
+        [[], [b'a', [b'b']], b'c' * 60],
+    ),
+)
+def test_split_rlp_list(items):
+    assert split_rlp_list(rlp.encode(items)) == tuple(rlp.encode(item) for item in items)
+
+
+@pytest.mark.parametrize(
+    'encoded',
+    (
+        b'',
+        rlp.encode(b'not a list'),
+        # trailing bytes after the list
+        rlp.encode([b'a']) + b'\x00',
+        # list prefix announcing more than there is
+        b'\xc3\x01',
+        # item extending beyond the list
+        b'\xc2\x83ab',
+    ),
+)
+def test_split_malformed_rlp_list(encoded):
+    with pytest.raises(rlp.DecodingError):
+        split_rlp_list(encoded)
+
+
+def test_lazy_rlp_sequence():
+    transactions = [mk_transaction(i) for i in range(3)]
+    lazy = LazyRLPSequence.from_encoded_list(
+        rlp.encode(transactions), BaseTransactionFields)
+
+    assert len(lazy) == 3
+    assert lazy[1] == transactions[1]
+    assert lazy[1] is lazy[1]
+    assert lazy[1:] == tuple(transactions[1:])
+    assert list(lazy) == transactions
+    assert lazy == transactions
+    assert lazy != transactions[:2]
+
+    decoded = lazy.decode_as(FrontierTransaction)
+    assert all(isinstance(tx, FrontierTransaction) for tx in decoded)
+    assert [tx.hash for tx in decoded] == [keccak(rlp.encode(tx)) for tx in transactions]
+
+
+def test_lazy_block_body():
+    body = BlockBody([mk_transaction(i) for i in range(3)], [mk_uncle(1)])
+    lazy_body = LazyBlockBody(rlp.encode(body))
+
+    assert lazy_body == body
+    assert lazy_body.uncles_hash == keccak(rlp.encode(body.uncles))
+    assert lazy_body.transactions.encoded_items == tuple(map(rlp.encode, body.transactions))
+
+
+def test_block_body_must_have_two_items():
+    with pytest.raises(rlp.DecodingError):
+        LazyBlockBody(rlp.encode([[]]))
+
+
+def test_block_bodies_normalized_from_encoded_items():
+    bodies = [
+        BlockBody([mk_transaction(i) for i in range(10)], [mk_uncle(1), mk_uncle(2)]),
+        BlockBody([], []),
+    ]
+    msg = BlockBodies(cmd_id_offset=0, snappy_support=False).decode_payload(
+        rlp.encode(bodies, sedes=sedes.CountableList(BlockBody)))
+
+    result = GetBlockBodiesNormalizer.normalize_result(msg)
+
+    for body, (lazy_body, trie_root_and_data, uncles_hash) in zip(bodies, result):
+        assert lazy_body == body
+        assert trie_root_and_data == make_trie_root_and_nodes(body.transactions)
+        assert uncles_hash == keccak(rlp.encode(body.uncles))
+
+
+def test_receipts_normalized_from_encoded_items():
+    receipts = [[mk_receipt(i) for i in range(5)], []]
+    msg = Receipts(cmd_id_offset=0, snappy_support=False).decode_payload(rlp.encode(receipts))
+
+    result = ReceiptsNormalizer.normalize_result(msg)
+
+    for block_receipts, (lazy_receipts, trie_root_and_data) in zip(receipts, result):
+        assert lazy_receipts == block_receipts
+        assert trie_root_and_data == make_trie_root_and_nodes(block_receipts)
+
+
+@pytest.mark.parametrize('cmd_class', (BlockBodies, Receipts))
+def test_malformed_payload(cmd_class):
+    cmd = cmd_class(cmd_id_offset=0, snappy_support=False)
+    with pytest.raises(MalformedMessage):
+        cmd.decode_payload(b'\xc3\x01')
@@ -1,12 +1,24 @@
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import os
 
 import pytest
 
+from eth.rlp.headers import BlockHeader
+
 from p2p.exceptions import NoMatchingPeerCapabilities
 from p2p.p2p_proto import DisconnectReason, P2PProtocol
 
+from trinity.protocol.eth.commands import (
+    BlockHeaders,
+    NodeData,
+    Transactions,
+)
 from trinity.protocol.eth.peer import ETHPeer
-from trinity.protocol.eth.proto import ETHProtocol
+from trinity.protocol.eth.proto import (
+    ETHProtocol,
+    ETHRangeProtocol,
+)
 from trinity.protocol.les.peer import LESPeer
 from trinity.protocol.les.proto import (
     LESProtocol,
@@ -24,7 +36,7 @@ from tests.core.peer_helpers import (
     'peer_class,proto',
     (
         (LESPeer, LESProtocolV2),
-        (ETHPeer, ETHProtocol),
+        (ETHPeer, ETHRangeProtocol),
     )
 )
 @pytest.mark.asyncio
@@ -72,6 +84,24 @@ def test_sub_protocol_selection(snappy_support):
         peer.select_sub_protocol([('unknown', 1)], snappy_support)
 
 
+def test_sub_protocol_selection_by_preference():
+    peer = ProtoMatchingPeer([ETHProtocol, ETHRangeProtocol], snappy_support=False)
+
+    proto = peer.select_sub_protocol([
+        (ETHRangeProtocol.name, ETHRangeProtocol.version),
+        (ETHProtocol.name, ETHProtocol.version),
+    ],
+        snappy_support=False
+    )
+    assert isinstance(proto, ETHRangeProtocol)
+
+    # ethrange/1 has a lower version than eth/63, but it's still only used when both sides
+    # support it.
+    proto = peer.select_sub_protocol(
+        [(ETHProtocol.name, ETHProtocol.version)], snappy_support=False)
+    assert type(proto) is ETHProtocol
+
+
 @pytest.mark.asyncio
 async def test_peer_pool_iter(request, event_loop):
     peer1, _ = await get_directly_linked_peers(request, event_loop)
@@ -96,6 +126,49 @@ async def test_peer_pool_iter(request, event_loop):
     assert peer3 in peers
 
 
+class RecordingExecutor(ProcessPoolExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(fn)
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_large_messages_decoded_in_executor(monkeypatch):
+    alice, bob = await get_directly_linked_peers_without_handshake()
+    await asyncio.gather(alice.do_p2p_handshake(), bob.do_p2p_handshake())
+    await asyncio.gather(alice.do_sub_proto_handshake(), bob.do_sub_proto_handshake())
+    executor = RecordingExecutor(1)
+    monkeypatch.setattr(bob, 'get_msg_decoding_executor', lambda: executor)
+    bob.min_offloaded_msg_size = 1000
+
+    headers = tuple(
+        BlockHeader(difficulty=1, block_number=i, gas_limit=1, extra_data=os.urandom(32))
+        for i in range(20)
+    )
+    nodes = (os.urandom(100), os.urandom(2000))
+    alice.sub_proto.send_block_headers(headers)
+    alice.sub_proto.send_transactions([])
+    alice.sub_proto.send_node_data(nodes)
+    alice.sub_proto.send_node_data(nodes[:1])
+
+    try:
+        received = [await bob.read_msg() for _ in range(4)]
+    finally:
+        executor.shutdown()
+
+    # Messages are still processed in the order they were sent.
+    assert [type(cmd) for cmd, _ in received] == [BlockHeaders, Transactions, NodeData, NodeData]
+    assert tuple(received[0][1]) == headers
+    assert tuple(received[2][1]) == nodes
+    assert tuple(received[3][1]) == nodes[:1]
+    # Only the large messages were decoded in the executor.
+    assert [type(fn.__self__) for fn in executor.submitted] == [BlockHeaders, NodeData]
+
+
 class LESProtocolV3(LESProtocol):
     version = 3
 
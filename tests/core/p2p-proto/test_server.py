@@ -10,7 +10,7 @@ from eth.chains.ropsten import RopstenChain, ROPSTEN_GENESIS_HEADER
 from eth.db.atomic import AtomicDB
 from eth.db.chain import ChainDB
 
-from p2p.auth import HandshakeInitiator, _handshake
+from p2p.auth import HandshakeExecutor, HandshakeInitiator, _handshake
 from p2p.events import ConnectToNodeCommand
 from p2p.kademlia import (
     Node,
@@ -136,6 +136,59 @@ async def test_server_incoming_connection(monkeypatch, server, event_loop):
     assert receiver_peer.privkey == RECEIVER_PRIVKEY
 
 
+@pytest.mark.asyncio
+async def test_handshake_stage_latencies(server):
+    token = CancelToken("initiator")
+    executor = HandshakeExecutor(max_workers=1)
+    initiator = HandshakeInitiator(RECEIVER_REMOTE, INITIATOR_PRIVKEY, False, token)
+    reader, writer = await initiator.connect()
+
+    await _handshake(initiator, reader, writer, token, executor)
+
+    stages = {latency.stage: latency for latency in executor.get_stage_latencies()}
+    assert set(stages) == {'encode_auth', 'wait_auth_ack', 'decode_auth_ack'}
+    assert all(latency.samples == 1 for latency in stages.values())
+    # The server has sent its auth ack, so it is done with the auth handshake
+    server_stages = [
+        latency.stage for latency in server.peer_pool.handshake_executor.get_stage_latencies()]
+    assert server_stages == ['wait_auth', 'decode_auth', 'encode_auth_ack']
+    writer.close()
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_peer_pool_dials_concurrently(monkeypatch):
+    peer_pool = ParagonPeerPool(
+        privkey=INITIATOR_PRIVKEY,
+        context=ParagonContext(),
+    )
+    peer_pool.handshake_executor = HandshakeExecutor(max_workers=0, max_concurrent_dials=3)
+    dialing = set()
+    max_dialing = 0
+    dialed = []
+
+    async def mock_connect(node):
+        nonlocal max_dialing
+        dialing.add(node)
+        max_dialing = max(max_dialing, len(dialing))
+        await asyncio.sleep(0.01)
+        dialing.remove(node)
+        dialed.append(node)
+        return None
+
+    monkeypatch.setattr(peer_pool, 'connect', mock_connect)
+    asyncio.ensure_future(peer_pool.run())
+    await peer_pool.events.started.wait()
+
+    nodes = [
+        Node(keys.PrivateKey(bytes([i]) * 32).public_key, SERVER_ADDRESS) for i in range(1, 11)]
+    await peer_pool.connect_to_nodes(iter(nodes))
+
+    assert sorted(dialed) == sorted(nodes)
+    assert max_dialing == 3
+    await peer_pool.cancel()
+
+
 @pytest.mark.asyncio
 async def test_peer_pool_connect(monkeypatch, event_loop, server):
     started_peers = []
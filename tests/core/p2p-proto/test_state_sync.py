@@ -1,9 +1,12 @@
 import os
+from pathlib import Path
 import random
 import time
 
 import pytest
 
+import rlp
+
 from hypothesis import (
     given,
     settings,
@@ -12,13 +15,18 @@ from hypothesis import (
 )
 from hypothesis.types import RandomWithSeed
 
+from eth_hash.auto import keccak
+
 from trie import HexaryTrie
 
 from eth.db.backends.memory import MemoryDB
 from eth.db.account import AccountDB
 from eth.tools.logging import ExtendedDebugLogger
 
-from trinity.sync.full.hexary_trie import HexaryTrieSync
+from trinity.sync.full.hexary_trie import (
+    HexaryTrieSync,
+    decode_trie_nodes,
+)
 from trinity.sync.full.state import StateSync, TrieNodeRequestTracker
 
 from tests.core.integration_test_helpers import FakeAsyncMemoryDB
@@ -120,6 +128,196 @@ async def test_state_sync():
         assert result_account_db.get_code(addr) == code
 
 
+@pytest.mark.asyncio
+async def test_state_sync_with_nodes_decoded_elsewhere():
+    raw_db, state_root, contents = make_random_state(200)
+    dest_db = FakeAsyncMemoryDB()
+    scheduler = StateSync(state_root, dest_db, MemoryDB(), ExtendedDebugLogger('test'))
+    requests = scheduler.next_batch(10)
+    while requests:
+        results = [(request.node_key, raw_db[request.node_key]) for request in requests]
+        decoded = decode_trie_nodes(scheduler.get_nodes_to_decode(results))
+        # contract code is stored as is, without decoding it
+        assert len(decoded) == len([request for request in requests if not request.is_raw])
+        await scheduler.process(results, decoded)
+        requests = scheduler.next_batch(10)
+
+    result_account_db = AccountDB(dest_db, state_root)
+    for addr, (balance, _, storage, code) in contents.items():
+        assert result_account_db.get_balance(addr) == balance
+        assert result_account_db.get_storage(addr, 0) == storage
+        assert result_account_db.get_code(addr) == code
+
+
+@pytest.mark.asyncio
+async def test_state_sync_spilling_queue_to_disk(tmpdir):
+    raw_db, state_root, contents = make_random_state(200)
+    dest_db = FakeAsyncMemoryDB()
+    scheduler = StateSync(
+        state_root,
+        dest_db,
+        MemoryDB(),
+        ExtendedDebugLogger('test'),
+        max_queued_requests=8,
+        spill_dir=tmpdir,
+    )
+    max_spilled = 0
+    requests = scheduler.next_batch(4)
+    while requests:
+        results = [[request.node_key, raw_db[request.node_key]] for request in requests]
+        await scheduler.process(results)
+        assert len(scheduler.queue) <= 8
+        max_spilled = max(max_spilled, scheduler.num_spilled)
+        requests = scheduler.next_batch(4)
+
+    assert max_spilled > 0
+    assert not scheduler.has_pending_requests
+    result_account_db = AccountDB(dest_db, state_root)
+    for addr, (balance, nonce, storage, code) in contents.items():
+        assert result_account_db.get_balance(addr) == balance
+        assert result_account_db.get_nonce(addr) == nonce
+        assert result_account_db.get_storage(addr, 0) == storage
+        assert result_account_db.get_code(addr) == code
+
+
+@pytest.mark.asyncio
+async def test_state_sync_resumes_from_saved_progress(tmpdir):
+    raw_db, state_root, contents = make_random_state(200)
+    dest_db = FakeAsyncMemoryDB()
+    nodes_cache = MemoryDB()
+    progress_path = Path(tmpdir) / 'frontier'
+
+    def reply(requests):
+        return [(request.node_key, raw_db[request.node_key]) for request in requests]
+
+    def make_scheduler():
+        return StateSync(
+            state_root,
+            dest_db,
+            nodes_cache,
+            ExtendedDebugLogger('test'),
+            max_queued_requests=8,
+            spill_dir=tmpdir,
+        )
+
+    scheduler = make_scheduler()
+    for _ in range(20):
+        requests = scheduler.next_batch(4)
+        await scheduler.process(reply(requests))
+    # Some requests are in flight while we save, and we keep going for a bit after that.
+    in_flight = scheduler.next_batch(4)
+    assert in_flight and scheduler.num_spilled > 0
+    await scheduler.save_progress(progress_path)
+    for _ in range(5):
+        requests = scheduler.next_batch(4)
+        await scheduler.process(reply(requests))
+    num_committed_before_restart = scheduler.committed_nodes
+
+    resumed = make_scheduler()
+    assert await resumed.load_progress(progress_path)
+    assert resumed.num_queued > 0
+    num_requested = 0
+    requests = resumed.next_batch(4)
+    while requests:
+        assert state_root not in [request.node_key for request in requests]
+        num_requested += len(requests)
+        await resumed.process(reply(requests))
+        requests = resumed.next_batch(4)
+
+    assert not resumed.has_pending_requests
+    assert num_committed_before_restart + num_requested < len(raw_db.kv_store)
+    result_account_db = AccountDB(dest_db, state_root)
+    for addr, (balance, nonce, storage, code) in contents.items():
+        assert result_account_db.get_balance(addr) == balance
+        assert result_account_db.get_nonce(addr) == nonce
+        assert result_account_db.get_storage(addr, 0) == storage
+        assert result_account_db.get_code(addr) == code
+
+    # Progress saved for another state root is ignored
+    other_root = make_random_state(1)[1]
+    other = StateSync(other_root, dest_db, nodes_cache, ExtendedDebugLogger('test'))
+    assert not await other.load_progress(progress_path)
+    assert [request.node_key for request in other.next_batch()] == [other_root]
+
+
+@pytest.mark.asyncio
+async def test_trie_sync_saves_request_scheduled_again_while_spilled(tmpdir):
+    def make_scheduler(max_queued_requests=None):
+        return HexaryTrieSync(
+            b'\x00' * 32,
+            FakeAsyncMemoryDB(),
+            MemoryDB(),
+            ExtendedDebugLogger('test'),
+            max_queued_requests=max_queued_requests,
+            spill_dir=tmpdir,
+        )
+
+    scheduler = make_scheduler(max_queued_requests=2)
+    root = scheduler.next_batch()[0]
+    node_a, node_b, node_c = (bytes([i]) * 32 for i in range(1, 4))
+    for node_key in (node_a, node_b, node_c):
+        scheduler._schedule(node_key, root, 1, None)
+    # Only the most recent request is kept in memory
+    assert scheduler.num_spilled == 2
+    request_c = scheduler.next_batch()[0]
+    assert request_c.node_key == node_c
+    scheduler._schedule(node_b, request_c, 2, None)
+
+    progress_path = Path(tmpdir) / 'frontier'
+    assert await scheduler.save_progress(progress_path) == 4
+
+    resumed = make_scheduler()
+    assert await resumed.load_progress(progress_path)
+    resumed_root = resumed.requests[root.node_key]
+    resumed_b = resumed.requests[node_b]
+    resumed_c = resumed.requests[node_c]
+    assert set(resumed_b.parents) == {resumed_root, resumed_c}
+    assert resumed_root.dependencies == 3
+    assert resumed_c.dependencies == 1
+
+    # Committing the leaves releases all their ancestors
+    resumed._commit(resumed.requests[node_a])
+    resumed._commit(resumed_b)
+    assert not resumed.has_pending_requests
+
+
+def test_trie_sync_queue_prefers_deepest_most_recent_requests():
+    scheduler = HexaryTrieSync(
+        b'\x00' * 32, FakeAsyncMemoryDB(), MemoryDB(), ExtendedDebugLogger('test'))
+    root = scheduler.next_batch()[0]
+    shallow_a, shallow_b, deep_a, deep_b = (bytes([i]) * 32 for i in range(1, 5))
+    scheduler._schedule(shallow_a, root, 1, None)
+    scheduler._schedule(deep_a, root, 2, None)
+    scheduler._schedule(shallow_b, root, 1, None)
+    scheduler._schedule(deep_b, root, 2, None)
+
+    batch = scheduler.next_batch(4)
+    assert [request.node_key for request in batch] == [deep_b, deep_a, shallow_b, shallow_a]
+    assert root.dependencies == 4
+
+
+@pytest.mark.asyncio
+async def test_trie_sync_reply_with_node_referenced_by_a_later_one():
+    leaf = rlp.encode([b'\x20' + b'\x01' * 31, b'\x02' * 32])
+    branch = rlp.encode([keccak(leaf)] + [b''] * 16)
+    root = rlp.encode([keccak(leaf), keccak(branch)] + [b''] * 15)
+    nodes = {keccak(node): node for node in (leaf, branch, root)}
+    dest_db = FakeAsyncMemoryDB()
+    scheduler = HexaryTrieSync(
+        keccak(root), dest_db, MemoryDB(), ExtendedDebugLogger('test'))
+
+    await scheduler.process([(keccak(root), root)])
+    assert {request.node_key for request in scheduler.next_batch(2)} == {
+        keccak(leaf), keccak(branch)}
+    # The branch references the leaf, which is in the same reply but hasn't been committed yet
+    await scheduler.process([(keccak(leaf), leaf), (keccak(branch), branch)])
+
+    assert not scheduler.has_pending_requests
+    assert scheduler.committed_nodes == 3
+    for node_key, node in nodes.items():
+        assert dest_db[node_key] == node
+
+
 REPLY_TIMEOUT = 5
 
 
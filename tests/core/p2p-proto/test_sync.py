@@ -1,7 +1,12 @@
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 
 import pytest
 
+from eth_utils import ValidationError
+
+from eth.db.account import AccountDB
+
 from p2p.service import BaseService
 
 from trinity.protocol.eth.servers import ETHRequestServer
@@ -9,9 +14,11 @@ from trinity.protocol.eth.sync import ETHHeaderChainSyncer
 from trinity.protocol.les.peer import LESPeer
 from trinity.protocol.les.servers import LightRequestServer
 from trinity.sync.common.chain import (
+    PipelinedBlockImporter,
     SimpleBlockImporter,
 )
 from trinity.sync.full.chain import FastChainSyncer, RegularChainSyncer, RegularChainBodySyncer
+from trinity.sync.full.snap import SnapStateDownloader
 from trinity.sync.full.state import StateDownloader
 from trinity.sync.light.chain import LightChainSyncer
 
@@ -68,6 +75,74 @@ async def test_fast_syncer(request, event_loop, chaindb_fresh, chaindb_20):
     assert head.state_root in chaindb_fresh.db
 
 
+@pytest.mark.asyncio
+async def test_state_downloader_decoding_off_loop(request, event_loop, chaindb_fresh, chaindb_20):
+    client_peer, server_peer = await get_directly_linked_peers(
+        request, event_loop,
+        alice_headerdb=FakeAsyncHeaderDB(chaindb_fresh.db),
+        bob_headerdb=FakeAsyncHeaderDB(chaindb_20.db))
+    client_peer_pool = MockPeerPoolWithConnectedPeers([client_peer])
+    server_peer_pool = MockPeerPoolWithConnectedPeers([server_peer])
+    server_request_handler = ETHRequestServer(FakeAsyncChainDB(chaindb_20.db), server_peer_pool)
+    asyncio.ensure_future(server_request_handler.run())
+
+    head = chaindb_20.get_canonical_head()
+    state_downloader = StateDownloader(
+        chaindb_fresh, chaindb_fresh.db, head.state_root, client_peer_pool, decode_workers=2)
+    await asyncio.wait_for(state_downloader.run(), timeout=10)
+
+    assert head.state_root in chaindb_fresh.db
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('decode_workers', (0, 2))
+async def test_snap_state_downloader(
+        request, event_loop, monkeypatch, chaindb_fresh, chaindb_20, decode_workers):
+    from trinity.protocol.eth import constants
+    monkeypatch.setattr(constants, 'MAX_TRIE_RANGE_LEAVES', 8)
+
+    # Add some accounts with storage and code to the state served by our peer, some of them
+    # sharing the same storage trie or code.
+    server_account_db = AccountDB(chaindb_20.db)
+    addresses = [i.to_bytes(20, 'big') for i in range(1, 61)]
+    for i, address in enumerate(addresses):
+        server_account_db.set_balance(address, i + 1)
+        if i % 3 == 0:
+            server_account_db.set_storage(address, 1, i % 2 + 1)
+            server_account_db.set_storage(address, 2, i)
+        if i % 4 == 0:
+            server_account_db.set_code(address, bytes([i % 5]) * 40)
+    server_account_db.persist()
+    state_root = server_account_db.state_root
+
+    client_peer, server_peer = await get_directly_linked_peers(
+        request, event_loop,
+        alice_headerdb=FakeAsyncHeaderDB(chaindb_fresh.db),
+        bob_headerdb=FakeAsyncHeaderDB(chaindb_20.db))
+    client_peer_pool = MockPeerPoolWithConnectedPeers([client_peer])
+    server_peer_pool = MockPeerPoolWithConnectedPeers([server_peer])
+    server_request_handler = ETHRequestServer(FakeAsyncChainDB(chaindb_20.db), server_peer_pool)
+    asyncio.ensure_future(server_request_handler.run())
+
+    state_downloader = SnapStateDownloader(
+        chaindb_fresh,
+        chaindb_fresh.db,
+        state_root,
+        client_peer_pool,
+        decode_workers=decode_workers,
+    )
+    await asyncio.wait_for(state_downloader.run(), timeout=10)
+
+    assert state_root in chaindb_fresh.db
+    client_account_db = AccountDB(chaindb_fresh.db, state_root)
+    for address in addresses:
+        assert client_account_db.get_balance(address) == server_account_db.get_balance(address)
+        assert client_account_db.get_code(address) == server_account_db.get_code(address)
+        for slot in (1, 2):
+            assert (client_account_db.get_storage(address, slot) ==
+                    server_account_db.get_storage(address, slot))
+
+
 @pytest.mark.asyncio
 async def test_skeleton_syncer(request, event_loop, chaindb_fresh, chaindb_1000):
     client_peer, server_peer = await get_directly_linked_peers(
@@ -96,8 +171,10 @@ async def test_skeleton_syncer(request, event_loop, chaindb_fresh, chaindb_1000)
     assert head.state_root in chaindb_fresh.db
 
 
+@pytest.mark.parametrize('sender_recovery_workers', (0, 2))
 @pytest.mark.asyncio
-async def test_regular_syncer(request, event_loop, chaindb_fresh, chaindb_20):
+async def test_regular_syncer(
+        request, event_loop, chaindb_fresh, chaindb_20, sender_recovery_workers):
     client_peer, server_peer = await get_directly_linked_peers(
         request, event_loop,
         alice_headerdb=FakeAsyncHeaderDB(chaindb_fresh.db),
@@ -105,7 +182,8 @@ async def test_regular_syncer(request, event_loop, chaindb_fresh, chaindb_20):
     client = RegularChainSyncer(
         ByzantiumTestChain(chaindb_fresh.db),
         chaindb_fresh,
-        MockPeerPoolWithConnectedPeers([client_peer]))
+        MockPeerPoolWithConnectedPeers([client_peer]),
+        sender_recovery_workers=sender_recovery_workers)
     server_peer_pool = MockPeerPoolWithConnectedPeers([server_peer])
 
     server_request_handler = ETHRequestServer(FakeAsyncChainDB(chaindb_20.db), server_peer_pool)
@@ -126,6 +204,38 @@ async def test_regular_syncer(request, event_loop, chaindb_fresh, chaindb_20):
     assert head.state_root in chaindb_fresh.db
 
 
+@pytest.mark.asyncio
+async def test_pipelined_block_importer(chaindb_fresh, chaindb_20):
+    server_chain = ByzantiumTestChain(chaindb_20.db)
+    blocks = [server_chain.get_canonical_block_by_number(number) for number in range(1, 21)]
+    assert all(block.transactions for block in blocks)
+    executor = ProcessPoolExecutor(2)
+    importer = PipelinedBlockImporter(
+        ByzantiumTestChain(chaindb_fresh.db), executor, lookahead=4, max_workers=2)
+    try:
+        importer.preview_blocks(blocks[:10])
+        for block in blocks[:10]:
+            imported, new_canonical, old_canonical = await importer.import_block(block)
+            assert imported == block
+            assert new_canonical == (block,)
+            assert old_canonical == ()
+
+        # A transaction with a signature that doesn't recover must still be rejected by the VM
+        block = blocks[10]
+        tampered = block.copy(transactions=[block.transactions[0].copy(r=0)])
+        importer.preview_blocks([tampered] + blocks[11:])
+        with pytest.raises(ValidationError):
+            await importer.import_block(tampered)
+
+        # Blocks that weren't announced beforehand are imported as they are
+        for block in blocks[10:]:
+            await importer.import_block(block)
+    finally:
+        executor.shutdown()
+
+    assert chaindb_fresh.get_canonical_head() == chaindb_20.get_canonical_head()
+
+
 class FallbackTesting_RegularChainSyncer(BaseService):
     class HeaderSyncer_OnlyOne:
         def __init__(self, real_syncer):
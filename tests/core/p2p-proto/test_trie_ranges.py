@@ -0,0 +1,159 @@
+import random
+
+import pytest
+
+from eth_hash.auto import keccak
+from eth_utils import ValidationError
+
+from trie import HexaryTrie
+
+from eth.constants import BLANK_ROOT_HASH
+
+from trinity.protocol.eth.trie_ranges import (
+    collect_trie_range,
+    decode_prefix,
+    encode_prefix,
+    verify_trie_range,
+)
+
+
+def make_trie(num_leaves, value_length=(1, 40)):
+    trie = HexaryTrie({})
+    contents = {}
+    for i in range(num_leaves):
+        key = keccak(i.to_bytes(4, 'big'))
+        value = bytes(random.randint(1, 255) for _ in range(random.randint(*value_length)))
+        trie[key] = value
+        contents[key] = value
+    return trie, contents
+
+
+def make_node_getter(db):
+    async def get_node(node_hash):
+        return db[node_hash]
+    return get_node
+
+
+async def sync_trie(db, root_hash, max_leaves):
+    synced_db = {}
+    synced_leaves = {}
+    pending = [()]
+    while pending:
+        prefix = pending.pop()
+        leaves, proof = await collect_trie_range(
+            make_node_getter(db), root_hash, prefix, max_leaves)
+        assert len(leaves) <= max_leaves
+        bundle = verify_trie_range(root_hash, prefix, leaves, proof)
+        synced_db.update(bundle.nodes)
+        synced_db.update(bundle.proof)
+        synced_leaves.update(bundle.leaves)
+        pending.extend(bundle.missing_prefixes)
+    return synced_db, synced_leaves
+
+
+@pytest.mark.parametrize('num_leaves', (1, 2, 3, 17, 500))
+@pytest.mark.parametrize('max_leaves', (1, 7, 1000))
+@pytest.mark.asyncio
+async def test_sync_trie_by_ranges(num_leaves, max_leaves):
+    trie, contents = make_trie(num_leaves)
+
+    synced_db, synced_leaves = await sync_trie(trie.db, trie.root_hash, max_leaves)
+
+    assert synced_leaves == contents
+    for node_hash, node in synced_db.items():
+        assert trie.db[node_hash] == node
+    synced_trie = HexaryTrie(synced_db, trie.root_hash)
+    for key, value in contents.items():
+        assert synced_trie[key] == value
+
+
+@pytest.mark.asyncio
+async def test_trie_range_with_inlined_nodes():
+    # Values this small make most nodes near the leaves shorter than 32 bytes, so they get
+    # inlined into their parents.
+    trie, contents = make_trie(300, value_length=(1, 1))
+
+    synced_db, synced_leaves = await sync_trie(trie.db, trie.root_hash, max_leaves=5)
+
+    assert synced_leaves == contents
+    synced_trie = HexaryTrie(synced_db, trie.root_hash)
+    for key, value in contents.items():
+        assert synced_trie[key] == value
+
+
+@pytest.mark.asyncio
+async def test_trie_range_of_empty_trie():
+    leaves, proof = await collect_trie_range(make_node_getter({}), BLANK_ROOT_HASH, (), 10)
+    assert leaves == [] and proof == []
+
+    bundle = verify_trie_range(BLANK_ROOT_HASH, (), leaves, proof)
+    assert bundle.leaves == () and bundle.missing_prefixes == ()
+
+    with pytest.raises(ValidationError):
+        verify_trie_range(BLANK_ROOT_HASH, (), [(b'\x00' * 32, b'\x01')], [])
+
+
+@pytest.mark.asyncio
+async def test_trie_range_of_absent_prefix():
+    trie, _ = make_trie(3)
+    # With only three keys, at least one of the sixteen top level branches is empty
+    for nibble in range(16):
+        leaves, proof = await collect_trie_range(
+            make_node_getter(trie.db), trie.root_hash, (nibble,), 10)
+        bundle = verify_trie_range(trie.root_hash, (nibble,), leaves, proof)
+        if not bundle.leaves:
+            break
+    else:
+        raise AssertionError("All top level branches have leaves")
+
+    assert bundle.missing_prefixes == ()
+    assert leaves == []
+
+
+@pytest.mark.asyncio
+async def test_invalid_trie_ranges():
+    trie, _ = make_trie(50)
+    prefix = ()
+    leaves, proof = await collect_trie_range(make_node_getter(trie.db), trie.root_hash, prefix, 100)
+    assert len(leaves) == 50
+
+    # Sanity check
+    verify_trie_range(trie.root_hash, prefix, leaves, proof)
+
+    with pytest.raises(ValidationError, match="don't match the proof"):
+        verify_trie_range(trie.root_hash, prefix, leaves[1:], proof)
+
+    with pytest.raises(ValidationError, match="don't match the proof"):
+        key, value = leaves[10]
+        tampered = leaves[:10] + [(key, value + b'\x00')] + leaves[11:]
+        verify_trie_range(trie.root_hash, prefix, tampered, proof)
+
+    with pytest.raises(ValidationError, match="not sorted"):
+        verify_trie_range(trie.root_hash, prefix, list(reversed(leaves)), proof)
+
+    with pytest.raises(ValidationError, match="key length"):
+        key, value = leaves[0]
+        verify_trie_range(trie.root_hash, prefix, [(key[1:], value)] + leaves[1:], proof)
+
+    with pytest.raises(ValidationError, match="lacks node"):
+        verify_trie_range(trie.root_hash, prefix, leaves, [])
+
+    # Leaves outside of the requested range
+    key, _ = leaves[0]
+    subtree_prefix = (key[0] >> 4,)
+    sub_leaves, sub_proof = await collect_trie_range(
+        make_node_getter(trie.db), trie.root_hash, subtree_prefix, 100)
+    with pytest.raises(ValidationError):
+        verify_trie_range(trie.root_hash, subtree_prefix, leaves, sub_proof)
+
+
+def test_prefix_encoding():
+    prefix = (0, 15, 3, 7)
+    assert decode_prefix(encode_prefix(prefix)) == prefix
+    assert decode_prefix(b'') == ()
+
+    with pytest.raises(ValidationError):
+        decode_prefix(b'\x10')
+
+    with pytest.raises(ValidationError):
+        decode_prefix(b'\x00' * 65)
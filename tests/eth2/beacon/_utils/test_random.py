@@ -5,6 +5,8 @@ from eth_utils import (
 )
 
 from eth2.beacon._utils.random import (
+    _shuffled_indices_numpy,
+    _shuffled_indices_python,
     get_permuted_index,
     shuffle,
 )
@@ -44,6 +46,19 @@ def test_shuffle_consistent(values, seed, shuffle_round_count):
     assert shuffle(values, seed, shuffle_round_count) == expect
 
 
+@pytest.mark.parametrize(
+    'list_size',
+    (1, 2, 255, 256, 257, 1000),
+)
+def test_numpy_shuffle_matches_python_shuffle(list_size):
+    pytest.importorskip('numpy')
+    seed = b'\x89' * 32
+
+    expect = _shuffled_indices_python(list_size, seed, 90)
+    assert _shuffled_indices_numpy(list_size, seed, 90) == expect
+    assert sorted(expect) == list(range(list_size))
+
+
 def test_get_permuted_index_invalid(shuffle_round_count):
     with pytest.raises(ValidationError):
         get_permuted_index(2, 2, b'\x12' * 32, shuffle_round_count)
@@ -8,6 +8,9 @@ from eth_utils import (
 )
 
 from py_ecc import bls
+from eth2.beacon.committee_helpers import (
+    clear_committee_caches,
+)
 from eth2.beacon.configs import (
     BeaconConfig,
     CommitteeConfig,
@@ -54,6 +57,13 @@ DEFAULT_RANDAO = b'\45' * 32
 DEFAULT_NUM_VALIDATORS = 40
 
 
+@pytest.fixture(autouse=True)
+def committee_caches():
+    # The committee caches trust the active index roots of the states they are given, which the
+    # states made up in these tests don't keep up to date with their validators.
+    clear_committee_caches()
+
+
 @pytest.fixture(scope="session")
 def privkeys():
     """
@@ -123,6 +123,8 @@ def test_chaindb_state(chaindb, state):
 
     result_state = chaindb.get_state_by_root(state.root)
     assert result_state.root == state.root
+    # The persisted state is kept around, along with the tree hashes of its fields
+    assert result_state is state
 
 
 def test_chaindb_get_finalized_head(chaindb, block):
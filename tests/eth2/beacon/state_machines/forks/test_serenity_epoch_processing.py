@@ -964,6 +964,192 @@ def test_process_rewards_and_penalties_for_crosslinks(
         )
 
 
+@settings(max_examples=1)
+@given(random=st.randoms())
+@pytest.mark.parametrize(
+    (
+        'n,'
+        'slots_per_epoch,'
+        'target_committee_size,'
+        'shard_count,'
+        'current_slot,'
+        'finalized_epoch,'
+        'genesis_slot,'
+    ),
+    [
+        (50, 10, 5, 10, 100, 8, 0),  # epochs_since_finality <= 4
+        (50, 10, 5, 10, 100, 3, 0),  # epochs_since_finality > 4
+    ]
+)
+def test_process_rewards_and_penalties_with_numpy(
+        monkeypatch,
+        random,
+        n,
+        n_validators_state,
+        config,
+        slots_per_epoch,
+        current_slot,
+        finalized_epoch,
+        max_deposit_amount,
+        min_attestation_inclusion_delay,
+        sample_attestation_data_params,
+        sample_pending_attestation_record_params):
+    pytest.importorskip('numpy')
+    from eth2.beacon.state_machines.forks.serenity import epoch_processing
+
+    previous_epoch = current_slot // slots_per_epoch - 1
+    previous_epoch_start_slot = get_epoch_start_slot(previous_epoch, slots_per_epoch)
+
+    # Some validators are slashed, some of those exited before the previous epoch
+    validator_registry = list(n_validators_state.validator_registry)
+    for index in random.sample(range(n), 10):
+        validator_registry[index] = validator_registry[index].copy(slashed=True)
+    for index in random.sample(range(n), 5):
+        validator_registry[index] = validator_registry[index].copy(
+            exit_epoch=previous_epoch - 1,
+            slashed=True,
+        )
+    # Some validators have too small a balance to get any base reward, so unless they're
+    # proposers their balances don't change
+    balances = [random.randrange(max_deposit_amount * 2) for _ in range(n)]
+    for index in random.sample(range(n), 10):
+        balances[index] = random.randrange(1000, 5000)
+    state = n_validators_state.copy(
+        slot=current_slot,
+        finalized_epoch=finalized_epoch,
+        validator_registry=tuple(validator_registry),
+        validator_balances=tuple(balances),
+    )
+
+    # Every committee votes for two crosslink data roots, with random participants, boundary and
+    # head roots and inclusion delays
+    previous_epoch_attestations = []
+    for slot in range(previous_epoch_start_slot, previous_epoch_start_slot + slots_per_epoch):
+        for committee, shard in get_crosslink_committees_at_slot(
+                state,
+                slot,
+                CommitteeConfig(config)):
+            for crosslink_data_root in (b'\x11' * 32, b'\x22' * 32):
+                participants_bitfield = get_empty_bitfield(len(committee))
+                for index in random.sample(committee, random.randrange(len(committee) + 1)):
+                    participants_bitfield = set_voted(
+                        participants_bitfield,
+                        committee.index(index),
+                    )
+                previous_epoch_attestations.append(
+                    PendingAttestationRecord(**sample_pending_attestation_record_params).copy(
+                        data=AttestationData(**sample_attestation_data_params).copy(
+                            slot=slot,
+                            shard=shard,
+                            epoch_boundary_root=random.choice((
+                                get_block_root(
+                                    state,
+                                    previous_epoch_start_slot,
+                                    config.LATEST_BLOCK_ROOTS_LENGTH,
+                                ),
+                                b'\x33' * 32,
+                            )),
+                            beacon_block_root=random.choice((
+                                get_block_root(state, slot, config.LATEST_BLOCK_ROOTS_LENGTH),
+                                b'\x33' * 32,
+                            )),
+                            latest_crosslink=state.latest_crosslinks[shard],
+                            crosslink_data_root=crosslink_data_root,
+                        ),
+                        aggregation_bitfield=participants_bitfield,
+                        slot_included=slot + min_attestation_inclusion_delay + random.randrange(3),
+                    )
+                )
+    state = state.copy(
+        previous_epoch_attestations=tuple(previous_epoch_attestations),
+    )
+
+    numpy_result_state = epoch_processing.process_rewards_and_penalties(state, config)
+    monkeypatch.setattr(epoch_processing, 'np', None)
+    python_result_state = epoch_processing.process_rewards_and_penalties(state, config)
+
+    assert numpy_result_state.validator_balances == python_result_state.validator_balances
+    assert numpy_result_state.validator_balances != state.validator_balances
+    # The balances that didn't change are still shared with the old state
+    unchanged_indices = tuple(
+        index for index in range(n)
+        if numpy_result_state.validator_balances[index] == state.validator_balances[index]
+    )
+    assert unchanged_indices
+    for index in unchanged_indices:
+        assert numpy_result_state.validator_balances[index] is state.validator_balances[index]
+
+
+@pytest.mark.parametrize(
+    (
+        'n,'
+        'slots_per_epoch,'
+        'target_committee_size,'
+        'shard_count,'
+        'current_slot,'
+        'finalized_epoch,'
+        'genesis_slot,'
+        'base_reward_quotient,'
+        'inclusion_delay,'
+    ),
+    [
+        # The adjusted quotient of the base rewards is 0
+        (50, 10, 5, 10, 100, 8, 0, 2**40, 1),
+        # Attestations included in their own slot, with epochs_since_finality <= 4 and > 4
+        (50, 10, 5, 10, 100, 8, 0, 32, 0),
+        (50, 10, 5, 10, 100, 3, 0, 32, 0),
+    ]
+)
+def test_process_rewards_and_penalties_with_numpy_divides_by_zero_like_python(
+        monkeypatch,
+        n_validators_state,
+        config,
+        slots_per_epoch,
+        current_slot,
+        finalized_epoch,
+        inclusion_delay,
+        sample_attestation_data_params,
+        sample_pending_attestation_record_params):
+    pytest.importorskip('numpy')
+    from eth2.beacon.state_machines.forks.serenity import epoch_processing
+
+    previous_epoch = current_slot // slots_per_epoch - 1
+    previous_epoch_start_slot = get_epoch_start_slot(previous_epoch, slots_per_epoch)
+    state = n_validators_state.copy(
+        slot=current_slot,
+        finalized_epoch=finalized_epoch,
+    )
+    previous_epoch_attestations = []
+    for slot in range(previous_epoch_start_slot, previous_epoch_start_slot + slots_per_epoch):
+        for committee, shard in get_crosslink_committees_at_slot(
+                state,
+                slot,
+                CommitteeConfig(config)):
+            participants_bitfield = get_empty_bitfield(len(committee))
+            for committee_index in range(len(committee)):
+                participants_bitfield = set_voted(participants_bitfield, committee_index)
+            previous_epoch_attestations.append(
+                PendingAttestationRecord(**sample_pending_attestation_record_params).copy(
+                    data=AttestationData(**sample_attestation_data_params).copy(
+                        slot=slot,
+                        shard=shard,
+                        latest_crosslink=state.latest_crosslinks[shard],
+                    ),
+                    aggregation_bitfield=participants_bitfield,
+                    slot_included=slot + inclusion_delay,
+                )
+            )
+    state = state.copy(
+        previous_epoch_attestations=tuple(previous_epoch_attestations),
+    )
+
+    with pytest.raises(ZeroDivisionError):
+        epoch_processing.process_rewards_and_penalties(state, config)
+    monkeypatch.setattr(epoch_processing, 'np', None)
+    with pytest.raises(ZeroDivisionError):
+        epoch_processing.process_rewards_and_penalties(state, config)
+
+
 #
 # Ejections
 #
@@ -1,5 +1,3 @@
-import time
-
 import itertools
 import pytest
 
@@ -10,6 +8,12 @@ from eth_utils.toolz import (
     isdistinct,
 )
 
+from eth2._utils.tuple import (
+    update_tuple_item,
+)
+from eth2.beacon._utils.random import (
+    shuffle,
+)
 from eth2.beacon.committee_helpers import (
     get_attestation_participants,
     get_beacon_proposer_index,
@@ -20,6 +24,9 @@ from eth2.beacon.committee_helpers import (
     get_previous_epoch_committee_count,
     get_shuffling,
 )
+from eth2.beacon.datastructures.committee_cache import (
+    RecentEpochsCache,
+)
 from eth2.beacon.helpers import (
     slot_to_epoch,
 )
@@ -183,51 +190,6 @@ def test_get_shuffling_is_complete(activated_genesis_validators,
     assert sorted(validator_indices) == sorted(activated_genesis_validator_indices)
 
 
-@pytest.mark.parametrize(
-    (
-        'genesis_slot,'
-    ),
-    [
-        (0),
-    ],
-)
-@pytest.mark.parametrize(
-    (
-        'num_validators,'
-        'slots_per_epoch,'
-        'target_committee_size,'
-        'shard_count,'
-        'epoch'
-    ),
-    [
-        (1000, 20, 10, 100, 0),
-
-    ],
-)
-def test_get_shuffling_cache(activated_genesis_validators,
-                             committee_config,
-                             epoch):
-    start_time = time.time()
-    get_shuffling(
-        seed=b'\x55' * 32,
-        validators=activated_genesis_validators,
-        epoch=epoch,
-        committee_config=committee_config,
-    )
-    one_shuffle_time = time.time() - start_time
-
-    start_time = time.time()
-    for _ in range(100):
-        get_shuffling(
-            seed=b'\x66' * 32,
-            validators=activated_genesis_validators,
-            epoch=epoch,
-            committee_config=committee_config,
-        )
-    one_hundred_shuffles_time = time.time() - start_time
-    assert one_hundred_shuffles_time < one_shuffle_time * 2
-
-
 @pytest.mark.parametrize(
     (
         'n, target_committee_size, shard_count, len_active_validators,'
@@ -495,6 +457,112 @@ def test_get_crosslink_committees_at_slot(
     assert shuffling[committees_per_slot * offset] == crosslink_committees_at_slot[0][0]
 
 
+@pytest.mark.parametrize(
+    (
+        'n,'
+        'slots_per_epoch,'
+        'target_committee_size,'
+        'shard_count,'
+    ),
+    [
+        (64, 8, 2, 16),
+    ],
+)
+def test_crosslink_committees_shuffled_once_per_epoch(monkeypatch,
+                                                      n_validators_state,
+                                                      slots_per_epoch,
+                                                      committee_config):
+    from eth2.beacon import committee_helpers
+
+    shuffled_seeds = []
+
+    def mock_shuffle(values, seed, shuffle_round_count):
+        shuffled_seeds.append(seed)
+        return shuffle(values, seed, shuffle_round_count)
+
+    monkeypatch.setattr(committee_helpers, 'shuffle', mock_shuffle)
+
+    state = n_validators_state
+    crosslink_committees = []
+    for slot in range(state.slot, state.slot + slots_per_epoch):
+        # Each slot's state is a different object, which the committees can't be keyed on
+        state = state.copy(slot=slot)
+        crosslink_committees.extend(
+            get_crosslink_committees_at_slot(state, slot, committee_config)
+        )
+
+    assert shuffled_seeds == [state.current_shuffling_seed]
+    assert tuple(committee for committee, _ in crosslink_committees) == get_shuffling(
+        seed=state.current_shuffling_seed,
+        validators=state.validator_registry,
+        epoch=state.current_shuffling_epoch,
+        committee_config=committee_config,
+    )
+
+
+@pytest.mark.parametrize(
+    (
+        'n,'
+        'slots_per_epoch,'
+        'target_committee_size,'
+        'shard_count,'
+    ),
+    [
+        (64, 8, 2, 16),
+    ],
+)
+def test_crosslink_committees_keyed_by_active_index_root(n_validators_state,
+                                                         slots_per_epoch,
+                                                         latest_active_index_roots_length,
+                                                         committee_config):
+    state = n_validators_state
+    committees = get_crosslink_committees_at_slot(state, state.slot, committee_config)
+
+    # Exit half of the validators, which gives the epoch a different active index root
+    validator_registry = tuple(
+        validator.copy(exit_epoch=state.current_shuffling_epoch) if index % 2 else validator
+        for index, validator in enumerate(state.validator_registry)
+    )
+    index_root_position = state.current_shuffling_epoch % latest_active_index_roots_length
+    state = state.copy(
+        validator_registry=validator_registry,
+        latest_active_index_roots=update_tuple_item(
+            state.latest_active_index_roots,
+            index_root_position,
+            b'\x11' * 32,
+        ),
+    )
+    new_committees = get_crosslink_committees_at_slot(state, state.slot, committee_config)
+
+    assert new_committees != committees
+    assert all(index % 2 == 0 for committee, _ in new_committees for index in committee)
+
+
+def test_recent_epochs_cache_eviction():
+    cache = RecentEpochsCache()
+    cache.get('a', 1, lambda: 'A')
+    cache.get('b', 1, lambda: 'B')
+    cache.get('b', 2, lambda: 'not computed again')
+    cache.get('c', 2, lambda: 'C')
+
+    # Nothing from the previous epoch gets evicted
+    assert 'a' in cache and 'b' in cache and 'c' in cache
+    # Values are only computed on a miss
+    assert cache.get('b', 2, lambda: 'not computed again') == 'B'
+
+    cache.get('c', 3, lambda: 'not computed again')
+    assert 'a' not in cache
+    assert 'b' in cache and 'c' in cache
+
+    # Looking up values for states from earlier epochs doesn't evict anything
+    cache.get('d', 1, lambda: 'D')
+    assert len(cache) == 3
+
+    cache.get('e', 5, lambda: 'E')
+    assert len(cache) == 1
+    assert cache.get('e', 5, lambda: 'not computed again') == 'E'
+
+
 @pytest.mark.parametrize(
     (
         'registry_change'
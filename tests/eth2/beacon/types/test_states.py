@@ -8,9 +8,6 @@ from eth2.beacon.types.states import (
 from eth2.beacon.types.crosslink_records import (
     CrosslinkRecord,
 )
-from eth2.beacon._utils.hash import (
-    hash_eth2,
-)
 
 from tests.eth2.beacon.helpers import (
     mock_validator_record,
@@ -75,7 +72,26 @@ def test_num_crosslink_records(expected,
 
 def test_hash(sample_beacon_state_params):
     state = BeaconState(**sample_beacon_state_params)
-    assert state.root == hash_eth2(ssz.encode(state))
+    assert state.root == ssz.hash_tree_root(state)
+
+
+def test_hash_of_copies(n_validators_state):
+    state = n_validators_state
+    assert state.root == ssz.hash_tree_root(state)
+
+    balances_state = state.update_validator_balances({0: 1, 2: 3})
+    registry_state = state.update_validator_registry(
+        1,
+        state.validator_registry[1].copy(slashed=True),
+    )
+    slot_state = balances_state.copy(
+        slot=state.slot + 1,
+        latest_block_roots=(b'\x01' * 32,) + state.latest_block_roots[1:],
+    )
+
+    # Copies share what their ancestors hashed so far, whatever order they are hashed in
+    for copied_state in (slot_state, registry_state, balances_state, state):
+        assert copied_state.root == ssz.hash_tree_root(copied_state)
 
 
 @pytest.mark.parametrize(
@@ -108,3 +124,18 @@ def test_update_validator(n_validators_state,
                 validator=validator,
                 balance=new_balance,
             )
+
+
+def test_update_validator_balances(n_validators_state):
+    state = n_validators_state
+
+    result_state = state.update_validator_balances({0: 1, 2: 3})
+
+    assert result_state.validator_balances == (1, state.validator_balances[1], 3) + tuple(
+        state.validator_balances[3:]
+    )
+    # The validator registry is shared, not copied
+    assert result_state.validator_registry._chunks is state.validator_registry._chunks
+
+    with pytest.raises(IndexError):
+        state.update_validator_balances({0: 1, state.num_validators: 1})
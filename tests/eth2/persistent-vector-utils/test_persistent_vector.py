@@ -0,0 +1,95 @@
+import copy
+import pickle
+
+import pytest
+
+from eth_utils import (
+    ValidationError,
+)
+
+from eth2._utils.persistent_vector import (
+    CHUNK_SIZE,
+    PersistentVector,
+)
+
+
+@pytest.mark.parametrize(
+    'length',
+    (0, 1, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, CHUNK_SIZE * 3 + 5),
+)
+def test_persistent_vector_behaves_like_tuple(length):
+    items = tuple(range(length))
+    vector = PersistentVector(items)
+
+    assert len(vector) == length
+    assert vector == items
+    assert items == vector
+    assert tuple(vector) == items
+    assert all(vector[index] == items[index] for index in range(-length, length))
+    assert vector[1:CHUNK_SIZE + 2] == items[1:CHUNK_SIZE + 2]
+    assert hash(vector) == hash(items)
+    assert pickle.loads(pickle.dumps(vector)) == vector
+    assert copy.deepcopy(vector) is vector
+
+    with pytest.raises(IndexError):
+        vector[length]
+    with pytest.raises(IndexError):
+        vector[-length - 1]
+
+
+@pytest.mark.parametrize(
+    'index, new_value, expected',
+    (
+        (0, -99, (-99,) + (1,) * (CHUNK_SIZE * 2 - 1)),
+        (CHUNK_SIZE, -99, (1,) * CHUNK_SIZE + (-99,) + (1,) * (CHUNK_SIZE - 1)),
+        (CHUNK_SIZE * 2 - 1, -99, (1,) * (CHUNK_SIZE * 2 - 1) + (-99,)),
+        (CHUNK_SIZE * 2, -99, ValidationError()),
+        (-1, -99, ValidationError()),
+    )
+)
+def test_persistent_vector_set(index, new_value, expected):
+    vector = PersistentVector((1,) * CHUNK_SIZE * 2)
+
+    if isinstance(expected, Exception):
+        with pytest.raises(ValidationError):
+            vector.set(index, new_value)
+    else:
+        result = vector.set(index, new_value)
+        assert result == expected
+        assert vector == (1,) * CHUNK_SIZE * 2
+
+
+def test_persistent_vector_shares_unchanged_chunks():
+    vector = PersistentVector(range(CHUNK_SIZE * 3))
+
+    result = vector.update({1: -1, 2: -2, CHUNK_SIZE * 2: -3})
+
+    assert result == (0, -1, -2) + tuple(range(3, CHUNK_SIZE * 2)) + (-3,) + tuple(
+        range(CHUNK_SIZE * 2 + 1, CHUNK_SIZE * 3)
+    )
+    assert result._chunks[0] is not vector._chunks[0]
+    assert result._chunks[1] is vector._chunks[1]
+    assert result._chunks[2] is not vector._chunks[2]
+
+
+@pytest.mark.parametrize(
+    'length, extension_length',
+    (
+        (0, 0),
+        (0, 3),
+        (3, CHUNK_SIZE),
+        (CHUNK_SIZE, 1),
+        (CHUNK_SIZE - 1, CHUNK_SIZE * 2),
+    ),
+)
+def test_persistent_vector_extend(length, extension_length):
+    items = tuple(range(length))
+    extension = tuple(range(length, length + extension_length))
+
+    result = PersistentVector(items) + extension
+
+    assert isinstance(result, PersistentVector)
+    assert result == items + extension
+    assert len(result) == length + extension_length
+    # All the chunks but the last one are full
+    assert all(len(chunk) == CHUNK_SIZE for chunk in result._chunks[:-1])
@@ -0,0 +1,62 @@
+import pytest
+
+from ssz.sedes import (
+    List,
+    bytes32,
+    uint24,
+    uint64,
+)
+
+from eth2._utils.persistent_vector import (
+    CHUNK_SIZE,
+    PersistentVector,
+)
+from eth2._utils.tree_hash import (
+    MerkleTree,
+)
+
+
+def test_merkle_tree_matches_list_sedes():
+    tree = MerkleTree(uint64)
+    sedes = List(uint64)
+
+    items = ()
+    assert tree.intermediate_tree_hash(items) == sedes.intermediate_tree_hash(items)
+
+    # Grow through odd and even lengths, with the last chunk filling up one item at a time
+    for length in (1, 2, 3, 4, 5, 9, 17, 100):
+        items = items + tuple(range(len(items), length))
+        assert tree.intermediate_tree_hash(items) == sedes.intermediate_tree_hash(items)
+
+    items = items[:40] + (2 ** 64 - 1,) + items[41:]
+    assert tree.intermediate_tree_hash(items) == sedes.intermediate_tree_hash(items)
+
+    # Shrinking rebuilds the tree
+    items = items[:7]
+    assert tree.intermediate_tree_hash(items) == sedes.intermediate_tree_hash(items)
+
+
+@pytest.mark.parametrize(
+    'element_sedes, make_item',
+    (
+        (uint24, lambda index: index),
+        (bytes32, lambda index: index.to_bytes(32, 'little')),
+    ),
+)
+def test_merkle_tree_over_persistent_vector(element_sedes, make_item):
+    tree = MerkleTree(element_sedes)
+    sedes = List(element_sedes)
+
+    vector = PersistentVector(make_item(index) for index in range(CHUNK_SIZE * 2 + 3))
+    assert tree.intermediate_tree_hash(vector) == sedes.intermediate_tree_hash(vector)
+
+    vector = vector.update({0: make_item(7), CHUNK_SIZE + 1: make_item(8)})
+    assert tree.intermediate_tree_hash(vector) == sedes.intermediate_tree_hash(vector)
+
+    vector = vector.extend(make_item(index) for index in range(CHUNK_SIZE))
+    assert tree.intermediate_tree_hash(vector) == sedes.intermediate_tree_hash(vector)
+
+    # The same list can be given again, or a different one of the same length
+    assert tree.intermediate_tree_hash(vector) == sedes.intermediate_tree_hash(vector)
+    items = tuple(make_item(1) for _ in vector)
+    assert tree.intermediate_tree_hash(items) == sedes.intermediate_tree_hash(items)
@@ -1,4 +1,5 @@
 import asyncio
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 import logging
 import random
 import re
@@ -7,7 +8,7 @@ import pytest
 
 import rlp
 
-from eth_utils import decode_hex
+from eth_utils import big_endian_to_int, decode_hex
 
 from eth_hash.auto import keccak
 
@@ -17,6 +18,7 @@ from cancel_token import CancelToken
 
 from p2p import discovery
 from p2p import kademlia
+from p2p.persistence import MemoryNodeStore
 
 from tests.p2p.helpers import (
     get_discovery_protocol,
@@ -50,6 +52,177 @@ def test_ping_pong():
     assert token == payload[1]
 
 
+def test_duplicate_and_expired_messages_are_dropped(monkeypatch):
+    alice = get_discovery_protocol(b"alice")
+    bob = get_discovery_protocol(b"bob")
+    link_transports(alice, bob)
+    received_pings = []
+    bob.recv_ping_v4 = lambda node, payload, hash_: received_pings.append(node)
+    recovered = []
+
+    def recover_signers(signed_messages):
+        recovered.extend(signed_messages)
+        return original_recover_signers(signed_messages)
+
+    original_recover_signers = discovery.recover_signers
+    monkeypatch.setattr(discovery, 'recover_signers', recover_signers)
+
+    version = rlp.sedes.big_endian_int.serialize(discovery.PROTO_VERSION)
+    payload = (version, alice.address.to_endpoint(), bob.address.to_endpoint())
+    message = discovery._pack_v4(discovery.CMD_PING.id, payload, alice.privkey)
+    addr = (alice.address.ip, alice.address.udp_port)
+    bob.datagram_received(message, addr)
+    bob.datagram_received(message, addr)
+
+    assert received_pings == [alice.this_node]
+    assert len(recovered) == 1
+
+    monkeypatch.setattr(discovery, 'EXPIRATION', -1)
+    expired_message = discovery._pack_v4(discovery.CMD_PING.id, payload, alice.privkey)
+    bob.datagram_received(expired_message, addr)
+
+    assert received_pings == [alice.this_node]
+    assert len(recovered) == 1
+
+
+def test_invalid_messages_are_dropped():
+    alice = get_discovery_protocol(b"alice")
+    bob = get_discovery_protocol(b"bob")
+    received_pings = []
+    bob.recv_ping_v4 = lambda node, payload, hash_: received_pings.append(node)
+
+    version = rlp.sedes.big_endian_int.serialize(discovery.PROTO_VERSION)
+    payload = (version, alice.address.to_endpoint(), bob.address.to_endpoint())
+    message = discovery._pack_v4(discovery.CMD_PING.id, payload, alice.privkey)
+    # A signature with an invalid recovery ID, with the MAC updated to match it.
+    bad_signature = message[discovery.MAC_SIZE:discovery.HEAD_SIZE - 1] + b'\x05'
+    signed = bad_signature + message[discovery.HEAD_SIZE:]
+    bad_message = keccak(signed) + signed
+    addr = (alice.address.ip, alice.address.udp_port)
+    for datagram in (b'', message[:-1], bad_message, message):
+        bob.datagram_received(datagram, addr)
+
+    assert received_pings == [alice.this_node]
+
+
+@pytest.mark.asyncio
+async def test_handle_datagrams_with_executor(monkeypatch):
+    alice = get_discovery_protocol(b"alice")
+    bob = get_discovery_protocol(b"bob")
+    monkeypatch.setattr(bob, 'inbound_batch_size', 3)
+    bob.executor = ProcessPoolExecutor(1)
+    alice.transport = type(
+        "mock-transport",
+        (object,),
+        {"sendto": lambda msg, addr: bob.datagram_received(msg, addr)},
+    )
+    received_targets = []
+    bob.recv_find_node_v4 = lambda node, payload, hash_: received_targets.append(payload[0])
+
+    handler = asyncio.ensure_future(bob.handle_datagrams())
+    try:
+        for target in range(10):
+            alice.send_find_node_v4(bob.this_node, target)
+        # Give the handler a chance to get through all batches
+        for _ in range(100):
+            if len(received_targets) == 10:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        bob.cancel_token.trigger()
+        await handler
+        bob.executor.shutdown()
+
+    assert [big_endian_to_int(t) for t in received_targets] == list(range(10))
+
+
+class ManualExecutor(Executor):
+    """An executor that runs what it gets only when told to, in any order."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.calls.append((future, fn, args))
+        return future
+
+    def run(self, index):
+        future, fn, args = self.calls[index]
+        future.set_result(fn(*args))
+
+
+@pytest.mark.asyncio
+async def test_handle_datagrams_keeps_a_batch_in_flight_per_worker(monkeypatch):
+    alice = get_discovery_protocol(b"alice")
+    bob = get_discovery_protocol(b"bob")
+    monkeypatch.setattr(bob, 'inbound_batch_size', 2)
+    executor = ManualExecutor()
+    bob.executor = executor
+    bob.executor_workers = 3
+    alice.transport = type(
+        "mock-transport",
+        (object,),
+        {"sendto": lambda msg, addr: bob.datagram_received(msg, addr)},
+    )
+    received_targets = []
+    bob.recv_find_node_v4 = lambda node, payload, hash_: received_targets.append(
+        big_endian_to_int(payload[0]))
+
+    handler = asyncio.ensure_future(bob.handle_datagrams())
+    try:
+        for target in range(8):
+            alice.send_find_node_v4(bob.this_node, target)
+        await asyncio.sleep(0.01)
+        # One batch per worker, the last datagrams wait for a worker to be free
+        assert len(executor.calls) == 3
+
+        # Batches finishing out of order are still dispatched in the order they came in
+        executor.run(2)
+        executor.run(1)
+        await asyncio.sleep(0.01)
+        assert received_targets == []
+        assert len(executor.calls) == 3
+
+        executor.run(0)
+        await asyncio.sleep(0.01)
+        assert received_targets == [0, 1, 2, 3, 4, 5]
+        assert len(executor.calls) == 4
+
+        executor.run(3)
+        await asyncio.sleep(0.01)
+        assert received_targets == list(range(8))
+    finally:
+        bob.cancel_token.trigger()
+        await handler
+
+
+def test_neighbours_packets_are_reused(monkeypatch):
+    alice = get_discovery_protocol(b"alice")
+    bob = get_discovery_protocol(b"bob")
+    link_transports(alice, bob)
+    for _ in range(kademlia.k_bucket_size * 2):
+        bob.update_routing_table(random_node())
+    bob.update_routing_table(alice.this_node)
+    received_neighbours = []
+    alice.recv_neighbours_v4 = lambda node, payload, hash_: received_neighbours.append(hash_)
+    signed = []
+
+    def pack_v4(cmd_id, payload, privkey):
+        signed.append(cmd_id)
+        return original_pack_v4(cmd_id, payload, privkey)
+
+    original_pack_v4 = discovery._pack_v4
+    monkeypatch.setattr(discovery, '_pack_v4', pack_v4)
+
+    alice.send_find_node_v4(bob.this_node, alice.this_node.id)
+    alice.send_find_node_v4(bob.this_node, alice.this_node.id + 1)
+
+    # Both lookups are answered with the same two packets, which alice drops the second time
+    assert len(received_neighbours) == 2
+    assert signed.count(discovery.CMD_NEIGHBOURS.id) == 2
+
+
 def _test_find_node_neighbours(use_v5):
     alice = get_discovery_protocol(b"alice")
     bob = get_discovery_protocol(b"bob")
@@ -111,6 +284,41 @@ async def test_protocol_bootstrap():
         (node2, 'find_node')])
 
 
+@pytest.mark.asyncio
+async def test_protocol_bootstrap_from_node_store():
+    bootnode, alive_node, dead_node = random_node(), random_node(), random_node()
+    node_store = MemoryNodeStore()
+    node_store.record_pong(dead_node)
+    node_store.record_pong(alive_node)
+    proto = MockDiscoveryProtocol([bootnode], node_store)
+    proto.messages = []
+
+    async def bond(node):
+        return False
+
+    pinged_in_routing_table = []
+
+    async def ping(node):
+        # Nodes from the store are in our routing table while we check they're still around
+        pinged_in_routing_table.append(node in proto.routing)
+        return node == alive_node
+
+    # None of our bootstrap nodes replies, but one of the nodes we knew about before does.
+    proto.bond = bond
+    proto._ping = ping
+
+    await proto.bootstrap()
+
+    assert pinged_in_routing_table == [True, True]
+    assert list(proto.routing) == [alive_node]
+    assert node_store.get_seed_nodes(10) == (alive_node, dead_node)
+    for _ in range(node_store.max_failures - 1):
+        await proto.revalidate(dead_node)
+    assert node_store.get_seed_nodes(10) == (alive_node,)
+    assert sorted([(node, cmd) for (node, cmd, _) in proto.messages]) == [
+        (alive_node, 'find_node')]
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize('echo', ['echo', b'echo'])
 async def test_wait_ping(echo):
@@ -192,12 +400,20 @@ async def test_wait_neighbours():
     # Ensure wait_neighbours() cleaned up after itself.
     assert node not in proto.neighbours_callbacks
 
-    # If wait_neighbours() times out, we get an empty list of neighbours.
+    # If the node replies with no neighbours, we get an empty list of neighbours.
+    asyncio.ensure_future(asyncio.coroutine(
+        lambda: proto.recv_neighbours_v4(node, [[], discovery._get_msg_expiration()], b''))())
     received_neighbours = await proto.wait_neighbours(node)
 
     assert received_neighbours == tuple()
     assert node not in proto.neighbours_callbacks
 
+    # If wait_neighbours() times out without any reply, we get None.
+    received_neighbours = await proto.wait_neighbours(node)
+
+    assert received_neighbours is None
+    assert node not in proto.neighbours_callbacks
+
 
 @pytest.mark.asyncio
 async def test_bond():
@@ -257,6 +473,125 @@ async def test_update_routing_table_triggers_bond_if_eviction_candidate():
     assert bond_called
 
 
+@pytest.mark.asyncio
+async def test_update_routing_table_limits_pending_evictions(monkeypatch):
+    monkeypatch.setattr(MockDiscoveryProtocol, 'max_pending_evictions', 2)
+    proto = MockDiscoveryProtocol([])
+    candidates = [random_node() for _ in range(3)]
+    bonds_started = []
+    bond_finished = asyncio.Event()
+
+    async def bond(node):
+        bonds_started.append(node)
+        await bond_finished.wait()
+        return True
+
+    proto.bond = bond
+    eviction_candidates = iter(candidates[:1] + candidates)
+    proto.routing.add_node = lambda n: next(eviction_candidates)
+
+    for _ in range(4):
+        proto.update_routing_table(random_node())
+    await asyncio.sleep(0.001)
+
+    # The first candidate came up twice, and the third was one too many
+    assert bonds_started == candidates[:2]
+
+    bond_finished.set()
+    await asyncio.sleep(0.001)
+    assert not proto._pending_evictions
+
+
+@pytest.mark.asyncio
+async def test_bond_limits_concurrent_bonds(monkeypatch):
+    monkeypatch.setattr(MockDiscoveryProtocol, 'max_concurrent_bonds', 2)
+    proto = MockDiscoveryProtocol([])
+    in_flight = 0
+    max_in_flight = 0
+
+    async def _bond(node):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(in_flight, max_in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return True
+
+    proto._bond = _bond
+
+    bonded = await asyncio.gather(*(proto.bond(random_node()) for _ in range(10)))
+
+    assert all(bonded)
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_lookup():
+    proto = MockDiscoveryProtocol([])
+    target = random.randint(0, kademlia.k_max_node_id)
+    network = kademlia.sort_by_distance([random_node() for _ in range(100)], target)
+    closest_nodes = network[:kademlia.k_bucket_size]
+    # We start knowing only the nodes furthest from the target, one of which takes too long to
+    # reply to matter.
+    slow_node, *known_nodes = network[-3:]
+    for node in [slow_node] + known_nodes:
+        proto.routing.add_node(node)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def wait_neighbours(remote):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(in_flight, max_in_flight)
+        try:
+            await asyncio.sleep(5 if remote == slow_node else 0.001)
+        finally:
+            in_flight -= 1
+        # Every node knows about all others, so the first reply has the closest nodes.
+        return tuple(closest_nodes)
+
+    async def bond(node):
+        return True
+
+    proto.send_find_node_v4 = lambda remote, target: None
+    proto.wait_neighbours = wait_neighbours
+    proto.bond = bond
+
+    result = await asyncio.wait_for(proto.lookup(target), timeout=1)
+
+    assert result == tuple(closest_nodes)
+    assert max_in_flight == proto.lookup_concurrency
+    stats, = proto.lookup_stats
+    assert stats.target == target
+    assert stats.hops == 2
+    assert stats.queries == len(closest_nodes) + 3
+    assert stats.replies == len(closest_nodes) + 2
+
+
+@pytest.mark.asyncio
+async def test_lookup_keeps_nodes_with_no_neighbours_to_offer():
+    proto = MockDiscoveryProtocol([])
+    target = random.randint(0, kademlia.k_max_node_id)
+    empty_node, silent_node = random_node(), random_node()
+    for node in (empty_node, silent_node):
+        proto.routing.add_node(node)
+
+    async def wait_neighbours(remote):
+        if remote == empty_node:
+            return tuple()
+        else:
+            return None
+
+    proto.send_find_node_v4 = lambda remote, target: None
+    proto.wait_neighbours = wait_neighbours
+
+    result = await asyncio.wait_for(proto.lookup(target), timeout=1)
+
+    assert result == (empty_node,)
+    stats, = proto.lookup_stats
+    assert stats.replies == 1
+
+
 def test_get_max_neighbours_per_packet():
     proto = get_discovery_protocol()
     # This test is just a safeguard against changes that inadvertently modify the behaviour of
@@ -458,9 +793,10 @@ class MockDiscoveryProtocol(discovery.DiscoveryProtocol):
 
     messages = []
 
-    def __init__(self, bootnodes):
+    def __init__(self, bootnodes, node_store=None):
         privkey = keys.PrivateKey(keccak(b"seed"))
-        super().__init__(privkey, random_address(), bootnodes, CancelToken("discovery-test"))
+        super().__init__(
+            privkey, random_address(), bootnodes, CancelToken("discovery-test"), node_store)
 
     def send_ping_v4(self, node):
         echo = hex(random.randint(0, 2**256))[-32:]
@@ -78,6 +78,19 @@ def test_routingtable_neighbours():
         assert node_a == table.neighbours(node_b.id)[0]
 
 
+@pytest.mark.parametrize('k', (1, kademlia.k_bucket_size, 100))
+def test_routingtable_neighbours_are_the_closest_nodes(k):
+    table = kademlia.RoutingTable(random_node())
+    for _ in range(500):
+        table.add_node(random_node())
+    nodes = list(table)
+
+    targets = [random_node().id, table.this_node.id, 0, kademlia.k_max_node_id]
+    for target in targets:
+        expected = sorted(nodes, key=lambda n: n.distance_to(target))[:k]
+        assert table.neighbours(target, k) == expected
+
+
 def test_routingtable_get_random_nodes():
     table = kademlia.RoutingTable(random_node())
     for _ in range(100):
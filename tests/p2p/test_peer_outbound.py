@@ -0,0 +1,103 @@
+import asyncio
+import os
+
+import pytest
+
+from p2p import peer as peer_module
+from p2p.p2p_proto import Disconnect
+from p2p.peer import CongestionPolicy
+from p2p.tools.paragon import BroadcastData
+from p2p.tools.paragon.helpers import (
+    get_directly_linked_peers_without_handshake,
+)
+
+
+async def get_linked_peers():
+    alice, bob = await get_directly_linked_peers_without_handshake()
+    await asyncio.gather(alice.do_p2p_handshake(), bob.do_p2p_handshake())
+    return alice, bob
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def congest(monkeypatch, peer, policy):
+    # Write one message at a time, and never get drained until the returned event is set. How
+    # long the peer has been congested for goes by the returned clock, not the wall clock.
+    drained = asyncio.Event()
+    peer.writer.drain = drained.wait
+    peer.max_coalesced_write_size = 1
+    peer.outbound_high_water = 1000
+    peer.outbound_low_water = 500
+    peer.max_congestion_time = 10
+    peer.congestion_policy = policy
+    clock = FakeClock()
+    monkeypatch.setattr(peer_module, 'time', clock)
+    return drained, clock
+
+
+@pytest.mark.asyncio
+async def test_outbound_msgs_coalesced():
+    alice, bob = await get_linked_peers()
+    writes_count = alice.writes_count
+
+    for i in range(10):
+        alice.sub_proto.send_broadcast_data(bytes([i]) * 100)
+    received = [await bob.read_msg() for _ in range(10)]
+
+    assert [msg['data'] for _, msg in received] == [bytes([i]) * 100 for i in range(10)]
+    assert alice.writes_count == writes_count + 1
+    assert alice.get_extra_stats()[0].startswith('outbound: ')
+
+
+@pytest.mark.asyncio
+async def test_msgs_to_congested_peer_dropped(monkeypatch):
+    alice, bob = await get_linked_peers()
+    drained, clock = congest(monkeypatch, alice, CongestionPolicy.drop)
+
+    data = [os.urandom(200) for _ in range(20)]
+    for item in data:
+        alice.sub_proto.send_broadcast_data(item)
+    assert alice.is_congested
+
+    # Only once it has been congested for long enough do we start dropping messages
+    clock.now += 10
+    alice.sub_proto.send_broadcast_data(data[-1])
+    data.append(data[-1])
+    assert alice.dropped_msgs_count == 0
+    clock.now += 1
+    alice.sub_proto.send_broadcast_data(b'dropped')
+    assert alice.dropped_msgs_count == 1
+
+    drained.set()
+    received = [await bob.read_msg() for _ in range(len(data))]
+    assert [msg['data'] for _, msg in received] == data
+    assert not alice.is_congested
+    assert alice.max_outbound_size > alice.outbound_high_water
+
+
+@pytest.mark.asyncio
+async def test_congested_peer_disconnected(monkeypatch):
+    alice, bob = await get_linked_peers()
+    drained, clock = congest(monkeypatch, alice, CongestionPolicy.disconnect)
+
+    for _ in range(20):
+        alice.sub_proto.send_broadcast_data(os.urandom(200))
+    await asyncio.sleep(0)
+    assert alice.is_congested
+    clock.now += 11
+    alice.sub_proto.send_broadcast_data(b'dropped')
+
+    assert alice.is_closing
+    drained.set()
+    # We'd written the first message before getting congested, and then only the Disconnect
+    cmd, _ = await bob.read_msg()
+    assert isinstance(cmd, BroadcastData)
+    cmd, msg = await bob.read_msg()
+    assert isinstance(cmd, Disconnect)
+    assert alice.dropped_msgs_count == 20
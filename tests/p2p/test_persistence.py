@@ -3,6 +3,7 @@ from pathlib import Path
 import sqlite3
 import pytest
 import tempfile
+import time
 
 from p2p.ecies import generate_privkey
 from p2p.exceptions import (
@@ -15,6 +16,8 @@ from p2p import (
     persistence,
 )
 
+from tests.p2p.helpers import random_node as random_discovery_node
+
 
 # do it the long way to enable monkeypatching p2p.persistence.current_time
 SQLitePeerInfo = persistence.SQLitePeerInfo
@@ -95,7 +98,8 @@ def test_records_failures():
 
     assert peer_info.should_connect_to(node) is False
 
-    # And just to make sure, check that it's been saved to the db
+    # And just to make sure, check that it's been saved to the db once flushed
+    peer_info.flush()
     db = peer_info.db
     rows = db.execute('''
         SELECT * FROM bad_nodes
@@ -136,6 +140,50 @@ def test_sql_does_persist(temp_path):
     peer_info.close()
 
 
+def test_failures_written_in_batches(temp_path):
+    dbpath = temp_path / "nodedb"
+    known_node, new_node = random_node(), random_node()
+
+    peer_info = SQLitePeerInfo(dbpath)
+    peer_info.record_failure(known_node, HandshakeFailure())
+    peer_info.flush()
+    peer_info.record_failure(known_node, HandshakeFailure())
+    # Recorded twice before we get to write it, so it gets inserted with both failures
+    peer_info.record_failure(new_node, HandshakeFailure())
+    peer_info.record_failure(new_node, WrongGenesisFailure())
+
+    def get_rows():
+        rows = peer_info.db.execute('SELECT * FROM bad_nodes ORDER BY error_count').fetchall()
+        return [(row['enode'], row['reason'], row['error_count']) for row in rows]
+
+    assert get_rows() == [(known_node.uri(), 'HandshakeFailure', 1)]
+    peer_info.flush()
+    assert sorted(get_rows()) == sorted([
+        (known_node.uri(), 'HandshakeFailure', 2),
+        (new_node.uri(), 'WrongGenesisFailure', 2),
+    ])
+    peer_info.close()
+
+    peer_info = SQLitePeerInfo(dbpath)
+    assert peer_info.should_connect_to(known_node) is False
+    assert peer_info.should_connect_to(new_node) is False
+    peer_info.close()
+
+
+def test_failures_flushed_in_background(monkeypatch):
+    monkeypatch.setattr(MemoryPeerInfo, 'flush_interval', 0.01)
+    peer_info = MemoryPeerInfo()
+    node = random_node()
+
+    peer_info.record_failure(node, HandshakeFailure())
+    time.sleep(0.1)
+
+    with peer_info._db_lock:
+        rows = peer_info.db.execute('SELECT * FROM bad_nodes').fetchall()
+    assert [row['enode'] for row in rows] == [node.uri()]
+    peer_info.close()
+
+
 def test_timeout_works(monkeypatch):
     node = random_node()
 
@@ -168,3 +216,70 @@ def test_fails_when_closed():
     node = random_node()
     with pytest.raises(persistence.ClosedException):
         peer_info.record_failure(node, HandshakeFailure())
+
+
+def test_node_store_persists_bonded_nodes(temp_path):
+    dbpath = temp_path / "discovery-nodes"
+    old_node, new_node, unknown_node = random_discovery_node(), random_discovery_node(), random_discovery_node()  # noqa: E501
+
+    node_store = persistence.SQLiteNodeStore(dbpath)
+    node_store.record_pong(old_node)
+    node_store.record_pong(new_node)
+    # Nodes that never replied to us are not worth remembering
+    node_store.record_failure(unknown_node)
+    assert node_store.get_seed_nodes(10) == (new_node, old_node)
+    node_store.close()
+
+    node_store = persistence.SQLiteNodeStore(dbpath)
+    seed_nodes = node_store.get_seed_nodes(10)
+    assert seed_nodes == (new_node, old_node)
+    assert node_store.get_seed_nodes(1) == (new_node,)
+    # Nodes are restored with the UDP port we used to ping them
+    assert seed_nodes[0].address == new_node.address
+    assert seed_nodes[0].address.tcp_port == new_node.address.tcp_port
+    node_store.close()
+
+
+def test_node_store_forgets_unresponsive_nodes(temp_path):
+    dbpath = temp_path / "discovery-nodes"
+    node = random_discovery_node()
+
+    node_store = persistence.SQLiteNodeStore(dbpath)
+    node_store.record_pong(node)
+    for _ in range(node_store.max_failures - 1):
+        node_store.record_failure(node)
+    assert node_store.get_seed_nodes(10) == (node,)
+
+    # A pong resets the count of failures
+    node_store.record_pong(node)
+    for _ in range(node_store.max_failures - 1):
+        node_store.record_failure(node)
+    node_store.flush()
+    assert node_store.get_seed_nodes(10) == (node,)
+
+    node_store.record_failure(node)
+    assert node_store.get_seed_nodes(10) == ()
+    node_store.close()
+
+    node_store = persistence.SQLiteNodeStore(dbpath)
+    assert node_store.get_seed_nodes(10) == ()
+    node_store.close()
+
+
+def test_node_store_forgets_old_nodes(temp_path, monkeypatch):
+    dbpath = temp_path / "discovery-nodes"
+    old_node, new_node = random_discovery_node(), random_discovery_node()
+
+    node_store = persistence.SQLiteNodeStore(dbpath)
+    node_store.record_pong(old_node)
+    later = time.time() + node_store.max_age + 1
+    monkeypatch.setattr(persistence.time, 'time', lambda: later)
+    node_store.record_pong(new_node)
+    assert node_store.get_seed_nodes(10) == (new_node,)
+    node_store.close()
+
+    node_store = persistence.SQLiteNodeStore(dbpath)
+    assert node_store.get_seed_nodes(10) == (new_node,)
+    rows = node_store.db.execute('SELECT * FROM nodes').fetchall()
+    assert len(rows) == 1
+    node_store.close()
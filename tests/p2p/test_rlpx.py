@@ -0,0 +1,127 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+import pytest
+
+import sha3
+
+from p2p.exceptions import DecryptionError
+from p2p.rlpx import RLPxFrameCodec
+from p2p._utils import roundup_16
+
+
+def make_codecs(executor=None):
+    aes_secret = os.urandom(32)
+    mac_secret = os.urandom(32)
+    egress_mac = sha3.keccak_256(b'egress')
+    ingress_mac = sha3.keccak_256(b'ingress')
+    sender = RLPxFrameCodec(aes_secret, mac_secret, egress_mac.copy(), ingress_mac.copy())
+    receiver = RLPxFrameCodec(
+        aes_secret, mac_secret, ingress_mac.copy(), egress_mac.copy(), executor=executor)
+    return sender, receiver
+
+
+def encrypt(codec, frame):
+    header = len(frame).to_bytes(3, 'big') + b'\x00' * 13
+    padding = b'\x00' * (roundup_16(len(frame)) - len(frame))
+    return codec.encrypt(header, frame + padding)
+
+
+@pytest.mark.asyncio
+async def test_decode_frames_fed_at_once():
+    sender, receiver = make_codecs()
+    frames = [os.urandom(size) for size in (1, 16, 17, 1000, 0)]
+
+    receiver.feed(b''.join(encrypt(sender, frame) for frame in frames))
+
+    assert await receiver.decode_frames() == tuple(frames)
+    assert await receiver.decode_frames() == ()
+    assert receiver.bytes_needed == 32
+
+
+@pytest.mark.asyncio
+async def test_decode_frames_fed_in_pieces():
+    sender, receiver = make_codecs()
+    frames = [os.urandom(size) for size in (100, 3000, 5)]
+    data = b''.join(encrypt(sender, frame) for frame in frames)
+
+    decoded = []
+    for i in range(0, len(data), 7):
+        receiver.feed(data[i:i + 7])
+        assert receiver.bytes_needed >= 0
+        decoded.extend(await receiver.decode_frames())
+
+    assert decoded == frames
+    assert receiver.bytes_needed == 32
+
+
+@pytest.mark.asyncio
+async def test_decode_large_frames_in_executor():
+    sender, receiver = make_codecs(ThreadPoolExecutor(1))
+    receiver.min_threaded_frame_size = 1000
+    frames = [os.urandom(size) for size in (10, 5000, 20, 100000)]
+
+    receiver.feed(b''.join(encrypt(sender, frame) for frame in frames))
+
+    assert await receiver.decode_frames() == tuple(frames)
+    receiver.executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_decode_frames_cancelled_while_decrypting_in_executor():
+    sender, receiver = make_codecs(ThreadPoolExecutor(1))
+    receiver.min_threaded_frame_size = 1000
+    frames = [os.urandom(size) for size in (10, 5000, 20)]
+    decrypt_body = receiver._decrypt_body
+    decrypting = threading.Event()
+    resume = threading.Event()
+
+    def slow_decrypt_body(frame_ciphertext, frame_mac, body_size):
+        if body_size >= receiver.min_threaded_frame_size:
+            decrypting.set()
+            resume.wait()
+        return decrypt_body(frame_ciphertext, frame_mac, body_size)
+
+    receiver._decrypt_body = slow_decrypt_body
+    receiver.feed(b''.join(encrypt(sender, frame) for frame in frames))
+
+    decoding = asyncio.ensure_future(receiver.decode_frames())
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, decrypting.wait)
+    decoding.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await decoding
+    resume.set()
+
+    # The frame decrypted before the cancellation isn't lost, and the one being decrypted then
+    # isn't decrypted a second time.
+    assert await receiver.decode_frames() == tuple(frames)
+    assert receiver.bytes_needed == 32
+    receiver.executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_decode_frames_with_bad_mac():
+    sender, receiver = make_codecs()
+    data = bytearray(encrypt(sender, b'\x01' * 20))
+    # Flip a bit of the body
+    data[40] ^= 1
+
+    receiver.feed(data)
+
+    with pytest.raises(DecryptionError, match='frame mac'):
+        await receiver.decode_frames()
+
+
+@pytest.mark.asyncio
+async def test_decode_frames_with_bad_header_mac():
+    sender, receiver = make_codecs()
+    data = bytearray(encrypt(sender, b'\x01' * 20))
+    data[0] ^= 1
+
+    receiver.feed(data)
+
+    with pytest.raises(DecryptionError, match='header mac'):
+        await receiver.decode_frames()
@@ -83,6 +83,19 @@ def get_database_socket_path(data_dir: Path) -> Path:
     ))
 
 
+DATABASE_WIRE_SOCKET_FILENAME = 'db-wire.ipc'
+
+
+def get_database_wire_socket_path(data_dir: Path) -> Path:
+    """
+    Returns the path to the ipc socket for the binary database transport.
+    """
+    return Path(os.environ.get(
+        'TRINITY_DATABASE_WIRE_IPC',
+        data_dir / DATABASE_WIRE_SOCKET_FILENAME,
+    ))
+
+
 JSONRPC_SOCKET_FILENAME = 'jsonrpc.ipc'
 
 
@@ -14,6 +14,8 @@ from p2p.kademlia import Node
 
 from trinity import __version__
 from trinity.constants import (
+    DB_TRANSPORT_MANAGER,
+    DB_TRANSPORTS,
     MAINNET_NETWORK_ID,
     ROPSTEN_NETWORK_ID,
 )
@@ -166,6 +168,15 @@ trinity_parser.add_argument(
         "Port on which trinity should listen for incoming p2p/discovery connections. Default: 30303"
     ),
 )
+trinity_parser.add_argument(
+    '--db-transport',
+    choices=DB_TRANSPORTS,
+    default=DB_TRANSPORT_MANAGER,
+    help=(
+        "Transport used by other processes to access the database process. "
+        "Default: manager"
+    ),
+)
 
 
 #
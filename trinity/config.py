@@ -15,6 +15,7 @@ from typing import (
     cast,
     Dict,
     Iterable,
+    Optional,
     TYPE_CHECKING,
     Tuple,
     Type,
@@ -40,6 +41,9 @@ from p2p.constants import (
 
 from trinity.constants import (
     ASSETS_DIR,
+    DB_TRANSPORT_BINARY,
+    DB_TRANSPORT_MANAGER,
+    DB_TRANSPORTS,
     DEFAULT_PREFERRED_NODES,
     IPC_DIR,
     LOG_DIR,
@@ -53,6 +57,7 @@ from trinity._utils.chains import (
     construct_trinity_config_params,
     get_data_dir_for_network_id,
     get_database_socket_path,
+    get_database_wire_socket_path,
     get_jsonrpc_socket_path,
     get_nodekey_path,
     load_nodekey,
@@ -247,12 +252,17 @@ class TrinityConfig:
                  port: int=30303,
                  use_discv5: bool = False,
                  preferred_nodes: Tuple[KademliaNode, ...]=None,
-                 bootstrap_nodes: Tuple[KademliaNode, ...]=None) -> None:
+                 bootstrap_nodes: Tuple[KademliaNode, ...]=None,
+                 db_transport: str=DB_TRANSPORT_MANAGER) -> None:
         self.app_identifier = app_identifier
         self.network_id = network_id
         self.max_peers = max_peers
         self.port = port
         self.use_discv5 = use_discv5
+
+        if db_transport not in DB_TRANSPORTS:
+            raise ValueError(f"Unknown database transport: {db_transport}")
+        self.db_transport = db_transport
         self._app_configs = {}
 
         if genesis_config is not None:
@@ -385,6 +395,33 @@ class TrinityConfig:
         """
         return get_database_socket_path(self.ipc_dir)
 
+    @property
+    def database_wire_ipc_path(self) -> Path:
+        """
+        Path for the database IPC socket of the binary transport. Only served when
+        ``db_transport`` is ``binary``.
+        """
+        return get_database_wire_socket_path(self.ipc_dir)
+
+    @property
+    def database_wire_client_ipc_path(self) -> Optional[Path]:
+        """
+        Path that processes accessing the database should use the binary transport on, or
+        ``None`` if they should go through the ``BaseManager`` proxies.
+        """
+        if self.db_transport == DB_TRANSPORT_BINARY:
+            return self.database_wire_ipc_path
+        else:
+            return None
+
+    @property
+    def discovery_nodes_path(self) -> Path:
+        """
+        Path where the nodes we bond with during discovery are kept, so that we can reconnect to
+        them after a restart.
+        """
+        return self.with_app_suffix(self.data_dir / "discovery-nodes")
+
     @property
     def ipc_dir(self) -> Path:
         """
@@ -465,7 +502,11 @@ class TrinityConfig:
         an ``argparse.ArgumentParser``
         """
         constructor_kwargs = construct_trinity_config_params(parser_args)
-        trinity_config = cls(app_identifier=app_identifier, **constructor_kwargs)
+        trinity_config = cls(
+            app_identifier=app_identifier,
+            db_transport=parser_args.db_transport,
+            **constructor_kwargs
+        )
 
         trinity_config.initialize_app_configs(parser_args, app_config_types)
 
@@ -587,6 +628,15 @@ class Eth1AppConfig(BaseAppConfig):
         config = self.trinity_config
         return config.with_app_suffix(config.data_dir / "nodedb")
 
+    @property
+    def state_sync_dir(self) -> Path:
+        """
+        Path where the progress of an unfinished state sync is kept, so that it can be resumed
+        after a restart.
+        """
+        config = self.trinity_config
+        return config.with_app_suffix(config.data_dir / "state-sync")
+
 
 class BeaconChainConfig:
     def __init__(self,
@@ -31,10 +31,17 @@ PID_DIR = 'pids'
 SYNC_FULL = 'full'
 SYNC_FAST = 'fast'
 SYNC_LIGHT = 'light'
+SYNC_SNAP = 'snap'
+
+# database IPC transports
+DB_TRANSPORT_MANAGER = 'manager'
+DB_TRANSPORT_BINARY = 'binary'
+DB_TRANSPORTS = (DB_TRANSPORT_MANAGER, DB_TRANSPORT_BINARY)
 
 # lahja endpoint names
 MAIN_EVENTBUS_ENDPOINT = 'main'
 NETWORKING_EVENTBUS_ENDPOINT = 'networking'
+DATABASE_EVENTBUS_ENDPOINT = 'database'
 TO_NETWORKING_BROADCAST_CONFIG = BroadcastConfig(filter_endpoint=NETWORKING_EVENTBUS_ENDPOINT)
 
 # Network IDs: https://ethereum.stackexchange.com/questions/17051/how-to-select-a-network-id-or-is-there-a-list-of-network-ids/17101#17101  # noqa: E501
@@ -1,7 +1,12 @@
 from abc import abstractmethod
 from contextlib import contextmanager
 from typing import (
+    Any,
+    Dict,
     Generator,
+    Optional,
+    Sequence,
+    Tuple,
 )
 # Typeshed definitions for multiprocessing.managers is incomplete, so ignore them for now:
 # https://github.com/python/typeshed/blob/85a788dbcaa5e9e9a62e55f15d44530cd28ba830/stdlib/3/multiprocessing/managers.pyi#L3
@@ -28,6 +33,59 @@ class BaseAsyncDB(BaseDB):
     async def coro_exists(self, key: bytes) -> bool:
         pass
 
+    @abstractmethod
+    async def coro_get_many(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        """
+        Return the values for all ``keys`` in order, using ``None`` for missing keys.
+        """
+        pass
+
+    @abstractmethod
+    async def coro_exists_many(self, keys: Sequence[bytes]) -> Tuple[bool, ...]:
+        pass
+
+    @abstractmethod
+    async def coro_set_many(self, items: Dict[bytes, bytes]) -> None:
+        """
+        Write all ``items`` to the database in a single atomic batch.
+        """
+        pass
+
+
+class BatchedDB:
+    """
+    Wrap a ``BaseDB`` (usually on the database process side of the IPC boundary) and add the
+    batch APIs that back the ``coro_*_many`` methods of the proxies. Every other attribute is
+    delegated to the wrapped database.
+    """
+
+    def __init__(self, db: BaseDB) -> None:
+        self._db = db
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._db, name)
+
+    def get_many(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        return tuple(self._get_or_none(key) for key in keys)
+
+    def exists_many(self, keys: Sequence[bytes]) -> Tuple[bool, ...]:
+        return tuple(self._db.exists(key) for key in keys)
+
+    def set_many(self, items: Dict[bytes, bytes]) -> None:
+        if hasattr(self._db, 'atomic_batch'):
+            with self._db.atomic_batch() as batch:
+                for key, value in items.items():
+                    batch[key] = value
+        else:
+            for key, value in items.items():
+                self._db[key] = value
+
+    def _get_or_none(self, key: bytes) -> Optional[bytes]:
+        try:
+            return self._db[key]
+        except KeyError:
+            return None
+
 
 class AsyncDBPreProxy(BaseAsyncDB):
     """
@@ -45,15 +103,22 @@ class AsyncDBPreProxy(BaseAsyncDB):
         'coro_exists',
         'delete',
         'exists',
+        'exists_many',
         'get',
+        'get_many',
         'set',
+        'set_many',
     )
 
     def __init__(self) -> None:
         pass
 
+    coro_get = async_method('__getitem__')
     coro_set = async_method('set')
     coro_exists = async_method('exists')
+    coro_get_many = async_method('get_many')
+    coro_exists_many = async_method('exists_many')
+    coro_set_many = async_method('set_many')
 
     def get(self, key: bytes) -> bytes:
         return self._callmethod('get', (key,))
@@ -79,6 +144,15 @@ class AsyncDBPreProxy(BaseAsyncDB):
     def __contains__(self, key: bytes) -> bool:
         return self._callmethod('__contains__', (key,))
 
+    def get_many(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        return self._callmethod('get_many', (keys,))
+
+    def exists_many(self, keys: Sequence[bytes]) -> Tuple[bool, ...]:
+        return self._callmethod('exists_many', (keys,))
+
+    def set_many(self, items: Dict[bytes, bytes]) -> None:
+        return self._callmethod('set_many', (items,))
+
     @contextmanager
     def atomic_batch(self) -> Generator['AtomicDBWriteBatch', None, None]:
         with AtomicDBWriteBatch._commit_unless_raises(self) as readable_batch:
@@ -10,8 +10,12 @@ from trinity.config import (
     BeaconAppConfig,
     TrinityConfig,
 )
-from trinity.db.base import AsyncDBProxy
+from trinity.db.base import (
+    AsyncDBProxy,
+    BatchedDB,
+)
 from trinity.db.beacon.chain import AsyncBeaconChainDBProxy
+from trinity.db.wire import AsyncDBWireClient
 
 from trinity._utils.mp import TracebackRecorder
 from trinity.initialization import (
@@ -36,7 +40,10 @@ def create_db_server_manager(trinity_config: TrinityConfig,
         pass
 
     DBManager.register(
-        'get_db', callable=lambda: TracebackRecorder(base_db), proxytype=AsyncDBProxy)
+        'get_db',
+        callable=lambda: TracebackRecorder(BatchedDB(base_db)),
+        proxytype=AsyncDBProxy,
+    )
 
     DBManager.register(
         'get_chaindb',
@@ -48,10 +55,15 @@ def create_db_server_manager(trinity_config: TrinityConfig,
     return manager
 
 
-def create_db_consumer_manager(ipc_path: pathlib.Path, connect: bool=True) -> BaseManager:
+def create_db_consumer_manager(ipc_path: pathlib.Path,
+                               connect: bool=True,
+                               wire_ipc_path: pathlib.Path=None) -> BaseManager:
     """
     We're still using 'str' here on param ipc_path because an issue with
     multi-processing not being able to interpret 'Path' objects correctly
+
+    If ``wire_ipc_path`` is given, ``get_db`` returns a client of the binary database
+    transport served on that path instead of a manager proxy.
     """
     class DBManager(BaseManager):
         pass
@@ -59,7 +71,15 @@ def create_db_consumer_manager(ipc_path: pathlib.Path, connect: bool=True) -> Ba
     DBManager.register('get_db', proxytype=AsyncDBProxy)
     DBManager.register('get_chaindb', proxytype=AsyncBeaconChainDBProxy)
 
-    manager = DBManager(address=str(ipc_path))  # type: ignore
+    if wire_ipc_path is None:
+        manager = DBManager(address=str(ipc_path))  # type: ignore
+    else:
+        class WireDBManager(DBManager):
+            def get_db(self) -> AsyncDBWireClient:
+                return AsyncDBWireClient(wire_ipc_path)
+
+        manager = WireDBManager(address=str(ipc_path))  # type: ignore
+
     if connect:
         manager.connect()
     return manager
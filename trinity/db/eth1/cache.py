@@ -0,0 +1,297 @@
+from contextlib import contextmanager
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from cachetools import LRUCache
+
+from eth_typing import (
+    BlockNumber,
+    Hash32,
+)
+
+from eth.db.backends.base import (
+    BaseAtomicDB,
+    BaseDB,
+)
+from eth.db.schema import SchemaV1
+from eth.rlp.blocks import BaseBlock
+from eth.rlp.headers import BlockHeader
+from eth.rlp.receipts import Receipt
+from eth.rlp.transactions import BaseTransaction
+
+from lahja import Endpoint
+
+from trinity.db.eth1.chain import BaseAsyncChainDB
+from trinity.db.eth1.events import CanonicalHeadChanged
+from trinity.db.eth1.header import BaseAsyncHeaderDB
+
+
+DEFAULT_HEADER_CACHE_SIZE = 2048
+
+CANONICAL_HEAD_HASH_KEY = SchemaV1.make_canonical_head_hash_lookup_key()
+
+
+class CanonicalHeadNotifyingDB(BaseAtomicDB):
+    """
+    Wrap the database that the database process serves and call ``on_canonical_head_change``
+    with the new head hash whenever a write changes the canonical head, no matter whether the
+    write came in through the ``ChainDB``, the ``HeaderDB`` or the raw database.
+    """
+
+    def __init__(self,
+                 db: BaseAtomicDB,
+                 on_canonical_head_change: Callable[[Hash32], None]) -> None:
+        self._db = db
+        self._on_canonical_head_change = on_canonical_head_change
+        self._lock = threading.Lock()
+        self._canonical_head_hash = db.get(CANONICAL_HEAD_HASH_KEY)
+
+    def __getitem__(self, key: bytes) -> bytes:
+        return self._db[key]
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        self._db[key] = value
+        if key == CANONICAL_HEAD_HASH_KEY:
+            self._check_canonical_head()
+
+    def __delitem__(self, key: bytes) -> None:
+        del self._db[key]
+
+    def _exists(self, key: bytes) -> bool:
+        return key in self._db
+
+    @contextmanager
+    def atomic_batch(self) -> Generator[BaseDB, None, None]:
+        with self._db.atomic_batch() as batch:
+            yield batch
+        # Batches are committed straight to the wrapped database, so we can't see which keys
+        # they touched. One extra read per batch is cheap compared to the batch itself.
+        self._check_canonical_head()
+
+    def _check_canonical_head(self) -> None:
+        # The manager serves every connection from its own thread
+        with self._lock:
+            head_hash = self._db.get(CANONICAL_HEAD_HASH_KEY)
+            if head_hash == self._canonical_head_hash:
+                return
+            self._canonical_head_hash = head_hash
+        self._on_canonical_head_change(Hash32(head_hash))
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_size: int
+    size: int
+
+
+class CachedAsyncHeaderDB(BaseAsyncHeaderDB):
+    """
+    Process-local read cache in front of a ``BaseAsyncHeaderDB`` that lives in the database
+    process.
+
+    Headers and scores are keyed by hash and never change, so they stay cached until the LRU
+    evicts them. Canonical lookups (block number to hash and the canonical head) are dropped
+    whenever a :class:`~trinity.db.eth1.events.CanonicalHeadChanged` event arrives on
+    ``event_bus`` or a header is persisted through this instance.
+    """
+
+    def __init__(self,
+                 headerdb: BaseAsyncHeaderDB,
+                 event_bus: Endpoint = None,
+                 max_size: int = DEFAULT_HEADER_CACHE_SIZE) -> None:
+        self._headerdb = headerdb
+        self._max_size = max_size
+
+        self._headers: Dict[Hash32, BlockHeader] = LRUCache(max_size)
+        self._scores: Dict[Hash32, int] = LRUCache(max_size)
+        self._canonical_hashes: Dict[BlockNumber, Hash32] = LRUCache(max_size)
+        self._canonical_head: BlockHeader = None
+        # Bumped on every invalidation so that a canonical lookup which was in flight while the
+        # head changed doesn't put its (possibly stale) result into the fresh cache.
+        self._canonical_generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        if event_bus is not None:
+            event_bus.subscribe(CanonicalHeadChanged, self._handle_canonical_head_changed)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._headerdb, name)
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            max_size=self._max_size,
+            size=len(self._headers) + len(self._scores) + len(self._canonical_hashes),
+        )
+
+    def invalidate_canonical(self) -> None:
+        self._canonical_generation += 1
+        self._canonical_hashes.clear()
+        self._canonical_head = None
+
+    def _handle_canonical_head_changed(self, event: CanonicalHeadChanged) -> None:
+        self.invalidate_canonical()
+
+    #
+    # Canonical Chain API
+    #
+    async def coro_get_canonical_block_hash(self, block_number: BlockNumber) -> Hash32:
+        try:
+            block_hash = self._canonical_hashes[block_number]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return block_hash
+
+        self.misses += 1
+        generation = self._canonical_generation
+        block_hash = await self._headerdb.coro_get_canonical_block_hash(block_number)
+        if generation == self._canonical_generation:
+            self._canonical_hashes[block_number] = block_hash
+        return block_hash
+
+    async def coro_get_canonical_block_header_by_number(self, block_number: BlockNumber) -> BlockHeader:  # noqa: E501
+        try:
+            header = self._headers[self._canonical_hashes[block_number]]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return header
+
+        self.misses += 1
+        generation = self._canonical_generation
+        header = await self._headerdb.coro_get_canonical_block_header_by_number(block_number)
+        if generation == self._canonical_generation:
+            self._canonical_hashes[block_number] = header.hash
+        self._headers[header.hash] = header
+        return header
+
+    async def coro_get_canonical_head(self) -> BlockHeader:
+        if self._canonical_head is not None:
+            self.hits += 1
+            return self._canonical_head
+
+        self.misses += 1
+        generation = self._canonical_generation
+        header = await self._headerdb.coro_get_canonical_head()
+        if generation == self._canonical_generation:
+            self._canonical_head = header
+        self._headers[header.hash] = header
+        return header
+
+    #
+    # Header API
+    #
+    async def coro_get_block_header_by_hash(self, block_hash: Hash32) -> BlockHeader:
+        try:
+            header = self._headers[block_hash]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return header
+
+        self.misses += 1
+        header = await self._headerdb.coro_get_block_header_by_hash(block_hash)
+        self._headers[block_hash] = header
+        return header
+
+    async def coro_get_score(self, block_hash: Hash32) -> int:
+        try:
+            score = self._scores[block_hash]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return score
+
+        self.misses += 1
+        score = await self._headerdb.coro_get_score(block_hash)
+        self._scores[block_hash] = score
+        return score
+
+    async def coro_header_exists(self, block_hash: Hash32) -> bool:
+        # Headers are never deleted, so only positive answers can be served from the cache
+        if block_hash in self._headers:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        return await self._headerdb.coro_header_exists(block_hash)
+
+    async def coro_persist_header(self, header: BlockHeader) -> Tuple[BlockHeader, ...]:
+        try:
+            return await self._headerdb.coro_persist_header(header)
+        finally:
+            self.invalidate_canonical()
+
+    async def coro_persist_header_chain(self,
+                                        headers: Iterable[BlockHeader]) -> Tuple[BlockHeader, ...]:
+        try:
+            return await self._headerdb.coro_persist_header_chain(headers)
+        finally:
+            self.invalidate_canonical()
+
+
+class CachedAsyncChainDB(CachedAsyncHeaderDB, BaseAsyncChainDB):
+    """
+    :class:`CachedAsyncHeaderDB` for a ``BaseAsyncChainDB``. Only the header lookups are
+    cached, everything else goes straight to the database process.
+    """
+    _headerdb: BaseAsyncChainDB
+
+    async def coro_exists(self, key: bytes) -> bool:
+        return await self._headerdb.coro_exists(key)
+
+    async def coro_get(self, key: bytes) -> bytes:
+        return await self._headerdb.coro_get(key)
+
+    async def coro_persist_block(self, block: BaseBlock) -> None:
+        try:
+            await self._headerdb.coro_persist_block(block)
+        finally:
+            self.invalidate_canonical()
+
+    async def coro_persist_blocks(
+            self,
+            blocks: Sequence[BaseBlock]) -> Tuple[Tuple[Hash32, ...], Tuple[Hash32, ...]]:
+        try:
+            return await self._headerdb.coro_persist_blocks(blocks)
+        finally:
+            self.invalidate_canonical()
+
+    async def coro_persist_uncles(self, uncles: Tuple[BlockHeader]) -> Hash32:
+        return await self._headerdb.coro_persist_uncles(uncles)
+
+    async def coro_persist_trie_data_dict(self, trie_data_dict: Dict[Hash32, bytes]) -> None:
+        await self._headerdb.coro_persist_trie_data_dict(trie_data_dict)
+
+    async def coro_get_block_transactions(
+            self,
+            header: BlockHeader,
+            transaction_class: Type[BaseTransaction]) -> Iterable[BaseTransaction]:
+        return await self._headerdb.coro_get_block_transactions(header, transaction_class)
+
+    async def coro_get_block_uncles(self, uncles_hash: Hash32) -> List[BlockHeader]:
+        return await self._headerdb.coro_get_block_uncles(uncles_hash)
+
+    async def coro_get_receipts(
+            self, header: BlockHeader, receipt_class: Type[Receipt]) -> List[Receipt]:
+        return await self._headerdb.coro_get_receipts(header, receipt_class)
@@ -8,6 +8,7 @@ from typing import (
     Dict,
     Iterable,
     List,
+    Sequence,
     Tuple,
     Type,
 )
@@ -15,6 +16,7 @@ from typing import (
 from eth_typing import Hash32
 
 from eth.db.backends.base import BaseAtomicDB
+from eth.db.chain import ChainDB
 from eth.rlp.blocks import BaseBlock
 from eth.rlp.headers import BlockHeader
 from eth.rlp.receipts import Receipt
@@ -26,6 +28,32 @@ from trinity._utils.mp import (
 )
 
 
+class TrinityChainDB(ChainDB):
+    """
+    The ``ChainDB`` served by the database process, with the extra APIs we need on top of
+    py-evm's.
+    """
+
+    def persist_blocks(self,
+                       blocks: Sequence[BaseBlock]
+                       ) -> Tuple[Tuple[Hash32, ...], Tuple[Hash32, ...]]:
+        """
+        Persist the headers and uncles of the given blocks, like ``persist_block()`` does for a
+        single one, in a single atomic write.
+
+        The parent of every block must be either in the database already or before it in
+        ``blocks``. Assumes all block transactions have been persisted already.
+        """
+        new_canonical_hashes: List[Hash32] = []
+        old_canonical_hashes: List[Hash32] = []
+        with self.db.atomic_batch() as db:
+            for block in blocks:
+                new_hashes, old_hashes = self._persist_block(db, block)
+                new_canonical_hashes.extend(new_hashes)
+                old_canonical_hashes.extend(old_hashes)
+        return tuple(new_canonical_hashes), tuple(old_canonical_hashes)
+
+
 class BaseAsyncChainDB(BaseAsyncHeaderDB):
     """
     Abstract base class for the async counterpart to ``BaseChainDB``.
@@ -43,6 +71,12 @@ class BaseAsyncChainDB(BaseAsyncHeaderDB):
     async def coro_persist_block(self, block: BaseBlock) -> None:
         pass
 
+    @abstractmethod
+    async def coro_persist_blocks(
+            self,
+            blocks: Sequence[BaseBlock]) -> Tuple[Tuple[Hash32, ...], Tuple[Hash32, ...]]:
+        pass
+
     @abstractmethod
     async def coro_persist_uncles(self, uncles: Tuple[BlockHeader]) -> Hash32:
         pass
@@ -87,6 +121,7 @@ class AsyncChainDBPreProxy(BaseAsyncChainDB):
     coro_get_canonical_block_header_by_number = async_method('get_canonical_block_header_by_number')
     coro_persist_header = async_method('persist_header')
     coro_persist_block = async_method('persist_block')
+    coro_persist_blocks = async_method('persist_blocks')
     coro_persist_uncles = async_method('persist_uncles')
     coro_persist_trie_data_dict = async_method('persist_trie_data_dict')
     coro_get_block_transactions = async_method('get_block_transactions')
@@ -0,0 +1,15 @@
+from eth_typing import Hash32
+
+from lahja import (
+    BaseEvent,
+)
+
+
+class CanonicalHeadChanged(BaseEvent):
+    """
+    Broadcasted by the database process whenever a write changes the canonical head, so that
+    processes holding a local cache of canonical lookups know they have to drop it.
+    """
+
+    def __init__(self, block_hash: Hash32) -> None:
+        self.block_hash = block_hash
@@ -3,16 +3,25 @@ from multiprocessing.managers import (
 )
 import pathlib
 
-from eth.db.chain import ChainDB
 from eth.db.backends.base import BaseAtomicDB
 from eth.db.header import HeaderDB
 
 from trinity.config import TrinityConfig
-from trinity.db.base import AsyncDBProxy
-from trinity.db.eth1.chain import AsyncChainDBProxy
+from trinity.db.base import (
+    AsyncDBProxy,
+    BatchedDB,
+)
+from trinity.db.eth1.chain import (
+    AsyncChainDBProxy,
+    TrinityChainDB,
+)
 from trinity.db.eth1.header import (
     AsyncHeaderDBProxy
 )
+from trinity.db.wire import (
+    AsyncDBWireClient,
+    AsyncHeaderDBWireClient,
+)
 from trinity.initialization import (
     is_database_initialized,
     initialize_database,
@@ -24,7 +33,7 @@ def create_db_server_manager(trinity_config: TrinityConfig,
                              base_db: BaseAtomicDB) -> BaseManager:
 
     chain_config = trinity_config.get_chain_config()
-    chaindb = ChainDB(base_db)
+    chaindb = TrinityChainDB(base_db)
 
     if not is_database_initialized(chaindb):
         initialize_database(chain_config, chaindb, base_db)
@@ -35,7 +44,10 @@ def create_db_server_manager(trinity_config: TrinityConfig,
         pass
 
     DBManager.register(
-        'get_db', callable=lambda: TracebackRecorder(base_db), proxytype=AsyncDBProxy)
+        'get_db',
+        callable=lambda: TracebackRecorder(BatchedDB(base_db)),
+        proxytype=AsyncDBProxy,
+    )
 
     DBManager.register(
         'get_chaindb',
@@ -53,10 +65,15 @@ def create_db_server_manager(trinity_config: TrinityConfig,
     return manager
 
 
-def create_db_consumer_manager(ipc_path: pathlib.Path, connect: bool=True) -> BaseManager:
+def create_db_consumer_manager(ipc_path: pathlib.Path,
+                               connect: bool=True,
+                               wire_ipc_path: pathlib.Path=None) -> BaseManager:
     """
     We're still using 'str' here on param ipc_path because an issue with
     multi-processing not being able to interpret 'Path' objects correctly
+
+    If ``wire_ipc_path`` is given, ``get_db`` and ``get_headerdb`` return clients of the
+    binary database transport served on that path instead of manager proxies.
     """
     class DBManager(BaseManager):
         pass
@@ -65,7 +82,18 @@ def create_db_consumer_manager(ipc_path: pathlib.Path, connect: bool=True) -> Ba
     DBManager.register('get_chaindb', proxytype=AsyncChainDBProxy)
     DBManager.register('get_headerdb', proxytype=AsyncHeaderDBProxy)
 
-    manager = DBManager(address=str(ipc_path))  # type: ignore
+    if wire_ipc_path is None:
+        manager = DBManager(address=str(ipc_path))  # type: ignore
+    else:
+        class WireDBManager(DBManager):
+            def get_db(self) -> AsyncDBWireClient:
+                return AsyncDBWireClient(wire_ipc_path)
+
+            def get_headerdb(self) -> AsyncHeaderDBWireClient:
+                return AsyncHeaderDBWireClient(wire_ipc_path)
+
+        manager = WireDBManager(address=str(ipc_path))  # type: ignore
+
     if connect:
         manager.connect()
     return manager
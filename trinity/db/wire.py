@@ -0,0 +1,554 @@
+"""
+A compact binary transport for the database process that does not use pickle.
+
+Every request is a frame ``<opcode: u8><length: u32><payload>`` and every response is a
+frame ``<status: u8><length: u32><payload>``. Raw keys and values travel as-is, lists of
+them as length-prefixed items and typed objects as their RLP encoding. The server answers
+requests in order on each connection which lets the asyncio client pipeline requests
+without tagging them.
+"""
+import asyncio
+import collections
+import functools
+import logging
+import pathlib
+import socket
+import struct
+import threading
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from eth_typing import (
+    BlockNumber,
+    Hash32,
+)
+from eth_utils import (
+    ValidationError,
+    big_endian_to_int,
+    encode_hex,
+    int_to_big_endian,
+)
+import rlp
+from rlp.sedes import (
+    CountableList,
+    List,
+)
+
+from eth.db.atomic import AtomicDBWriteBatch
+from eth.db.backends.base import BaseAtomicDB
+from eth.db.header import BaseHeaderDB
+from eth.db.schema import SchemaV1
+from eth.exceptions import (
+    CanonicalHeadNotFound,
+    HeaderNotFound,
+    ParentNotFound,
+)
+from eth.rlp.headers import BlockHeader
+from eth.validation import validate_word
+
+from trinity.db.base import (
+    BaseAsyncDB,
+    BatchedDB,
+)
+from trinity.db.eth1.header import BaseAsyncHeaderDB
+from trinity.exceptions import RemoteDBError
+
+
+FRAME_HEADER = struct.Struct('>BI')
+ITEM_LENGTH = struct.Struct('>I')
+
+HEADER_LIST = CountableList(BlockHeader)
+# (new canonical headers, old canonical headers) as returned by ``persist_header_chain``
+CANONICAL_CHANGE = List([HEADER_LIST, HEADER_LIST])
+
+# Raw key/value operations
+GET = 1
+EXISTS = 2
+SET = 3
+DELETE = 4
+GET_MANY = 5
+EXISTS_MANY = 6
+SET_MANY = 7
+
+# Header operations, headers are sent RLP encoded
+GET_BLOCK_HEADER_BY_HASH = 16
+GET_CANONICAL_HEAD = 17
+GET_CANONICAL_BLOCK_HASH = 18
+GET_CANONICAL_BLOCK_HEADER_BY_NUMBER = 19
+GET_SCORE = 20
+HEADER_EXISTS = 21
+PERSIST_HEADER_CHAIN = 22
+
+STATUS_OK = 0
+STATUS_UNKNOWN_ERROR = 255
+
+# Exceptions that are re-raised as-is in the client. The first class an exception is an
+# instance of gives its status, so a subclass must come before the class it derives from, like
+# ParentNotFound before HeaderNotFound. The other classes are unrelated.
+ERROR_STATUSES: Tuple[Tuple[int, Type[Exception]], ...] = (
+    (1, KeyError),
+    (2, ParentNotFound),
+    (3, HeaderNotFound),
+    (4, CanonicalHeadNotFound),
+    (5, ValidationError),
+)
+_EXCEPTIONS_BY_STATUS = dict(ERROR_STATUSES)
+
+
+# Mirrors the cache of ``HeaderDB``, recent headers are requested over and over during sync
+@functools.lru_cache(128)
+def decode_block_header(header_rlp: bytes) -> BlockHeader:
+    return rlp.decode(header_rlp, sedes=BlockHeader)
+
+
+def encode_frame(code: int, payload: bytes=b'') -> bytes:
+    return FRAME_HEADER.pack(code, len(payload)) + payload
+
+
+def encode_items(items: Iterable[bytes]) -> bytes:
+    return b''.join(ITEM_LENGTH.pack(len(item)) + item for item in items)
+
+
+def decode_items(payload: bytes) -> Tuple[bytes, ...]:
+    items = []
+    offset = 0
+    while offset < len(payload):
+        length, = ITEM_LENGTH.unpack_from(payload, offset)
+        offset += ITEM_LENGTH.size
+        items.append(payload[offset:offset + length])
+        offset += length
+    return tuple(items)
+
+
+def encode_error(exc: Exception) -> bytes:
+    for status, exc_class in ERROR_STATUSES:
+        if isinstance(exc, exc_class):
+            return encode_frame(status, str(exc).encode('utf8'))
+    return encode_frame(STATUS_UNKNOWN_ERROR, repr(exc).encode('utf8'))
+
+
+def decode_response(status: int, payload: bytes) -> bytes:
+    """
+    Return the payload of a successful response or raise the exception it carries.
+    """
+    if status == STATUS_OK:
+        return payload
+    elif status in _EXCEPTIONS_BY_STATUS:
+        raise _EXCEPTIONS_BY_STATUS[status](payload.decode('utf8'))
+    else:
+        raise RemoteDBError(payload.decode('utf8'))
+
+
+class DBWireServer:
+    """
+    Serve a database (and optionally a ``HeaderDB`` on top of it) over the binary transport.
+    """
+    logger = logging.getLogger('trinity.db.wire.DBWireServer')
+
+    def __init__(self, db: BaseAtomicDB, headerdb: BaseHeaderDB=None) -> None:
+        self._db = db
+        self._batched_db = BatchedDB(db)
+        self._headerdb = headerdb
+        self._loop: asyncio.AbstractEventLoop = None
+
+        self._handlers: Dict[int, Callable[[bytes], bytes]] = {
+            GET: self._get,
+            EXISTS: self._exists,
+            SET: self._set,
+            DELETE: self._delete,
+            GET_MANY: self._get_many,
+            EXISTS_MANY: self._exists_many,
+            SET_MANY: self._set_many,
+        }
+        if headerdb is not None:
+            self._handlers.update({
+                GET_BLOCK_HEADER_BY_HASH: self._get_block_header_by_hash,
+                GET_CANONICAL_HEAD: self._get_canonical_head,
+                GET_CANONICAL_BLOCK_HASH: self._get_canonical_block_hash,
+                GET_CANONICAL_BLOCK_HEADER_BY_NUMBER: self._get_canonical_block_header_by_number,
+                GET_SCORE: self._get_score,
+                HEADER_EXISTS: self._header_exists,
+                PERSIST_HEADER_CHAIN: self._persist_header_chain,
+            })
+
+    def serve_forever(self, ipc_path: pathlib.Path, started: threading.Event=None) -> None:
+        """
+        Serve on ``ipc_path`` until ``stop`` is called, using a dedicated event loop.
+        """
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(
+            asyncio.start_unix_server(self._handle_connection, str(ipc_path), loop=self._loop)
+        )
+        if started is not None:
+            started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            server.close()
+            self._loop.run_until_complete(server.wait_closed())
+            self._loop.close()
+
+    def serve_in_thread(self, ipc_path: pathlib.Path, timeout: float=30) -> threading.Thread:
+        """
+        Serve from a daemon thread, returning once the server accepts connections.
+
+        Raise the error the server failed to start with, or a :exc:`TimeoutError` if it is
+        not accepting connections after ``timeout`` seconds.
+        """
+        started = threading.Event()
+        startup_error: Optional[BaseException] = None
+
+        def serve() -> None:
+            nonlocal startup_error
+            try:
+                self.serve_forever(ipc_path, started)
+            except BaseException as exc:
+                if started.is_set():
+                    raise
+                startup_error = exc
+                started.set()
+
+        thread = threading.Thread(target=serve, name='DBWireServer', daemon=True)
+        thread.start()
+        if not started.wait(timeout):
+            self.stop()
+            raise TimeoutError(
+                f"Database wire server did not start on {ipc_path} in {timeout} seconds"
+            )
+        elif startup_error is not None:
+            raise startup_error
+        return thread
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _handle_connection(self,
+                                 reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                opcode, length = FRAME_HEADER.unpack(
+                    await reader.readexactly(FRAME_HEADER.size)
+                )
+                payload = await reader.readexactly(length)
+                writer.write(self._dispatch(opcode, payload))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # The client went away
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, opcode: int, payload: bytes) -> bytes:
+        try:
+            handler = self._handlers[opcode]
+        except KeyError:
+            return encode_frame(STATUS_UNKNOWN_ERROR, f"Unknown opcode: {opcode}".encode('utf8'))
+
+        try:
+            return encode_frame(STATUS_OK, handler(payload))
+        except Exception as exc:
+            if not isinstance(exc, tuple(exc_class for _, exc_class in ERROR_STATUSES)):
+                self.logger.exception("Unexpected error handling database request %d", opcode)
+            return encode_error(exc)
+
+    #
+    # Raw key/value handlers
+    #
+    def _get(self, key: bytes) -> bytes:
+        return self._db[key]
+
+    def _exists(self, key: bytes) -> bytes:
+        return b'\x01' if self._db.exists(key) else b'\x00'
+
+    def _set(self, payload: bytes) -> bytes:
+        key, value = decode_items(payload)
+        self._db[key] = value
+        return b''
+
+    def _delete(self, key: bytes) -> bytes:
+        del self._db[key]
+        return b''
+
+    def _get_many(self, payload: bytes) -> bytes:
+        values = self._batched_db.get_many(decode_items(payload))
+        # an empty item marks a missing key, present values are prefixed with a marker byte
+        return encode_items(b'' if value is None else b'\x01' + value for value in values)
+
+    def _exists_many(self, payload: bytes) -> bytes:
+        return bytes(self._batched_db.exists_many(decode_items(payload)))
+
+    def _set_many(self, payload: bytes) -> bytes:
+        items = decode_items(payload)
+        self._batched_db.set_many(dict(zip(items[::2], items[1::2])))
+        return b''
+
+    #
+    # Header handlers
+    #
+    def _get_block_header_by_hash(self, block_hash: bytes) -> bytes:
+        # Headers are stored RLP encoded under their hash, ship them without re-encoding
+        validate_word(block_hash, title="Block Hash")
+        try:
+            return self._db[block_hash]
+        except KeyError:
+            raise HeaderNotFound(f"No header with hash {encode_hex(block_hash)} found")
+
+    def _get_canonical_head(self, payload: bytes) -> bytes:
+        try:
+            canonical_head_hash = self._db[SchemaV1.make_canonical_head_hash_lookup_key()]
+        except KeyError:
+            raise CanonicalHeadNotFound("No canonical head set for this chain")
+        return self._get_block_header_by_hash(canonical_head_hash)
+
+    def _get_canonical_block_hash(self, block_number: bytes) -> bytes:
+        return self._headerdb.get_canonical_block_hash(
+            BlockNumber(big_endian_to_int(block_number))
+        )
+
+    def _get_canonical_block_header_by_number(self, block_number: bytes) -> bytes:
+        return self._get_block_header_by_hash(self._get_canonical_block_hash(block_number))
+
+    def _get_score(self, block_hash: bytes) -> bytes:
+        return int_to_big_endian(self._headerdb.get_score(Hash32(block_hash)))
+
+    def _header_exists(self, block_hash: bytes) -> bytes:
+        return b'\x01' if self._headerdb.header_exists(Hash32(block_hash)) else b'\x00'
+
+    def _persist_header_chain(self, payload: bytes) -> bytes:
+        headers = rlp.decode(payload, sedes=HEADER_LIST)
+        new_canonical_headers, old_canonical_headers = self._headerdb.persist_header_chain(headers)
+        return rlp.encode(
+            (tuple(new_canonical_headers), tuple(old_canonical_headers)),
+            sedes=CANONICAL_CHANGE,
+        )
+
+
+def _recv_exactly(sock: socket.socket, num_bytes: int) -> bytes:
+    buffer = bytearray(num_bytes)
+    view = memoryview(buffer)
+    received = 0
+    while received < num_bytes:
+        chunk_size = sock.recv_into(view[received:], num_bytes - received)
+        if chunk_size == 0:
+            raise RemoteDBError("Connection to the database process was closed")
+        received += chunk_size
+    return bytes(buffer)
+
+
+class BaseDBWireClient:
+    """
+    Connection handling shared by the binary transport clients.
+
+    Coroutine calls go through an asyncio connection that is opened lazily in the running
+    event loop and can have many requests in flight. Blocking calls use a separate socket so
+    that they never interleave with the pipelined async requests.
+    """
+
+    def __init__(self, ipc_path: pathlib.Path) -> None:
+        self._ipc_path = ipc_path
+
+        self._sock: socket.socket = None
+        self._sock_lock = threading.Lock()
+
+        self._writer: asyncio.StreamWriter = None
+        self._connecting: 'asyncio.Future[None]' = None
+        self._pending: Deque['asyncio.Future[Tuple[int, bytes]]'] = collections.deque()
+
+    def __reduce__(self) -> Tuple[Type['BaseDBWireClient'], Tuple[pathlib.Path]]:
+        # Connections are not shared with other processes, the receiver opens its own
+        return type(self), (self._ipc_path,)
+
+    def _request(self, opcode: int, payload: bytes=b'') -> bytes:
+        with self._sock_lock:
+            if self._sock is None:
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.connect(str(self._ipc_path))
+            self._sock.sendall(encode_frame(opcode, payload))
+            status, length = FRAME_HEADER.unpack(_recv_exactly(self._sock, FRAME_HEADER.size))
+            response = _recv_exactly(self._sock, length)
+        return decode_response(status, response)
+
+    async def _coro_request(self, opcode: int, payload: bytes=b'') -> bytes:
+        if self._writer is None:
+            await self._connect()
+
+        future: 'asyncio.Future[Tuple[int, bytes]]' = asyncio.get_event_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(encode_frame(opcode, payload))
+        status, response = await future
+        return decode_response(status, response)
+
+    async def _connect(self) -> None:
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._open_connection())
+        # Shield so that a cancelled caller doesn't abort the connection for everybody else
+        await asyncio.shield(self._connecting)
+
+    async def _open_connection(self) -> None:
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(self._ipc_path))
+        except Exception:
+            self._connecting = None
+            raise
+        self._writer = writer
+        asyncio.ensure_future(self._read_responses(reader))
+
+    async def _read_responses(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                status, length = FRAME_HEADER.unpack(
+                    await reader.readexactly(FRAME_HEADER.size)
+                )
+                response = await reader.readexactly(length)
+                future = self._pending.popleft()
+                # The caller may have been cancelled while the request was in flight
+                if not future.done():
+                    future.set_result((status, response))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self._writer = None
+            self._connecting = None
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(
+                        RemoteDBError("Connection to the database process was closed")
+                    )
+
+
+class AsyncDBWireClient(BaseDBWireClient, BaseAsyncDB):
+    """
+    Implementation of ``BaseAsyncDB`` on top of the binary transport. Drop-in replacement
+    for the ``AsyncDBProxy`` returned by the ``DBManager``.
+    """
+
+    #
+    # Blocking API
+    #
+    def __getitem__(self, key: bytes) -> bytes:
+        return self._request(GET, key)
+
+    def __setitem__(self, key: bytes, value: bytes) -> None:
+        self._request(SET, encode_items((key, value)))
+
+    def __delitem__(self, key: bytes) -> None:
+        self._request(DELETE, key)
+
+    def _exists(self, key: bytes) -> bool:
+        return self._request(EXISTS, key) == b'\x01'
+
+    @contextmanager
+    def atomic_batch(self) -> Generator['AtomicDBWriteBatch', None, None]:
+        with AtomicDBWriteBatch._commit_unless_raises(self) as readable_batch:
+            yield readable_batch
+
+    #
+    # Async API
+    #
+    async def coro_get(self, key: bytes) -> bytes:
+        return await self._coro_request(GET, key)
+
+    async def coro_exists(self, key: bytes) -> bool:
+        return await self._coro_request(EXISTS, key) == b'\x01'
+
+    async def coro_set(self, key: bytes, value: bytes) -> None:
+        await self._coro_request(SET, encode_items((key, value)))
+
+    async def coro_get_many(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        items = decode_items(await self._coro_request(GET_MANY, encode_items(keys)))
+        return tuple(item[1:] if item else None for item in items)
+
+    async def coro_exists_many(self, keys: Sequence[bytes]) -> Tuple[bool, ...]:
+        response = await self._coro_request(EXISTS_MANY, encode_items(keys))
+        return tuple(bool(flag) for flag in response)
+
+    async def coro_set_many(self, items: Dict[bytes, bytes]) -> None:
+        await self._coro_request(SET_MANY, encode_items(
+            item for key_value in items.items() for item in key_value
+        ))
+
+
+class AsyncHeaderDBWireClient(BaseDBWireClient, BaseAsyncHeaderDB):
+    """
+    Implementation of ``BaseAsyncHeaderDB`` on top of the binary transport. Drop-in
+    replacement for the ``AsyncHeaderDBProxy`` returned by the ``DBManager``.
+    """
+
+    #
+    # Blocking API
+    #
+    def get_block_header_by_hash(self, block_hash: Hash32) -> BlockHeader:
+        return decode_block_header(self._request(GET_BLOCK_HEADER_BY_HASH, block_hash))
+
+    def get_canonical_head(self) -> BlockHeader:
+        return decode_block_header(self._request(GET_CANONICAL_HEAD))
+
+    def get_canonical_block_hash(self, block_number: BlockNumber) -> Hash32:
+        return Hash32(self._request(GET_CANONICAL_BLOCK_HASH, int_to_big_endian(block_number)))
+
+    def get_canonical_block_header_by_number(self, block_number: BlockNumber) -> BlockHeader:
+        return decode_block_header(
+            self._request(GET_CANONICAL_BLOCK_HEADER_BY_NUMBER, int_to_big_endian(block_number))
+        )
+
+    def get_score(self, block_hash: Hash32) -> int:
+        return big_endian_to_int(self._request(GET_SCORE, block_hash))
+
+    def header_exists(self, block_hash: Hash32) -> bool:
+        return self._request(HEADER_EXISTS, block_hash) == b'\x01'
+
+    #
+    # Async API
+    #
+    async def coro_get_block_header_by_hash(self, block_hash: Hash32) -> BlockHeader:
+        response = await self._coro_request(GET_BLOCK_HEADER_BY_HASH, block_hash)
+        return decode_block_header(response)
+
+    async def coro_get_canonical_head(self) -> BlockHeader:
+        return decode_block_header(await self._coro_request(GET_CANONICAL_HEAD))
+
+    async def coro_get_canonical_block_hash(self, block_number: BlockNumber) -> Hash32:
+        response = await self._coro_request(
+            GET_CANONICAL_BLOCK_HASH,
+            int_to_big_endian(block_number),
+        )
+        return Hash32(response)
+
+    async def coro_get_canonical_block_header_by_number(self, block_number: BlockNumber) -> BlockHeader:  # noqa: E501
+        response = await self._coro_request(
+            GET_CANONICAL_BLOCK_HEADER_BY_NUMBER,
+            int_to_big_endian(block_number),
+        )
+        return decode_block_header(response)
+
+    async def coro_get_score(self, block_hash: Hash32) -> int:
+        return big_endian_to_int(await self._coro_request(GET_SCORE, block_hash))
+
+    async def coro_header_exists(self, block_hash: Hash32) -> bool:
+        return await self._coro_request(HEADER_EXISTS, block_hash) == b'\x01'
+
+    async def coro_persist_header(self, header: BlockHeader) -> Tuple[BlockHeader, ...]:
+        return await self.coro_persist_header_chain((header,))
+
+    async def coro_persist_header_chain(self,
+                                        headers: Iterable[BlockHeader]) -> Tuple[BlockHeader, ...]:
+        response = await self._coro_request(
+            PERSIST_HEADER_CHAIN,
+            rlp.encode(tuple(headers), sedes=HEADER_LIST),
+        )
+        new_canonical_headers, old_canonical_headers = rlp.decode(
+            response,
+            sedes=CANONICAL_CHANGE,
+        )
+        return tuple(new_canonical_headers), tuple(old_canonical_headers)
@@ -51,3 +51,11 @@ class DAOForkCheckFailure(BaseTrinityError):
     Raised when the DAO fork check with a certain peer is unsuccessful.
     """
     pass
+
+
+class RemoteDBError(BaseTrinityError):
+    """
+    Raised when the database process reports an unexpected error over the binary
+    database transport.
+    """
+    pass
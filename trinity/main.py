@@ -2,6 +2,7 @@ from argparse import ArgumentParser, Namespace
 import asyncio
 import logging
 import signal
+import threading
 from typing import (
     Any,
     Dict,
@@ -13,8 +14,11 @@ from lahja import (
     ConnectionConfig,
 )
 
+from eth_typing import Hash32
+
 from eth.db.backends.base import BaseDB
 from eth.db.backends.level import LevelDB
+from eth.db.header import HeaderDB
 
 from p2p.service import BaseService
 from p2p._utils import ensure_global_asyncio_executor
@@ -30,12 +34,21 @@ from trinity.config import (
 )
 from trinity.constants import (
     APP_IDENTIFIER_ETH1,
+    DATABASE_EVENTBUS_ENDPOINT,
+    DB_TRANSPORT_BINARY,
     MAIN_EVENTBUS_ENDPOINT,
     NETWORKING_EVENTBUS_ENDPOINT,
 )
+from trinity.db.eth1.cache import (
+    CanonicalHeadNotifyingDB,
+)
+from trinity.db.eth1.events import (
+    CanonicalHeadChanged,
+)
 from trinity.db.eth1.manager import (
     create_db_server_manager,
 )
+from trinity.db.wire import DBWireServer
 from trinity.endpoint import (
     TrinityMainEventBusEndpoint,
     TrinityEventBusEndpoint,
@@ -202,12 +215,53 @@ def run_database_process(trinity_config: TrinityConfig, db_class: Type[BaseDB])
     with trinity_config.process_id_file('database'):
         app_config = trinity_config.get_app_config(Eth1AppConfig)
 
-        base_db = db_class(db_path=app_config.database_dir)
+        event_bus = start_database_event_bus(trinity_config)
+
+        def broadcast_canonical_head_change(head_hash: Hash32) -> None:
+            # Writes happen on the threads of the manager and the wire server
+            event_bus.event_loop.call_soon_threadsafe(
+                event_bus.broadcast,
+                CanonicalHeadChanged(head_hash),
+            )
+
+        base_db = CanonicalHeadNotifyingDB(
+            db_class(db_path=app_config.database_dir),
+            broadcast_canonical_head_change,
+        )
 
         manager = create_db_server_manager(trinity_config, base_db)
+        if trinity_config.db_transport == DB_TRANSPORT_BINARY:
+            wire_server = DBWireServer(base_db, HeaderDB(base_db))
+            wire_server.serve_in_thread(trinity_config.database_wire_ipc_path)
         serve_until_sigint(manager)
 
 
+def start_database_event_bus(trinity_config: TrinityConfig) -> TrinityEventBusEndpoint:
+    """
+    Connect the database process to the event bus so that it can tell other processes about
+    changes of the canonical head. The main thread of the database process is busy serving the
+    database, so the endpoint runs its own event loop in a background thread.
+    """
+    endpoint = TrinityEventBusEndpoint()
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name='DatabaseEventBus', daemon=True).start()
+
+    # The endpoint is not thread-safe, so everything touching it runs on its own loop
+    async def connect() -> None:
+        await endpoint.start_serving(
+            ConnectionConfig.from_name(DATABASE_EVENTBUS_ENDPOINT, trinity_config.ipc_dir),
+            loop,
+        )
+        endpoint.auto_connect_new_announced_endpoints()
+        await endpoint.connect_to_endpoints(
+            ConnectionConfig.from_name(MAIN_EVENTBUS_ENDPOINT, trinity_config.ipc_dir),
+        )
+        endpoint.announce_endpoint()
+
+    asyncio.run_coroutine_threadsafe(connect(), loop).result(timeout=30)
+    return endpoint
+
+
 async def handle_networking_exit(service: BaseService,
                                  plugin_manager: PluginManager,
                                  endpoint: TrinityEventBusEndpoint) -> None:
@@ -28,10 +28,12 @@ from trinity.config import (
 )
 from trinity.constants import (
     APP_IDENTIFIER_BEACON,
+    DB_TRANSPORT_BINARY,
 )
 from trinity.db.beacon.manager import (
     create_db_server_manager,
 )
+from trinity.db.wire import DBWireServer
 from trinity.endpoint import (
     TrinityMainEventBusEndpoint,
 )
@@ -139,4 +141,7 @@ def run_database_process(trinity_config: TrinityConfig, db_class: Type[BaseDB])
         base_db = db_class(db_path=app_config.database_dir)
 
         manager = create_db_server_manager(trinity_config, base_db)
+        if trinity_config.db_transport == DB_TRANSPORT_BINARY:
+            wire_server = DBWireServer(base_db)
+            wire_server.serve_in_thread(trinity_config.database_wire_ipc_path)
         serve_until_sigint(manager)
@@ -16,6 +16,9 @@ from p2p.service import (
 )
 
 from trinity.chains.full import FullChain
+from trinity.db.eth1.cache import (
+    CachedAsyncHeaderDB,
+)
 from trinity.db.eth1.header import (
     BaseAsyncHeaderDB,
 )
@@ -49,14 +52,19 @@ class Node(BaseService):
     def __init__(self, event_bus: TrinityEventBusEndpoint, trinity_config: TrinityConfig) -> None:
         super().__init__()
         self.trinity_config = trinity_config
-        self._db_manager = create_db_consumer_manager(trinity_config.database_ipc_path)
-        self._headerdb = self._db_manager.get_headerdb()  # type: ignore
+        self._db_manager = create_db_consumer_manager(
+            trinity_config.database_ipc_path,
+            wire_ipc_path=trinity_config.database_wire_client_ipc_path,
+        )
+        self.event_bus = event_bus
+        self._headerdb = CachedAsyncHeaderDB(
+            self._db_manager.get_headerdb(),  # type: ignore
+            event_bus,
+        )
 
         self._jsonrpc_ipc_path: Path = trinity_config.jsonrpc_ipc_path
         self._network_id = trinity_config.network_id
 
-        self.event_bus = event_bus
-
     async def handle_network_id_requests(self) -> None:
         async for req in self.wait_iter(self.event_bus.stream(NetworkIdRequest)):
             # We are listening for all `NetworkIdRequest` events but we ensure to only send a
@@ -5,6 +5,7 @@ from p2p.persistence import SQLitePeerInfo
 
 from trinity.chains.full import FullChain
 from trinity.config import TrinityConfig, Eth1AppConfig
+from trinity.db.eth1.cache import CachedAsyncChainDB
 from trinity.endpoint import TrinityEventBusEndpoint
 from trinity.server import FullServer
 
@@ -14,6 +15,7 @@ from .base import Node
 class FullNode(Node):
     _chain: FullChain = None
     _p2p_server: FullServer = None
+    _peer_info: SQLitePeerInfo = None
 
     def __init__(self, event_bus: TrinityEventBusEndpoint, trinity_config: TrinityConfig) -> None:
         super().__init__(event_bus, trinity_config)
@@ -36,12 +38,12 @@ class FullNode(Node):
     def get_p2p_server(self) -> FullServer:
         if self._p2p_server is None:
             manager = self.db_manager
-            peer_info = SQLitePeerInfo(self._nodedb_path)
+            peer_info = self._peer_info = SQLitePeerInfo(self._nodedb_path)
             self._p2p_server = FullServer(
                 privkey=self._node_key,
                 port=self._node_port,
                 chain=self.get_full_chain(),
-                chaindb=manager.get_chaindb(),  # type: ignore
+                chaindb=CachedAsyncChainDB(manager.get_chaindb(), self.event_bus),  # type: ignore
                 headerdb=self.headerdb,
                 base_db=manager.get_db(),  # type: ignore
                 network_id=self._network_id,
@@ -56,3 +58,9 @@ class FullNode(Node):
 
     def get_peer_pool(self) -> BasePeerPool:
         return self.get_p2p_server().peer_pool
+
+    async def _cleanup(self) -> None:
+        await super()._cleanup()
+        if self._peer_info is not None:
+            # Write out the failures recorded since it last flushed
+            self._peer_info.close()
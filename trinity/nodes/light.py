@@ -16,6 +16,7 @@ from trinity.chains.light import (
 from trinity.config import (
     TrinityConfig,
 )
+from trinity.db.eth1.cache import CachedAsyncChainDB
 from trinity.endpoint import TrinityEventBusEndpoint
 from trinity.nodes.base import Node
 from trinity.protocol.les.peer import LESPeerPool
@@ -72,7 +73,7 @@ class LightNode(Node):
                 privkey=self._nodekey,
                 port=self._port,
                 chain=self.get_full_chain(),
-                chaindb=manager.get_chaindb(),  # type: ignore
+                chaindb=CachedAsyncChainDB(manager.get_chaindb(), self.event_bus),  # type: ignore
                 headerdb=self.headerdb,
                 base_db=manager.get_db(),  # type: ignore
                 network_id=self._network_id,
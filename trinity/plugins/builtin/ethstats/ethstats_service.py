@@ -156,7 +156,11 @@ class EthstatsService(BaseService):
         }
 
     def get_chain(self) -> BaseChain:
-        db_manager = create_db_consumer_manager(self.context.trinity_config.database_ipc_path)
+        trinity_config = self.context.trinity_config
+        db_manager = create_db_consumer_manager(
+            trinity_config.database_ipc_path,
+            wire_ipc_path=trinity_config.database_wire_client_ipc_path,
+        )
 
         chain_config = self.context.trinity_config.get_chain_config()
 
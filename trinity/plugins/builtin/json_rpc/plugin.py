@@ -61,7 +61,10 @@ class JsonRpcServerPlugin(BaseIsolatedPlugin):
         )
 
     def setup_eth1_modules(self, trinity_config: TrinityConfig) -> Tuple[Eth1ChainRPCModule, ...]:
-        db_manager = create_db_consumer_manager(trinity_config.database_ipc_path)
+        db_manager = create_db_consumer_manager(
+            trinity_config.database_ipc_path,
+            wire_ipc_path=trinity_config.database_wire_client_ipc_path,
+        )
 
         eth1_app_config = trinity_config.get_app_config(Eth1AppConfig)
         chain_config = trinity_config.get_chain_config()
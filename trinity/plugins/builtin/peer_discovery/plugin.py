@@ -3,6 +3,10 @@ from argparse import (
     _SubParsersAction,
 )
 import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+)
 from typing import (
     Type,
 )
@@ -27,6 +31,9 @@ from p2p.discovery import (
 from p2p.kademlia import (
     Address,
 )
+from p2p.persistence import (
+    SQLiteNodeStore,
+)
 from p2p.protocol import (
     Protocol,
 )
@@ -80,7 +87,10 @@ def get_protocol(trinity_config: TrinityConfig) -> Type[Protocol]:
 
 
 def get_discv5_topic(trinity_config: TrinityConfig, protocol: Type[Protocol]) -> bytes:
-    db_manager = create_db_consumer_manager(trinity_config.database_ipc_path)
+    db_manager = create_db_consumer_manager(
+        trinity_config.database_ipc_path,
+        wire_ipc_path=trinity_config.database_wire_client_ipc_path,
+    )
 
     header_db = db_manager.get_headerdb()  # type: ignore
     genesis_hash = header_db.get_canonical_block_hash(BlockNumber(GENESIS_BLOCK_NUMBER))
@@ -96,15 +106,22 @@ class DiscoveryBootstrapService(BaseService):
     def __init__(self,
                  disable_discovery: bool,
                  event_bus: TrinityEventBusEndpoint,
-                 trinity_config: TrinityConfig) -> None:
+                 trinity_config: TrinityConfig,
+                 discovery_workers: int = 0) -> None:
         super().__init__()
         self.is_discovery_disabled = disable_discovery
         self.event_bus = event_bus
         self.trinity_config = trinity_config
+        self.discovery_workers = discovery_workers
 
     async def _run(self) -> None:
         external_ip = "0.0.0.0"
         address = Address(external_ip, self.trinity_config.port, self.trinity_config.port)
+        node_store = SQLiteNodeStore(self.trinity_config.discovery_nodes_path)
+        if self.discovery_workers > 0:
+            executor: Executor = ProcessPoolExecutor(self.discovery_workers)
+        else:
+            executor = None
 
         if self.trinity_config.use_discv5:
             protocol = get_protocol(self.trinity_config)
@@ -116,6 +133,9 @@ class DiscoveryBootstrapService(BaseService):
                 address,
                 self.trinity_config.bootstrap_nodes,
                 self.cancel_token,
+                node_store,
+                executor,
+                self.discovery_workers,
             )
         else:
             discovery_protocol = PreferredNodeDiscoveryProtocol(
@@ -124,6 +144,9 @@ class DiscoveryBootstrapService(BaseService):
                 self.trinity_config.bootstrap_nodes,
                 self.trinity_config.preferred_nodes,
                 self.cancel_token,
+                node_store,
+                executor,
+                self.discovery_workers,
             )
 
         if self.is_discovery_disabled:
@@ -140,7 +163,12 @@ class DiscoveryBootstrapService(BaseService):
                 self.cancel_token,
             )
 
-        await discovery_service.run()
+        try:
+            await discovery_service.run()
+        finally:
+            node_store.close()
+            if executor is not None:
+                executor.shutdown(wait=False)
 
 
 class PeerDiscoveryPlugin(BaseIsolatedPlugin):
@@ -165,13 +193,23 @@ class PeerDiscoveryPlugin(BaseIsolatedPlugin):
             action="store_true",
             help="Disable peer discovery",
         )
+        arg_parser.add_argument(
+            "--discovery-workers",
+            type=int,
+            default=0,
+            help=(
+                "Number of processes used to recover the senders of the discovery packets we "
+                "receive. By default they are recovered in the discovery process itself."
+            ),
+        )
 
     def do_start(self) -> None:
         loop = asyncio.get_event_loop()
         discovery_bootstrap = DiscoveryBootstrapService(
             self.context.args.disable_discovery,
             self.event_bus,
-            self.context.trinity_config
+            self.context.trinity_config,
+            self.context.args.discovery_workers,
         )
         asyncio.ensure_future(exit_with_service_and_endpoint(discovery_bootstrap, self.event_bus))
         asyncio.ensure_future(discovery_bootstrap.run())
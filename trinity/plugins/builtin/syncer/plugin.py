@@ -4,6 +4,7 @@ from abc import (
 )
 from argparse import (
     ArgumentParser,
+    Namespace,
     _SubParsersAction,
 )
 import asyncio
@@ -13,6 +14,7 @@ from logging import (
 from multiprocessing.managers import (
     BaseManager,
 )
+from pathlib import Path
 from typing import (
     cast,
     Iterable,
@@ -28,10 +30,15 @@ from eth_utils import (
     ValidationError,
 )
 
+from trinity.config import (
+    Eth1AppConfig,
+    TrinityConfig,
+)
 from trinity.constants import (
     SYNC_FAST,
     SYNC_FULL,
     SYNC_LIGHT,
+    SYNC_SNAP,
 )
 from trinity.endpoint import (
     TrinityEventBusEndpoint,
@@ -73,6 +80,13 @@ class BaseSyncStrategy(ABC):
     def get_sync_mode(cls) -> str:
         pass
 
+    def configure(self, args: Namespace, trinity_config: TrinityConfig) -> None:
+        """
+        Called with the parsed command line arguments and the config once this strategy has
+        been selected.
+        """
+        pass
+
     @abstractmethod
     async def sync(self,
                    logger: Logger,
@@ -104,11 +118,19 @@ class NoopSyncStrategy(BaseSyncStrategy):
 
 
 class FullSyncStrategy(BaseSyncStrategy):
+    state_decode_workers = 0
+    state_sync_dir: Path = None
+    sender_recovery_workers = 0
 
     @classmethod
     def get_sync_mode(cls) -> str:
         return SYNC_FULL
 
+    def configure(self, args: Namespace, trinity_config: TrinityConfig) -> None:
+        self.state_decode_workers = args.state_decode_workers
+        self.state_sync_dir = trinity_config.get_app_config(Eth1AppConfig).state_sync_dir
+        self.sender_recovery_workers = args.sender_recovery_workers
+
     async def sync(self,
                    logger: Logger,
                    chain: BaseChain,
@@ -122,17 +144,59 @@ class FullSyncStrategy(BaseSyncStrategy):
             db_manager.get_db(),  # type: ignore
             cast(ETHPeerPool, peer_pool),
             cancel_token,
+            state_decode_workers=self.state_decode_workers,
+            state_sync_dir=self.state_sync_dir,
+            sender_recovery_workers=self.sender_recovery_workers,
         )
 
         await syncer.run()
 
 
 class FastThenFullSyncStrategy(BaseSyncStrategy):
+    state_decode_workers = 0
+    state_sync_dir: Path = None
+    sender_recovery_workers = 0
 
     @classmethod
     def get_sync_mode(cls) -> str:
         return SYNC_FAST
 
+    def configure(self, args: Namespace, trinity_config: TrinityConfig) -> None:
+        self.state_decode_workers = args.state_decode_workers
+        self.state_sync_dir = trinity_config.get_app_config(Eth1AppConfig).state_sync_dir
+        self.sender_recovery_workers = args.sender_recovery_workers
+
+    async def sync(self,
+                   logger: Logger,
+                   chain: BaseChain,
+                   db_manager: BaseManager,
+                   peer_pool: BaseChainPeerPool,
+                   cancel_token: CancelToken) -> None:
+
+        syncer = FastThenFullChainSyncer(
+            chain,
+            db_manager.get_chaindb(),  # type: ignore
+            db_manager.get_db(),  # type: ignore
+            cast(ETHPeerPool, peer_pool),
+            cancel_token,
+            state_decode_workers=self.state_decode_workers,
+            state_sync_dir=self.state_sync_dir,
+            sender_recovery_workers=self.sender_recovery_workers,
+        )
+
+        await syncer.run()
+
+
+class SnapThenFullSyncStrategy(FastThenFullSyncStrategy):
+    """
+    Like :class:`FastThenFullSyncStrategy`, but downloading the state in ranges of leaves,
+    which only other Trinity nodes can serve.
+    """
+
+    @classmethod
+    def get_sync_mode(cls) -> str:
+        return SYNC_SNAP
+
     async def sync(self,
                    logger: Logger,
                    chain: BaseChain,
@@ -146,6 +210,10 @@ class FastThenFullSyncStrategy(BaseSyncStrategy):
             db_manager.get_db(),  # type: ignore
             cast(ETHPeerPool, peer_pool),
             cancel_token,
+            state_decode_workers=self.state_decode_workers,
+            state_sync_dir=self.state_sync_dir,
+            snap_state_sync=True,
+            sender_recovery_workers=self.sender_recovery_workers,
         )
 
         await syncer.run()
@@ -207,6 +275,25 @@ class SyncerPlugin(BaseAsyncStopPlugin):
             choices=self.extract_modes(),
             default=self.default_strategy.get_sync_mode(),
         )
+        syncing_parser.add_argument(
+            '--state-decode-workers',
+            type=int,
+            default=0,
+            help=(
+                "Number of workers of the shared process pool used to decode trie nodes during "
+                "state sync. By default they are decoded in the networking process."
+            ),
+        )
+        syncing_parser.add_argument(
+            '--sender-recovery-workers',
+            type=int,
+            default=0,
+            help=(
+                "Number of workers of the shared process pool used to recover the senders of "
+                "transactions in upcoming blocks while a block is imported during full sync. "
+                "By default they are recovered as each block is imported."
+            ),
+        )
 
     @to_tuple
     def extract_modes(self) -> Iterable[str]:
@@ -231,6 +318,8 @@ class SyncerPlugin(BaseAsyncStopPlugin):
             self.logger.warn("No sync strategy matches --sync-mode=%s", self.context.args.sync_mode)
             return
 
+        self.active_strategy.configure(self.context.args, self.context.trinity_config)
+
         self.event_bus.subscribe(ResourceAvailableEvent, self.handle_event)
 
     def handle_event(self, event: ResourceAvailableEvent) -> None:
@@ -43,7 +43,10 @@ class BeaconNodePlugin(BaseIsolatedPlugin):
         trinity_config = self.context.trinity_config
         beacon_config = trinity_config.get_app_config(BeaconAppConfig)
 
-        db_manager = create_db_consumer_manager(trinity_config.database_ipc_path)
+        db_manager = create_db_consumer_manager(
+            trinity_config.database_ipc_path,
+            wire_ipc_path=trinity_config.database_wire_client_ipc_path,
+        )
         base_db = db_manager.get_db()  # type: ignore
         chain_db = db_manager.get_chaindb()  # type: ignore
         chain_config = beacon_config.get_chain_config()
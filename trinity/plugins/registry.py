@@ -27,6 +27,7 @@ from trinity.plugins.builtin.syncer.plugin import (
     FullSyncStrategy,
     LightSyncStrategy,
     NoopSyncStrategy,
+    SnapThenFullSyncStrategy,
     SyncerPlugin,
 )
 from trinity.plugins.eth2.beacon.plugin import BeaconNodePlugin
@@ -65,6 +66,7 @@ ETH1_NODE_PLUGINS: Tuple[BasePlugin, ...] = (
         FullSyncStrategy(),
         LightSyncStrategy(),
         NoopSyncStrategy(),
+        SnapThenFullSyncStrategy(),
     ), FastThenFullSyncStrategy),
     TxPlugin(),
 )
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from concurrent.futures import Executor
 import operator
 import random
 from typing import (
@@ -29,6 +30,7 @@ from p2p.peer import (
 from p2p.peer_pool import (
     BasePeerPool,
 )
+from p2p._utils import ensure_global_asyncio_executor
 
 from trinity.db.eth1.header import BaseAsyncHeaderDB
 from trinity.protocol.common.handlers import BaseChainExchangeHandler
@@ -66,6 +68,11 @@ class BaseChainPeer(BasePeer):
     def headerdb(self) -> BaseAsyncHeaderDB:
         return self.context.headerdb
 
+    def get_msg_decoding_executor(self) -> Executor:
+        # We just retrieve the global executor that was created when the Node launches. The node
+        # manages the lifecycle of the executor.
+        return ensure_global_asyncio_executor()
+
     @property
     def network_id(self) -> int:
         return self.context.network_id
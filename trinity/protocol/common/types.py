@@ -11,7 +11,8 @@ from eth_typing import (
 from p2p.peer import BasePeer
 from p2p.protocol import PayloadType
 
-from trinity.rlp.block_body import BlockBody
+from trinity.rlp.block_body import LazyBlockBody
+from trinity.rlp.lazy import LazyRLPSequence
 
 TPeer = TypeVar('TPeer', bound=BasePeer)
 
@@ -28,18 +29,21 @@ TResult = TypeVar('TResult')
 NodeDataBundles = Tuple[Tuple[Hash32, bytes], ...]
 
 # (receipts_in_block_a, receipts_in_block_b, ...)
-ReceiptsByBlock = Tuple[Tuple[Receipt, ...], ...]
+ReceiptsByBlock = Tuple[LazyRLPSequence[Receipt], ...]
 
 # (
 #   (receipts_in_block_a, (receipts_root_hash, receipts_trie_nodes),
 #   (receipts_in_block_b, (receipts_root_hash, receipts_trie_nodes),
 #   ...
 # (
-ReceiptsBundles = Tuple[Tuple[Tuple[Receipt, ...], Tuple[Hash32, Dict[Hash32, bytes]]], ...]
+ReceiptsBundles = Tuple[
+    Tuple[LazyRLPSequence[Receipt], Tuple[Hash32, Dict[Hash32, bytes]]],
+    ...
+]
 
 # (BlockBody, (txn_root, txn_trie_data), uncles_hash)
 BlockBodyBundles = Tuple[Tuple[
-    BlockBody,
+    LazyBlockBody,
     Tuple[Hash32, Dict[Hash32, bytes]],
     Hash32,
 ], ...]
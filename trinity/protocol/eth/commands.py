@@ -3,19 +3,28 @@ from typing import (
     Tuple,
 )
 
+import rlp
 from rlp import sedes
 
 from eth.rlp.headers import BlockHeader
 from eth.rlp.receipts import Receipt
 from eth.rlp.transactions import BaseTransactionFields
 
+from p2p.exceptions import MalformedMessage
 from p2p.protocol import (
     Command,
     _DecodedMsgType,
 )
 
 from trinity.protocol.common.commands import BaseBlockHeaders
-from trinity.rlp.block_body import BlockBody
+from trinity.rlp.block_body import (
+    BlockBody,
+    LazyBlockBody,
+)
+from trinity.rlp.lazy import (
+    LazyRLPSequence,
+    split_rlp_list,
+)
 from trinity.rlp.sedes import HashOrNumber
 
 
@@ -52,6 +61,7 @@ class GetBlockHeaders(Command):
 
 class BlockHeaders(BaseBlockHeaders):
     _cmd_id = 4
+    is_decoding_slow = True
     structure = sedes.CountableList(BlockHeader)
 
     def extract_headers(self, msg: _DecodedMsgType) -> Tuple[BlockHeader, ...]:
@@ -67,6 +77,15 @@ class BlockBodies(Command):
     _cmd_id = 6
     structure = sedes.CountableList(BlockBody)
 
+    def decode_payload(self, rlp_data: bytes) -> _DecodedMsgType:
+        # The transactions and uncles are only deserialized when accessed, and we often don't
+        # need them to be, see LazyBlockBody.
+        try:
+            bodies = tuple(map(LazyBlockBody, split_rlp_list(rlp_data)))
+        except rlp.DecodingError as err:
+            raise MalformedMessage(f"Malformed {type(self).__name__} message: {err!r}") from err
+        return cast(_DecodedMsgType, bodies)
+
 
 class NewBlock(Command):
     _cmd_id = 7
@@ -84,6 +103,7 @@ class GetNodeData(Command):
 
 class NodeData(Command):
     _cmd_id = 14
+    is_decoding_slow = True
     structure = sedes.CountableList(sedes.binary)
 
 
@@ -95,3 +115,34 @@ class GetReceipts(Command):
 class Receipts(Command):
     _cmd_id = 16
     structure = sedes.CountableList(sedes.CountableList(Receipt))
+
+    def decode_payload(self, rlp_data: bytes) -> _DecodedMsgType:
+        # Receipts are only deserialized when accessed, and their tries can be built from their
+        # encoded form.
+        try:
+            receipts: Tuple[LazyRLPSequence[Receipt], ...] = tuple(
+                LazyRLPSequence.from_encoded_list(block_receipts, Receipt)
+                for block_receipts in split_rlp_list(rlp_data)
+            )
+        except rlp.DecodingError as err:
+            raise MalformedMessage(f"Malformed {type(self).__name__} message: {err!r}") from err
+        return cast(_DecodedMsgType, receipts)
+
+
+class GetTrieRange(Command):
+    _cmd_id = 17
+    structure = [
+        ('root_hash', sedes.binary),
+        ('prefix', sedes.binary),
+        ('max_leaves', sedes.big_endian_int),
+    ]
+
+
+class TrieRange(Command):
+    _cmd_id = 18
+    structure = [
+        ('root_hash', sedes.binary),
+        ('prefix', sedes.binary),
+        ('leaves', sedes.CountableList(sedes.List([sedes.binary, sedes.binary]))),
+        ('proof', sedes.CountableList(sedes.binary)),
+    ]
@@ -4,3 +4,7 @@ MAX_STATE_FETCH = 384
 MAX_BODIES_FETCH = 128
 MAX_RECEIPTS_FETCH = 256
 MAX_HEADERS_FETCH = 192
+
+# Max number of leaves in a TrieRange reply. This is our own extension of the protocol, so unlike
+# the above it's not a geth value.
+MAX_TRIE_RANGE_LEAVES = 1024
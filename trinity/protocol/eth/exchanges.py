@@ -25,29 +25,37 @@ from trinity.protocol.common.types import (
     ReceiptsByBlock,
     ReceiptsBundles,
 )
-from trinity.rlp.block_body import BlockBody
+from trinity.rlp.block_body import LazyBlockBody
 
 from .normalizers import (
     GetBlockBodiesNormalizer,
     GetNodeDataNormalizer,
     ReceiptsNormalizer,
+    TrieRangeNormalizer,
 )
 from .requests import (
     GetBlockBodiesRequest,
     GetBlockHeadersRequest,
     GetNodeDataRequest,
     GetReceiptsRequest,
+    GetTrieRangeRequest,
 )
 from .trackers import (
     GetBlockHeadersTracker,
     GetBlockBodiesTracker,
     GetNodeDataTracker,
-    GetReceiptsTracker
+    GetReceiptsTracker,
+    GetTrieRangeTracker,
+)
+from .trie_ranges import (
+    Nibbles,
+    TrieRangeBundle,
 )
 from .validators import (
     GetBlockBodiesValidator,
     GetBlockHeadersValidator,
     GetNodeDataValidator,
+    GetTrieRangeValidator,
     ReceiptsValidator,
 )
 
@@ -130,7 +138,7 @@ class GetReceiptsExchange(BaseExchange[Tuple[Hash32, ...], ReceiptsByBlock, Rece
 
 BaseGetBlockBodiesExchange = BaseExchange[
     Tuple[Hash32, ...],
-    Tuple[BlockBody, ...],
+    Tuple[LazyBlockBody, ...],
     BlockBodyBundles,
 ]
 
@@ -155,3 +163,24 @@ class GetBlockBodiesExchange(BaseGetBlockBodiesExchange):
             noop_payload_validator,
             timeout,
         )
+
+
+class GetTrieRangeExchange(BaseExchange[Dict[str, Any], Dict[str, Any], TrieRangeBundle]):
+    _normalizer = TrieRangeNormalizer()
+    request_class = GetTrieRangeRequest
+    tracker_class = GetTrieRangeTracker
+
+    async def __call__(self,  # type: ignore
+                       root_hash: Hash32,
+                       prefix: Nibbles,
+                       max_leaves: int,
+                       timeout: float = None) -> TrieRangeBundle:
+        validator = GetTrieRangeValidator(root_hash, prefix)
+        request = self.request_class(root_hash, prefix, max_leaves)
+        return await self.get_result(
+            request,
+            self._normalizer,
+            validator,
+            noop_payload_validator,
+            timeout,
+        )
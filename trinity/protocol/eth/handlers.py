@@ -7,6 +7,7 @@ from .exchanges import (
     GetBlockHeadersExchange,
     GetNodeDataExchange,
     GetReceiptsExchange,
+    GetTrieRangeExchange,
 )
 
 
@@ -16,9 +17,11 @@ class ETHExchangeHandler(BaseChainExchangeHandler):
         'get_block_headers': GetBlockHeadersExchange,
         'get_node_data': GetNodeDataExchange,
         'get_receipts': GetReceiptsExchange,
+        'get_trie_range': GetTrieRangeExchange,
     }
 
     # These are needed only to please mypy.
     get_block_bodies: GetBlockBodiesExchange
     get_node_data: GetNodeDataExchange
     get_receipts: GetReceiptsExchange
+    get_trie_range: GetTrieRangeExchange
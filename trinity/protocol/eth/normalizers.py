@@ -1,13 +1,15 @@
 from typing import (
+    Any,
+    Dict,
     Tuple,
 )
 
-from eth_utils.toolz import (
-    compose,
-)
-from eth.db.trie import make_trie_root_and_nodes
 from eth_hash.auto import keccak
+from eth_typing import Hash32
 import rlp
+from trie import HexaryTrie
+
+from eth.constants import BLANK_ROOT_HASH
 
 from trinity.protocol.common.normalizers import (
     BaseNormalizer,
@@ -18,7 +20,13 @@ from trinity.protocol.common.types import (
     ReceiptsBundles,
     ReceiptsByBlock,
 )
-from trinity.rlp.block_body import BlockBody
+from trinity.rlp.block_body import LazyBlockBody
+
+from .trie_ranges import (
+    TrieRangeBundle,
+    decode_prefix,
+    verify_trie_range,
+)
 
 
 class GetNodeDataNormalizer(BaseNormalizer[Tuple[bytes, ...], NodeDataBundles]):
@@ -31,28 +39,51 @@ class GetNodeDataNormalizer(BaseNormalizer[Tuple[bytes, ...], NodeDataBundles]):
         return result
 
 
+def _make_trie_root_and_nodes(
+        encoded_items: Tuple[bytes, ...]) -> Tuple[Hash32, Dict[Hash32, bytes]]:
+    # Like eth.db.trie.make_trie_root_and_nodes(), but for items that are already encoded
+    kv_store: Dict[Hash32, bytes] = {}
+    trie = HexaryTrie(kv_store, BLANK_ROOT_HASH)
+    with trie.squash_changes() as memory_trie:
+        for index, item in enumerate(encoded_items):
+            index_key = rlp.encode(index, sedes=rlp.sedes.big_endian_int)
+            memory_trie[index_key] = item
+    return trie.root_hash, kv_store
+
+
 class ReceiptsNormalizer(BaseNormalizer[ReceiptsByBlock, ReceiptsBundles]):
     is_normalization_slow = True
 
     @staticmethod
     def normalize_result(message: ReceiptsByBlock) -> ReceiptsBundles:
-        trie_roots_and_data = tuple(map(make_trie_root_and_nodes, message))
+        trie_roots_and_data = tuple(
+            _make_trie_root_and_nodes(receipts.encoded_items) for receipts in message
+        )
         return tuple(zip(message, trie_roots_and_data))
 
 
-class GetBlockBodiesNormalizer(BaseNormalizer[Tuple[BlockBody, ...], BlockBodyBundles]):
+class GetBlockBodiesNormalizer(BaseNormalizer[Tuple[LazyBlockBody, ...], BlockBodyBundles]):
     is_normalization_slow = True
 
     @staticmethod
-    def normalize_result(msg: Tuple[BlockBody, ...]) -> BlockBodyBundles:
-        uncles_hashes = tuple(map(
-            compose(keccak, rlp.encode),
-            tuple(body.uncles for body in msg)
-        ))
-        transaction_roots_and_trie_data = tuple(map(
-            make_trie_root_and_nodes,
-            tuple(body.transactions for body in msg)
-        ))
+    def normalize_result(msg: Tuple[LazyBlockBody, ...]) -> BlockBodyBundles:
+        uncles_hashes = tuple(body.uncles_hash for body in msg)
+        transaction_roots_and_trie_data = tuple(
+            _make_trie_root_and_nodes(body.transactions.encoded_items) for body in msg
+        )
 
         body_bundles = tuple(zip(msg, transaction_roots_and_trie_data, uncles_hashes))
         return body_bundles
+
+
+class TrieRangeNormalizer(BaseNormalizer[Dict[str, Any], TrieRangeBundle]):
+    is_normalization_slow = True
+
+    @staticmethod
+    def normalize_result(msg: Dict[str, Any]) -> TrieRangeBundle:
+        return verify_trie_range(
+            msg['root_hash'],
+            decode_prefix(msg['prefix']),
+            tuple((key, value) for key, value in msg['leaves']),
+            msg['proof'],
+        )
@@ -29,21 +29,26 @@ from .commands import (
     Status,
 )
 from .constants import MAX_HEADERS_FETCH
-from .proto import ETHProtocol
+from .proto import (
+    ETHProtocol,
+    ETHRangeProtocol,
+)
 from .handlers import ETHExchangeHandler
 
 
 class ETHPeer(BaseChainPeer):
     max_headers_fetch = MAX_HEADERS_FETCH
 
-    _supported_sub_protocols = [ETHProtocol]
+    _supported_sub_protocols = [ETHProtocol, ETHRangeProtocol]
     sub_proto: ETHProtocol = None
 
     _requests: ETHExchangeHandler = None
 
     def get_extra_stats(self) -> List[str]:
         stats_pairs = self.requests.get_stats().items()
-        return ['%s: %s' % (cmd_name, stats) for cmd_name, stats in stats_pairs]
+        return super().get_extra_stats() + [
+            '%s: %s' % (cmd_name, stats) for cmd_name, stats in stats_pairs
+        ]
 
     @property
     def requests(self) -> ETHExchangeHandler:
@@ -19,6 +19,10 @@ from p2p.protocol import (
 )
 
 from trinity.protocol.common.peer import ChainInfo
+from trinity.protocol.eth.trie_ranges import (
+    Nibbles,
+    encode_prefix,
+)
 from trinity.rlp.block_body import BlockBody
 
 from .commands import (
@@ -28,12 +32,14 @@ from .commands import (
     GetBlockHeaders,
     GetNodeData,
     GetReceipts,
+    GetTrieRange,
     NewBlock,
     NewBlockHashes,
     NodeData,
     Receipts,
     Status,
     Transactions,
+    TrieRange,
 )
 
 from trinity._utils.logging import HasExtendedDebugLogger
@@ -142,3 +148,43 @@ class ETHProtocol(HasExtendedDebugLogger, Protocol):
         cmd = Transactions(self.cmd_id_offset, self.snappy_support)
         header, body = cmd.encode(transactions)
         self.send(header, body)
+
+
+class ETHRangeProtocol(ETHProtocol):
+    """
+    The eth/63 protocol plus requests for ranges of trie leaves, which Trinity nodes use
+    between themselves for the snap sync mode. As it extends eth/63, peers speaking it can be
+    used for everything else as well.
+    """
+    name = 'ethrange'
+    version = 1
+    _commands = ETHProtocol._commands + [GetTrieRange, TrieRange]
+    cmd_length = 19
+
+    #
+    # Trie Ranges
+    #
+    def send_get_trie_range(self, root_hash: Hash32, prefix: Nibbles, max_leaves: int) -> None:
+        cmd = GetTrieRange(self.cmd_id_offset, self.snappy_support)
+        data = {
+            'root_hash': root_hash,
+            'prefix': encode_prefix(prefix),
+            'max_leaves': max_leaves,
+        }
+        header, body = cmd.encode(data)
+        self.send(header, body)
+
+    def send_trie_range(self,
+                        root_hash: Hash32,
+                        prefix: Nibbles,
+                        leaves: List[Tuple[bytes, bytes]],
+                        proof: List[bytes]) -> None:
+        cmd = TrieRange(self.cmd_id_offset, self.snappy_support)
+        data = {
+            'root_hash': root_hash,
+            'prefix': encode_prefix(prefix),
+            'leaves': leaves,
+            'proof': proof,
+        }
+        header, body = cmd.encode(data)
+        self.send(header, body)
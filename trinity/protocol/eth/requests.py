@@ -11,6 +11,10 @@ from eth_typing import (
 from p2p.protocol import BaseRequest
 
 from trinity.protocol.eth.constants import MAX_HEADERS_FETCH
+from trinity.protocol.eth.trie_ranges import (
+    Nibbles,
+    encode_prefix,
+)
 from trinity.protocol.common.requests import (
     BaseHeaderRequest,
 )
@@ -22,8 +26,10 @@ from .commands import (
     GetBlockHeaders,
     GetNodeData,
     GetReceipts,
+    GetTrieRange,
     NodeData,
     Receipts,
+    TrieRange,
 )
 
 
@@ -85,3 +91,15 @@ class GetBlockBodiesRequest(BaseRequest[Tuple[Hash32, ...]]):
 
     def __init__(self, block_hashes: Tuple[Hash32, ...]) -> None:
         self.command_payload = block_hashes
+
+
+class GetTrieRangeRequest(BaseRequest[Dict[str, Any]]):
+    cmd_type = GetTrieRange
+    response_type = TrieRange
+
+    def __init__(self, root_hash: Hash32, prefix: Nibbles, max_leaves: int) -> None:
+        self.command_payload = {
+            'root_hash': root_hash,
+            'prefix': encode_prefix(prefix),
+            'max_leaves': max_leaves,
+        }
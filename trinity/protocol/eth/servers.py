@@ -19,6 +19,7 @@ from eth_typing import (
 )
 
 from eth_utils import (
+    ValidationError,
     to_hex,
 )
 
@@ -40,8 +41,14 @@ from trinity.protocol.eth.constants import (
     MAX_BODIES_FETCH,
     MAX_RECEIPTS_FETCH,
     MAX_STATE_FETCH,
+    MAX_TRIE_RANGE_LEAVES,
 )
+from trinity.protocol.eth.proto import ETHRangeProtocol
 from trinity.protocol.eth.requests import HeaderRequest as ETHHeaderRequest
+from trinity.protocol.eth.trie_ranges import (
+    collect_trie_range,
+    decode_prefix,
+)
 from trinity.rlp.block_body import BlockBody
 
 
@@ -127,6 +134,37 @@ class ETHPeerRequestHandler(BasePeerRequestHandler):
         self.logger.debug2("Replying to %s with %d trie nodes", peer, len(nodes))
         peer.sub_proto.send_node_data(tuple(nodes))
 
+    async def handle_get_trie_range(self, peer: ETHPeer, msg: Dict[str, Any]) -> None:
+        if not peer.is_operational:
+            return
+        root_hash = msg['root_hash']
+        try:
+            prefix = decode_prefix(msg['prefix'])
+        except ValidationError as err:
+            self.logger.debug("%s sent an invalid trie range request: %s", peer, err)
+            return
+        self.logger.debug2(
+            "%s requested trie range %s of %s", peer, prefix, to_hex(root_hash))
+        try:
+            leaves, proof = await self.wait(collect_trie_range(
+                self.db.coro_get,
+                root_hash,
+                prefix,
+                # Only serve up to MAX_TRIE_RANGE_LEAVES leaves in every reply.
+                min(msg['max_leaves'], MAX_TRIE_RANGE_LEAVES),
+            ))
+        except KeyError:
+            self.logger.debug(
+                "%s asked for a trie range we don't have: %s of %s",
+                peer,
+                prefix,
+                to_hex(root_hash),
+            )
+            return
+        self.logger.debug2(
+            "Replying to %s with %d leaves and %d proof nodes", peer, len(leaves), len(proof))
+        cast(ETHRangeProtocol, peer.sub_proto).send_trie_range(root_hash, prefix, leaves, proof)
+
 
 class ETHRequestServer(BaseRequestServer):
     """
@@ -138,6 +176,7 @@ class ETHRequestServer(BaseRequestServer):
         commands.GetBlockBodies,
         commands.GetReceipts,
         commands.GetNodeData,
+        commands.GetTrieRange,
         # TODO: all of the following are here to quiet warning logging output
         # until the messages are properly handled.
         commands.Transactions,
@@ -174,5 +213,7 @@ class ETHRequestServer(BaseRequestServer):
         elif isinstance(cmd, commands.GetNodeData):
             node_hashes = cast(Sequence[Hash32], msg)
             await self._handler.handle_get_node_data(peer, node_hashes)
+        elif isinstance(cmd, commands.GetTrieRange):
+            await self._handler.handle_get_trie_range(peer, cast(Dict[str, Any], msg))
         else:
             self.logger.debug("%s msg not handled yet, need to be implemented", cmd)
@@ -18,7 +18,9 @@ from .requests import (
     GetBlockHeadersRequest,
     GetNodeDataRequest,
     GetReceiptsRequest,
+    GetTrieRangeRequest,
 )
+from .trie_ranges import TrieRangeBundle
 
 
 BaseGetBlockHeadersTracker = BasePerformanceTracker[
@@ -86,3 +88,14 @@ class GetNodeDataTracker(BasePerformanceTracker[GetNodeDataRequest, NodeDataBund
 
     def _get_result_item_count(self, result: NodeDataBundles) -> int:
         return len(result)
+
+
+class GetTrieRangeTracker(BasePerformanceTracker[GetTrieRangeRequest, TrieRangeBundle]):
+    def _get_request_size(self, request: GetTrieRangeRequest) -> Optional[int]:
+        return request.command_payload['max_leaves']
+
+    def _get_result_size(self, result: TrieRangeBundle) -> int:
+        return len(result.leaves)
+
+    def _get_result_item_count(self, result: TrieRangeBundle) -> int:
+        return len(result.leaves) + len(result.proof)
@@ -0,0 +1,334 @@
+"""
+Serving and verifying ranges of trie leaves.
+
+A range is every leaf of a trie whose key starts with a given prefix of nibbles, so the leaves in
+it are contiguous and they make up the subtree at that prefix. A range is served together with
+the nodes on the path from the root of the trie to that subtree, which is all a client needs to
+check that the leaves are complete: it rebuilds the subtree from the leaves and compares it with
+the one referenced by the last node on that path.
+
+When a subtree has too many leaves to be served in one go, the path alone is returned and the
+client follows up with requests for the subtrees under it, see :func:`verify_trie_range`.
+"""
+import itertools
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from eth_hash.auto import keccak
+from eth_typing import Hash32
+from eth_utils import ValidationError
+import rlp
+
+from trie.constants import (
+    BLANK_NODE,
+    NODE_TYPE_BLANK,
+    NODE_TYPE_BRANCH,
+    NODE_TYPE_EXTENSION,
+    NODE_TYPE_LEAF,
+)
+from trie.utils.nibbles import (
+    bytes_to_nibbles,
+    nibbles_to_bytes,
+)
+from trie.utils.nodes import (
+    compute_extension_key,
+    compute_leaf_key,
+    decode_node,
+    extract_key,
+    get_common_prefix_length,
+    get_node_type,
+)
+
+from eth.constants import BLANK_ROOT_HASH
+
+
+Nibbles = Tuple[int, ...]
+
+# A decoded trie node, and the way a node refers to one of its children: either the hash of the
+# child or, when its encoding is shorter than 32 bytes, the child itself.
+RawNode = List[Any]
+NodeReference = Union[bytes, RawNode]
+
+# The number of nibbles in the (hashed) keys of the state and storage tries.
+KEY_NIBBLES = 64
+
+
+class TrieRangeBundle(NamedTuple):
+    root_hash: Hash32
+    prefix: Nibbles
+    # The leaves in the range, as (key, value) pairs sorted by key.
+    leaves: Tuple[Tuple[Hash32, bytes], ...]
+    # The nodes of the subtree holding the leaves, rebuilt from them.
+    nodes: Tuple[Tuple[Hash32, bytes], ...]
+    # The nodes on the path from the root to that subtree, root first.
+    proof: Tuple[Tuple[Hash32, bytes], ...]
+    # Prefixes of the subtrees that were not served, which need to be requested separately.
+    missing_prefixes: Tuple[Nibbles, ...]
+
+
+def descend(node: RawNode, depth: int, prefix: Nibbles) -> Tuple[NodeReference, int]:
+    """Take one step from the given node, at the given depth, towards the given prefix.
+
+    :return: The reference to the child we need to visit next and its depth. ``None`` if the
+    given node is the root of the subtree with the given prefix, and ``BLANK_NODE`` if there are
+    no keys with that prefix in the trie.
+    """
+    if depth == len(prefix):
+        return None, depth
+
+    node_type = get_node_type(node)
+    remaining = prefix[depth:]
+    if node_type == NODE_TYPE_BLANK:
+        return BLANK_NODE, depth
+    elif node_type == NODE_TYPE_LEAF:
+        if extract_key(node)[:len(remaining)] == remaining:
+            return None, depth
+        else:
+            return BLANK_NODE, depth
+    elif node_type == NODE_TYPE_EXTENSION:
+        path = extract_key(node)
+        if len(remaining) < len(path):
+            # The prefix ends halfway through this node's path, so its whole subtree is in range
+            if path[:len(remaining)] == remaining:
+                return None, depth
+            else:
+                return BLANK_NODE, depth
+        elif remaining[:len(path)] == path:
+            return node[1], depth + len(path)
+        else:
+            return BLANK_NODE, depth
+    elif node_type == NODE_TYPE_BRANCH:
+        child = node[remaining[0]]
+        if child == BLANK_NODE:
+            return BLANK_NODE, depth
+        return child, depth + 1
+    else:
+        raise Exception("Invariant: unknown node type %s" % node_type)
+
+
+def get_children(node: RawNode,
+                 path: Nibbles) -> Tuple[List[Tuple[Nibbles, bytes]],
+                                         List[Tuple[NodeReference, Nibbles]]]:
+    """Return the leaves in the given node and the references to its children, in key order.
+
+    :param path: The path from the root of the trie to the given node.
+    """
+    node_type = get_node_type(node)
+    if node_type == NODE_TYPE_BLANK:
+        return [], []
+    elif node_type == NODE_TYPE_LEAF:
+        return [(path + extract_key(node), node[1])], []
+    elif node_type == NODE_TYPE_EXTENSION:
+        return [], [(node[1], path + extract_key(node))]
+    elif node_type == NODE_TYPE_BRANCH:
+        references = [
+            (child, path + (nibble,))
+            for nibble, child in enumerate(node[:16])
+            if child != BLANK_NODE
+        ]
+        return [], references
+    else:
+        raise Exception("Invariant: unknown node type %s" % node_type)
+
+
+def build_subtree(leaves: Sequence[Tuple[Nibbles, bytes]],
+                  depth: int) -> Tuple[RawNode, Dict[Hash32, bytes]]:
+    """Build the subtree, at the given depth, holding the given leaves.
+
+    :param leaves: (key, value) pairs, sorted by key and sharing the first ``depth`` nibbles.
+    :return: The root node of the subtree and all nodes in it that are referenced by hash, which
+    includes the root node itself when it's the root of the whole trie.
+    """
+    nodes: Dict[Hash32, bytes] = {}
+    subtree_root = _build_node(leaves, depth, nodes)
+    if depth == 0:
+        # The root of a trie is always stored by hash, no matter how small it is
+        encoded = rlp.encode(subtree_root)
+        nodes[Hash32(keccak(encoded))] = encoded
+    else:
+        _reference(subtree_root, nodes)
+    return subtree_root, nodes
+
+
+def _build_node(leaves: Sequence[Tuple[Nibbles, bytes]],
+                depth: int,
+                nodes: Dict[Hash32, bytes]) -> RawNode:
+    first_key = leaves[0][0]
+    if len(leaves) == 1:
+        return [compute_leaf_key(first_key[depth:]), leaves[0][1]]
+
+    # Keys are sorted, so the prefix shared by the first and last ones is shared by all of them
+    shared = get_common_prefix_length(first_key[depth:], leaves[-1][0][depth:])
+    if shared:
+        child = _build_node(leaves, depth + shared, nodes)
+        return [compute_extension_key(first_key[depth:depth + shared]), _reference(child, nodes)]
+
+    branch: RawNode = [BLANK_NODE] * 17
+    for nibble, group in itertools.groupby(leaves, key=lambda leaf: leaf[0][depth]):
+        branch[nibble] = _reference(_build_node(tuple(group), depth + 1, nodes), nodes)
+    return branch
+
+
+def _reference(node: RawNode, nodes: Dict[Hash32, bytes]) -> NodeReference:
+    encoded = rlp.encode(node)
+    if len(encoded) < 32:
+        return node
+    node_hash = Hash32(keccak(encoded))
+    nodes[node_hash] = encoded
+    return node_hash
+
+
+def encode_prefix(prefix: Nibbles) -> bytes:
+    """Prefixes go over the wire with one nibble per byte."""
+    return bytes(prefix)
+
+
+def decode_prefix(encoded: bytes) -> Nibbles:
+    prefix = tuple(encoded)
+    if len(prefix) > KEY_NIBBLES or any(nibble > 15 for nibble in prefix):
+        raise ValidationError("Invalid trie range prefix: %s" % encoded.hex())
+    return prefix
+
+
+async def collect_trie_range(
+        get_node: Callable[[Hash32], Awaitable[bytes]],
+        root_hash: Hash32,
+        prefix: Nibbles,
+        max_leaves: int) -> Tuple[List[Tuple[bytes, bytes]], List[bytes]]:
+    """Return the leaves under the given prefix in the given trie, and their proof.
+
+    If there are more than ``max_leaves`` of them, only the proof is returned.
+
+    :param get_node: Coroutine returning the node with the given hash, raising KeyError if we
+    don't have it.
+    """
+    if root_hash == BLANK_ROOT_HASH:
+        return [], []
+
+    proof: List[bytes] = []
+    encoded = await get_node(root_hash)
+    proof.append(encoded)
+    node = decode_node(encoded)
+    depth = 0
+    while True:
+        reference, depth = descend(node, depth, prefix)
+        if reference is None:
+            break
+        elif reference == BLANK_NODE:
+            return [], proof
+        elif isinstance(reference, list):
+            node = reference
+        else:
+            encoded = await get_node(Hash32(reference))
+            proof.append(encoded)
+            node = decode_node(encoded)
+
+    leaves: List[Tuple[bytes, bytes]] = []
+    # Depth-first, visiting children in key order
+    pending: List[Tuple[NodeReference, Nibbles]] = [(node, prefix[:depth])]
+    while pending:
+        reference, path = pending.pop()
+        if isinstance(reference, list):
+            node = reference
+        else:
+            node = decode_node(await get_node(Hash32(reference)))
+        node_leaves, children = get_children(node, path)
+        leaves.extend((nibbles_to_bytes(key), value) for key, value in node_leaves)
+        if len(leaves) > max_leaves:
+            return [], proof
+        pending.extend(reversed(children))
+    return leaves, proof
+
+
+def verify_trie_range(root_hash: Hash32,
+                      prefix: Nibbles,
+                      leaves: Sequence[Tuple[bytes, bytes]],
+                      proof: Sequence[bytes]) -> TrieRangeBundle:
+    """Check that the given leaves are all the leaves under the given prefix in the given trie.
+
+    If there are no leaves but the proof shows that the subtree at the given prefix isn't empty,
+    the range wasn't served and the returned bundle lists the prefixes to request instead. When
+    that subtree is a single leaf it's taken from the proof.
+
+    Raises ValidationError if the proof is incomplete or doesn't match the leaves.
+    """
+    proof_by_hash = {keccak(node): node for node in proof}
+    used_proof: List[Tuple[Hash32, bytes]] = []
+
+    def resolve(reference: NodeReference) -> RawNode:
+        if isinstance(reference, list):
+            return reference
+        try:
+            encoded = proof_by_hash[reference]
+        except KeyError:
+            raise ValidationError("Trie range proof lacks node %s" % reference.hex())
+        used_proof.append((Hash32(reference), encoded))
+        return decode_node(encoded)
+
+    def make_bundle(leaves: Sequence[Tuple[bytes, bytes]] = (),
+                    nodes: Dict[Hash32, bytes] = None,
+                    missing_prefixes: Sequence[Nibbles] = ()) -> TrieRangeBundle:
+        return TrieRangeBundle(
+            root_hash,
+            prefix,
+            tuple((Hash32(key), value) for key, value in leaves),
+            tuple((nodes or {}).items()),
+            tuple(used_proof),
+            tuple(missing_prefixes),
+        )
+
+    if root_hash == BLANK_ROOT_HASH:
+        if leaves:
+            raise ValidationError("Got leaves for an empty trie")
+        return make_bundle()
+
+    node = resolve(root_hash)
+    depth = 0
+    while True:
+        reference, depth = descend(node, depth, prefix)
+        if reference is None:
+            break
+        elif reference == BLANK_NODE:
+            if leaves:
+                raise ValidationError("Got leaves for a prefix that is not in the trie")
+            return make_bundle()
+        node = resolve(reference)
+
+    if not leaves:
+        node_type = get_node_type(node)
+        if node_type == NODE_TYPE_LEAF:
+            leaf_key, value = get_children(node, prefix[:depth])[0][0]
+            return make_bundle(leaves=((nibbles_to_bytes(leaf_key), value),))
+        elif node_type == NODE_TYPE_EXTENSION:
+            return make_bundle(missing_prefixes=(prefix[:depth] + extract_key(node),))
+        else:
+            return make_bundle(missing_prefixes=tuple(
+                child_path for _, child_path in get_children(node, prefix[:depth])[1]
+            ))
+
+    keyed_leaves = []
+    previous_key = None
+    for key, value in leaves:
+        if len(key) != KEY_NIBBLES // 2:
+            raise ValidationError("Invalid trie key length: %d" % len(key))
+        elif previous_key is not None and key <= previous_key:
+            raise ValidationError("Trie range leaves are not sorted")
+        previous_key = key
+        nibbles = bytes_to_nibbles(key)
+        if nibbles[:depth] != prefix[:depth]:
+            raise ValidationError("Trie range leaf %s doesn't match the prefix" % key.hex())
+        keyed_leaves.append((nibbles, value))
+
+    subtree_root, nodes = build_subtree(keyed_leaves, depth)
+    if rlp.encode(subtree_root) != rlp.encode(node):
+        raise ValidationError("Trie range leaves don't match the proof")
+    return make_bundle(leaves=leaves, nodes=nodes)
@@ -21,6 +21,10 @@ from trinity.protocol.common.types import (
 )
 
 from . import constants
+from .trie_ranges import (
+    Nibbles,
+    TrieRangeBundle,
+)
 
 
 class GetBlockHeadersValidator(BaseBlockHeadersValidator):
@@ -87,3 +91,16 @@ class GetBlockBodiesValidator(BaseValidator[BlockBodyBundles]):
         unexpected_keys = actual_keys.difference(expected_keys)
         if unexpected_keys:
             raise ValidationError(f"Got {len(unexpected_keys)} unexpected block bodies")
+
+
+class GetTrieRangeValidator(BaseValidator[TrieRangeBundle]):
+    def __init__(self, root_hash: Hash32, prefix: Nibbles) -> None:
+        self.root_hash = root_hash
+        self.prefix = prefix
+
+    def validate_result(self, result: TrieRangeBundle) -> None:
+        if result.root_hash != self.root_hash or result.prefix != self.prefix:
+            raise ValidationError(
+                f"Got trie range {result.prefix} of {result.root_hash.hex()}, expected "
+                f"{self.prefix} of {self.root_hash.hex()}"
+            )
@@ -53,7 +53,9 @@ class LESPeer(BaseChainPeer):
 
     def get_extra_stats(self) -> List[str]:
         stats_pairs = self.requests.get_stats().items()
-        return ['%s: %s' % (cmd_name, stats) for cmd_name, stats in stats_pairs]
+        return super().get_extra_stats() + [
+            '%s: %s' % (cmd_name, stats) for cmd_name, stats in stats_pairs
+        ]
 
     @property
     def requests(self) -> LESExchangeHandler:
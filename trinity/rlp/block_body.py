@@ -1,3 +1,7 @@
+from typing import Any
+
+from eth_hash.auto import keccak
+from eth_typing import Hash32
 import rlp
 from rlp import sedes
 
@@ -5,9 +9,48 @@ from rlp import sedes
 from eth.rlp.headers import BlockHeader
 from eth.rlp.transactions import BaseTransactionFields
 
+from trinity.rlp.lazy import (
+    LazyRLPSequence,
+    split_rlp_list,
+)
+
 
 class BlockBody(rlp.Serializable):
     fields = [
         ('transactions', sedes.CountableList(BaseTransactionFields)),
         ('uncles', sedes.CountableList(BlockHeader))
     ]
+
+
+class LazyBlockBody:
+    """
+    A block body as we get it in a ``BlockBodies`` message, whose transactions and uncles are
+    only deserialized when they are accessed.
+
+    The transaction trie and the uncles hash can be computed from the encoded items alone, and
+    the transactions can be decoded straight into the transaction class of the block's VM.
+    """
+
+    def __init__(self, encoded: bytes) -> None:
+        try:
+            encoded_transactions, self.encoded_uncles = split_rlp_list(encoded)
+        except ValueError as err:
+            raise rlp.DecodingError("Block body must have two items", encoded) from err
+        self.transactions: LazyRLPSequence[BaseTransactionFields] = (
+            LazyRLPSequence.from_encoded_list(encoded_transactions, BaseTransactionFields)
+        )
+        self.uncles: LazyRLPSequence[BlockHeader] = LazyRLPSequence.from_encoded_list(
+            self.encoded_uncles, BlockHeader)
+
+    @property
+    def uncles_hash(self) -> Hash32:
+        return Hash32(keccak(self.encoded_uncles))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (LazyBlockBody, BlockBody)):
+            return self.transactions == other.transactions and self.uncles == other.uncles
+        else:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LazyBlockBody({len(self.transactions)} txs, {len(self.uncles)} uncles)"
@@ -0,0 +1,106 @@
+from typing import (
+    Any,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
+
+import rlp
+from rlp.codec import consume_length_prefix
+from rlp.exceptions import DecodingError
+
+
+TItem = TypeVar('TItem')
+
+
+def split_rlp_list(encoded: bytes) -> Tuple[bytes, ...]:
+    """
+    Return the RLP encodings of the items in the given RLP encoded list, without decoding them.
+
+    Raises DecodingError if the given bytes are not a well formed RLP list, but the items
+    themselves are only checked to fit in it.
+    """
+    try:
+        _, item_type, length, start = consume_length_prefix(encoded, 0)
+        if item_type is not list:
+            raise DecodingError("Expected an RLP list", encoded)
+        end = start + length
+        if end != len(encoded):
+            raise DecodingError("RLP length prefix announced wrong length", encoded)
+
+        items: List[bytes] = []
+        position = start
+        while position < end:
+            _, _, item_length, item_start = consume_length_prefix(encoded, position)
+            item_end = item_start + item_length
+            if item_end > end:
+                raise DecodingError("RLP list item extends beyond the list", encoded)
+            items.append(encoded[position:item_end])
+            position = item_end
+    except IndexError as err:
+        raise DecodingError("RLP list is truncated", encoded) from err
+    return tuple(items)
+
+
+class LazyRLPSequence(Sequence[TItem]):
+    """
+    A sequence of RLP encoded items, which are only deserialized with the given sedes when they
+    are first accessed.
+
+    The encoded items are available as they are, to be hashed or stored without going through
+    the deserialized objects, or to be decoded with a different sedes altogether.
+    """
+
+    def __init__(self, encoded_items: Tuple[bytes, ...], sedes: Any) -> None:
+        self.encoded_items = encoded_items
+        self.sedes = sedes
+        self._items: List[TItem] = [None] * len(encoded_items)
+
+    @classmethod
+    def from_encoded_list(cls, encoded: bytes, sedes: Any) -> 'LazyRLPSequence[TItem]':
+        return cls(split_rlp_list(encoded), sedes)
+
+    def decode_as(self, sedes: Any) -> Tuple[Any, ...]:
+        """
+        Decode all the items with the given sedes instead, without caching them.
+        """
+        return tuple(rlp.decode(item, sedes=sedes) for item in self.encoded_items)
+
+    def __len__(self) -> int:
+        return len(self.encoded_items)
+
+    @overload
+    def __getitem__(self, index: int) -> TItem:
+        pass
+
+    @overload  # noqa: F811
+    def __getitem__(self, index: slice) -> Sequence[TItem]:
+        pass
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[TItem, Sequence[TItem]]:  # noqa: F811
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        item = self._items[index]
+        if item is None:
+            item = rlp.decode(self.encoded_items[index], sedes=self.sedes)
+            self._items[index] = item
+        return item
+
+    def __iter__(self) -> Iterator[TItem]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazyRLPSequence):
+            return self.encoded_items == other.encoded_items
+        elif isinstance(other, Sequence):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        else:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} items of {self.sedes})"
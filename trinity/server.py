@@ -13,6 +13,7 @@ from typing import (
 )
 
 from eth_keys import datatypes
+import sha3
 from eth_utils import big_endian_to_int
 from cancel_token import CancelToken, OperationCancelled
 from eth_typing import BlockNumber
@@ -186,51 +187,57 @@ class BaseServer(BaseService, Generic[TPeerPool]):
 
     async def _receive_handshake(
             self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
-        msg = await self.wait(
-            reader.read(ENCRYPTED_AUTH_MSG_LEN),
-            timeout=REPLY_TIMEOUT)
+        # The elliptic curve work is done in the peer pool's executor, which we share with the
+        # connections it makes.
+        executor = self.peer_pool.handshake_executor
+        with executor.timed('wait_auth'):
+            msg = await self.wait(
+                reader.read(ENCRYPTED_AUTH_MSG_LEN),
+                timeout=REPLY_TIMEOUT)
 
         ip, socket, *_ = writer.get_extra_info("peername")
         remote_address = Address(ip, socket)
         self.logger.debug("Receiving handshake from %s", remote_address)
         got_eip8 = False
-        try:
-            ephem_pubkey, initiator_nonce, initiator_pubkey = decode_authentication(
-                msg, self.privkey)
-        except DecryptionError:
-            # Try to decode as EIP8
-            got_eip8 = True
-            msg_size = big_endian_to_int(msg[:2])
-            remaining_bytes = msg_size - ENCRYPTED_AUTH_MSG_LEN + 2
-            msg += await self.wait(
-                reader.read(remaining_bytes),
-                timeout=REPLY_TIMEOUT)
+        with executor.timed('decode_auth'):
             try:
-                ephem_pubkey, initiator_nonce, initiator_pubkey = decode_authentication(
-                    msg, self.privkey)
-            except DecryptionError as e:
-                self.logger.debug("Failed to decrypt handshake: %s", e)
-                return
+                ephem_pubkey, initiator_nonce, initiator_pubkey = await self.wait(
+                    executor.run(decode_authentication, msg, self.privkey))
+            except DecryptionError:
+                # Try to decode as EIP8
+                got_eip8 = True
+                msg_size = big_endian_to_int(msg[:2])
+                remaining_bytes = msg_size - ENCRYPTED_AUTH_MSG_LEN + 2
+                msg += await self.wait(
+                    reader.read(remaining_bytes),
+                    timeout=REPLY_TIMEOUT)
+                try:
+                    ephem_pubkey, initiator_nonce, initiator_pubkey = await self.wait(
+                        executor.run(decode_authentication, msg, self.privkey))
+                except DecryptionError as e:
+                    self.logger.debug("Failed to decrypt handshake: %s", e)
+                    return
 
         initiator_remote = Node(initiator_pubkey, remote_address)
         responder = HandshakeResponder(initiator_remote, self.privkey, got_eip8, self.cancel_token)
 
         responder_nonce = secrets.token_bytes(HASH_LEN)
-        auth_ack_msg = responder.create_auth_ack_message(responder_nonce)
-        auth_ack_ciphertext = responder.encrypt_auth_ack_message(auth_ack_msg)
+        with executor.timed('encode_auth_ack'):
+            auth_ack_ciphertext, (aes_secret, mac_secret, egress_mac, ingress_mac) = (
+                await self.wait(executor.run(
+                    _create_auth_ack,
+                    responder,
+                    responder_nonce,
+                    initiator_nonce,
+                    ephem_pubkey,
+                    msg,
+                ))
+            )
 
         # Use the `writer` to send the reply to the remote
         writer.write(auth_ack_ciphertext)
         await self.wait(writer.drain())
 
-        # Call `HandshakeResponder.derive_shared_secrets()` and use return values to create `Peer`
-        aes_secret, mac_secret, egress_mac, ingress_mac = responder.derive_secrets(
-            initiator_nonce=initiator_nonce,
-            responder_nonce=responder_nonce,
-            remote_ephemeral_pubkey=ephem_pubkey,
-            auth_init_ciphertext=msg,
-            auth_ack_ciphertext=auth_ack_ciphertext
-        )
         connection = PeerConnection(
             reader=reader,
             writer=writer,
@@ -270,11 +277,34 @@ class BaseServer(BaseService, Generic[TPeerPool]):
             await self.wait(self.do_handshake(peer))
 
     async def do_handshake(self, peer: BasePeer) -> None:
-        await peer.do_p2p_handshake()
-        await peer.do_sub_proto_handshake()
+        executor = self.peer_pool.handshake_executor
+        with executor.timed('p2p_handshake'):
+            await peer.do_p2p_handshake()
+        with executor.timed('sub_proto_handshake'):
+            await peer.do_sub_proto_handshake()
         await self.peer_pool.start_peer(peer)
 
 
+def _create_auth_ack(
+        responder: HandshakeResponder,
+        responder_nonce: bytes,
+        initiator_nonce: bytes,
+        remote_ephemeral_pubkey: datatypes.PublicKey,
+        auth_init_ciphertext: bytes,
+) -> Tuple[bytes, Tuple[bytes, bytes, sha3.keccak_256, sha3.keccak_256]]:
+    auth_ack_msg = responder.create_auth_ack_message(responder_nonce)
+    auth_ack_ciphertext = responder.encrypt_auth_ack_message(auth_ack_msg)
+    # Call `HandshakeResponder.derive_shared_secrets()` and use return values to create `Peer`
+    shared_secrets = responder.derive_secrets(
+        initiator_nonce=initiator_nonce,
+        responder_nonce=responder_nonce,
+        remote_ephemeral_pubkey=remote_ephemeral_pubkey,
+        auth_init_ciphertext=auth_init_ciphertext,
+        auth_ack_ciphertext=auth_ack_ciphertext
+    )
+    return auth_ack_ciphertext, shared_secrets
+
+
 class FullServer(BaseServer[ETHPeerPool]):
     def _make_peer_pool(self) -> ETHPeerPool:
         context = ChainContext(
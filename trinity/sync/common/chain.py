@@ -1,7 +1,16 @@
 from abc import ABC, abstractmethod
+import asyncio
+import collections
+from concurrent.futures import Executor
+import functools
 from typing import (
     AsyncIterator,
+    Deque,
+    Dict,
+    Optional,
+    Sequence,
     Tuple,
+    Type,
 )
 
 from cancel_token import (
@@ -13,7 +22,12 @@ from eth.constants import GENESIS_BLOCK_NUMBER
 from eth.exceptions import (
     HeaderNotFound,
 )
+from eth_keys.exceptions import (
+    BadSignature,
+    ValidationError as KeysValidationError,
+)
 from eth_typing import (
+    Address,
     BlockNumber,
     Hash32,
 )
@@ -27,6 +41,9 @@ from eth.rlp.blocks import (
 from eth.rlp.headers import (
     BlockHeader,
 )
+from eth.rlp.transactions import (
+    BaseTransaction,
+)
 
 from p2p.constants import (
     MAX_REORG_DEPTH,
@@ -259,6 +276,13 @@ class PeerHeaderSyncer(BaseService):
 
 
 class BaseBlockImporter(ABC):
+    def preview_blocks(self, blocks: Sequence[BaseBlock]) -> None:
+        """
+        Announce blocks that are about to be passed to :meth:`import_block`, in that order, so
+        that work on them can start ahead of time. Importers are free to ignore it.
+        """
+        pass
+
     @abstractmethod
     async def import_block(
             self,
@@ -274,3 +298,139 @@ class SimpleBlockImporter(BaseBlockImporter):
             self,
             block: BaseBlock) -> Tuple[BaseBlock, Tuple[BaseBlock, ...], Tuple[BaseBlock, ...]]:
         return await self._chain.coro_import_block(block, perform_validation=True)
+
+
+def recover_transaction_senders(
+        transactions: Sequence[BaseTransaction]) -> Tuple[Optional[Address], ...]:
+    """
+    Check the signatures of the given transactions and return their senders, or None for those
+    with an invalid signature, which are left for the VM to reject.
+
+    This is meant to be run in a process pool, so that it doesn't compete with block execution.
+    """
+    senders = []
+    for transaction in transactions:
+        try:
+            transaction.check_signature_validity()
+            senders.append(transaction.sender)
+        except (BadSignature, KeysValidationError, ValidationError):
+            senders.append(None)
+    return tuple(senders)
+
+
+class _RecoveredSenderMixin:
+    """
+    Transaction whose sender was already recovered, and its signature checked, elsewhere.
+
+    py-evm recovers the sender every time it's needed, which is several times per transaction
+    when it's imported.
+    """
+    recovered_sender: Address = None
+
+    def check_signature_validity(self) -> None:
+        if self.recovered_sender is None:
+            super().check_signature_validity()  # type: ignore
+
+    def get_sender(self) -> Address:
+        if self.recovered_sender is None:
+            return super().get_sender()  # type: ignore
+        return self.recovered_sender
+
+
+@functools.lru_cache(maxsize=None)
+def _get_recovered_sender_class(
+        transaction_class: Type[BaseTransaction]) -> Type[BaseTransaction]:
+    return type(
+        transaction_class.__name__,
+        (_RecoveredSenderMixin, transaction_class),
+        {},
+    )
+
+
+def _with_recovered_senders(block: BaseBlock,
+                            senders: Sequence[Optional[Address]]) -> BaseBlock:
+    transactions = []
+    for transaction, sender in zip(block.transactions, senders):
+        transaction_class = _get_recovered_sender_class(type(transaction))
+        # The transaction comes with its RLP encoding cached, which makes this cheap
+        recovered = transaction_class.from_base_transaction(transaction)
+        recovered.recovered_sender = sender
+        transactions.append(recovered)
+    return type(block)(block.header, transactions, block.uncles)
+
+
+class PipelinedBlockImporter(BaseBlockImporter):
+    """
+    Import blocks while the senders of the transactions in the next ones are recovered in a
+    process pool, so that signature checks overlap with block execution.
+
+    Only blocks announced with :meth:`preview_blocks` get their senders recovered ahead of time,
+    any other block is imported as it is.
+    """
+    def __init__(self,
+                 chain: BaseAsyncChain,
+                 executor: Executor,
+                 lookahead: int = 16,
+                 max_workers: int = None) -> None:
+        """
+        :param lookahead: The maximum number of blocks whose senders are being recovered or have
+        been recovered but not imported yet.
+        :param max_workers: The maximum number of blocks whose senders are being recovered at
+        once, so that we don't take more than our share of a pool that is used for other things
+        as well. Defaults to ``lookahead``.
+        """
+        self._chain = chain
+        self._executor = executor
+        self._lookahead = lookahead
+        if max_workers is None:
+            self._max_workers = lookahead
+        else:
+            self._max_workers = max_workers
+        self._num_running = 0
+        self._upcoming: Deque[BaseBlock] = collections.deque()
+        self._recoveries: Dict[Hash32, 'asyncio.Future[Tuple[Optional[Address], ...]]'] = {}
+
+    def preview_blocks(self, blocks: Sequence[BaseBlock]) -> None:
+        self._upcoming.extend(blocks)
+        self._schedule_recoveries()
+
+    def _schedule_recoveries(self) -> None:
+        loop = asyncio.get_event_loop()
+        while (self._upcoming and
+               len(self._recoveries) < self._lookahead and
+               self._num_running < self._max_workers):
+            block = self._upcoming.popleft()
+            if block.transactions and block.hash not in self._recoveries:
+                recovery = asyncio.ensure_future(loop.run_in_executor(
+                    self._executor,
+                    recover_transaction_senders,
+                    block.transactions,
+                ))
+                recovery.add_done_callback(self._recovery_done)
+                self._num_running += 1
+                self._recoveries[block.hash] = recovery
+
+    def _recovery_done(self, recovery: 'asyncio.Future[Tuple[Optional[Address], ...]]') -> None:
+        self._num_running -= 1
+        self._schedule_recoveries()
+
+    def _reset(self) -> None:
+        self._upcoming.clear()
+        for recovery in self._recoveries.values():
+            recovery.cancel()
+        self._recoveries.clear()
+
+    async def import_block(
+            self,
+            block: BaseBlock) -> Tuple[BaseBlock, Tuple[BaseBlock, ...], Tuple[BaseBlock, ...]]:
+        recovery = self._recoveries.pop(block.hash, None)
+        # Keep the pool busy with the following blocks while this one is imported
+        self._schedule_recoveries()
+        try:
+            if recovery is not None:
+                block = _with_recovered_senders(block, await recovery)
+            return await self._chain.coro_import_block(block, perform_validation=True)
+        except BaseException:
+            # The blocks lined up after this one won't be imported, at least not in this order
+            self._reset()
+            raise
@@ -37,6 +37,7 @@ from eth.constants import (
     EMPTY_UNCLE_HASH,
 )
 from eth.exceptions import HeaderNotFound
+from eth.rlp.blocks import BaseBlock
 from eth.rlp.headers import BlockHeader
 from eth.rlp.receipts import Receipt
 from eth.rlp.transactions import BaseTransaction
@@ -46,6 +47,7 @@ from p2p.exceptions import BaseP2PError, PeerConnectionLost
 from p2p.peer import BasePeer, PeerSubscriber
 from p2p.protocol import Command
 from p2p.service import BaseService
+from p2p._utils import ensure_global_asyncio_executor
 
 from trinity.chains.base import BaseAsyncChain
 from trinity.db.eth1.chain import BaseAsyncChainDB
@@ -57,9 +59,11 @@ from trinity.protocol.eth.constants import (
 )
 from trinity.protocol.eth.peer import ETHPeer, ETHPeerPool
 from trinity.protocol.eth.sync import ETHHeaderChainSyncer
-from trinity.rlp.block_body import BlockBody
+from trinity.rlp.block_body import LazyBlockBody
+from trinity.rlp.lazy import LazyRLPSequence
 from trinity.sync.common.chain import (
     BaseBlockImporter,
+    PipelinedBlockImporter,
     SimpleBlockImporter,
 )
 from trinity.sync.common.constants import (
@@ -85,10 +89,10 @@ from trinity._utils.humanize import humanize_elapsed, humanize_hash
 from trinity._utils.timer import Timer
 
 # (ReceiptBundle, (Receipt, (root_hash, receipt_trie_data))
-ReceiptBundle = Tuple[Tuple[Receipt, ...], Tuple[Hash32, Dict[Hash32, bytes]]]
-# (BlockBody, (txn_root, txn_trie_data), uncles_hash)
+ReceiptBundle = Tuple[LazyRLPSequence[Receipt], Tuple[Hash32, Dict[Hash32, bytes]]]
+# (LazyBlockBody, (txn_root, txn_trie_data), uncles_hash)
 BlockBodyBundle = Tuple[
-    BlockBody,
+    LazyBlockBody,
     Tuple[Hash32, Dict[Hash32, bytes]],
     Hash32,
 ]
@@ -112,7 +116,7 @@ class BaseBodyChainSyncer(BaseService, PeerSubscriber):
 
     tip_monitor_class = ETHChainTipMonitor
 
-    _pending_bodies: Dict[BlockHeader, BlockBody]
+    _pending_bodies: Dict[BlockHeader, LazyBlockBody]
 
     def __init__(self,
                  chain: BaseAsyncChain,
@@ -685,10 +689,15 @@ class FastChainBodySyncer(BaseBodyChainSyncer):
 
     async def _persist_blocks(self, headers: Tuple[BlockHeader, ...]) -> None:
         """
-        Persist blocks for the given headers, directly to the database
+        Persist blocks for the given headers, directly to the database, in a single write
 
-        :param headers: headers for which block bodies and receipts have been downloaded
+        :param headers: headers for which block bodies and receipts have been downloaded, each
+            one after its parent
         """
+        if not headers:
+            return
+
+        blocks = []
         for header in headers:
             vm_class = self.chain.get_vm_class(header)
             block_class = vm_class.get_block_class()
@@ -698,19 +707,20 @@ class FastChainBodySyncer(BaseBodyChainSyncer):
                 uncles: List[BlockHeader] = []
             else:
                 body = self._pending_bodies.pop(header)
-                uncles = body.uncles
+                uncles = list(body.uncles)
 
                 # transaction data was already persisted in _block_body_bundle_processing, but
                 # we need to include the transactions for them to be added to the hash->txn lookup
                 tx_class = block_class.get_transaction_class()
-                transactions = [tx_class.from_base_transaction(tx) for tx in body.transactions]
+                transactions = list(body.transactions.decode_as(tx_class))
 
                 # record progress in the tracker
                 self.tracker.record_transactions(len(transactions))
 
-            block = block_class(header, transactions, uncles)
-            await self.wait(self.db.coro_persist_block(block))
-            self.tracker.set_latest_head(header)
+            blocks.append(block_class(header, transactions, uncles))
+
+        await self.wait(self.db.coro_persist_blocks(blocks))
+        self.tracker.set_latest_head(headers[-1])
 
     async def _assign_receipt_download_to_peers(self) -> None:
         """
@@ -915,15 +925,33 @@ class RegularChainSyncer(BaseService):
                  chain: BaseAsyncChain,
                  db: BaseAsyncChainDB,
                  peer_pool: ETHPeerPool,
-                 token: CancelToken = None) -> None:
+                 token: CancelToken = None,
+                 sender_recovery_workers: int = 0) -> None:
+        """
+        :param sender_recovery_workers: If greater than zero, the senders of the transactions in
+        upcoming blocks are recovered in the global process pool, using up to this many of its
+        workers, while the current block is imported (see
+        :class:`~trinity.sync.common.chain.PipelinedBlockImporter`).
+        """
         super().__init__(token=token)
         self._header_syncer = ETHHeaderChainSyncer(chain, db, peer_pool, self.cancel_token)
+        block_importer: BaseBlockImporter
+        if sender_recovery_workers > 0:
+            block_importer = PipelinedBlockImporter(
+                chain,
+                # We just retrieve the global executor that was created when the Node launches.
+                # The node manages the lifecycle of the executor.
+                ensure_global_asyncio_executor(),
+                max_workers=sender_recovery_workers,
+            )
+        else:
+            block_importer = SimpleBlockImporter(chain)
         self._body_syncer = RegularChainBodySyncer(
             chain,
             db,
             peer_pool,
             self._header_syncer,
-            SimpleBlockImporter(chain),
+            block_importer,
             self.cancel_token,
         )
 
@@ -1044,21 +1072,9 @@ class RegularChainBodySyncer(BaseBodyChainSyncer):
 
         :param headers: headers that have the block bodies downloaded
         """
-        for header in headers:
-            vm_class = self.chain.get_vm_class(header)
-            block_class = vm_class.get_block_class()
-
-            if _is_body_empty(header):
-                transactions: List[BaseTransaction] = []
-                uncles: List[BlockHeader] = []
-            else:
-                body = self._pending_bodies.pop(header)
-                tx_class = block_class.get_transaction_class()
-                transactions = [tx_class.from_base_transaction(tx)
-                                for tx in body.transactions]
-                uncles = body.uncles
-
-            block = block_class(header, transactions, uncles)
+        blocks = tuple(self._build_block(header) for header in headers)
+        self._block_importer.preview_blocks(blocks)
+        for block in blocks:
             timer = Timer()
             _, new_canonical_blocks, old_canonical_blocks = await self.wait(
                 self._block_importer.import_block(block)
@@ -1067,17 +1083,17 @@ class RegularChainBodySyncer(BaseBodyChainSyncer):
             if new_canonical_blocks == (block,):
                 # simple import of a single new block.
                 self.logger.info("Imported block %d (%d txs) in %.2f seconds",
-                                 block.number, len(transactions), timer.elapsed)
+                                 block.number, len(block.transactions), timer.elapsed)
             elif not new_canonical_blocks:
                 # imported block from a fork.
                 self.logger.info("Imported non-canonical block %d (%d txs) in %.2f seconds",
-                                 block.number, len(transactions), timer.elapsed)
+                                 block.number, len(block.transactions), timer.elapsed)
             elif old_canonical_blocks:
                 self.logger.info(
                     "Chain Reorganization: Imported block %d (%d txs) in %.2f "
                     "seconds, %d blocks discarded and %d new canonical blocks added",
                     block.number,
-                    len(transactions),
+                    len(block.transactions),
                     timer.elapsed,
                     len(old_canonical_blocks),
                     len(new_canonical_blocks),
@@ -1085,6 +1101,21 @@ class RegularChainBodySyncer(BaseBodyChainSyncer):
             else:
                 raise Exception("Invariant: unreachable code path")
 
+    def _build_block(self, header: BlockHeader) -> BaseBlock:
+        vm_class = self.chain.get_vm_class(header)
+        block_class = vm_class.get_block_class()
+
+        if _is_body_empty(header):
+            transactions: List[BaseTransaction] = []
+            uncles: List[BlockHeader] = []
+        else:
+            body = self._pending_bodies.pop(header)
+            tx_class = block_class.get_transaction_class()
+            transactions = list(body.transactions.decode_as(tx_class))
+            uncles = list(body.uncles)
+
+        return block_class(header, transactions, uncles)
+
 
 def _is_body_empty(header: BlockHeader) -> bool:
     return header.transaction_root == BLANK_ROOT_HASH and header.uncles_hash == EMPTY_UNCLE_HASH
@@ -1,9 +1,19 @@
-import bisect
+import asyncio
+import heapq
+import itertools
+import os
+from pathlib import Path
+import struct
+import tempfile
 from typing import (
     Awaitable,
     Callable,
     Dict,
+    IO,
+    Iterable,
     List,
+    Optional,
+    Sequence,
     Tuple,
 )
 
@@ -35,6 +45,8 @@ from trinity.exceptions import SyncRequestAlreadyProcessed
 
 
 class SyncRequest:
+    __slots__ = (
+        'node_key', 'parents', 'depth', 'leaf_callback', 'is_raw', 'dependencies', 'data')
 
     def __init__(
             self, node_key: Hash32, parent: 'SyncRequest', depth: int,
@@ -111,15 +123,202 @@ def _get_children(node: Hash32, depth: int
     return references, leaves  # type: ignore
 
 
+# Scheduling order of a queued request: deepest first and, within the same depth, the most
+# recently scheduled first, which keeps the sync close to a depth-first traversal.
+QueueItem = Tuple[int, int, SyncRequest]
+
+ScheduledNode = Tuple[
+    Hash32, SyncRequest, int, Callable[[bytes, SyncRequest], Awaitable[None]], bool]
+
+# A spilled request is its node key, depth, flags and the number of parents, followed by the keys
+# of its parents (which are kept in memory).
+SPILLED_REQUEST_HEADER = struct.Struct('>32sHBI')
+SPILL_IS_RAW = 0x01
+# Whether the request uses the trie's default leaf callback or no callback at all
+SPILL_HAS_LEAF_CALLBACK = 0x02
+
+SpilledRequest = Tuple[Hash32, int, bool, bool, List[Hash32]]
+
+# A progress snapshot starts with its format version, the root hash of the trie being synced and
+# the number of requests in it. Requests are stored like spilled ones, followed by the length of
+# their data and the data itself, if we have it already.
+FRONTIER_SNAPSHOT_VERSION = 1
+FRONTIER_SNAPSHOT_HEADER = struct.Struct('>B32sQ')
+SNAPSHOT_HAS_DATA = 0x04
+SNAPSHOT_DATA_LENGTH = struct.Struct('>I')
+
+SnapshotRecord = Tuple[Hash32, int, bool, bool, List[Hash32], Optional[bytes]]
+
+
+def _write_frontier_snapshot(path: Path,
+                             root_hash: Hash32,
+                             records: Sequence[SnapshotRecord]) -> None:
+    encoded = [FRONTIER_SNAPSHOT_HEADER.pack(FRONTIER_SNAPSHOT_VERSION, root_hash, len(records))]
+    for node_key, depth, is_raw, has_callback, parent_keys, data in records:
+        flags = (
+            (SPILL_IS_RAW if is_raw else 0) |
+            (SPILL_HAS_LEAF_CALLBACK if has_callback else 0) |
+            (SNAPSHOT_HAS_DATA if data is not None else 0)
+        )
+        encoded.append(SPILLED_REQUEST_HEADER.pack(node_key, depth, flags, len(parent_keys)))
+        encoded.extend(parent_keys)
+        if data is not None:
+            encoded.append(SNAPSHOT_DATA_LENGTH.pack(len(data)))
+            encoded.append(data)
+
+    # Write to a new file and move it over the old one, so that we never leave a truncated
+    # snapshot behind if we're killed halfway.
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as snapshot_file:
+        snapshot_file.write(b''.join(encoded))
+    os.replace(str(tmp_path), str(path))
+
+
+def _read_frontier_snapshot(path: Path) -> Optional[Tuple[Hash32, List[SnapshotRecord]]]:
+    """Return the root hash and records of a snapshot, or None if it's in another format."""
+    encoded = path.read_bytes()
+    version, root_hash, num_records = FRONTIER_SNAPSHOT_HEADER.unpack_from(encoded)
+    if version != FRONTIER_SNAPSHOT_VERSION:
+        return None
+
+    records: List[SnapshotRecord] = []
+    position = FRONTIER_SNAPSHOT_HEADER.size
+    for _ in range(num_records):
+        node_key, depth, flags, num_parents = SPILLED_REQUEST_HEADER.unpack_from(
+            encoded, position)
+        position += SPILLED_REQUEST_HEADER.size
+        parent_keys = [
+            Hash32(encoded[position + 32 * i:position + 32 * (i + 1)])
+            for i in range(num_parents)
+        ]
+        position += 32 * num_parents
+        if flags & SNAPSHOT_HAS_DATA:
+            data_length, = SNAPSHOT_DATA_LENGTH.unpack_from(encoded, position)
+            position += SNAPSHOT_DATA_LENGTH.size
+            data: Optional[bytes] = encoded[position:position + data_length]
+            position += data_length
+        else:
+            data = None
+        records.append((
+            Hash32(node_key),
+            depth,
+            bool(flags & SPILL_IS_RAW),
+            bool(flags & SPILL_HAS_LEAF_CALLBACK),
+            parent_keys,
+            data,
+        ))
+    return Hash32(root_hash), records
+
+
+class FrontierSpill:
+    """
+    Temporary file where :class:`HexaryTrieSync` moves the lowest priority part of its queue
+    when that grows past its memory budget. It works as a stack of chunks: the chunk spilled
+    last is read back first, once the in-memory queue has been drained.
+    """
+
+    def __init__(self, spill_dir: Path = None) -> None:
+        self._file: IO[bytes] = tempfile.TemporaryFile(
+            prefix="trie-sync-frontier", dir=None if spill_dir is None else str(spill_dir))
+        # (offset, length, number of records) of every chunk in the file
+        self._chunks: List[Tuple[int, int, int]] = []
+        self._num_records = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._num_records
+
+    def push_chunk(self, records: List[SpilledRequest]) -> None:
+        encoded = b''.join(
+            SPILLED_REQUEST_HEADER.pack(
+                node_key,
+                depth,
+                (SPILL_IS_RAW if is_raw else 0) | (SPILL_HAS_LEAF_CALLBACK if has_callback else 0),
+                len(parent_keys),
+            ) + b''.join(parent_keys)
+            for node_key, depth, is_raw, has_callback, parent_keys in records
+        )
+        self._file.seek(self._end)
+        self._file.write(encoded)
+        self._chunks.append((self._end, len(encoded), len(records)))
+        self._num_records += len(records)
+        self._end += len(encoded)
+
+    def pop_chunk(self) -> List[SpilledRequest]:
+        offset, length, num_records = self._chunks.pop()
+        self._num_records -= num_records
+        records = self._read_chunk(offset, length, num_records)
+        # Chunks are popped in reverse order, so the next push can reuse this space
+        self._end = offset
+        return records
+
+    def peek_all(self) -> Iterable[SpilledRequest]:
+        """Return all spilled records without removing them from the file."""
+        for offset, length, num_records in self._chunks:
+            yield from self._read_chunk(offset, length, num_records)
+
+    def _read_chunk(self, offset: int, length: int, num_records: int) -> List[SpilledRequest]:
+        self._file.seek(offset)
+        encoded = self._file.read(length)
+        records = []
+        position = 0
+        for _ in range(num_records):
+            node_key, depth, flags, num_parents = SPILLED_REQUEST_HEADER.unpack_from(
+                encoded, position)
+            position += SPILLED_REQUEST_HEADER.size
+            parent_keys = [
+                Hash32(encoded[position + 32 * i:position + 32 * (i + 1)])
+                for i in range(num_parents)
+            ]
+            position += 32 * num_parents
+            records.append((
+                Hash32(node_key),
+                depth,
+                bool(flags & SPILL_IS_RAW),
+                bool(flags & SPILL_HAS_LEAF_CALLBACK),
+                parent_keys,
+            ))
+        return records
+
+
+# A decoded trie node: its key, its depth, the (depth, key) pairs of the nodes it references and
+# its leaves.
+DecodedNode = Tuple[Hash32, int, Tuple[Tuple[int, Hash32], ...], Tuple[bytes, ...]]
+
+
+def decode_trie_nodes(nodes: Sequence[Tuple[Hash32, bytes, int]]) -> Tuple[DecodedNode, ...]:
+    """Decode the given (key, data, depth) triples and extract their children.
+
+    This is what :meth:`HexaryTrieSync.process` does for every node it receives, exposed as a
+    module level function so that it can be run in a process pool.
+    """
+    decoded = []
+    for node_key, data, depth in nodes:
+        references, leaves = _get_children(decode_node(data), depth)
+        decoded.append((node_key, depth, tuple(references), tuple(leaves)))
+    return tuple(decoded)
+
+
 class HexaryTrieSync:
 
     def __init__(self,
                  root_hash: Hash32,
                  db: BaseAsyncDB,
                  nodes_cache: BaseDB,
-                 logger: ExtendedDebugLogger) -> None:
-        # Nodes that haven't been requested yet.
-        self.queue: List[SyncRequest] = []
+                 logger: ExtendedDebugLogger,
+                 max_queued_requests: int = None,
+                 spill_dir: Path = None) -> None:
+        """
+        :param max_queued_requests: If given, the number of not yet requested nodes we keep in
+        memory. Beyond that, the lowest priority half of the queue is spilled into a temporary
+        file in ``spill_dir`` and only read back once the queue runs empty.
+        """
+        # Nodes that haven't been requested yet, as a heap of QueueItems.
+        self.queue: List[QueueItem] = []
+        self._queue_counter = itertools.count()
+        self._max_queued_requests = max_queued_requests
+        self._spill_dir = spill_dir
+        self._spill: Optional[FrontierSpill] = None
         # Nodes that have been requested to a peer, but not yet committed to the DB, either
         # because we haven't processed a reply containing them or because some of their children
         # haven't been retrieved/committed yet.
@@ -132,6 +331,13 @@ class HexaryTrieSync:
         # ethereum's mainnet/ropsten.
         self.nodes_cache = nodes_cache
         self.committed_nodes = 0
+        # Nodes that have been committed but not yet written to the DB.
+        self._pending_writes: Dict[bytes, bytes] = {}
+        # While a reply is being processed, nodes to schedule are collected here so that we can
+        # check which of them exist in the DB with a single call.
+        self._deferred_schedules: List[ScheduledNode] = None
+        # Replies are processed one at a time as that's what the deferred schedules rely on.
+        self._process_lock: asyncio.Lock = None
         if root_hash in self.db:
             self.logger.info("Root node (%s) already exists in DB, nothing to do", root_hash)
         else:
@@ -146,28 +352,61 @@ class HexaryTrieSync:
 
     @property
     def has_pending_requests(self) -> bool:
-        return len(self.requests) > 0
+        return len(self.requests) > 0 or self.num_spilled > 0
+
+    @property
+    def num_queued(self) -> int:
+        return len(self.queue) + self.num_spilled
+
+    @property
+    def num_spilled(self) -> int:
+        if self._spill is None:
+            return 0
+        return len(self._spill)
 
     def next_batch(self, n: int = 1) -> List[SyncRequest]:
         """Return the next requests that should be dispatched."""
-        if len(self.queue) == 0:
-            return []
-        batch = list(reversed((self.queue[-n:])))
-        self.queue = self.queue[:-n]
+        if len(self.queue) == 0 and self.num_spilled > 0:
+            self._unspill()
+        batch: List[SyncRequest] = []
+        while self.queue and len(batch) < n:
+            _, _, request = heapq.heappop(self.queue)
+            batch.append(request)
         return batch
 
     async def schedule(self, node_key: Hash32, parent: SyncRequest, depth: int,
                        leaf_callback: Callable[[bytes, 'SyncRequest'], Awaitable[None]],
                        is_raw: bool = False) -> None:
-        """Schedule a request for the node with the given key."""
+        """Schedule a request for the node with the given key.
+
+        When called from a leaf callback while a reply is being processed, the DB lookup is
+        deferred and done together with the lookups for all other nodes referenced in that reply.
+        """
         if node_key in self.nodes_cache:
             self.logger.debug2("Node %s already exists in db", encode_hex(node_key))
             return
-        if await self.db.coro_exists(node_key):
-            self.nodes_cache[node_key] = b''
-            self.logger.debug2("Node %s already exists in db", encode_hex(node_key))
-            return
-        self._schedule(node_key, parent, depth, leaf_callback, is_raw)
+        scheduled = (node_key, parent, depth, leaf_callback, is_raw)
+        if self._deferred_schedules is not None:
+            self._deferred_schedules.append(scheduled)
+        else:
+            await self._schedule_many([scheduled])
+
+    async def _schedule_many(self, scheduled: List[ScheduledNode]) -> None:
+        """Schedule requests for all given nodes that don't exist in the DB yet."""
+        candidates = tuple(set(
+            node_key for node_key, *_ in scheduled if node_key not in self.nodes_cache))
+        if candidates:
+            exists = await self.db.coro_exists_many(candidates)
+        else:
+            exists = ()
+        for node_key, is_present in zip(candidates, exists):
+            if is_present:
+                self.nodes_cache[node_key] = b''
+                self.logger.debug2("Node %s already exists in db", encode_hex(node_key))
+
+        for node_key, parent, depth, leaf_callback, is_raw in scheduled:
+            if node_key not in self.nodes_cache:
+                self._schedule(node_key, parent, depth, leaf_callback, is_raw)
 
     def _schedule(self, node_key: Hash32, parent: SyncRequest, depth: int,
                   leaf_callback: Callable[[bytes, 'SyncRequest'], Awaitable[None]],
@@ -186,45 +425,155 @@ class HexaryTrieSync:
         # Requests get added to both self.queue and self.requests; the former is used to keep
         # track which requests should be sent next, and the latter is used to avoid scheduling a
         # request for a given node multiple times.
-        self.logger.debug2("Scheduling retrieval of %s", encode_hex(request.node_key))
+        self.logger.debug2("Scheduling retrieval of %s", request)
         self.requests[request.node_key] = request
-        bisect.insort(self.queue, request)
-
-    async def process(self, results: List[Tuple[Hash32, bytes]]) -> None:
-        """Process request results.
-
-        :param results: A list of two-tuples containing the node's key and data.
+        self._enqueue(request)
+
+    def _enqueue(self, request: SyncRequest) -> None:
+        heapq.heappush(self.queue, (-request.depth, -next(self._queue_counter), request))
+        if self._max_queued_requests is not None and len(self.queue) > self._max_queued_requests:
+            self._spill_lowest_priority()
+
+    def _spill_lowest_priority(self) -> None:
+        ordered = sorted(self.queue)
+        keep = max(1, self._max_queued_requests // 2)
+        in_memory, to_spill = ordered[:keep], ordered[keep:]
+        records: List[SpilledRequest] = []
+        for item in to_spill:
+            request = item[2]
+            if request.leaf_callback not in (None, self.leaf_callback):
+                # We have no way to serialize arbitrary callbacks, so keep this one around
+                in_memory.append(item)
+                continue
+            records.append((
+                request.node_key,
+                request.depth,
+                request.is_raw,
+                request.leaf_callback is not None,
+                [parent.node_key for parent in request.parents if parent is not None],
+            ))
+            # Parents can't be committed while this request is pending, so they stay in
+            # self.requests and we can find them again when the request is read back.
+            del self.requests[request.node_key]
+
+        if not records:
+            return
+        if self._spill is None:
+            self._spill = FrontierSpill(self._spill_dir)
+        self._spill.push_chunk(records)
+        # A sorted list is a valid heap
+        self.queue = in_memory
+        self.logger.debug("Spilled %d queued trie node requests to disk", len(records))
+
+    def _unspill(self) -> None:
+        for node_key, depth, is_raw, has_leaf_callback, parent_keys in self._spill.pop_chunk():
+            parents = [self.requests[parent_key] for parent_key in parent_keys]
+            existing = self.requests.get(node_key)
+            if existing is not None:
+                # Scheduled again while it was on disk. The parents have already been counted as
+                # dependencies, so we only need to link them.
+                existing.parents.extend(parents)
+                continue
+            # If the node got committed through another request while it was on disk we fetch
+            # it once more, as that's what eventually releases these parents.
+            leaf_callback = self.leaf_callback if has_leaf_callback else None
+            request = SyncRequest(node_key, None, depth, leaf_callback, is_raw)
+            request.parents = parents
+            self.requests[node_key] = request
+            heapq.heappush(self.queue, (-depth, -next(self._queue_counter), request))
+
+    def get_nodes_to_decode(self,
+                            results: Sequence[Tuple[Hash32, bytes]]
+                            ) -> List[Tuple[Hash32, bytes, int]]:
+        """Return the (key, data, depth) triples of the given results that process() would need
+        to decode, for use with decode_trie_nodes().
         """
+        nodes = []
         for node_key, data in results:
             request = self.requests.get(node_key)
-            if request is None:
-                # This may happen if we resend a request for a node after waiting too long,
-                # and then eventually get two responses with it.
-                self.logger.debug2(
-                    "No SyncRequest found for %s, maybe we got more than one response for it",
-                    encode_hex(node_key))
-                return
-
-            if request.data is not None:
-                raise SyncRequestAlreadyProcessed("%s has been processed already" % request)
-
-            request.data = data
-            if request.is_raw:
-                await self.commit(request)
+            if request is None or request.data is not None or request.is_raw:
                 continue
+            nodes.append((node_key, data, request.depth))
+        return nodes
 
-            node = decode_node(request.data)
-            references, leaves = _get_children(node, request.depth)
-
-            for depth, ref in references:
-                await self.schedule(ref, request, depth, request.leaf_callback)
+    async def process(self,
+                      results: List[Tuple[Hash32, bytes]],
+                      decoded: Iterable[DecodedNode] = None) -> None:
+        """Process request results.
 
-            if request.leaf_callback is not None:
-                for leaf in leaves:
-                    await request.leaf_callback(leaf, request)
+        All nodes referenced by the given results are looked up in the DB with a single call, and
+        all nodes that can be committed as a result are written in a single atomic batch.
 
-            if request.dependencies == 0:
-                await self.commit(request)
+        :param results: A list of two-tuples containing the node's key and data.
+        :param decoded: Optionally, the results of running decode_trie_nodes() on (some of) the
+        results, so that we don't have to decode those again.
+        """
+        if self._process_lock is None:
+            self._process_lock = asyncio.Lock()
+        async with self._process_lock:
+            await self._process(results, decoded)
+
+    async def _process(self,
+                       results: List[Tuple[Hash32, bytes]],
+                       decoded: Iterable[DecodedNode]) -> None:
+        if decoded is None:
+            children: Dict[Hash32, Tuple[Iterable[Tuple[int, Hash32]], Iterable[bytes]]] = {}
+        else:
+            children = {
+                node_key: (references, leaves) for node_key, _, references, leaves in decoded
+            }
+
+        already_processed = []
+        processed = []
+        self._deferred_schedules = []
+        try:
+            for node_key, data in results:
+                request = self.requests.get(node_key)
+                if request is None:
+                    # This may happen if we resend a request for a node after waiting too long,
+                    # and then eventually get two responses with it.
+                    self.logger.debug2(
+                        "No SyncRequest found for %s, maybe we got more than one response for it",
+                        encode_hex(node_key))
+                    continue
+
+                if request.data is not None:
+                    already_processed.append(request)
+                    continue
+
+                request.data = data
+                processed.append(request)
+                if request.is_raw:
+                    continue
+
+                if node_key in children:
+                    references, leaves = children[node_key]
+                else:
+                    node = decode_node(request.data)
+                    references, leaves = _get_children(node, request.depth)
+
+                for depth, ref in references:
+                    await self.schedule(ref, request, depth, request.leaf_callback)
+
+                if request.leaf_callback is not None:
+                    for leaf in leaves:
+                        await request.leaf_callback(leaf, request)
+
+            scheduled, self._deferred_schedules = self._deferred_schedules, None
+            await self._schedule_many(scheduled)
+        finally:
+            self._deferred_schedules = None
+
+        for request in processed:
+            # A node from this reply may be referenced by another one that comes after it, in
+            # which case the latter got committed together with the former already.
+            if request.dependencies == 0 and request.node_key in self.requests:
+                self._commit(request)
+        await self._flush_commits()
+
+        if already_processed:
+            raise SyncRequestAlreadyProcessed(
+                "%s have been processed already" % ", ".join(map(str, already_processed)))
 
     async def commit(self, request: SyncRequest) -> None:
         """Commit the given request's data to the database.
@@ -232,11 +581,127 @@ class HexaryTrieSync:
         The request's data attribute must be set (done by the process() method) before this can be
         called.
         """
-        self.committed_nodes += 1
-        await self.db.coro_set(request.node_key, request.data)
-        self.nodes_cache[request.node_key] = b''
-        self.requests.pop(request.node_key)
-        for ancestor in request.parents:
-            ancestor.dependencies -= 1
-            if ancestor.dependencies == 0:
-                await self.commit(ancestor)
+        self._commit(request)
+        await self._flush_commits()
+
+    def _commit(self, request: SyncRequest) -> None:
+        # Ancestors are released as soon as their last child is committed, and they all get
+        # written to the DB together on the next _flush_commits().
+        pending = [request]
+        while pending:
+            request = pending.pop()
+            self.committed_nodes += 1
+            if request.data is not None:
+                self._pending_writes[request.node_key] = request.data
+            self.requests.pop(request.node_key)
+            for ancestor in request.parents:
+                ancestor.dependencies -= 1
+                if ancestor.dependencies == 0:
+                    pending.append(ancestor)
+
+    async def _flush_commits(self) -> None:
+        if not self._pending_writes:
+            return
+        writes, self._pending_writes = self._pending_writes, {}
+        await self.db.coro_set_many(writes)
+        # Only once they've been written, as the nodes cache may outlive us when it's persistent.
+        for node_key in writes:
+            self.nodes_cache[node_key] = b''
+
+    async def save_progress(self, path: Path) -> int:
+        """Write a snapshot of all pending requests to the given file.
+
+        Together with a persistent ``nodes_cache`` this allows :meth:`load_progress` to resume the
+        sync from where we are now instead of from the root. Requests with a leaf callback other
+        than our own are saved as if they used ours.
+
+        :return: The number of requests saved.
+        """
+        if self._process_lock is None:
+            self._process_lock = asyncio.Lock()
+        # Wait for the reply being processed, if any, so that we don't catch its requests halfway.
+        async with self._process_lock:
+            records: Dict[Hash32, SnapshotRecord] = {
+                request.node_key: (
+                    request.node_key,
+                    request.depth,
+                    request.is_raw,
+                    request.leaf_callback is not None,
+                    [parent.node_key for parent in request.parents if parent is not None],
+                    request.data,
+                )
+                for request in self.requests.values()
+            }
+            if self._spill is not None:
+                for node_key, depth, is_raw, has_callback, parent_keys in self._spill.peek_all():
+                    if node_key in records:
+                        # Scheduled again while it was on disk, so like _unspill() does we only
+                        # need to add the parents it had back then.
+                        records[node_key][4].extend(parent_keys)
+                    else:
+                        records[node_key] = (
+                            node_key, depth, is_raw, has_callback, parent_keys, None)
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None, _write_frontier_snapshot, path, self.root_hash, tuple(records.values()))
+        return len(records)
+
+    async def load_progress(self, path: Path) -> bool:
+        """Replace all pending requests with the ones saved by :meth:`save_progress`.
+
+        Must be called before any requests are handed out. Requests that haven't been received
+        yet but are found in the ``nodes_cache`` were committed after the snapshot was taken, so
+        they're committed again straight away rather than requested.
+
+        :return: False if there's no usable snapshot in the given file, in which case we carry on
+        from the root.
+        """
+        if not self.requests or not path.exists():
+            return False
+        loop = asyncio.get_event_loop()
+        snapshot = await loop.run_in_executor(None, _read_frontier_snapshot, path)
+        if snapshot is None or snapshot[0] != self.root_hash:
+            self.logger.info("Ignoring state sync progress saved for another state root")
+            return False
+
+        requests: Dict[Hash32, SyncRequest] = {}
+        parent_keys_by_request: List[Tuple[SyncRequest, List[Hash32]]] = []
+        for node_key, depth, is_raw, has_callback, parent_keys, data in snapshot[1]:
+            # Merge any duplicate records the way _unspill() does, so that every parent is
+            # released once all the requests it was counted for are committed.
+            request = requests.get(node_key)
+            if request is None:
+                leaf_callback = self.leaf_callback if has_callback else None
+                request = SyncRequest(node_key, None, depth, leaf_callback, is_raw)
+                requests[node_key] = request
+            if data is not None:
+                request.data = data
+            parent_keys_by_request.append((request, parent_keys))
+
+        for request, parent_keys in parent_keys_by_request:
+            parents = [requests[parent_key] for parent_key in parent_keys]
+            request.parents.extend(parents)
+            for parent in parents:
+                parent.dependencies += 1
+
+        self.queue = []
+        self._spill = None
+        self.requests = requests
+        present = []
+        for request in tuple(requests.values()):
+            if request.data is not None:
+                continue
+            elif request.node_key in self.nodes_cache:
+                present.append(request)
+            else:
+                self._enqueue(request)
+        for request in present:
+            self._commit(request)
+        await self._flush_commits()
+        self.logger.info(
+            "Resumed trie sync with %d pending requests, %d of which were already in the DB",
+            len(requests),
+            len(present),
+        )
+        return True
@@ -1,4 +1,5 @@
 import logging
+from pathlib import Path
 import time
 
 from cancel_token import CancelToken
@@ -15,6 +16,7 @@ from trinity.protocol.eth.peer import ETHPeerPool
 
 from .chain import FastChainSyncer, RegularChainSyncer
 from .constants import FAST_SYNC_CUTOFF
+from .snap import SnapStateDownloader
 from .state import StateDownloader
 
 
@@ -24,12 +26,40 @@ async def ensure_state_then_sync_full(logger: logging.Logger,
                                       chaindb: BaseAsyncChainDB,
                                       chain: BaseAsyncChain,
                                       peer_pool: ETHPeerPool,
-                                      cancel_token: CancelToken) -> None:
+                                      cancel_token: CancelToken,
+                                      state_decode_workers: int = 0,
+                                      state_sync_dir: Path = None,
+                                      snap_state_sync: bool = False,
+                                      sender_recovery_workers: int = 0) -> None:
     # Ensure we have the state for our current head.
     if head.state_root != BLANK_ROOT_HASH and head.state_root not in base_db:
         logger.info(
             "Missing state for current head %s, downloading it", head)
-        downloader = StateDownloader(chaindb, base_db, head.state_root, peer_pool, cancel_token)
+        downloader: BaseService
+        if snap_state_sync and StateDownloader.has_saved_progress(state_sync_dir):
+            # Ranges can't resume from the requests saved by a node by node sync, so we'd start
+            # over from the root if we switched now.
+            logger.info("Resuming the node by node state sync saved in %s", state_sync_dir)
+            snap_state_sync = False
+        if snap_state_sync:
+            downloader = SnapStateDownloader(
+                chaindb,
+                base_db,
+                head.state_root,
+                peer_pool,
+                cancel_token,
+                decode_workers=state_decode_workers,
+            )
+        else:
+            downloader = StateDownloader(
+                chaindb,
+                base_db,
+                head.state_root,
+                peer_pool,
+                cancel_token,
+                decode_workers=state_decode_workers,
+                progress_dir=state_sync_dir,
+            )
         await downloader.run()
         # remove the reference so the memory can be reclaimed
         del downloader
@@ -40,7 +70,7 @@ async def ensure_state_then_sync_full(logger: logging.Logger,
     # Now, loop forever, fetching missing blocks and applying them.
     logger.info("Starting regular sync; current head: %s", head)
     regular_syncer = RegularChainSyncer(
-        chain, chaindb, peer_pool, cancel_token)
+        chain, chaindb, peer_pool, cancel_token, sender_recovery_workers=sender_recovery_workers)
     await regular_syncer.run()
 
 
@@ -51,12 +81,18 @@ class FullChainSyncer(BaseService):
                  chaindb: BaseAsyncChainDB,
                  base_db: BaseAsyncDB,
                  peer_pool: ETHPeerPool,
-                 token: CancelToken = None) -> None:
+                 token: CancelToken = None,
+                 state_decode_workers: int = 0,
+                 state_sync_dir: Path = None,
+                 sender_recovery_workers: int = 0) -> None:
         super().__init__(token)
         self.chain = chain
         self.chaindb = chaindb
         self.base_db = base_db
         self.peer_pool = peer_pool
+        self.state_decode_workers = state_decode_workers
+        self.state_sync_dir = state_sync_dir
+        self.sender_recovery_workers = sender_recovery_workers
 
     async def _run(self) -> None:
         head = await self.wait(self.chaindb.coro_get_canonical_head())
@@ -71,7 +107,10 @@ class FullChainSyncer(BaseService):
             self.chaindb,
             self.chain,
             self.peer_pool,
-            self.cancel_token
+            self.cancel_token,
+            state_decode_workers=self.state_decode_workers,
+            state_sync_dir=self.state_sync_dir,
+            sender_recovery_workers=self.sender_recovery_workers,
         )
 
 
@@ -82,12 +121,25 @@ class FastThenFullChainSyncer(BaseService):
                  chaindb: BaseAsyncChainDB,
                  base_db: BaseAsyncDB,
                  peer_pool: ETHPeerPool,
-                 token: CancelToken = None) -> None:
+                 token: CancelToken = None,
+                 state_decode_workers: int = 0,
+                 state_sync_dir: Path = None,
+                 snap_state_sync: bool = False,
+                 sender_recovery_workers: int = 0) -> None:
+        """
+        :param snap_state_sync: If True, the state is downloaded in ranges of leaves from
+        Trinity peers (see :class:`~trinity.sync.full.snap.SnapStateDownloader`) instead of node
+        by node.
+        """
         super().__init__(token)
         self.chain = chain
         self.chaindb = chaindb
         self.base_db = base_db
         self.peer_pool = peer_pool
+        self.state_decode_workers = state_decode_workers
+        self.state_sync_dir = state_sync_dir
+        self.sender_recovery_workers = sender_recovery_workers
+        self.snap_state_sync = snap_state_sync
 
     async def _run(self) -> None:
         head = await self.wait(self.chaindb.coro_get_canonical_head())
@@ -129,7 +181,11 @@ class FastThenFullChainSyncer(BaseService):
             self.chaindb,
             self.chain,
             self.peer_pool,
-            self.cancel_token
+            self.cancel_token,
+            state_decode_workers=self.state_decode_workers,
+            state_sync_dir=self.state_sync_dir,
+            snap_state_sync=self.snap_state_sync,
+            sender_recovery_workers=self.sender_recovery_workers,
         )
 
 
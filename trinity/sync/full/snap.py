@@ -0,0 +1,399 @@
+import asyncio
+import collections
+from typing import (
+    cast,
+    Deque,
+    Dict,
+    FrozenSet,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+import rlp
+
+from eth_utils import (
+    ValidationError,
+    encode_hex,
+)
+
+from eth_typing import (
+    Hash32
+)
+
+from cancel_token import CancelToken
+
+from eth.constants import (
+    BLANK_ROOT_HASH,
+    EMPTY_SHA3,
+)
+from eth.rlp.accounts import Account
+
+from p2p.exceptions import (
+    NoIdlePeers,
+    PeerConnectionLost,
+)
+from p2p.peer import BasePeer, PeerSubscriber
+from p2p.protocol import (
+    Command,
+)
+from p2p.service import BaseService
+from p2p._utils import ensure_global_asyncio_executor
+
+from trinity.db.base import BaseAsyncDB
+from trinity.db.eth1.chain import BaseAsyncChainDB
+from trinity.exceptions import AlreadyWaiting
+from trinity.protocol.eth.commands import GetTrieRange
+from trinity.protocol.eth.peer import ETHPeer, ETHPeerPool
+from trinity.protocol.eth import (
+    constants as eth_constants,
+)
+from trinity.protocol.eth.trie_ranges import (
+    Nibbles,
+    TrieRangeBundle,
+)
+from trinity._utils.timer import Timer
+
+
+def get_account_dependencies(leaves: Sequence[Tuple[Hash32, bytes]]
+                             ) -> Tuple[Tuple[Hash32, ...], Tuple[Hash32, ...]]:
+    """Return the storage roots and code hashes of the accounts in the given state trie leaves.
+
+    Exposed as a module level function so that it can be run in a process pool.
+    """
+    storage_roots = []
+    code_hashes = []
+    for _, value in leaves:
+        account = rlp.decode(value, sedes=Account)
+        if account.storage_root != BLANK_ROOT_HASH:
+            storage_roots.append(account.storage_root)
+        if account.code_hash != EMPTY_SHA3:
+            code_hashes.append(account.code_hash)
+    return tuple(storage_roots), tuple(code_hashes)
+
+
+class _RangeWrites:
+    """
+    The nodes of a range of the state trie, which can only be written once the storage tries
+    and code of all accounts in the range are.
+    """
+
+    def __init__(self, trie: '_TrieSync', nodes: Dict[bytes, bytes]) -> None:
+        self.trie = trie
+        self.nodes = nodes
+        self.dependencies = 0
+
+
+class _TrieSync:
+    """
+    A trie being downloaded, range by range.
+
+    Nodes below the ranges are written as soon as they (and everything they depend on) are
+    complete, but the nodes above them, which we get as proofs, are only written once the whole
+    trie is. That way having a node in the database still means we have its whole subtree, like
+    with :class:`~trinity.sync.full.state.StateDownloader`, and a sync can always be resumed or
+    finished by either of them.
+    """
+
+    def __init__(self, root_hash: Hash32, is_state_trie: bool) -> None:
+        self.root_hash = root_hash
+        self.is_state_trie = is_state_trie
+        # Ranges we're yet to receive plus ranges waiting for their dependencies to be written
+        self.pending = 0
+        self.proof: Dict[bytes, bytes] = {}
+        # State trie ranges with accounts using this (storage) trie
+        self.waiters: List[_RangeWrites] = []
+
+
+class SnapStateDownloader(BaseService, PeerSubscriber):
+    """
+    Download the state for a given root hash by requesting ranges of trie leaves, and the proof
+    for them, instead of individual trie nodes.
+
+    Only peers that speak the ``ethrange`` protocol, i.e. Trinity nodes, can serve trie ranges,
+    so this will wait until we're connected to one of them.
+    """
+    _total_leaves = 0
+    _total_ranges = 0
+    _total_timeouts = 0
+    _report_interval = 10  # Number of seconds between progress reports.
+    _reply_timeout = 20  # seconds
+    # Max number of seconds to wait for a request to complete before checking for new peers
+    _idle_peers_check_interval = 1
+    _timer = Timer(auto_start=False)
+
+    def __init__(self,
+                 chaindb: BaseAsyncChainDB,
+                 account_db: BaseAsyncDB,
+                 root_hash: Hash32,
+                 peer_pool: ETHPeerPool,
+                 token: CancelToken = None,
+                 decode_workers: int = 0) -> None:
+        """
+        :param decode_workers: If greater than zero, the accounts in the ranges we receive are
+        decoded in the global process pool, using up to that many of its workers, instead of on
+        the event loop.
+        """
+        super().__init__(token)
+        self.chaindb = chaindb
+        self.account_db = account_db
+        self.root_hash = root_hash
+        self.peer_pool = peer_pool
+        self._tries: Dict[Hash32, _TrieSync] = {}
+        self._pending_ranges: Deque[Tuple[_TrieSync, Nibbles]] = collections.deque()
+        self._code_waiters: Dict[Hash32, List[_RangeWrites]] = {}
+        self._pending_code: Deque[Hash32] = collections.deque()
+        self._busy_peers: Set[ETHPeer] = set()
+        # Set whenever a request completes, as a peer becomes idle and we may have more to ask.
+        self._request_completed = asyncio.Event()
+        self._is_complete = False
+        if decode_workers > 0:
+            self._decode_slots: asyncio.Semaphore = asyncio.Semaphore(decode_workers)
+        else:
+            self._decode_slots = None
+
+    # We are only interested in peers entering or leaving the pool
+    subscription_msg_types: FrozenSet[Type[Command]] = frozenset()
+
+    msg_queue_maxsize: int = 2000
+
+    def deregister_peer(self, peer: BasePeer) -> None:
+        self._busy_peers.discard(cast(ETHPeer, peer))
+
+    async def get_idle_peer(self) -> ETHPeer:
+        """Return an idle peer that can serve trie ranges.
+
+        Raise NoIdlePeers if there are none.
+        """
+        async for peer in self.peer_pool:
+            peer = cast(ETHPeer, peer)
+            if not peer.sub_proto.supports_command(GetTrieRange):
+                continue
+            elif peer in self._busy_peers:
+                continue
+            return peer
+        raise NoIdlePeers()
+
+    async def _run(self) -> None:
+        """Fetch the whole state trie for self.root_hash, and store it in self.account_db.
+
+        Raises OperationCancelled if we're interrupted before that is completed.
+        """
+        self._timer.start()
+        self.logger.info("Starting snap state sync for root hash %s", encode_hex(self.root_hash))
+        self.run_task(self._periodically_report_progress())
+        with self.subscribe(self.peer_pool):
+            await self._add_tries([self.root_hash], None, is_state_trie=True)
+            while not self._is_complete:
+                self._request_completed.clear()
+                peer: ETHPeer = None
+                if self._pending_ranges or self._pending_code:
+                    try:
+                        peer = await self.wait(self.get_idle_peer())
+                    except NoIdlePeers:
+                        self.logger.debug2("No idle peers can serve trie ranges, waiting")
+
+                if peer is None:
+                    try:
+                        await self.wait(
+                            self._request_completed.wait(),
+                            timeout=self._idle_peers_check_interval,
+                        )
+                    except TimeoutError:
+                        pass
+                    continue
+
+                self._busy_peers.add(peer)
+                if self._pending_code:
+                    code_hashes = tuple(
+                        self._pending_code.popleft()
+                        for _ in range(min(len(self._pending_code), eth_constants.MAX_STATE_FETCH))
+                    )
+                    self.run_task(self._request_code(peer, code_hashes))
+                else:
+                    trie, prefix = self._pending_ranges.popleft()
+                    self.run_task(self._request_range(peer, trie, prefix))
+
+        self.logger.info("Finished snap state sync with root hash %s", encode_hex(self.root_hash))
+
+    async def _request_range(self, peer: ETHPeer, trie: _TrieSync, prefix: Nibbles) -> None:
+        try:
+            bundle = await peer.requests.get_trie_range(
+                trie.root_hash,
+                prefix,
+                eth_constants.MAX_TRIE_RANGE_LEAVES,
+                timeout=self._reply_timeout,
+            )
+        except (TimeoutError, PeerConnectionLost, AlreadyWaiting, ValidationError) as err:
+            # Invalid replies are discarded by the exchange, so they end up as timeouts too.
+            self.logger.debug(
+                "Failed to get trie range %s of %s from %s: %r",
+                prefix,
+                encode_hex(trie.root_hash),
+                peer,
+                err,
+            )
+            self._total_timeouts += 1
+            self._pending_ranges.append((trie, prefix))
+            return
+        finally:
+            self._busy_peers.discard(peer)
+            self._request_completed.set()
+
+        self.logger.debug2(
+            "Got %d leaves and %d missing prefixes for trie range %s of %s from %s",
+            len(bundle.leaves),
+            len(bundle.missing_prefixes),
+            prefix,
+            encode_hex(trie.root_hash),
+            peer,
+        )
+        await self._process_range(trie, bundle)
+        self._request_completed.set()
+
+    async def _process_range(self, trie: _TrieSync, bundle: TrieRangeBundle) -> None:
+        self._total_ranges += 1
+        self._total_leaves += len(bundle.leaves)
+        trie.proof.update(bundle.proof)
+        for missing_prefix in bundle.missing_prefixes:
+            trie.pending += 1
+            self._pending_ranges.append((trie, missing_prefix))
+
+        if not trie.is_state_trie:
+            # Storage tries have no dependencies, so their nodes can go straight to the database
+            await self.account_db.coro_set_many(dict(bundle.nodes))
+            await self._complete_range(trie)
+            return
+
+        writes = _RangeWrites(trie, dict(bundle.nodes))
+        if self._decode_slots is None:
+            storage_roots, code_hashes = get_account_dependencies(bundle.leaves)
+        else:
+            async with self._decode_slots:
+                dependencies = await self._run_in_executor(
+                    # We just retrieve the global executor that was created when the Node
+                    # launches. The node manages the lifecycle of the executor.
+                    ensure_global_asyncio_executor(),
+                    get_account_dependencies,
+                    bundle.leaves,
+                )
+            if dependencies is None:
+                # The pool died, in which case we've been cancelled
+                return
+            storage_roots, code_hashes = dependencies
+        # Hold the range back until we've gone through all its accounts, otherwise it could be
+        # released by a storage trie we already have before the others are added.
+        writes.dependencies = 1
+        await self._add_tries(list(storage_roots), writes, is_state_trie=False)
+        await self._add_code(list(code_hashes), writes)
+        await self._release(writes)
+
+    async def _add_tries(self,
+                         root_hashes: List[Hash32],
+                         waiter: _RangeWrites,
+                         is_state_trie: bool) -> None:
+        new_tries = []
+        for root_hash in root_hashes:
+            if root_hash in self._tries:
+                trie = self._tries[root_hash]
+            else:
+                trie = _TrieSync(root_hash, is_state_trie)
+                trie.pending = 1
+                self._tries[root_hash] = trie
+                new_tries.append(trie)
+            if waiter is not None:
+                waiter.dependencies += 1
+                trie.waiters.append(waiter)
+
+        # Only tries we have in full have their root in the database
+        exists = await self.account_db.coro_exists_many([trie.root_hash for trie in new_tries])
+        for trie, is_present in zip(new_tries, exists):
+            if is_present:
+                trie.pending = 0
+                await self._complete_trie(trie)
+            else:
+                self._pending_ranges.append((trie, ()))
+
+    async def _add_code(self, code_hashes: List[Hash32], waiter: _RangeWrites) -> None:
+        new_code_hashes = []
+        for code_hash in code_hashes:
+            if code_hash not in self._code_waiters:
+                self._code_waiters[code_hash] = []
+                new_code_hashes.append(code_hash)
+            waiter.dependencies += 1
+            self._code_waiters[code_hash].append(waiter)
+
+        exists = await self.account_db.coro_exists_many(new_code_hashes)
+        for code_hash, is_present in zip(new_code_hashes, exists):
+            if is_present:
+                await self._complete_code(code_hash)
+            else:
+                self._pending_code.append(code_hash)
+
+    async def _request_code(self, peer: ETHPeer, code_hashes: Tuple[Hash32, ...]) -> None:
+        try:
+            node_data = await peer.requests.get_node_data(code_hashes, timeout=self._reply_timeout)
+        except (TimeoutError, PeerConnectionLost, AlreadyWaiting, ValidationError) as err:
+            self.logger.debug(
+                "Failed to get %d contract codes from %s: %r", len(code_hashes), peer, err)
+            self._total_timeouts += 1
+            node_data = ()
+        finally:
+            self._busy_peers.discard(peer)
+            self._request_completed.set()
+
+        if node_data:
+            await self.account_db.coro_set_many(dict(node_data))
+        received = set(code_hash for code_hash, _ in node_data)
+        missing = [code_hash for code_hash in code_hashes if code_hash not in received]
+        if missing:
+            self.logger.debug(
+                "Re-requesting %d/%d contract codes not returned by %s",
+                len(missing),
+                len(code_hashes),
+                peer,
+            )
+            self._pending_code.extend(missing)
+        for code_hash in received:
+            await self._complete_code(code_hash)
+        self._request_completed.set()
+
+    async def _complete_code(self, code_hash: Hash32) -> None:
+        for waiter in self._code_waiters.pop(code_hash):
+            await self._release(waiter)
+
+    async def _release(self, writes: _RangeWrites) -> None:
+        writes.dependencies -= 1
+        if writes.dependencies == 0:
+            await self.account_db.coro_set_many(writes.nodes)
+            await self._complete_range(writes.trie)
+
+    async def _complete_range(self, trie: _TrieSync) -> None:
+        trie.pending -= 1
+        if trie.pending == 0:
+            await self._complete_trie(trie)
+
+    async def _complete_trie(self, trie: _TrieSync) -> None:
+        # The root is always among the proof nodes, unless the trie was already in the database
+        await self.account_db.coro_set_many(trie.proof)
+        del self._tries[trie.root_hash]
+        if trie.root_hash == self.root_hash and trie.is_state_trie:
+            self._is_complete = True
+        for waiter in trie.waiters:
+            await self._release(waiter)
+
+    async def _periodically_report_progress(self) -> None:
+        while self.is_operational:
+            now = self._timer.elapsed
+            msg = "ranges=%d  " % self._total_ranges
+            msg += "leaves=%d  " % self._total_leaves
+            msg += "lps=%d  " % (self._total_leaves / max(now, 1e-3))
+            msg += "tries=%d  " % len(self._tries)
+            msg += "queued_ranges=%d  " % len(self._pending_ranges)
+            msg += "queued_code=%d  " % len(self._pending_code)
+            msg += "active_requests=%d  " % len(self._busy_peers)
+            msg += "timeouts=%d" % self._total_timeouts
+            self.logger.info("Snap-State-Sync: %s", msg)
+            await self.sleep(self._report_interval)
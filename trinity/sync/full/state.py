@@ -1,8 +1,11 @@
 import asyncio
 import collections
+from concurrent.futures import Executor
 import itertools
 import logging
+import os
 from pathlib import Path
+import shutil
 import tempfile
 import time
 from typing import (
@@ -10,6 +13,7 @@ from typing import (
     Dict,
     Iterable,
     List,
+    Sequence,
     Set,
     FrozenSet,
     Tuple,
@@ -48,6 +52,7 @@ from p2p.exceptions import (
     NoIdlePeers,
 )
 from p2p.peer import BasePeer, PeerSubscriber
+from p2p._utils import ensure_global_asyncio_executor
 
 from trinity.db.base import BaseAsyncDB
 from trinity.db.eth1.chain import BaseAsyncChainDB
@@ -60,8 +65,10 @@ from trinity.protocol.eth import (
     constants as eth_constants,
 )
 from trinity.sync.full.hexary_trie import (
+    DecodedNode,
     HexaryTrieSync,
     SyncRequest,
+    decode_trie_nodes,
 )
 from trinity._utils.os import get_open_fd_limit
 from trinity._utils.timer import Timer
@@ -73,20 +80,46 @@ class StateDownloader(BaseService, PeerSubscriber):
     _reply_timeout = 20  # seconds
     _timer = Timer(auto_start=False)
     _total_timeouts = 0
+    # Number of not yet requested trie nodes we keep in memory, the rest is spilled to disk.
+    _max_queued_requests = 1000000
+    # Number of seconds between snapshots of our progress, when we have somewhere to save them.
+    _progress_save_interval = 300
+    _progress_loaded = False
 
     def __init__(self,
                  chaindb: BaseAsyncChainDB,
                  account_db: BaseAsyncDB,
                  root_hash: Hash32,
                  peer_pool: ETHPeerPool,
-                 token: CancelToken = None) -> None:
+                 token: CancelToken = None,
+                 decode_workers: int = 0,
+                 progress_dir: Path = None) -> None:
+        """
+        :param decode_workers: If greater than zero, the trie nodes we receive are decoded in
+        the global process pool, split across up to that many of its workers, instead of on the
+        event loop. The pool always leaves one CPU to the event loop, so we may use less workers
+        than requested.
+        :param progress_dir: If given, the nodes cache is kept in this directory and our pending
+        requests are periodically saved to it, so that an interrupted sync can be resumed from
+        where it left off. Both are removed once the sync completes.
+        """
         super().__init__(token)
         self.chaindb = chaindb
         self.peer_pool = peer_pool
         self.root_hash = root_hash
         # We use a LevelDB instance for the nodes cache because a full state download, if run
         # uninterrupted will visit more than 180M nodes, making an in-memory cache unfeasible.
-        self._nodes_cache_dir = tempfile.TemporaryDirectory(prefix="pyevm-state-sync-cache")
+        # Every node in there has been committed together with its whole subtree, so it stays
+        # valid across restarts and for any state root.
+        if progress_dir is None:
+            self._nodes_cache_dir = tempfile.TemporaryDirectory(prefix="pyevm-state-sync-cache")
+            self._progress_dir: Path = None
+            nodes_cache_path = Path(self._nodes_cache_dir.name)
+        else:
+            self._nodes_cache_dir = None
+            self._progress_dir = progress_dir
+            nodes_cache_path = progress_dir / 'nodes-cache'
+            nodes_cache_path.mkdir(parents=True, exist_ok=True)
 
         # Allow the LevelDB instance to consume half of the entire file descriptor limit that
         # the OS permits. Let the other half be reserved for other db access, networking etc.
@@ -95,10 +128,20 @@ class StateDownloader(BaseService, PeerSubscriber):
         self.scheduler = StateSync(
             root_hash,
             account_db,
-            LevelDB(Path(self._nodes_cache_dir.name), max_open_files),
-            self.logger
+            LevelDB(nodes_cache_path, max_open_files),
+            self.logger,
+            max_queued_requests=self._max_queued_requests,
+            spill_dir=nodes_cache_path,
         )
         self.request_tracker = TrieNodeRequestTracker(self._reply_timeout, self.logger)
+        if decode_workers > 0:
+            self._decode_workers = min(decode_workers, max(1, (os.cpu_count() or 1) - 1))
+            # We just retrieve the global executor that was created when the Node launches. The
+            # node manages the lifecycle of the executor.
+            self._decode_executor: Executor = ensure_global_asyncio_executor()
+        else:
+            self._decode_workers = 0
+            self._decode_executor = None
         self._peer_missing_nodes: Dict[ETHPeer, Set[Hash32]] = collections.defaultdict(set)
 
     # We are only interested in peers entering or leaving the pool
@@ -138,18 +181,65 @@ class StateDownloader(BaseService, PeerSubscriber):
         else:
             raise NoIdlePeers()
 
-    async def _process_nodes(self, nodes: Iterable[Tuple[Hash32, bytes]]) -> None:
-        for node_key, node in nodes:
-            self._total_processed_nodes += 1
-            try:
-                await self.scheduler.process([(node_key, node)])
-            except SyncRequestAlreadyProcessed:
-                # This means we received a node more than once, which can happen when we
-                # retry after a timeout.
-                pass
+    async def _process_nodes(self, nodes: Sequence[Tuple[Hash32, bytes]]) -> None:
+        self._total_processed_nodes += len(nodes)
+        if self._decode_executor is None:
+            decoded: Iterable[DecodedNode] = None
+        else:
+            decoded = await self._decode_off_loop(self.scheduler.get_nodes_to_decode(nodes))
+        try:
+            await self.scheduler.process(list(nodes), decoded)
+        except SyncRequestAlreadyProcessed:
+            # This means we received a node more than once, which can happen when we
+            # retry after a timeout.
+            pass
+
+    async def _decode_off_loop(self,
+                               nodes: Sequence[Tuple[Hash32, bytes, int]]
+                               ) -> Iterable[DecodedNode]:
+        """Decode the given nodes in the process pool, split evenly across our workers."""
+        if not nodes:
+            return ()
+        chunk_size = -(-len(nodes) // self._decode_workers)
+        results = await asyncio.gather(*(
+            self._run_in_executor(
+                self._decode_executor, decode_trie_nodes, nodes[i:i + chunk_size])
+            for i in range(0, len(nodes), chunk_size)
+        ))
+        # _run_in_executor() returns None if the pool died, in which case we've been cancelled
+        # and the scheduler will decode on the event loop whatever else it gets.
+        return tuple(itertools.chain.from_iterable(
+            decoded for decoded in results if decoded is not None
+        ))
+
+    @staticmethod
+    def has_saved_progress(progress_dir: Path) -> bool:
+        """Return True if an interrupted sync saved its pending requests in ``progress_dir``."""
+        return progress_dir is not None and (progress_dir / 'frontier').exists()
+
+    @property
+    def _progress_path(self) -> Path:
+        return self._progress_dir / 'frontier'
+
+    async def _save_progress(self) -> None:
+        timer = Timer()
+        num_saved = await self.scheduler.save_progress(self._progress_path)
+        self.logger.info(
+            "Saved %d pending trie node requests in %.2fs", num_saved, timer.elapsed)
+
+    async def _periodically_save_progress(self) -> None:
+        while self.is_operational:
+            await self.sleep(self._progress_save_interval)
+            await self._save_progress()
 
     async def _cleanup(self) -> None:
-        self._nodes_cache_dir.cleanup()
+        if self._nodes_cache_dir is not None:
+            self._nodes_cache_dir.cleanup()
+        elif self.scheduler.has_pending_requests:
+            if self._progress_loaded:
+                await self._save_progress()
+        else:
+            shutil.rmtree(str(self._progress_dir), ignore_errors=True)
 
     async def request_nodes(self, node_keys: Iterable[Hash32]) -> None:
         not_yet_requested = set(node_keys)
@@ -252,8 +342,17 @@ class StateDownloader(BaseService, PeerSubscriber):
         Raises OperationCancelled if we're interrupted before that is completed.
         """
         self._timer.start()
-        self.logger.info("Starting state sync for root hash %s", encode_hex(self.root_hash))
+        if self._progress_dir is not None and await self.wait(
+                self.scheduler.load_progress(self._progress_path)):
+            self.logger.info(
+                "Resuming state sync for root hash %s", encode_hex(self.root_hash))
+        else:
+            self.logger.info("Starting state sync for root hash %s", encode_hex(self.root_hash))
         self.run_task(self._periodically_report_progress())
+        if self._progress_dir is not None:
+            # Don't overwrite a snapshot we may not have loaded yet
+            self._progress_loaded = True
+            self.run_task(self._periodically_save_progress())
         self.run_task(self._periodically_retry_timedout_and_missing())
         with self.subscribe(self.peer_pool):
             while self.scheduler.has_pending_requests:
@@ -277,18 +376,27 @@ class StateDownloader(BaseService, PeerSubscriber):
         self.logger.info("Finished state sync with root hash %s", encode_hex(self.root_hash))
 
     async def _periodically_report_progress(self) -> None:
+        last_processed = last_committed = 0
+        last_report_at = self._timer.elapsed
         while self.is_operational:
             requested_nodes = sum(
                 len(node_keys) for _, node_keys in self.request_tracker.active_requests.values())
-            msg = "processed=%d  " % self._total_processed_nodes
-            msg += "tnps=%d  " % (self._total_processed_nodes / self._timer.elapsed)
-            msg += "committed=%d  " % self.scheduler.committed_nodes
+            now = self._timer.elapsed
+            interval = max(now - last_report_at, 1e-3)
+            processed = self._total_processed_nodes
+            committed = self.scheduler.committed_nodes
+            msg = "processed=%d  " % processed
+            msg += "tnps=%d  " % (processed / now)
+            msg += "nps=%d  " % ((processed - last_processed) / interval)
+            msg += "committed=%d  " % committed
+            msg += "cnps=%d  " % ((committed - last_committed) / interval)
             msg += "active_requests=%d  " % requested_nodes
-            msg += "queued=%d  " % len(self.scheduler.queue)
+            msg += "queued=%d  " % self.scheduler.num_queued
             msg += "pending=%d  " % len(self.scheduler.requests)
             msg += "missing=%d  " % len(self.request_tracker.missing)
             msg += "timeouts=%d" % self._total_timeouts
             self.logger.info("State-Sync: %s", msg)
+            last_processed, last_committed, last_report_at = processed, committed, now
             await self.sleep(self._report_interval)
 
 